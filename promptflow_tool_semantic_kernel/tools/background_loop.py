@@ -0,0 +1,67 @@
+import asyncio
+import concurrent.futures
+import threading
+from typing import Any, Coroutine, Optional
+
+
+class BackgroundLoop:
+    """
+    Event loop in a daemon thread, for work that outlives a request.
+
+    promptflow runs a flow line in its own ``asyncio.run``, which cancels the
+    tasks still pending when the line is done. Coroutines submitted here run
+    on one long-lived loop instead, so they finish and the services they
+    pool stay bound to an open loop. The thread is started on first use.
+    """
+
+    _shared: Optional["BackgroundLoop"] = None
+    _shared_lock = threading.Lock()
+
+    def __init__(self, name: str = "background-loop"):
+        self.name: str = name
+        self._loop: Optional[asyncio.AbstractEventLoop] = None
+        self._thread: Optional[threading.Thread] = None
+        self._lock = threading.Lock()
+
+    @classmethod
+    def shared(cls) -> "BackgroundLoop":
+        """Return the process-wide background loop"""
+        with cls._shared_lock:
+            if cls._shared is None:
+                cls._shared = BackgroundLoop()
+            return cls._shared
+
+    @property
+    def loop(self) -> asyncio.AbstractEventLoop:
+        """The running loop, started if needed"""
+        with self._lock:
+            if self._loop is None or self._loop.is_closed():
+                self._loop = asyncio.new_event_loop()
+                self._thread = threading.Thread(target=self._run,
+                                                args=(self._loop, ),
+                                                name=self.name,
+                                                daemon=True)
+                self._thread.start()
+            return self._loop
+
+    def submit(self, coroutine: Coroutine[Any, Any,
+                                           Any]) -> concurrent.futures.Future:
+        """Run a coroutine on the loop, from any thread"""
+        return asyncio.run_coroutine_threadsafe(coroutine, self.loop)
+
+    def stop(self) -> None:
+        """Stop the loop, tasks still running are dropped"""
+        with self._lock:
+            loop, thread = self._loop, self._thread
+            self._loop = None
+            self._thread = None
+        if loop is None:
+            return
+        loop.call_soon_threadsafe(loop.stop)
+        thread.join()
+        loop.close()
+
+    @staticmethod
+    def _run(loop: asyncio.AbstractEventLoop) -> None:
+        asyncio.set_event_loop(loop)
+        loop.run_forever()
@@ -0,0 +1,56 @@
+from collections.abc import AsyncGenerator
+from typing import Any
+
+from semantic_kernel.connectors.ai.prompt_execution_settings import PromptExecutionSettings
+from semantic_kernel.contents.chat_history import ChatHistory
+
+from promptflow_tool_semantic_kernel.tools.delegating_chat_completion import DelegatingChatCompletion
+from promptflow_tool_semantic_kernel.tools.token_estimator import TokenEstimator
+
+
+class CalibratingChatCompletion(DelegatingChatCompletion):
+    """
+    Chat completion service that calibrates a TokenEstimator.
+
+    Every response reporting its usage is compared with the local estimate
+    of the request, including the requests of the auto function invocation
+    loop.
+    """
+
+    estimator: Any
+
+    def __init__(self, inner: Any, estimator: TokenEstimator, **kwargs: Any):
+        super().__init__(inner, estimator=estimator, **kwargs)
+
+    def _observe(self, messages: list, estimated: int) -> bool:
+        for message in messages:
+            usage = message.metadata.get("usage")
+            prompt_tokens = getattr(usage, "prompt_tokens", None)
+            if prompt_tokens:
+                self.estimator.observe(estimated, prompt_tokens)
+                return True
+        return False
+
+    async def _inner_get_chat_message_contents(self, chat_history: ChatHistory,
+                                               settings: PromptExecutionSettings):
+        estimated = self.estimator.estimate_request(chat_history.messages,
+                                                    settings)
+        result = await self.inner._inner_get_chat_message_contents(
+            chat_history, settings)
+        self._observe(result, estimated)
+        return result
+
+    async def _inner_get_streaming_chat_message_contents(
+            self,
+            chat_history: ChatHistory,
+            settings: PromptExecutionSettings,
+            function_invoke_attempt: int = 0) -> AsyncGenerator[list, Any]:
+        estimated = self.estimator.estimate_request(chat_history.messages,
+                                                    settings)
+        observed = False
+        async for messages in self.inner._inner_get_streaming_chat_message_contents(
+                chat_history, settings, function_invoke_attempt):
+            # The usage comes with the last chunk
+            if not observed:
+                observed = self._observe(messages, estimated)
+            yield messages
@@ -1,40 +1,118 @@
-from typing import List, Dict, Any
+from typing import List, Dict, Any, Optional, Tuple
 from semantic_kernel.contents.chat_history import ChatHistory
+from semantic_kernel.contents.chat_message_content import ChatMessageContent
+from semantic_kernel.contents.utils.author_role import AuthorRole
 
+from promptflow_tool_semantic_kernel.tools.history_cache import CachedHistory, HistoryCache
+from promptflow_tool_semantic_kernel.tools.history_compactor import HistoryCompactor
 from promptflow_tool_semantic_kernel.tools.logger_factory import LoggerFactory
+from promptflow_tool_semantic_kernel.tools.prompt_parser import PromptParser
 
 
 class ChatHistoryProcessor:
 
+    # Built histories of the sessions, see build_history
+    cache: HistoryCache = HistoryCache()
+    # Summaries of the older turns of long sessions
+    compactor: HistoryCompactor = HistoryCompactor()
+
+    @staticmethod
+    def entry_messages(entry: Any) -> Tuple[str, str]:
+        """Return the user and assistant message of a chat history entry"""
+        if isinstance(entry, dict):
+            user_message = entry.get("inputs", {}).get("question", "")
+            answer = entry.get("outputs", {}).get("answer", {})
+
+            # Handle the case where "answer" is a string
+            assistant_message = ""
+            if isinstance(answer, dict):
+                assistant_message = answer.get("content", "")
+            elif isinstance(answer, str):
+                assistant_message = answer
+            return user_message, assistant_message
+        if isinstance(entry, str):
+            # Handle string entries by adding them as user messages
+            return entry, ""
+        return "", ""
+
+    @staticmethod
+    def _add_entries(history: ChatHistory, entries: List[Any],
+                     digest: int) -> int:
+        """Add the messages of entries and return the updated rolling hash"""
+        for entry in entries:
+            user_message, assistant_message = (
+                ChatHistoryProcessor.entry_messages(entry))
+            digest = hash((digest, user_message, assistant_message))
+            if user_message:
+                history.add_user_message(user_message)
+            if assistant_message:
+                history.add_assistant_message(assistant_message)
+        return digest
+
+    @staticmethod
+    def _digest(entries: List[Any]) -> int:
+        digest = 0
+        for entry in entries:
+            digest = hash((digest, *ChatHistoryProcessor.entry_messages(entry)))
+        return digest
+
+    @staticmethod
+    def prompt_messages(current_prompt: str) -> int:
+        """Number of messages the prompt adds after the history"""
+        return sum(1 for role, _ in PromptParser.parse(current_prompt)
+                   if role != AuthorRole.SYSTEM)
+
     @staticmethod
     def build_history(chat_history: List[Dict[str, Any]],
-                      current_prompt: str) -> ChatHistory:
-        """Process chat history and add the current prompt"""
+                      current_prompt: str,
+                      session_id: Optional[str] = None) -> ChatHistory:
+        """Process chat history and add the current prompt
+
+        The ``# system:``, ``# user:`` and ``# assistant:`` sections of the
+        prompt become messages of that role. System messages are put before
+        the history so they form the same prefix on every turn, which lets
+        the provider's prompt cache hit. The other sections follow the
+        history. With a ``session_id`` the messages of the previous turns are
+        taken from the cache and only the new entries are converted. The
+        cache is rebuilt when the entries it was built from changed.
+        """
         history = ChatHistory()
 
         try:
-            for entry in chat_history:
-                if isinstance(entry, dict):
-                    user_message = entry.get("inputs", {}).get("question", "")
-                    answer = entry.get("outputs", {}).get("answer", {})
-
-                    # Handle the case where "answer" is a string
-                    assistant_message = ""
-                    if isinstance(answer, dict):
-                        assistant_message = answer.get("content", "")
-                    elif isinstance(answer, str):
-                        assistant_message = answer
-
-                    if user_message:
-                        history.add_user_message(user_message)
-                    if assistant_message:
-                        history.add_assistant_message(assistant_message)
-                elif isinstance(entry, str):
-                    # Handle string entries by adding them as user messages
-                    history.add_user_message(entry)
-
-            # Add current prompt as the latest user message
-            history.add_user_message(current_prompt)
+            cached = None
+            if session_id:
+                cached = ChatHistoryProcessor.cache.get(session_id)
+                if cached is not None and (
+                        len(chat_history) < cached.count
+                        or ChatHistoryProcessor._digest(
+                            chat_history[:cached.count]) != cached.digest):
+                    cached = None
+                ChatHistoryProcessor.cache.record(cached is not None)
+
+            if cached is None:
+                digest = ChatHistoryProcessor._add_entries(
+                    history, chat_history, 0)
+            else:
+                history.messages.extend(cached.messages)
+                digest = ChatHistoryProcessor._add_entries(
+                    history, chat_history[cached.count:], cached.digest)
+
+            if session_id:
+                ChatHistoryProcessor.cache.put(
+                    session_id,
+                    CachedHistory(list(history.messages), len(chat_history),
+                                  digest))
+
+            sections = PromptParser.parse(current_prompt)
+            history.messages[0:0] = [
+                ChatMessageContent(role=role, content=content)
+                for role, content in sections if role == AuthorRole.SYSTEM
+            ]
+            # Add current prompt as the latest messages
+            for role, content in sections:
+                if role != AuthorRole.SYSTEM:
+                    history.add_message(
+                        ChatMessageContent(role=role, content=content))
             return history
         except Exception as e:
             logger = LoggerFactory.create_logger("chat-history")
@@ -0,0 +1,207 @@
+import threading
+import time
+from collections import deque
+from typing import Any, Callable, Dict, List, Optional
+
+from promptflow_tool_semantic_kernel.tools.logger_factory import LoggerFactory
+
+
+class CircuitOpenError(Exception):
+    """Raised instead of calling an endpoint whose circuit is open."""
+
+    def __init__(self, name: str, retry_after: float):
+        super().__init__(
+            f"Circuit for '{name}' is open, retry in {retry_after:.1f}s")
+        self.name = name
+        self.retry_after = retry_after
+
+
+class CircuitBreaker:
+    """
+    Circuit breaker of one upstream endpoint.
+
+    The circuit opens after ``failure_threshold`` consecutive failures, or
+    when at least ``min_calls`` of the last ``window_size`` calls were made
+    and their error rate reaches ``error_rate_threshold``. While open, calls
+    are rejected for ``reset_timeout`` seconds. Then up to
+    ``half_open_max_calls`` probes are let through: a successful probe closes
+    the circuit, a failed one opens it again.
+
+    Listeners registered with ``add_listener`` are called with the breaker
+    name, the old and the new state on every transition.
+    """
+
+    CLOSED = "closed"
+    OPEN = "open"
+    HALF_OPEN = "half_open"
+
+    _registry: Dict[Any, "CircuitBreaker"] = {}
+    _registry_lock = threading.Lock()
+    _listeners: List[Callable[[str, str, str], None]] = []
+    # Options of the constructor that configure can change
+    OPTIONS = frozenset({
+        "failure_threshold", "error_rate_threshold", "window_size",
+        "min_calls", "reset_timeout", "half_open_max_calls"
+    })
+
+    def __init__(self,
+                 name: str,
+                 failure_threshold: int = 5,
+                 error_rate_threshold: Optional[float] = None,
+                 window_size: int = 20,
+                 min_calls: int = 10,
+                 reset_timeout: float = 30.0,
+                 half_open_max_calls: int = 1):
+        self.name: str = name
+        self.failure_threshold: int = failure_threshold
+        self.error_rate_threshold: Optional[float] = error_rate_threshold
+        self.min_calls: int = min_calls
+        self.reset_timeout: float = reset_timeout
+        self.half_open_max_calls: int = half_open_max_calls
+        self.state: str = self.CLOSED
+        self.consecutive_failures: int = 0
+        self.rejected_calls: int = 0
+        self._outcomes: deque = deque(maxlen=window_size)
+        self._opened_at: float = 0.0
+        self._half_open_calls: int = 0
+        self._lock = threading.Lock()
+
+    @classmethod
+    def for_endpoint(cls, key: Any, **kwargs: Any) -> "CircuitBreaker":
+        """Return the process-wide breaker of an endpoint
+
+        Options given for an existing breaker replace those options only,
+        the others keep their current values.
+        """
+        with cls._registry_lock:
+            breaker = cls._registry.get(key)
+            if breaker is None:
+                breaker = cls(str(key), **kwargs)
+                cls._registry[key] = breaker
+            elif kwargs:
+                breaker.configure(**kwargs)
+            return breaker
+
+    def configure(self, **options: Any) -> None:
+        """Change the given options, keeping the others, the state and the
+        recent outcomes"""
+        unknown = set(options) - self.OPTIONS
+        if unknown:
+            raise TypeError(f"Unknown circuit breaker options: "
+                            f"{', '.join(sorted(unknown))}")
+        with self._lock:
+            window_size = options.pop("window_size", self._outcomes.maxlen)
+            for name, value in options.items():
+                setattr(self, name, value)
+            if self._outcomes.maxlen != window_size:
+                self._outcomes = deque(self._outcomes, maxlen=window_size)
+
+    @classmethod
+    def clear_registry(cls) -> None:
+        with cls._registry_lock:
+            cls._registry.clear()
+
+    @classmethod
+    def add_listener(cls, listener: Callable[[str, str, str], None]) -> None:
+        """Register a metrics hook called on every state change"""
+        cls._listeners.append(listener)
+
+    @classmethod
+    def remove_listener(cls, listener: Callable[[str, str, str],
+                                                None]) -> None:
+        cls._listeners.remove(listener)
+
+    def before_call(self) -> None:
+        """Reserve a call or raise CircuitOpenError"""
+        with self._lock:
+            if self.state == self.OPEN:
+                remaining = (self._opened_at + self.reset_timeout -
+                             time.monotonic())
+                if remaining > 0:
+                    self.rejected_calls += 1
+                    raise CircuitOpenError(self.name, remaining)
+                transition = self._transition(self.HALF_OPEN)
+            else:
+                transition = None
+
+            if self.state == self.HALF_OPEN:
+                if self._half_open_calls >= self.half_open_max_calls:
+                    self.rejected_calls += 1
+                    raise CircuitOpenError(self.name, self.reset_timeout)
+                self._half_open_calls += 1
+        self._notify(transition)
+
+    def record_success(self) -> None:
+        with self._lock:
+            self.consecutive_failures = 0
+            self._outcomes.append(True)
+            transition = None
+            if self.state == self.HALF_OPEN:
+                transition = self._transition(self.CLOSED)
+        self._notify(transition)
+
+    def record_failure(self) -> None:
+        with self._lock:
+            self.consecutive_failures += 1
+            self._outcomes.append(False)
+            transition = None
+            if self.state == self.HALF_OPEN or self._should_open():
+                transition = self._transition(self.OPEN)
+        self._notify(transition)
+
+    def release(self) -> None:
+        """Give back a half-open probe slot whose outcome is not counted"""
+        with self._lock:
+            if self.state == self.HALF_OPEN and self._half_open_calls > 0:
+                self._half_open_calls -= 1
+
+    def error_rate(self) -> float:
+        with self._lock:
+            return self._error_rate()
+
+    def stats(self) -> Dict[str, Any]:
+        with self._lock:
+            return {
+                "name": self.name,
+                "state": self.state,
+                "consecutive_failures": self.consecutive_failures,
+                "error_rate": self._error_rate(),
+                "rejected_calls": self.rejected_calls,
+            }
+
+    def _error_rate(self) -> float:
+        if not self._outcomes:
+            return 0.0
+        return self._outcomes.count(False) / len(self._outcomes)
+
+    def _should_open(self) -> bool:
+        if self.state == self.OPEN:
+            return False
+        if self.consecutive_failures >= self.failure_threshold:
+            return True
+        return (self.error_rate_threshold is not None
+                and len(self._outcomes) >= self.min_calls
+                and self._error_rate() >= self.error_rate_threshold)
+
+    def _transition(self, state: str) -> tuple:
+        old_state = self.state
+        self.state = state
+        self._half_open_calls = 0
+        if state == self.OPEN:
+            self._opened_at = time.monotonic()
+        elif state == self.CLOSED:
+            self._outcomes.clear()
+        return old_state, state
+
+    def _notify(self, transition: Optional[tuple]) -> None:
+        if transition is None:
+            return
+        logger = LoggerFactory.create_logger("circuit-breaker")
+        logger.warning(f"Circuit '{self.name}' changed from {transition[0]} "
+                       f"to {transition[1]}")
+        for listener in list(self._listeners):
+            try:
+                listener(self.name, *transition)
+            except Exception as e:
+                # A failing metrics hook must not fail the call
+                logger.error(f"Circuit breaker listener failed: {str(e)}")
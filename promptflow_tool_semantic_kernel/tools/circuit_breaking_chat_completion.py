@@ -0,0 +1,71 @@
+from collections.abc import AsyncGenerator
+from typing import Any
+
+from semantic_kernel.connectors.ai.prompt_execution_settings import PromptExecutionSettings
+from semantic_kernel.contents.chat_history import ChatHistory
+
+from promptflow_tool_semantic_kernel.tools.circuit_breaker import CircuitBreaker
+from promptflow_tool_semantic_kernel.tools.delegating_chat_completion import DelegatingChatCompletion
+from promptflow_tool_semantic_kernel.tools.error_classifier import ErrorClassifier
+
+
+class CircuitBreakingChatCompletion(DelegatingChatCompletion):
+    """
+    Chat completion service guarded by the circuit breaker of its endpoint.
+
+    Server errors and timeouts count as failures. Throttling (429) is left
+    to the rate limiter and other errors prove the endpoint is answering.
+    While the circuit is open requests fail fast with CircuitOpenError,
+    which makes RoutingChatCompletion fail over to the next backend.
+    """
+
+    circuit_breaker: Any
+
+    def __init__(self, inner: Any, circuit_breaker: CircuitBreaker,
+                 **kwargs: Any):
+        super().__init__(inner, circuit_breaker=circuit_breaker, **kwargs)
+
+    def _after_error(self, error: BaseException) -> None:
+        if not isinstance(error, Exception):
+            # Cancelled, the endpoint did not get to answer
+            self.circuit_breaker.release()
+        elif ErrorClassifier.get_status_code(error) == 429:
+            self.circuit_breaker.release()
+        elif ErrorClassifier.is_retriable(error):
+            self.circuit_breaker.record_failure()
+        else:
+            self.circuit_breaker.record_success()
+
+    async def _inner_get_chat_message_contents(self, chat_history: ChatHistory,
+                                               settings: PromptExecutionSettings):
+        self.circuit_breaker.before_call()
+        try:
+            result = await self.inner._inner_get_chat_message_contents(
+                chat_history, settings)
+        except BaseException as e:
+            self._after_error(e)
+            raise
+        self.circuit_breaker.record_success()
+        return result
+
+    async def _inner_get_streaming_chat_message_contents(
+            self,
+            chat_history: ChatHistory,
+            settings: PromptExecutionSettings,
+            function_invoke_attempt: int = 0) -> AsyncGenerator[list, Any]:
+        self.circuit_breaker.before_call()
+        recorded = False
+        try:
+            async for messages in self.inner._inner_get_streaming_chat_message_contents(
+                    chat_history, settings, function_invoke_attempt):
+                if not recorded:
+                    # The endpoint is healthy once it starts streaming
+                    self.circuit_breaker.record_success()
+                    recorded = True
+                yield messages
+        except BaseException as e:
+            if not recorded:
+                self._after_error(e)
+            raise
+        if not recorded:
+            self.circuit_breaker.record_success()
@@ -0,0 +1,69 @@
+from collections.abc import AsyncGenerator
+from typing import Any, Callable, ClassVar
+
+from semantic_kernel.connectors.ai.chat_completion_client_base import ChatCompletionClientBase
+from semantic_kernel.connectors.ai.prompt_execution_settings import PromptExecutionSettings
+from semantic_kernel.contents.chat_history import ChatHistory
+
+
+class DelegatingChatCompletion(ChatCompletionClientBase):
+    """
+    Base class for chat completion services that wrap another service.
+
+    The auto function invocation loop of ``ChatCompletionClientBase`` runs in
+    the wrapper, while every single request is delegated to the wrapped
+    service's ``_inner_*`` methods. Wrappers therefore compose: a rate
+    limiter can wrap a router that wraps several Azure deployments.
+    """
+
+    SUPPORTS_FUNCTION_CALLING: ClassVar[bool] = True
+
+    inner: Any
+
+    def __init__(self, inner: Any, **kwargs: Any):
+        kwargs.setdefault("ai_model_id", inner.ai_model_id)
+        kwargs.setdefault("service_id", inner.service_id)
+        super().__init__(inner=inner, **kwargs)
+
+    def wrapped_services(self) -> list:
+        """Return the services this wrapper delegates to"""
+        return [self.inner]
+
+    def get_prompt_execution_settings_class(
+            self) -> type[PromptExecutionSettings]:
+        return self.inner.get_prompt_execution_settings_class()
+
+    def service_url(self) -> str | None:
+        return self.inner.service_url()
+
+    async def _inner_get_chat_message_contents(self, chat_history: ChatHistory,
+                                               settings: PromptExecutionSettings):
+        return await self.inner._inner_get_chat_message_contents(
+            chat_history, settings)
+
+    async def _inner_get_streaming_chat_message_contents(
+            self,
+            chat_history: ChatHistory,
+            settings: PromptExecutionSettings,
+            function_invoke_attempt: int = 0) -> AsyncGenerator[list, Any]:
+        async for messages in self.inner._inner_get_streaming_chat_message_contents(
+                chat_history, settings, function_invoke_attempt):
+            yield messages
+
+    def _verify_function_choice_settings(
+            self, settings: PromptExecutionSettings) -> None:
+        self.inner._verify_function_choice_settings(settings)
+
+    def _update_function_choice_settings_callback(self) -> Callable:
+        return self.inner._update_function_choice_settings_callback()
+
+    def _reset_function_choice_settings(
+            self, settings: PromptExecutionSettings) -> None:
+        self.inner._reset_function_choice_settings(settings)
+
+    def _prepare_chat_history_for_request(self,
+                                          chat_history: ChatHistory,
+                                          role_key: str = "role",
+                                          content_key: str = "content") -> Any:
+        return self.inner._prepare_chat_history_for_request(
+            chat_history, role_key=role_key, content_key=content_key)
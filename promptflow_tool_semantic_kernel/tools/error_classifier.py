@@ -0,0 +1,109 @@
+import asyncio
+from email.utils import parsedate_to_datetime
+from datetime import datetime, timezone
+from typing import Iterator, Optional
+
+import httpx
+
+from promptflow_tool_semantic_kernel.tools.circuit_breaker import CircuitOpenError
+
+RETRIABLE_STATUS_CODES = frozenset({408, 409, 429, 500, 502, 503, 504})
+
+
+class ErrorClassifier:
+    """
+    Inspects errors raised by chat completion services.
+
+    Semantic Kernel wraps provider errors into ``ServiceResponseException``,
+    so the whole cause chain is searched for status codes and headers.
+    """
+
+    @staticmethod
+    def iter_chain(error: BaseException) -> Iterator[BaseException]:
+        """Yield the error, its causes and exceptions passed as arguments"""
+        seen = set()
+        pending = [error]
+        while pending:
+            current = pending.pop(0)
+            if current is None or id(current) in seen:
+                continue
+            seen.add(id(current))
+            yield current
+            pending.append(current.__cause__)
+            pending.extend(arg for arg in getattr(current, "args", ())
+                           if isinstance(arg, BaseException))
+
+    @staticmethod
+    def get_status_code(error: BaseException) -> Optional[int]:
+        """Return the HTTP status code carried by the error, if any"""
+        for current in ErrorClassifier.iter_chain(error):
+            for attribute in ("status_code", "code"):
+                value = getattr(current, attribute, None)
+                if isinstance(value, int) and 100 <= value < 600:
+                    return value
+            response = getattr(current, "response", None)
+            status = getattr(response, "status_code", None)
+            if isinstance(status, int):
+                return status
+        return None
+
+    @staticmethod
+    def is_timeout(error: BaseException) -> bool:
+        """Whether the error was caused by a timeout or a broken connection"""
+        for current in ErrorClassifier.iter_chain(error):
+            if isinstance(current, (asyncio.TimeoutError, TimeoutError,
+                                    httpx.TimeoutException,
+                                    httpx.NetworkError)):
+                return True
+            # openai.APITimeoutError / APIConnectionError without importing
+            # the SDK here
+            if current.__class__.__name__ in ("APITimeoutError",
+                                              "APIConnectionError"):
+                return True
+        return False
+
+    @staticmethod
+    def is_retriable(error: BaseException) -> bool:
+        """Whether retrying the request, possibly elsewhere, may succeed"""
+        if isinstance(error, CircuitOpenError):
+            return True
+        status_code = ErrorClassifier.get_status_code(error)
+        if status_code is not None:
+            return status_code in RETRIABLE_STATUS_CODES
+        return ErrorClassifier.is_timeout(error)
+
+    @staticmethod
+    def get_retry_after(error: BaseException) -> Optional[float]:
+        """Return the delay in seconds requested by the Retry-After headers"""
+        for current in ErrorClassifier.iter_chain(error):
+            if isinstance(current, CircuitOpenError):
+                return current.retry_after
+            response = getattr(current, "response", None)
+            headers = getattr(response, "headers", None)
+            if not headers:
+                continue
+            retry_after_ms = headers.get("retry-after-ms")
+            if retry_after_ms:
+                try:
+                    return float(retry_after_ms) / 1000.0
+                except ValueError:
+                    pass
+            retry_after = headers.get("retry-after")
+            if retry_after:
+                return ErrorClassifier._parse_retry_after(retry_after)
+        return None
+
+    @staticmethod
+    def _parse_retry_after(value: str) -> Optional[float]:
+        try:
+            return max(0.0, float(value))
+        except ValueError:
+            pass
+        try:
+            retry_at = parsedate_to_datetime(value)
+        except (TypeError, ValueError):
+            return None
+        if retry_at.tzinfo is None:
+            retry_at = retry_at.replace(tzinfo=timezone.utc)
+        return max(0.0,
+                   (retry_at - datetime.now(timezone.utc)).total_seconds())
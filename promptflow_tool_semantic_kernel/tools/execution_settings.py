@@ -0,0 +1,35 @@
+from typing import Any, Dict, Optional
+
+from semantic_kernel.connectors.ai.open_ai.prompt_execution_settings.azure_chat_prompt_execution_settings import (
+    AzureChatPromptExecutionSettings, )
+from semantic_kernel.connectors.ai.open_ai.prompt_execution_settings.open_ai_prompt_execution_settings import (
+    OpenAIChatPromptExecutionSettings, )
+
+
+def _drop_parallel_tool_calls_without_tools(
+        settings_dict: Dict[str, Any]) -> Dict[str, Any]:
+    # The API rejects parallel_tool_calls on requests without tools, e.g.
+    # the final request once the auto invoke attempts are used up
+    if not settings_dict.get("tools"):
+        settings_dict.pop("parallel_tool_calls", None)
+    return settings_dict
+
+
+class AzureChatExecutionSettings(AzureChatPromptExecutionSettings):
+    """Azure OpenAI chat settings with ``parallel_tool_calls``."""
+
+    parallel_tool_calls: Optional[bool] = None
+
+    def prepare_settings_dict(self, **kwargs) -> Dict[str, Any]:
+        return _drop_parallel_tool_calls_without_tools(
+            super().prepare_settings_dict(**kwargs))
+
+
+class OpenAIChatExecutionSettings(OpenAIChatPromptExecutionSettings):
+    """OpenAI chat settings with ``parallel_tool_calls``."""
+
+    parallel_tool_calls: Optional[bool] = None
+
+    def prepare_settings_dict(self, **kwargs) -> Dict[str, Any]:
+        return _drop_parallel_tool_calls_without_tools(
+            super().prepare_settings_dict(**kwargs))
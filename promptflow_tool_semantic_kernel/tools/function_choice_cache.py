@@ -0,0 +1,81 @@
+import json
+import threading
+from collections import OrderedDict
+from collections.abc import Callable
+from typing import Any, ClassVar, Dict, Optional
+
+from semantic_kernel.connectors.ai.function_choice_behavior import FunctionChoiceBehavior
+
+
+class CachedFunctionChoiceBehavior(FunctionChoiceBehavior):
+    """
+    FunctionChoiceBehavior that reuses the tool definitions of a plugin set.
+
+    Semantic Kernel lists the kernel functions and converts their metadata
+    into the provider's tool format on every request. This behavior records
+    the settings the provider callback wrote (e.g. ``tools`` and
+    ``tool_choice``) the first time and copies them into the settings of
+    later requests, skipping the conversion and the pydantic validation of
+    the tool schemas. Entries are keyed by ``cache_key``, which identifies
+    the plugin definitions, together with the settings class, the choice
+    type, the filters and the registered plugin names.
+    """
+
+    MAX_ENTRIES: ClassVar[int] = 64
+
+    _cache: ClassVar["OrderedDict[tuple, Dict[str, Any]]"] = OrderedDict()
+    _cache_lock: ClassVar[threading.Lock] = threading.Lock()
+    _stats: ClassVar[Dict[str, int]] = {"hits": 0, "misses": 0}
+
+    cache_key: Optional[str] = None
+
+    @classmethod
+    def clear_cache(cls) -> None:
+        with cls._cache_lock:
+            cls._cache.clear()
+            cls._stats.update(hits=0, misses=0)
+
+    @classmethod
+    def cache_stats(cls) -> Dict[str, int]:
+        with cls._cache_lock:
+            return dict(cls._stats, entries=len(cls._cache))
+
+    def _entry_key(self, kernel: Any, settings: Any) -> tuple:
+        return (self.cache_key, type(settings), self.type_,
+                json.dumps(self.filters, sort_keys=True),
+                tuple(kernel.plugins))
+
+    def configure(self, kernel: Any, update_settings_callback: Callable[...,
+                                                                       None],
+                  settings: Any) -> None:
+        if self.cache_key is None or not self.enable_kernel_functions:
+            super().configure(kernel, update_settings_callback, settings)
+            return
+
+        key = self._entry_key(kernel, settings)
+        with self._cache_lock:
+            values = self._cache.get(key)
+            if values is not None:
+                self._cache.move_to_end(key)
+                self._stats["hits"] += 1
+            else:
+                self._stats["misses"] += 1
+
+        if values is None:
+            before = dict(settings.__dict__)
+            super().configure(kernel, update_settings_callback, settings)
+            values = {
+                name: value
+                for name, value in settings.__dict__.items()
+                if before.get(name) is not value
+            }
+            with self._cache_lock:
+                self._cache[key] = values
+                while len(self._cache) > self.MAX_ENTRIES:
+                    self._cache.popitem(last=False)
+            return
+
+        # The values were validated when they were recorded
+        for name, value in values.items():
+            settings.__dict__[name] = value
+            settings.__pydantic_fields_set__.add(name)
@@ -0,0 +1,195 @@
+import asyncio
+import contextvars
+import functools
+import inspect
+import os
+import pickle
+import threading
+from concurrent.futures import Executor, ProcessPoolExecutor, ThreadPoolExecutor
+from typing import Any, Callable, Dict, Iterable, Optional
+
+from semantic_kernel.functions.kernel_function_from_method import KernelFunctionFromMethod
+
+from promptflow_tool_semantic_kernel.tools.logger_factory import LoggerFactory
+
+
+class _PoolStats:
+    """Counters of one executor."""
+
+    def __init__(self, max_workers: int):
+        self.max_workers: int = max_workers
+        self.queued: int = 0
+        self.running: int = 0
+        self.completed: int = 0
+        self._lock = threading.Lock()
+
+    def as_dict(self, running: bool = True) -> Dict[str, int]:
+        with self._lock:
+            stats = {
+                "max_workers": self.max_workers,
+                "queued": self.queued,
+                "running": self.running,
+                "completed": self.completed,
+            }
+        if not running:
+            del stats["running"]
+        return stats
+
+
+class FunctionOffloader:
+    """
+    Runs synchronous kernel functions off the event loop.
+
+    Plain synchronous functions go to a thread pool, functions marked as
+    CPU-bound go to a process pool. Process pool functions must be methods of
+    a picklable plugin, and changes they make to the plugin stay in the
+    worker process. The pools are created on first use and sized by
+    ``thread_workers`` and ``process_workers``. The defaults come from the
+    ``PLUGIN_THREAD_POOL_SIZE`` and ``PLUGIN_PROCESS_POOL_SIZE`` environment
+    variables.
+    """
+
+    def __init__(self,
+                 thread_workers: Optional[int] = None,
+                 process_workers: Optional[int] = None):
+        self.thread_workers: int = thread_workers or int(
+            os.environ.get("PLUGIN_THREAD_POOL_SIZE",
+                           min(32, (os.cpu_count() or 1) + 4)))
+        self.process_workers: int = process_workers or int(
+            os.environ.get("PLUGIN_PROCESS_POOL_SIZE", os.cpu_count() or 1))
+        self._thread_pool: Optional[Executor] = None
+        self._process_pool: Optional[Executor] = None
+        self._thread_stats = _PoolStats(self.thread_workers)
+        self._process_stats = _PoolStats(self.process_workers)
+        self._lock = threading.Lock()
+
+    def stats(self) -> Dict[str, Dict[str, int]]:
+        """Return the queue depth and load of both pools
+
+        Process pool functions count as queued until they complete, as the
+        parent cannot observe when a worker picks them up, so the process
+        pool reports no running functions.
+        """
+        return {
+            "thread": self._thread_stats.as_dict(),
+            "process": self._process_stats.as_dict(running=False),
+        }
+
+    def shutdown(self) -> None:
+        with self._lock:
+            pools = (self._thread_pool, self._process_pool)
+            self._thread_pool = None
+            self._process_pool = None
+        for pool in pools:
+            if pool is not None:
+                pool.shutdown(wait=False, cancel_futures=True)
+
+    def offload_plugin(self,
+                       plugin: Any,
+                       cpu_bound: Iterable[str] = ()) -> None:
+        """Replace the synchronous functions of a KernelPlugin in place
+
+        Functions named in ``cpu_bound`` run in the process pool, unless
+        their plugin cannot be pickled. Functions that are already wrapped
+        are left as they are.
+        """
+        cpu_bound = set(cpu_bound)
+        for name, function in list(plugin.functions.items()):
+            method = getattr(function, "method", None)
+            if (not isinstance(function, KernelFunctionFromMethod)
+                    or getattr(method, "__offloaded__", False)
+                    or function.metadata.is_asynchronous
+                    or function.stream_method is not None):
+                continue
+            in_process = name in cpu_bound
+            if in_process and not inspect.ismethod(method):
+                LoggerFactory.create_logger("function-offloader").warning(
+                    f"{function.fully_qualified_name} is not a plugin "
+                    "method, running it in the thread pool instead")
+                in_process = False
+            elif in_process and not self._picklable(method):
+                LoggerFactory.create_logger("function-offloader").warning(
+                    f"The plugin of {function.fully_qualified_name} cannot "
+                    "be pickled, running it in the thread pool instead")
+                in_process = False
+            plugin.functions[name] = KernelFunctionFromMethod(
+                method=self._wrap(method, in_process),
+                plugin_name=function.plugin_name)
+
+    @staticmethod
+    def _picklable(method: Callable) -> bool:
+        """Whether a method and its plugin can be sent to a worker process"""
+        try:
+            pickle.dumps(method)
+        except Exception:
+            return False
+        return True
+
+    def _wrap(self, method: Callable, in_process: bool) -> Callable:
+
+        async def offloaded(**kwargs):
+            if in_process:
+                return await self._run_in_process(method, kwargs)
+            return await self._run_in_thread(method, kwargs)
+
+        function = getattr(method, "__func__", method)
+        offloaded.__name__ = function.__name__
+        offloaded.__qualname__ = function.__qualname__
+        offloaded.__doc__ = function.__doc__
+        # Copies the __kernel_function_*__ attributes of the decorator
+        offloaded.__dict__.update(function.__dict__)
+        offloaded.__offloaded__ = True
+        return offloaded
+
+    def _get_pool(self, in_process: bool) -> Executor:
+        with self._lock:
+            if in_process:
+                if self._process_pool is None:
+                    self._process_pool = ProcessPoolExecutor(
+                        max_workers=self.process_workers)
+                return self._process_pool
+            if self._thread_pool is None:
+                self._thread_pool = ThreadPoolExecutor(
+                    max_workers=self.thread_workers,
+                    thread_name_prefix="plugin-function")
+            return self._thread_pool
+
+    async def _run_in_thread(self, method: Callable, kwargs: Dict[str,
+                                                                  Any]) -> Any:
+        stats = self._thread_stats
+        context = contextvars.copy_context()
+
+        def run():
+            with stats._lock:
+                stats.queued -= 1
+                stats.running += 1
+            try:
+                return context.run(method, **kwargs)
+            finally:
+                with stats._lock:
+                    stats.running -= 1
+                    stats.completed += 1
+
+        with stats._lock:
+            stats.queued += 1
+        future = self._get_pool(False).submit(run)
+        try:
+            return await asyncio.wrap_future(future)
+        finally:
+            if future.cancel():
+                # Never started, so run() did not take it off the queue
+                with stats._lock:
+                    stats.queued -= 1
+
+    async def _run_in_process(self, method: Callable,
+                              kwargs: Dict[str, Any]) -> Any:
+        stats = self._process_stats
+        with stats._lock:
+            stats.queued += 1
+        try:
+            return await asyncio.get_running_loop().run_in_executor(
+                self._get_pool(True), functools.partial(method, **kwargs))
+        finally:
+            with stats._lock:
+                stats.queued -= 1
+                stats.completed += 1
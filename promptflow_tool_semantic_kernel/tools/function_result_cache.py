@@ -0,0 +1,245 @@
+import json
+import threading
+import time
+from collections import OrderedDict
+from typing import Any, Callable, Dict, Iterable, List, Optional
+
+from semantic_kernel.functions.function_result import FunctionResult
+
+from promptflow_tool_semantic_kernel.tools.logger_factory import LoggerFactory
+from promptflow_tool_semantic_kernel.tools.plugin_registry import PluginRegistry
+
+_MISSING = object()
+
+
+def cached_result(ttl: float = 60.0, max_size: int = 256) -> Callable:
+    """Mark a kernel function as read-only, so its results can be cached
+
+    Use next to ``@kernel_function``:
+
+        @cached_result(ttl=30)
+        @kernel_function(name="get_lights")
+        def get_lights(self, ...):
+    """
+
+    def decorator(function: Callable) -> Callable:
+        function.__result_cache__ = {"ttl": ttl, "max_size": max_size}
+        return function
+
+    return decorator
+
+
+def invalidates_cache(function: Callable) -> Callable:
+    """Mark a kernel function that changes what its plugin returns"""
+    function.__invalidates_cache__ = True
+    return function
+
+
+class ResultCache:
+    """
+    Least recently used results of one function, each kept for ``ttl``.
+
+    ``invalidate`` bumps ``generation``, so a result computed while the
+    plugin was being changed is not stored.
+    """
+
+    def __init__(self,
+                 ttl: float,
+                 max_size: int,
+                 clock: Callable[[], float] = time.monotonic):
+        self.ttl: float = ttl
+        self.max_size: int = max_size
+        self.generation: int = 0
+        self.hits: int = 0
+        self.misses: int = 0
+        self.evictions: int = 0
+        self.invalidations: int = 0
+        self._clock = clock
+        self._entries: "OrderedDict[str, tuple]" = OrderedDict()
+        self._lock = threading.Lock()
+
+    def get(self, key: str) -> Any:
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is not None and entry[0] <= self._clock():
+                del self._entries[key]
+                entry = None
+            if entry is None:
+                self.misses += 1
+                return _MISSING
+            self._entries.move_to_end(key)
+            self.hits += 1
+            return entry[1]
+
+    def put(self, key: str, value: Any, generation: int) -> bool:
+        with self._lock:
+            if generation != self.generation:
+                return False
+            self._entries[key] = (self._clock() + self.ttl, value)
+            self._entries.move_to_end(key)
+            while len(self._entries) > self.max_size:
+                self._entries.popitem(last=False)
+                self.evictions += 1
+            return True
+
+    def invalidate(self) -> None:
+        with self._lock:
+            self._entries.clear()
+            self.generation += 1
+            self.invalidations += 1
+
+    def stats(self) -> Dict[str, Any]:
+        with self._lock:
+            calls = self.hits + self.misses
+            return {
+                "entries": len(self._entries),
+                "hits": self.hits,
+                "misses": self.misses,
+                "hit_rate": self.hits / calls if calls else 0.0,
+                "evictions": self.evictions,
+                "invalidations": self.invalidations,
+            }
+
+
+class FunctionResultCache:
+    """
+    Caches the results of read-only plugin functions across requests.
+
+    Installed as a kernel filter. A function is cached when its plugin
+    definition lists it under ``cache`` or when it is decorated with
+    ``@cached_result``. Results are keyed by the function arguments, with
+    defaults filled in and unrelated arguments dropped. Calling a function
+    listed under ``invalidates_cache`` or decorated with
+    ``@invalidates_cache`` drops the cached results of its plugin.
+
+    Caches are shared by all kernels in the process and scoped by plugin
+    name, class and parameters.
+    """
+
+    _caches: Dict[tuple, ResultCache] = {}
+    _lock = threading.Lock()
+
+    def __init__(self,
+                 policies: Optional[Dict[str, Dict[str, float]]] = None,
+                 invalidating: Optional[Iterable[str]] = None,
+                 scopes: Optional[Dict[str, str]] = None):
+        self.policies: Dict[str, Dict[str, float]] = policies or {}
+        self.invalidating: set = set(invalidating or ())
+        self.scopes: Dict[str, str] = scopes or {}
+
+    @staticmethod
+    def from_plugins(plugins: List[Dict[str, Any]]) -> "FunctionResultCache":
+        """Read ``cache`` and ``invalidates_cache`` of plugin definitions
+
+        ``cache`` maps function names to a TTL in seconds or to a dict with
+        ``ttl`` and ``max_size``.
+        """
+        policies, invalidating, scopes = {}, set(), {}
+        for plugin in plugins or []:
+            if not isinstance(plugin, dict) or not plugin.get("name"):
+                continue
+            name = plugin["name"]
+            scopes[name] = (
+                f"{name}:{plugin.get('module')}.{plugin.get('class')}:"
+                f"{PluginRegistry.parameters_hash(plugin.get('parameters'))}")
+            for function_name, policy in (plugin.get("cache") or {}).items():
+                if not isinstance(policy, dict):
+                    policy = {"ttl": policy}
+                policies[f"{name}-{function_name}"] = {
+                    "ttl": float(policy.get("ttl", 60.0)),
+                    "max_size": int(policy.get("max_size", 256)),
+                }
+            for function_name in plugin.get("invalidates_cache") or []:
+                invalidating.add(f"{name}-{function_name}")
+        return FunctionResultCache(policies, invalidating, scopes)
+
+    @classmethod
+    def stats(cls) -> Dict[str, Dict[str, Any]]:
+        """Return the metrics of every cache, by scope and function"""
+        with cls._lock:
+            caches = dict(cls._caches)
+        return {
+            f"{scope}/{name}": cache.stats()
+            for (scope, name), cache in caches.items()
+        }
+
+    @classmethod
+    def clear_registry(cls) -> None:
+        with cls._lock:
+            cls._caches.clear()
+
+    @staticmethod
+    def arguments_key(function: Any, arguments: Any) -> str:
+        values = {}
+        for parameter in function.parameters:
+            if parameter.name in arguments:
+                values[parameter.name] = arguments[parameter.name]
+            elif parameter.default_value is not None:
+                values[parameter.name] = parameter.default_value
+        return json.dumps(values, sort_keys=True, default=repr)
+
+    def install(self, kernel: Any) -> None:
+        kernel.add_filter("function_invocation",
+                          self._function_invocation_filter)
+
+    def scope_for(self, plugin_name: str) -> str:
+        return self.scopes.get(plugin_name, plugin_name)
+
+    def invalidate(self, plugin_name: str) -> None:
+        scope = self.scope_for(plugin_name)
+        with self._lock:
+            caches = [
+                cache for (cache_scope, _), cache in self._caches.items()
+                if cache_scope == scope
+            ]
+        for cache in caches:
+            cache.invalidate()
+        LoggerFactory.create_logger("function-result-cache").debug(
+            f"Invalidated {len(caches)} cached functions of {plugin_name}")
+
+    def _cache_for(self, function: Any,
+                   policy: Dict[str, float]) -> ResultCache:
+        key = (self.scope_for(function.plugin_name),
+               function.fully_qualified_name)
+        with self._lock:
+            cache = self._caches.get(key)
+            if cache is None:
+                cache = self._caches[key] = ResultCache(
+                    ttl=policy["ttl"], max_size=int(policy["max_size"]))
+            return cache
+
+    async def _function_invocation_filter(self, context: Any,
+                                          next: Callable) -> None:
+        function = context.function
+        name = function.fully_qualified_name
+        method = getattr(function, "method", None)
+        if context.is_streaming:
+            await next(context)
+            return
+
+        if name in self.invalidating or getattr(
+                method, "__invalidates_cache__", False):
+            try:
+                await next(context)
+            finally:
+                self.invalidate(function.plugin_name)
+            return
+
+        policy = self.policies.get(name) or getattr(method,
+                                                    "__result_cache__", None)
+        if policy is None:
+            await next(context)
+            return
+
+        cache = self._cache_for(function, policy)
+        key = self.arguments_key(function, context.arguments)
+        value = cache.get(key)
+        if value is not _MISSING:
+            context.result = FunctionResult(function=function.metadata,
+                                            value=value)
+            return
+
+        generation = cache.generation
+        await next(context)
+        if context.result is not None:
+            cache.put(key, context.result.value, generation)
@@ -0,0 +1,135 @@
+import math
+import re
+import threading
+from collections import Counter, OrderedDict
+from typing import Any, Dict, List, Optional
+
+from semantic_kernel.contents.function_call_content import FunctionCallContent
+
+_WORD = re.compile(r"[A-Z]+(?![a-z])|[A-Z]?[a-z]+|[0-9]+")
+
+
+class FunctionSelector:
+    """
+    Ranks the kernel functions against a request with BM25.
+
+    Every function is indexed by its plugin name, function name, description
+    and parameters. ``select`` scores them against the rendered prompt and
+    the recent history and returns the fully qualified names of the best
+    ``top_k``, to be passed as ``included_functions`` filter. The index is
+    local, so no embedding service is needed, and it is built once per
+    plugin list.
+    """
+
+    K1 = 1.2
+    B = 0.75
+    MAX_INDEXES = 64
+
+    _indexes: "OrderedDict[tuple, FunctionSelector]" = OrderedDict()
+    _indexes_lock = threading.Lock()
+
+    def __init__(self, documents: Dict[str, List[str]]):
+        self.names: List[str] = list(documents)
+        self._frequencies: List[Counter] = [
+            Counter(tokens) for tokens in documents.values()
+        ]
+        self._lengths: List[int] = [
+            len(tokens) for tokens in documents.values()
+        ]
+        self._average_length: float = (sum(self._lengths) /
+                                        len(self._lengths) if self._lengths
+                                        else 0.0)
+        document_frequencies = Counter(token
+                                       for frequencies in self._frequencies
+                                       for token in frequencies)
+        count = len(self.names)
+        self._idf: Dict[str, float] = {
+            token: math.log(1 + (count - frequency + 0.5) / (frequency + 0.5))
+            for token, frequency in document_frequencies.items()
+        }
+
+    @staticmethod
+    def tokenize(text: str) -> List[str]:
+        """Split camelCase, snake_case and kebab-case words, singularized"""
+        tokens = []
+        for word in _WORD.findall(text or ""):
+            word = word.lower()
+            if len(word) > 3 and word.endswith("s") and not word.endswith(
+                    "ss"):
+                word = word[:-1]
+            tokens.append(word)
+        return tokens
+
+    @classmethod
+    def from_kernel(cls, kernel: Any) -> "FunctionSelector":
+        documents = {}
+        for plugin in kernel.plugins.values():
+            for function in plugin.functions.values():
+                parameters = " ".join(
+                    f"{parameter.name} {parameter.description or ''}"
+                    for parameter in function.parameters)
+                documents[function.fully_qualified_name] = cls.tokenize(
+                    f"{function.plugin_name} {function.name} "
+                    f"{function.description or ''} {parameters}")
+        return cls(documents)
+
+    @classmethod
+    def for_kernel(cls, kernel: Any, cache_key: str) -> "FunctionSelector":
+        """Return the index of the kernel functions, built once per key"""
+        key = (cache_key, tuple(kernel.plugins))
+        with cls._indexes_lock:
+            selector = cls._indexes.get(key)
+            if selector is not None:
+                cls._indexes.move_to_end(key)
+                return selector
+        selector = cls.from_kernel(kernel)
+        with cls._indexes_lock:
+            cls._indexes[key] = selector
+            while len(cls._indexes) > cls.MAX_INDEXES:
+                cls._indexes.popitem(last=False)
+        return selector
+
+    @classmethod
+    def clear_cache(cls) -> None:
+        with cls._indexes_lock:
+            cls._indexes.clear()
+
+    @staticmethod
+    def history_text(history: Any, max_messages: int = 6) -> str:
+        """Text and called function names of the last messages"""
+        parts = []
+        for message in list(history.messages)[-max_messages:]:
+            parts.append(message.content or "")
+            parts.extend(item.name or "" for item in message.items
+                         if isinstance(item, FunctionCallContent))
+        return " ".join(parts)
+
+    def scores(self, query: str) -> Dict[str, float]:
+        terms = Counter(self.tokenize(query))
+        scores = {}
+        for name, frequencies, length in zip(self.names, self._frequencies,
+                                             self._lengths):
+            score = 0.0
+            for term, query_count in terms.items():
+                frequency = frequencies.get(term)
+                if not frequency:
+                    continue
+                norm = self.K1 * (1 - self.B +
+                                  self.B * length / self._average_length)
+                score += (query_count * self._idf[term] * frequency *
+                          (self.K1 + 1) / (frequency + norm))
+            scores[name] = score
+        return scores
+
+    def select(self, query: str, top_k: int) -> Optional[List[str]]:
+        """Return the best ``top_k`` matching functions
+
+        None means all functions should be advertised, either because there
+        are no more than ``top_k`` or because none of them matches.
+        """
+        if top_k <= 0 or len(self.names) <= top_k:
+            return None
+        scores = self.scores(query)
+        ranked = sorted((name for name in self.names if scores[name] > 0),
+                        key=lambda name: -scores[name])
+        return ranked[:top_k] or None
@@ -0,0 +1,84 @@
+import threading
+import time
+from collections import OrderedDict
+from typing import Any, Callable, Dict, List, Optional
+
+
+class CachedHistory:
+    """Messages built from the first ``count`` chat history entries."""
+
+    def __init__(self, messages: List[Any], count: int, digest: int):
+        self.messages: List[Any] = messages
+        self.count: int = count
+        # Rolling hash of the first ``count`` entries
+        self.digest: int = digest
+
+
+class HistoryCache:
+    """
+    Bounded store of the built chat history of each session.
+
+    Sessions are evicted least recently used first once there are more than
+    ``max_sessions``, and after ``idle_ttl`` seconds without a request.
+    """
+
+    def __init__(self,
+                 max_sessions: int = 1024,
+                 idle_ttl: float = 1800.0,
+                 clock: Callable[[], float] = time.monotonic):
+        self.max_sessions: int = max_sessions
+        self.idle_ttl: float = idle_ttl
+        self.hits: int = 0
+        self.misses: int = 0
+        self._clock = clock
+        self._sessions: "OrderedDict[str, tuple]" = OrderedDict()
+        self._lock = threading.Lock()
+
+    def get(self, session_id: str) -> Optional[CachedHistory]:
+        now = self._clock()
+        with self._lock:
+            self._expire(now)
+            entry = self._sessions.get(session_id)
+            if entry is None:
+                return None
+            self._sessions[session_id] = (now, entry[1])
+            self._sessions.move_to_end(session_id)
+            return entry[1]
+
+    def put(self, session_id: str, history: CachedHistory) -> None:
+        now = self._clock()
+        with self._lock:
+            self._sessions[session_id] = (now, history)
+            self._sessions.move_to_end(session_id)
+            self._expire(now)
+            while len(self._sessions) > self.max_sessions:
+                self._sessions.popitem(last=False)
+
+    def record(self, hit: bool) -> None:
+        with self._lock:
+            if hit:
+                self.hits += 1
+            else:
+                self.misses += 1
+
+    def _expire(self, now: float) -> None:
+        # The least recently used session comes first
+        while self._sessions:
+            session_id, (last_used, _) = next(iter(self._sessions.items()))
+            if now - last_used < self.idle_ttl:
+                break
+            del self._sessions[session_id]
+
+    def stats(self) -> Dict[str, int]:
+        with self._lock:
+            return {
+                "sessions": len(self._sessions),
+                "hits": self.hits,
+                "misses": self.misses,
+            }
+
+    def clear(self) -> None:
+        with self._lock:
+            self._sessions.clear()
+            self.hits = 0
+            self.misses = 0
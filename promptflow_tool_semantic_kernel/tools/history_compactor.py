@@ -0,0 +1,228 @@
+import asyncio
+import concurrent.futures
+import threading
+from collections import OrderedDict
+from typing import Any, Awaitable, Callable, Dict, List, Optional
+
+from semantic_kernel.contents.chat_history import ChatHistory
+from semantic_kernel.contents.function_call_content import FunctionCallContent
+from semantic_kernel.contents.function_result_content import FunctionResultContent
+from semantic_kernel.contents.utils.author_role import AuthorRole
+
+from promptflow_tool_semantic_kernel.tools.background_loop import BackgroundLoop
+from promptflow_tool_semantic_kernel.tools.history_window import HistoryWindow
+from promptflow_tool_semantic_kernel.tools.kernel_factory import KernelFactory
+from promptflow_tool_semantic_kernel.tools.logger_factory import LoggerFactory
+
+SUMMARY_PREFIX = "Summary of the earlier conversation:\n"
+
+SUMMARY_INSTRUCTIONS = (
+    "Summarize the conversation below for an assistant that continues it. "
+    "Keep names, numbers, decisions, open questions and the results of "
+    "tool calls. Start from the previous summary if there is one. Answer "
+    "with the summary only.")
+
+
+class Summary:
+    """Summary of the first ``covered`` messages of a session."""
+
+    def __init__(self, text: str, covered: int, digest: int):
+        self.text: str = text
+        self.covered: int = covered
+        # Hash of the covered messages, to detect an edited history
+        self.digest: int = digest
+
+
+class HistoryCompactor:
+    """
+    Folds the oldest turns of long sessions into a summary message.
+
+    Once more than ``max_messages`` messages of a session, besides the system
+    messages and the current prompt, are not covered by its summary, all
+    but the newest ``max_messages // 2`` are summarized by ``summarize``,
+    e.g. with a cheaper deployment. The summary is computed on a
+    BackgroundLoop, so it is not cancelled when the request's loop closes:
+    the current request uses the last completed summary of the session, or
+    the full history if there is none yet, and later requests pick up the
+    new one. Summaries are updated incrementally from the previous summary
+    and the messages added since.
+    """
+
+    def __init__(self,
+                 max_sessions: int = 1024,
+                 background: Optional[BackgroundLoop] = None):
+        self.max_sessions: int = max_sessions
+        self._background: Optional[BackgroundLoop] = background
+        self._summaries: "OrderedDict[str, Summary]" = OrderedDict()
+        self._pending: Dict[str, concurrent.futures.Future] = {}
+        self._lock = threading.Lock()
+
+    @staticmethod
+    def text(message: Any) -> str:
+        """Content of a message, with its tool calls and results"""
+        parts = [message.content] if message.content else []
+        for item in message.items:
+            if isinstance(item, FunctionCallContent):
+                parts.append(f"[called {item.name} with {item.arguments}]")
+            elif isinstance(item, FunctionResultContent):
+                parts.append(f"[{item.name} returned {item.result}]")
+        return " ".join(parts)
+
+    @staticmethod
+    def digest(messages: List[Any]) -> int:
+        digest = 0
+        for message in messages:
+            digest = hash(
+                (digest, str(message.role), HistoryCompactor.text(message)))
+        return digest
+
+    @staticmethod
+    def transcript(messages: List[Any]) -> str:
+        return "\n".join(
+            f"{message.role.value}: {HistoryCompactor.text(message)}"
+            for message in messages)
+
+    def get(self, session_id: str) -> Optional[Summary]:
+        with self._lock:
+            summary = self._summaries.get(session_id)
+            if summary is not None:
+                self._summaries.move_to_end(session_id)
+            return summary
+
+    def _put(self, session_id: str, summary: Summary) -> None:
+        with self._lock:
+            self._summaries[session_id] = summary
+            self._summaries.move_to_end(session_id)
+            while len(self._summaries) > self.max_sessions:
+                self._summaries.popitem(last=False)
+
+    def clear(self) -> None:
+        with self._lock:
+            self._summaries.clear()
+
+    @staticmethod
+    def _cut(messages: List[Any], max_messages: int) -> int:
+        """Number of oldest messages to summarize, without splitting a tool
+        call from its results"""
+        keep = max_messages // 2
+        cut = 0
+        for unit in HistoryWindow.units(messages):
+            if cut + len(unit) > len(messages) - keep:
+                break
+            cut += len(unit)
+        return cut
+
+    def compact(self, history: ChatHistory, session_id: str,
+                max_messages: int,
+                summarize: Callable[[str], Awaitable[str]],
+                prompt_messages: int = 1) -> ChatHistory:
+        """Return the history with the summarized turns replaced
+
+        The last ``prompt_messages`` messages come from the current prompt
+        and are never summarized.
+        """
+        messages = history.messages
+        split = max(len(messages) - prompt_messages, 0)
+        system = [
+            message for message in messages[:split]
+            if message.role == AuthorRole.SYSTEM
+        ]
+        body = [
+            message for message in messages[:split]
+            if message.role != AuthorRole.SYSTEM
+        ]
+        if len(body) <= max_messages:
+            return history
+
+        summary = self.get(session_id)
+        if summary is not None and (summary.covered > len(body)
+                                    or self.digest(body[:summary.covered]) !=
+                                    summary.digest):
+            summary = None
+
+        covered = summary.covered if summary is not None else 0
+        if len(body) - covered > max_messages:
+            self._refresh(session_id, summary,
+                          body[:self._cut(body, max_messages)], summarize)
+        if summary is None:
+            return history
+
+        compacted = ChatHistory()
+        compacted.messages.extend(system)
+        compacted.add_system_message(SUMMARY_PREFIX + summary.text)
+        compacted.messages.extend(body[summary.covered:])
+        compacted.messages.extend(messages[split:])
+        return compacted
+
+    def _refresh(self, session_id: str, previous: Optional[Summary],
+                 messages: List[Any], summarize: Callable[[str],
+                                                          Awaitable[str]]):
+        background = self._background or BackgroundLoop.shared()
+        with self._lock:
+            if session_id in self._pending:
+                return
+            future = background.submit(
+                self._summarize(session_id, previous, messages, summarize))
+            self._pending[session_id] = future
+        # Also called when the summary was cancelled
+        future.add_done_callback(lambda _: self._finished(session_id, future))
+
+    def _finished(self, session_id: str,
+                  future: concurrent.futures.Future) -> None:
+        with self._lock:
+            if self._pending.get(session_id) is future:
+                del self._pending[session_id]
+
+    async def _summarize(self, session_id: str, previous: Optional[Summary],
+                         messages: List[Any],
+                         summarize: Callable[[str], Awaitable[str]]) -> None:
+        logger = LoggerFactory.create_logger("history-compactor")
+        start = 0
+        text = ""
+        if previous is not None:
+            start = previous.covered
+            text = f"Previous summary:\n{previous.text}\n\n"
+        text += self.transcript(messages[start:])
+        try:
+            summary = await summarize(text)
+        except Exception as e:
+            logger.warning(
+                f"Summarizing session {session_id} failed: {str(e)}")
+            return
+        self._put(session_id,
+                  Summary(summary, len(messages), self.digest(messages)))
+        logger.info(f"Summarized {len(messages)} messages of session "
+                    f"{session_id}")
+
+    async def wait(self, session_id: str) -> None:
+        """Wait for the pending summary of a session"""
+        with self._lock:
+            future = self._pending.get(session_id)
+        if future is not None:
+            await asyncio.shield(asyncio.wrap_future(future))
+
+    @staticmethod
+    def summarizer(connection: Any,
+                   deployment_name: str) -> Callable[[str], Awaitable[str]]:
+        """Summarize with a deployment of the connection
+
+        The service is created through KernelFactory on the first summary.
+        Summaries run on the compactor's background loop, so the pooled
+        service is reused by the next one.
+        """
+
+        async def summarize(text: str) -> str:
+            _, chat_completion = KernelFactory.create_kernel(
+                connection, deployment_name)
+            try:
+                history = ChatHistory()
+                history.add_system_message(SUMMARY_INSTRUCTIONS)
+                history.add_user_message(text)
+                response = await chat_completion.get_chat_message_content(
+                    chat_history=history,
+                    settings=KernelFactory.get_execution_settings(connection))
+                return str(response)
+            finally:
+                KernelFactory.release(chat_completion)
+
+        return summarize
@@ -0,0 +1,75 @@
+from typing import Any, List
+
+from semantic_kernel.contents.chat_history import ChatHistory
+from semantic_kernel.contents.function_call_content import FunctionCallContent
+from semantic_kernel.contents.utils.author_role import AuthorRole
+
+from promptflow_tool_semantic_kernel.tools.logger_factory import LoggerFactory
+from promptflow_tool_semantic_kernel.tools.token_estimator import TokenEstimator
+
+
+class HistoryWindow:
+    """Fits a chat history into a token budget."""
+
+    @staticmethod
+    def units(messages: List[Any]) -> List[List[Any]]:
+        """Group messages that must be kept together
+
+        An assistant message with tool calls is grouped with the tool
+        results that follow it.
+        """
+        units = []
+        for message in messages:
+            if (units and message.role == AuthorRole.TOOL and any(
+                    isinstance(item, FunctionCallContent)
+                    for item in units[-1][0].items)):
+                units[-1].append(message)
+            else:
+                units.append([message])
+        return units
+
+    @staticmethod
+    def fit(history: ChatHistory,
+            max_tokens: int,
+            estimator: TokenEstimator,
+            prompt_messages: int = 1) -> ChatHistory:
+        """Keep the newest messages that fit into ``max_tokens``
+
+        System messages and the current prompt, the last ``prompt_messages``
+        messages, are always kept. Older turns are dropped from the oldest
+        on, a tool call is only kept together with its results.
+        """
+        messages = history.messages
+        split = max(len(messages) - prompt_messages, 0)
+        if split == 0 or estimator.estimate(messages) <= max_tokens:
+            return history
+
+        system = [
+            message for message in messages[:split]
+            if message.role == AuthorRole.SYSTEM
+        ]
+        current = messages[split:]
+        budget = (max_tokens - estimator.estimate(system) -
+                  estimator.estimate(current))
+
+        kept = []
+        for unit in reversed(
+                HistoryWindow.units([
+                    message for message in messages[:split]
+                    if message.role != AuthorRole.SYSTEM
+                ])):
+            tokens = estimator.estimate(unit)
+            if tokens > budget:
+                break
+            budget -= tokens
+            kept.append(unit)
+
+        windowed = ChatHistory()
+        windowed.messages.extend(system)
+        for unit in reversed(kept):
+            windowed.messages.extend(unit)
+        windowed.messages.extend(current)
+        LoggerFactory.create_logger("history-window").info(
+            f"Kept {len(windowed.messages)} of {len(messages)} messages "
+            f"to fit {max_tokens} tokens")
+        return windowed
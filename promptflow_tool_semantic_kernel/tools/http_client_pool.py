@@ -0,0 +1,239 @@
+import asyncio
+import importlib.util
+import threading
+import weakref
+from collections import OrderedDict
+from typing import Any, Dict, Optional
+
+import httpx
+
+from promptflow_tool_semantic_kernel.tools.logger_factory import LoggerFactory
+from promptflow_tool_semantic_kernel.tools.rate_limiter import capture_rate_limit_headers
+
+# Connection ``configs`` keys and their defaults
+HTTP_CLIENT_DEFAULTS: Dict[str, Any] = {
+    "http_max_connections": 100,
+    "http_max_keepalive_connections": 20,
+    "http_keepalive_expiry": 30.0,
+    "http2": False,
+    "http_connect_timeout": 5.0,
+    "http_read_timeout": 600.0,
+}
+
+
+class _PooledClient:
+    """Shared client, the event loop its connections are bound to and its users."""
+
+    def __init__(self, client: httpx.AsyncClient, loop: Optional[Any]):
+        self.client: httpx.AsyncClient = client
+        # Held weakly, a loop of a finished asyncio.run must not be kept
+        self.loop_ref: Optional[weakref.ref] = (weakref.ref(loop)
+                                                if loop is not None else None)
+        self.users: int = 0
+
+    def usable(self, loop: Optional[Any]) -> bool:
+        """Whether the client is open and bound to ``loop``"""
+        if self.client.is_closed:
+            return False
+        if self.loop_ref is None:
+            return loop is None
+        bound = self.loop_ref()
+        return bound is loop and not bound.is_closed()
+
+    def loop_closed(self) -> bool:
+        if self.loop_ref is None:
+            return False
+        bound = self.loop_ref()
+        return bound is None or bound.is_closed()
+
+
+class HttpClientPool:
+    """
+    Shares one ``httpx.AsyncClient`` per endpoint and client options.
+
+    Clients are additionally scoped to the running event loop because httpx
+    connections cannot be reused across loops. When promptflow runs each
+    line in its own ``asyncio.run``, every line therefore gets a new client,
+    only the requests of one loop, e.g. of an async server, share one.
+
+    At most ``max_size`` clients are kept, least recently used first.
+    Callers of ``get_client`` hand the client back with ``release``, an
+    evicted client is closed on its own loop once it has no users left.
+    Clients of closed loops are dropped without closing, their sockets are
+    closed by the garbage collector as the loop cannot run ``aclose``.
+    """
+
+    def __init__(self, max_size: int = 32):
+        self.max_size: int = max_size
+        self.closed: int = 0
+        self._clients: "OrderedDict[tuple, _PooledClient]" = OrderedDict()
+        # Evicted clients waiting for their users to release them
+        self._retired: Dict[int, _PooledClient] = {}
+        self._lock = threading.Lock()
+
+    @staticmethod
+    def options_from_configs(configs: Optional[Dict[str, Any]]) -> tuple:
+        """Read the HTTP client options from connection configs
+
+        CustomConnection configs are strings, so values are converted to the
+        type of their default.
+        """
+        configs = configs if isinstance(configs, dict) else {}
+        options = []
+        for name, default in HTTP_CLIENT_DEFAULTS.items():
+            value = configs.get(name, default)
+            if isinstance(default, bool):
+                value = str(value).strip().lower() in ("1", "true", "yes")
+            else:
+                value = type(default)(value)
+            options.append((name, value))
+        return tuple(options)
+
+    def get_client(self, endpoint: str, options: tuple) -> httpx.AsyncClient:
+        """Return the shared client for the endpoint, creating it if needed
+
+        The caller uses the client until it calls ``release``.
+        """
+        try:
+            loop = asyncio.get_running_loop()
+        except RuntimeError:
+            loop = None
+
+        # The id of a dead loop can be reused, entries check the loop itself
+        key = (endpoint, options, id(loop) if loop is not None else None)
+        to_close = []
+        with self._lock:
+            self._drop_closed_loops()
+            pooled = self._clients.get(key)
+            if pooled is None or not pooled.usable(loop):
+                if pooled is not None:
+                    self._evict(key, to_close)
+                pooled = self._clients[key] = _PooledClient(
+                    self._create_client(dict(options)), loop)
+            pooled.users += 1
+            self._clients.move_to_end(key)
+            while len(self._clients) > self.max_size:
+                self._evict(next(iter(self._clients)), to_close)
+        self._close_all(to_close)
+        return pooled.client
+
+    def release(self, client: Any) -> None:
+        """Hand back a client of ``get_client``
+
+        An evicted client is closed when its last user releases it.
+        """
+        to_close = []
+        with self._lock:
+            pooled = self._retired.get(id(client))
+            if pooled is None:
+                pooled = next((pooled for pooled in self._clients.values()
+                               if pooled.client is client), None)
+            if pooled is None:
+                return
+            pooled.users = max(0, pooled.users - 1)
+            if pooled.users == 0 and self._retired.get(id(client)) is pooled:
+                del self._retired[id(client)]
+                to_close.append(pooled)
+        self._close_all(to_close)
+
+    def owns(self, client: Any) -> bool:
+        """Whether the given httpx client is one of the shared clients"""
+        with self._lock:
+            return id(client) in self._retired or any(
+                pooled.client is client for pooled in self._clients.values())
+
+    def __len__(self) -> int:
+        with self._lock:
+            return len(self._clients)
+
+    def stats(self) -> Dict[str, int]:
+        """Return the number of pooled, retired and closed clients"""
+        with self._lock:
+            return {
+                "size": len(self._clients),
+                "retired": len(self._retired),
+                "closed": self.closed,
+            }
+
+    def clear(self) -> None:
+        """Forget all shared clients and close those of open loops"""
+        with self._lock:
+            self._drop_closed_loops()
+            to_close = list(self._clients.values()) + list(
+                self._retired.values())
+            self._clients.clear()
+            self._retired.clear()
+        self._close_all(to_close)
+
+    def _evict(self, key: tuple, to_close: list) -> None:
+        """Drop a client, it is closed by the caller outside the lock"""
+        pooled = self._clients.pop(key)
+        if pooled.client.is_closed:
+            return
+        if pooled.users > 0:
+            self._retired[id(pooled.client)] = pooled
+        else:
+            to_close.append(pooled)
+
+    def _drop_closed_loops(self) -> None:
+        # Their connections died with the loop, closing would need it
+        for key in [
+                key for key, pooled in self._clients.items()
+                if pooled.loop_closed()
+        ]:
+            del self._clients[key]
+        for client_id in [
+                client_id for client_id, pooled in self._retired.items()
+                if pooled.loop_closed()
+        ]:
+            del self._retired[client_id]
+
+    def _close_all(self, clients: list) -> None:
+        for pooled in clients:
+            self._close(pooled)
+
+    def _close(self, pooled: _PooledClient) -> None:
+        """Close a client on the loop its connections are bound to"""
+        client = pooled.client
+        try:
+            running = asyncio.get_running_loop()
+        except RuntimeError:
+            running = None
+        loop = pooled.loop_ref() if pooled.loop_ref is not None else running
+        try:
+            if loop is None:
+                asyncio.run(client.aclose())
+            elif loop is running:
+                loop.create_task(client.aclose())
+            else:
+                loop.call_soon_threadsafe(
+                    lambda: loop.create_task(client.aclose()))
+        except RuntimeError:
+            # Its loop is closed, the connections died with it
+            return
+        with self._lock:
+            self.closed += 1
+
+    @staticmethod
+    def _create_client(options: Dict[str, Any]) -> httpx.AsyncClient:
+        http2 = options["http2"]
+        if http2 and importlib.util.find_spec("h2") is None:
+            logger = LoggerFactory.create_logger("http-client-pool")
+            logger.warning(
+                "http2 is enabled but the 'h2' package is not installed, "
+                "falling back to HTTP/1.1")
+            http2 = False
+
+        return httpx.AsyncClient(
+            limits=httpx.Limits(
+                max_connections=options["http_max_connections"],
+                max_keepalive_connections=options[
+                    "http_max_keepalive_connections"],
+                keepalive_expiry=options["http_keepalive_expiry"],
+            ),
+            timeout=httpx.Timeout(options["http_read_timeout"],
+                                  connect=options["http_connect_timeout"]),
+            http2=http2,
+            follow_redirects=True,
+            event_hooks={"response": [capture_rate_limit_headers]},
+        )
@@ -1,22 +1,62 @@
-from typing import Any
+import importlib
+import json
+from typing import Any, Dict, List
 
 from semantic_kernel import Kernel
-from semantic_kernel.connectors.ai.open_ai import AzureChatCompletion
-from semantic_kernel.connectors.ai.open_ai import OpenAIChatCompletion
-from semantic_kernel.connectors.ai.google.google_ai import GoogleAIChatCompletion
-from semantic_kernel.connectors.ai.open_ai.prompt_execution_settings.azure_chat_prompt_execution_settings import (
-    AzureChatPromptExecutionSettings, )
-from semantic_kernel.connectors.ai.open_ai.prompt_execution_settings.open_ai_prompt_execution_settings import (
-    OpenAIChatPromptExecutionSettings, )
-from semantic_kernel.connectors.ai.google.google_ai.google_ai_prompt_execution_settings import GoogleAIChatPromptExecutionSettings
 
 from promptflow.connections import CustomConnection, AzureOpenAIConnection, OpenAIConnection
 
 from promptflow_tool_semantic_kernel.tools.logger_factory import LoggerFactory
+from promptflow_tool_semantic_kernel.tools.retry_policy import RetryPolicy
+from promptflow_tool_semantic_kernel.tools.service_pool import ServicePool
+from promptflow_tool_semantic_kernel.tools.http_client_pool import HttpClientPool
+from promptflow_tool_semantic_kernel.tools.delegating_chat_completion import DelegatingChatCompletion
+from promptflow_tool_semantic_kernel.tools.routing_chat_completion import Backend, RoutingChatCompletion
+from promptflow_tool_semantic_kernel.tools.rate_limiter import RateLimiter
+from promptflow_tool_semantic_kernel.tools.rate_limited_chat_completion import RateLimitedChatCompletion
+from promptflow_tool_semantic_kernel.tools.circuit_breaker import CircuitBreaker
+from promptflow_tool_semantic_kernel.tools.circuit_breaking_chat_completion import CircuitBreakingChatCompletion
+
+
+# Provider connectors are imported the first time a connection needs them,
+# e.g. the Google AI connector alone takes about a second to import.
+_PROVIDER_MODULES = {
+    "AzureChatCompletion": "semantic_kernel.connectors.ai.open_ai",
+    "OpenAIChatCompletion": "semantic_kernel.connectors.ai.open_ai",
+    "AzureChatExecutionSettings":
+    "promptflow_tool_semantic_kernel.tools.execution_settings",
+    "OpenAIChatExecutionSettings":
+    "promptflow_tool_semantic_kernel.tools.execution_settings",
+    "GoogleAIChatCompletion": "semantic_kernel.connectors.ai.google.google_ai",
+    "GoogleAIChatPromptExecutionSettings":
+    "semantic_kernel.connectors.ai.google.google_ai",
+}
+
+
+def __getattr__(name: str) -> Any:
+    module_name = _PROVIDER_MODULES.get(name)
+    if module_name is None:
+        raise AttributeError(f"module {__name__!r} has no attribute {name!r}")
+    value = getattr(importlib.import_module(module_name), name)
+    globals()[name] = value
+    return value
+
+
+def _provider(name: str) -> Any:
+    """Return a provider class, importing its connector on first use"""
+    # Looked up through the module so patched classes are honored
+    return globals()[name] if name in globals() else __getattr__(name)
 
 
 class KernelFactory:
 
+    # Chat completion services are reused across requests of one event loop,
+    # kernels are not because plugins get registered on them per request.
+    # Lines run in their own asyncio.run get services of their own.
+    service_pool: ServicePool = ServicePool(
+        close_callback=lambda service: KernelFactory._close_service(service))
+    http_client_pool: HttpClientPool = HttpClientPool()
+
     @staticmethod
     def create_kernel(connection: Any, model_or_deployment: str) -> tuple:
         """Create and configure a Semantic Kernel instance based on connection type
@@ -26,23 +66,18 @@ class KernelFactory:
             model_or_deployment: The model ID (OpenAI) or deployment name (Azure OpenAI)
 
         Returns:
-            tuple: (kernel, chat_completion_service)
+            tuple: (kernel, chat_completion_service), the service is passed
+            to ``release`` when the request is done
         """
         logger = LoggerFactory.create_logger("kernel-factory")
 
         try:
             kernel = Kernel()
 
-            # Create the appropriate chat completion service based on connection type
-            if KernelFactory._is_azure_connection(connection):
-                chat_completion = KernelFactory._create_azure_chat_completion(
-                    connection, model_or_deployment)
-            elif KernelFactory._is_google_ai_connection(connection):
-                chat_completion = KernelFactory._create_google_ai_chat_completion(
-                    connection, model_or_deployment)
-            else:
-                chat_completion = KernelFactory._create_openai_chat_completion(
-                    connection, model_or_deployment)
+            chat_completion = KernelFactory.service_pool.get_or_create(
+                KernelFactory._service_key(connection, model_or_deployment),
+                lambda: KernelFactory._create_chat_completion(
+                    connection, model_or_deployment))
 
             kernel.add_service(chat_completion)
             return kernel, chat_completion
@@ -50,6 +85,204 @@ class KernelFactory:
             logger.error(f"Failed to create kernel: {str(e)}")
             raise
 
+    @staticmethod
+    def release(chat_completion: Any) -> None:
+        """Release the service of ``create_kernel`` once the request is done
+
+        Pooled services are only closed after their last request released
+        them.
+        """
+        KernelFactory.service_pool.release(chat_completion)
+
+    @staticmethod
+    def _create_chat_completion(connection: Any, model_or_deployment: str):
+        """Create the chat completion service matching the connection type"""
+        if KernelFactory._get_backend_definitions(connection):
+            return KernelFactory._create_routing_chat_completion(
+                connection, model_or_deployment)
+        elif KernelFactory._is_azure_connection(connection):
+            chat_completion = KernelFactory._create_azure_chat_completion(
+                connection, model_or_deployment)
+            KernelFactory._use_shared_http_client(chat_completion, connection)
+        elif KernelFactory._is_google_ai_connection(connection):
+            # The Google AI SDK manages its own transport, there is no
+            # httpx client to share
+            chat_completion = KernelFactory._create_google_ai_chat_completion(
+                connection, model_or_deployment)
+        else:
+            chat_completion = KernelFactory._create_openai_chat_completion(
+                connection, model_or_deployment)
+            KernelFactory._use_shared_http_client(chat_completion, connection)
+
+        # The breaker goes outside so an open circuit fails fast instead of
+        # waiting for rate limit budget
+        return KernelFactory._apply_circuit_breaker(
+            KernelFactory._apply_rate_limit(chat_completion, connection),
+            connection)
+
+    @staticmethod
+    def _get_backend_definitions(connection: Any) -> List[Dict[str, Any]]:
+        """Read the list of backends from a CustomConnection, if any"""
+        configs = getattr(connection, "configs", {})
+        if not isinstance(configs, dict) or not configs.get("backends"):
+            return []
+        backends = configs["backends"]
+        # CustomConnection configs only hold strings
+        if isinstance(backends, str):
+            backends = json.loads(backends)
+        return backends
+
+    @staticmethod
+    def _create_routing_chat_completion(connection: Any,
+                                        deployment_name: str):
+        """Create a service that balances over the configured backends
+
+        Each backend is a dict with ``base_url`` (Azure) or ``api_type:
+        openai``, and optionally ``deployment_name``, ``weight``, ``name`` and
+        ``api_key_secret``, the name of the secret holding its api key.
+        Other connection configs, e.g. the HTTP options, are inherited.
+        """
+        shared_configs = {
+            key: value
+            for key, value in connection.configs.items()
+            if key not in ("backends", "routing_strategy", "base_url")
+        }
+        secrets = getattr(connection, "secrets", {}) or {}
+        backend_only_keys = ("deployment_name", "weight", "name",
+                             "api_key_secret")
+
+        backends = []
+        for definition in KernelFactory._get_backend_definitions(connection):
+            configs = dict(shared_configs)
+            configs.update({
+                key: value
+                for key, value in definition.items()
+                if key not in backend_only_keys
+            })
+            api_key = secrets.get(definition.get("api_key_secret", "api_key"))
+            backend_connection = CustomConnection(secrets={"api_key": api_key},
+                                                  configs=configs)
+            service = KernelFactory._create_chat_completion(
+                backend_connection,
+                definition.get("deployment_name", deployment_name))
+            backends.append(
+                Backend(service,
+                        weight=float(definition.get("weight", 1.0)),
+                        name=definition.get("name")))
+
+        return RoutingChatCompletion(
+            backends,
+            strategy=connection.configs.get("routing_strategy",
+                                            RoutingChatCompletion.LEAST_LOADED))
+
+    @staticmethod
+    def _use_shared_http_client(chat_completion: Any, connection: Any) -> None:
+        """Rebind the service's OpenAI client onto the shared HTTP client"""
+        client = getattr(chat_completion, "client", None)
+        if client is None:
+            return
+
+        options = HttpClientPool.options_from_configs(
+            getattr(connection, "configs", {}))
+        http_client = KernelFactory.http_client_pool.get_client(
+            str(client.base_url), options)
+        options = {}
+        if RetryPolicy.configured(getattr(connection, "configs", {})):
+            # Retries are left to ResponseStrategy's retry policy and
+            # failover to the routing service, SDK retries would multiply
+            # with them
+            options["max_retries"] = 0
+        chat_completion.client = client.with_options(
+            http_client=http_client, timeout=http_client.timeout, **options)
+
+    @staticmethod
+    def _apply_rate_limit(chat_completion: Any, connection: Any):
+        """Wrap the service in the deployment's rate limiter, if configured"""
+        configs = getattr(connection, "configs", {})
+        if not isinstance(configs, dict):
+            return chat_completion
+        requests_per_minute = configs.get("requests_per_minute")
+        tokens_per_minute = configs.get("tokens_per_minute")
+        if not requests_per_minute and not tokens_per_minute:
+            return chat_completion
+
+        rate_limiter = RateLimiter.for_deployment(
+            (chat_completion.service_url(), chat_completion.ai_model_id),
+            float(requests_per_minute) if requests_per_minute else None,
+            float(tokens_per_minute) if tokens_per_minute else None)
+        return RateLimitedChatCompletion(chat_completion, rate_limiter)
+
+    @staticmethod
+    def _apply_circuit_breaker(chat_completion: Any, connection: Any):
+        """Guard the service with its endpoint's circuit breaker, if configured
+
+        Enabled by ``circuit_breaker_failure_threshold`` and/or
+        ``circuit_breaker_error_rate``, ``circuit_breaker_reset_timeout`` sets
+        how many seconds the circuit stays open.
+        """
+        configs = getattr(connection, "configs", {})
+        if not isinstance(configs, dict):
+            return chat_completion
+        failure_threshold = configs.get("circuit_breaker_failure_threshold")
+        error_rate = configs.get("circuit_breaker_error_rate")
+        if not failure_threshold and not error_rate:
+            return chat_completion
+
+        options = {}
+        if failure_threshold:
+            options["failure_threshold"] = int(failure_threshold)
+        if error_rate:
+            options["error_rate_threshold"] = float(error_rate)
+        if configs.get("circuit_breaker_reset_timeout"):
+            options["reset_timeout"] = float(
+                configs["circuit_breaker_reset_timeout"])
+        # Services without a URL, e.g. Google AI, get one breaker per model
+        endpoint = chat_completion.service_url() or (
+            f"{type(chat_completion).__name__}:{chat_completion.ai_model_id}")
+        circuit_breaker = CircuitBreaker.for_endpoint(endpoint, **options)
+        return CircuitBreakingChatCompletion(chat_completion, circuit_breaker)
+
+    @staticmethod
+    def _close_service(chat_completion: Any) -> None:
+        """Close an evicted service, a shared HTTP client is released"""
+        if isinstance(chat_completion, DelegatingChatCompletion):
+            for service in chat_completion.wrapped_services():
+                KernelFactory._close_service(service)
+            return
+
+        client = getattr(chat_completion, "client", None)
+        http_client = getattr(client, "_client", None)
+        if KernelFactory.http_client_pool.owns(http_client):
+            # Closed by the pool once no other service uses it
+            KernelFactory.http_client_pool.release(http_client)
+            return
+        ServicePool.close_service(chat_completion)
+
+    @staticmethod
+    def _service_key(connection: Any, model_or_deployment: str) -> str:
+        """Fingerprint the connection settings that identify a service"""
+        configs = getattr(connection, "configs", {}) or {}
+        secrets = getattr(connection, "secrets", {}) or {}
+        if KernelFactory._is_azure_connection(connection):
+            provider = "azure"
+        elif KernelFactory._is_google_ai_connection(connection):
+            provider = "google"
+        else:
+            provider = "openai"
+
+        return ServicePool.fingerprint(
+            connection.__class__.__name__,
+            provider,
+            getattr(connection, "api_base", None) or configs.get("base_url"),
+            secrets.get("api_key"),
+            getattr(connection, "organization", None)
+            or configs.get("organization"),
+            configs.get("model_id"),
+            sorted(configs.items()) if isinstance(configs, dict) else None,
+            sorted(secrets.items()) if isinstance(secrets, dict) else None,
+            model_or_deployment,
+        )
+
     @staticmethod
     def _is_azure_connection(connection: Any) -> bool:
         """Determine if the connection is for Azure OpenAI"""
@@ -95,9 +328,10 @@ class KernelFactory:
             base_url = getattr(connection, "configs", {}).get("base_url")
             api_key = getattr(connection, "secrets", {}).get("api_key")
 
-        return AzureChatCompletion(api_key=api_key,
-                                   deployment_name=deployment_name,
-                                   base_url=base_url)
+        azure_chat_completion = _provider("AzureChatCompletion")
+        return azure_chat_completion(api_key=api_key,
+                                     deployment_name=deployment_name,
+                                     base_url=base_url)
 
     @staticmethod
     def _create_openai_chat_completion(connection: Any, model_id: str):
@@ -112,9 +346,10 @@ class KernelFactory:
             api_key = getattr(connection, "secrets", {}).get("api_key")
             org_id = getattr(connection, "configs", {}).get("organization")
 
-        return OpenAIChatCompletion(api_key=api_key,
-                                    ai_model_id=model_id,
-                                    org_id=org_id)
+        openai_chat_completion = _provider("OpenAIChatCompletion")
+        return openai_chat_completion(api_key=api_key,
+                                      ai_model_id=model_id,
+                                      org_id=org_id)
 
     @staticmethod
     def _create_google_ai_chat_completion(connection: Any, model_id: str):
@@ -129,7 +364,8 @@ class KernelFactory:
         if not model:
             model = "gemini-2.0-flash"
 
-        return GoogleAIChatCompletion(gemini_model_id=model, api_key=api_key)
+        google_ai_chat_completion = _provider("GoogleAIChatCompletion")
+        return google_ai_chat_completion(gemini_model_id=model, api_key=api_key)
 
     @staticmethod
     def get_execution_settings(
@@ -137,10 +373,12 @@ class KernelFactory:
     ) -> Any:
         """
         Get the appropriate execution settings based on the connection type
+
+        Azure OpenAI and OpenAI settings also accept ``parallel_tool_calls``.
         """
         if KernelFactory._is_azure_connection(connection):
-            return AzureChatPromptExecutionSettings()
+            return _provider("AzureChatExecutionSettings")()
         elif KernelFactory._is_google_ai_connection(connection):
-            return GoogleAIChatPromptExecutionSettings()
+            return _provider("GoogleAIChatPromptExecutionSettings")()
         else:
-            return OpenAIChatPromptExecutionSettings()
+            return _provider("OpenAIChatExecutionSettings")()
@@ -0,0 +1,87 @@
+import inspect
+import threading
+from typing import Any, Callable
+
+from semantic_kernel.functions.kernel_function_from_method import KernelFunctionFromMethod
+from semantic_kernel.functions.kernel_plugin import KernelPlugin
+
+
+class LazyInstance:
+    """Builds a plugin instance with ``factory`` on first use, once."""
+
+    def __init__(self, factory: Callable[[], Any]):
+        self.factory: Callable[[], Any] = factory
+        self._instance: Any = None
+        self._lock = threading.Lock()
+
+    @property
+    def is_created(self) -> bool:
+        return self._instance is not None
+
+    def get(self) -> Any:
+        if self._instance is None:
+            with self._lock:
+                if self._instance is None:
+                    self._instance = self.factory()
+        return self._instance
+
+
+class LazyPlugin:
+    """
+    Builds KernelPlugins from a plugin class without constructing it.
+
+    The ``@kernel_function`` metadata is read from the class, so the model
+    sees the functions right away. The instance is only created when one of
+    them is invoked.
+    """
+
+    @staticmethod
+    def from_class(plugin_name: str, plugin_class: type,
+                   instance: LazyInstance) -> KernelPlugin:
+        functions = []
+        # Only instance methods are bound to the instance, static and class
+        # methods are looked up as plain functions on the class as well
+        for name, member in inspect.getmembers(plugin_class,
+                                               inspect.isfunction):
+            if not getattr(member, "__kernel_function__", False):
+                continue
+            if isinstance(inspect.getattr_static(plugin_class, name),
+                          (staticmethod, classmethod)):
+                continue
+            method = LazyPlugin._bind_lazily(member, instance)
+            functions.append(
+                KernelFunctionFromMethod(method=method,
+                                         plugin_name=plugin_name))
+        return KernelPlugin(name=plugin_name, functions=functions)
+
+    @staticmethod
+    def _bind_lazily(function: Callable, instance: LazyInstance) -> Callable:
+        """Wrap an unbound method so it runs on the lazily built instance
+
+        The wrapper keeps the kind of the function (coroutine, generator,
+        plain) because Semantic Kernel derives how to invoke it from that.
+        """
+        if inspect.isasyncgenfunction(function):
+
+            async def method(**kwargs):
+                async for item in function(instance.get(), **kwargs):
+                    yield item
+        elif inspect.iscoroutinefunction(function):
+
+            async def method(**kwargs):
+                return await function(instance.get(), **kwargs)
+        elif inspect.isgeneratorfunction(function):
+
+            def method(**kwargs):
+                yield from function(instance.get(), **kwargs)
+        else:
+
+            def method(**kwargs):
+                return function(instance.get(), **kwargs)
+
+        method.__name__ = function.__name__
+        method.__qualname__ = function.__qualname__
+        method.__doc__ = function.__doc__
+        # Copies the __kernel_function_*__ attributes of the decorator
+        method.__dict__.update(function.__dict__)
+        return method
@@ -0,0 +1,222 @@
+import abc
+import importlib
+import json
+import os
+import sqlite3
+import threading
+from typing import Any, Dict, Iterable, List, Optional
+
+
+class LightStore(abc.ABC):
+    """
+    Storage of the devices of a LightsPlugin.
+
+    Lights are dicts with at least ``id``, ``name`` and ``is_on``. Stores
+    return copies, so callers cannot change the stored lights, and must be
+    safe to use from several threads.
+
+    Stores returned by ``shared`` live for the whole process, independent
+    of the plugin instances using them.
+    """
+
+    # Short names accepted by the ``store`` plugin parameter
+    BACKENDS: Dict[str, str] = {
+        "memory":
+        "promptflow_tool_semantic_kernel.tools.light_store.InMemoryLightStore",
+        "sqlite":
+        "promptflow_tool_semantic_kernel.tools.light_store.SqliteLightStore",
+    }
+
+    _registry: Dict[tuple, "LightStore"] = {}
+    _registry_lock = threading.Lock()
+
+    @staticmethod
+    def create(store: Any = None, **options) -> "LightStore":
+        """Build a store from a short name, a ``module.Class`` path or a
+        LightStore instance"""
+        if isinstance(store, LightStore):
+            return store
+        path = LightStore.BACKENDS.get(store or "memory", store)
+        module_name, _, class_name = path.rpartition(".")
+        store_class = getattr(importlib.import_module(module_name),
+                              class_name)
+        return store_class(**options)
+
+    @classmethod
+    def shared(cls, store: Any = None, **options) -> "LightStore":
+        """Return the process-wide store of a backend and options
+
+        Plugins built again with the same parameters, e.g. after they were
+        evicted from the plugin registry or reloaded, keep their lights.
+        """
+        if isinstance(store, LightStore):
+            return store
+        key = (store or "memory",
+               json.dumps(options, sort_keys=True, default=repr))
+        with cls._registry_lock:
+            shared = cls._registry.get(key)
+            if shared is None:
+                shared = cls._registry[key] = cls.create(store, **options)
+            return shared
+
+    @classmethod
+    def clear_registry(cls) -> None:
+        with cls._registry_lock:
+            cls._registry.clear()
+
+    @abc.abstractmethod
+    def get(self, ids: Iterable[int]) -> List[Dict[str, Any]]:
+        """Return the lights with the given ids, in that order"""
+
+    @abc.abstractmethod
+    def all(self) -> List[Dict[str, Any]]:
+        """Return all lights, ordered by id"""
+
+    @abc.abstractmethod
+    def set_states(self, states: Dict[int, bool]) -> List[Dict[str, Any]]:
+        """Switch lights by id and return the changed lights"""
+
+
+class InMemoryLightStore(LightStore):
+    """
+    Lights indexed by id in a dict.
+
+    Stored lights are never changed in place, a write replaces them. Lookups
+    by id therefore need no lock, writes and full listings take one.
+    """
+
+    def __init__(self, lights: Optional[List[Dict[str, Any]]] = None):
+        self._lights: Dict[int, Dict[str, Any]] = {
+            light["id"]: dict(light)
+            for light in lights or []
+        }
+        self._lock = threading.Lock()
+
+    def get(self, ids: Iterable[int]) -> List[Dict[str, Any]]:
+        lights = self._lights
+        found = []
+        for id in ids:
+            light = lights.get(id)
+            if light is not None:
+                found.append(dict(light))
+        return found
+
+    def all(self) -> List[Dict[str, Any]]:
+        with self._lock:
+            lights = list(self._lights.values())
+        lights.sort(key=lambda light: light["id"])
+        return [dict(light) for light in lights]
+
+    def set_states(self, states: Dict[int, bool]) -> List[Dict[str, Any]]:
+        changed = []
+        with self._lock:
+            for id, is_on in states.items():
+                light = self._lights.get(id)
+                if light is None:
+                    continue
+                light = dict(light, is_on=is_on)
+                self._lights[id] = light
+                changed.append(dict(light))
+        return changed
+
+
+class SqliteLightStore(LightStore):
+    """
+    Lights in a local SQLite database, shared by all processes using it.
+
+    The database is at ``path``, by default the ``LIGHTS_DB_PATH``
+    environment variable or ``~/.promptflow/lights.db``. Relative paths are
+    resolved once, so worker processes with another working directory use
+    the same file.
+
+    The database runs in WAL mode, so readers in other threads and worker
+    processes are not blocked by a writer, and reads are served from a
+    memory-mapped file of up to ``mmap_size`` bytes. Every
+    ``set_states`` call is one transaction. ``lights`` are inserted when
+    their ids are missing, the state of existing lights is kept. Each
+    thread uses its own connection.
+    """
+
+    # Maximum number of ? placeholders in one statement
+    CHUNK_SIZE = 500
+
+    DEFAULT_PATH = os.path.join("~", ".promptflow", "lights.db")
+
+    def __init__(self,
+                 path: Optional[str] = None,
+                 lights: Optional[List[Dict[str, Any]]] = None,
+                 timeout: float = 5.0,
+                 mmap_size: int = 256 * 1024 * 1024):
+        path = path or os.environ.get("LIGHTS_DB_PATH") or self.DEFAULT_PATH
+        self.path: str = os.path.abspath(os.path.expanduser(path))
+        os.makedirs(os.path.dirname(self.path), exist_ok=True)
+        self.timeout: float = timeout
+        self.mmap_size: int = mmap_size
+        self._local = threading.local()
+        connection = self._connection()
+        with connection:
+            connection.execute("CREATE TABLE IF NOT EXISTS lights ("
+                               "id INTEGER PRIMARY KEY, name TEXT NOT NULL, "
+                               "is_on INTEGER NOT NULL)")
+            connection.executemany(
+                "INSERT OR IGNORE INTO lights (id, name, is_on) "
+                "VALUES (?, ?, ?)",
+                ((light["id"], light["name"], int(light["is_on"]))
+                 for light in lights or []))
+
+    def __getstate__(self) -> Dict[str, Any]:
+        # Connections stay in their process, e.g. for process pools
+        return {
+            "path": self.path,
+            "timeout": self.timeout,
+            "mmap_size": self.mmap_size
+        }
+
+    def __setstate__(self, state: Dict[str, Any]) -> None:
+        self.__dict__.update(state)
+        self._local = threading.local()
+
+    def _connection(self) -> sqlite3.Connection:
+        connection = getattr(self._local, "connection", None)
+        if connection is None:
+            connection = sqlite3.connect(self.path, timeout=self.timeout)
+            connection.execute("PRAGMA journal_mode=WAL")
+            connection.execute("PRAGMA synchronous=NORMAL")
+            connection.execute(f"PRAGMA mmap_size={int(self.mmap_size)}")
+            self._local.connection = connection
+        return connection
+
+    @staticmethod
+    def _light(row: tuple) -> Dict[str, Any]:
+        return {"id": row[0], "name": row[1], "is_on": bool(row[2])}
+
+    def _select(self, connection: sqlite3.Connection,
+                ids: List[int]) -> Dict[int, Dict[str, Any]]:
+        found = {}
+        for start in range(0, len(ids), self.CHUNK_SIZE):
+            chunk = ids[start:start + self.CHUNK_SIZE]
+            rows = connection.execute(
+                "SELECT id, name, is_on FROM lights WHERE id IN "
+                f"({', '.join('?' * len(chunk))})", chunk)
+            for row in rows:
+                found[row[0]] = self._light(row)
+        return found
+
+    def get(self, ids: Iterable[int]) -> List[Dict[str, Any]]:
+        ids = list(ids)
+        found = self._select(self._connection(), ids)
+        return [found[id] for id in ids if id in found]
+
+    def all(self) -> List[Dict[str, Any]]:
+        rows = self._connection().execute(
+            "SELECT id, name, is_on FROM lights ORDER BY id")
+        return [self._light(row) for row in rows]
+
+    def set_states(self, states: Dict[int, bool]) -> List[Dict[str, Any]]:
+        connection = self._connection()
+        with connection:
+            connection.executemany("UPDATE lights SET is_on = ? WHERE id = ?",
+                                   ((int(is_on), id)
+                                    for id, is_on in states.items()))
+            found = self._select(connection, list(states))
+        return [found[id] for id in states if id in found]
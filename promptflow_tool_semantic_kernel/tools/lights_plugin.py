@@ -1,9 +1,38 @@
-from typing import Annotated
+from typing import Annotated, Any, Dict, List, Optional
 from semantic_kernel.functions import kernel_function
 
+from promptflow_tool_semantic_kernel.tools.function_result_cache import invalidates_cache
+from promptflow_tool_semantic_kernel.tools.light_store import LightStore
+
 
 class LightsPlugin:
-    lights = [
+    """
+    Lights indexed by id in a thread-safe store.
+
+    The plugin ``parameters`` select the store: ``store`` is a short name
+    of LightStore.BACKENDS (``memory``, ``sqlite``) or a ``module.Class``
+    path, ``store_options`` are passed to its constructor and ``lights``
+    seeds the store. Plugins with the same parameters use the same
+    process-wide store.
+    """
+
+    # The state lives in the shared store, instances can be shared between
+    # requests and rebuilt without losing it
+    shareable = True
+
+    # Words the similarity cache counts as the same, and words it never
+    # matches with each other
+    similar_words = {
+        "switch": "turn",
+        "put": "turn",
+        "shut": "turn",
+        "toggle": "turn",
+        "lamp": "light",
+        "bulb": "light",
+    }
+    opposite_words = [("on", "off"), ("brighter", "darker")]
+
+    DEFAULT_LIGHTS = [
         {
             "id": 1,
             "name": "Table Lamp",
@@ -21,13 +50,30 @@ class LightsPlugin:
         },
     ]
 
+    def __init__(self,
+                 store: Any = None,
+                 store_options: Optional[Dict[str, Any]] = None,
+                 lights: Optional[List[Dict[str, Any]]] = None):
+        options = dict(store_options or {})
+        if store is None or store in LightStore.BACKENDS:
+            options.setdefault(
+                "lights", self.DEFAULT_LIGHTS if lights is None else lights)
+        elif lights is not None:
+            options.setdefault("lights", lights)
+        self.store: LightStore = LightStore.shared(store, **options)
+
+    # Not cached: lookups by id are as fast as a cache hit, and a cache
+    # could not see the changes other processes make to a SQLite store
     @kernel_function(
         name="get_lights",
         description="Gets a list of lights and their current state",
     )
     def get_state(
-        self, id: Annotated[int, "The ID of the light to get its state"],
-        all: Annotated[bool, "Flag to get all lights"]
+        self,
+        id: Annotated[int, "The ID of the light to get its state"],
+        all: Annotated[bool, "Flag to get all lights"],
+        ids: Annotated[list[int] | None,
+                       "The IDs of several lights to get their state"] = None
     ) -> Annotated[list[dict], "A list of lights with their properties"]:
         """
         Gets a list of lights and their current state.
@@ -36,15 +82,15 @@ class LightsPlugin:
             list[dict]: A list of dictionaries where each dictionary represents a light
                  with properties such as id, name, and is_on state.
         """
+        if ids:
+            return self.store.get(ids)
         if id:
-            for light in self.lights:
-                if light["id"] == id:
-                    return [light]
-            return []
+            return self.store.get([id])
         if all:
-            return self.lights
+            return self.store.all()
         return []
 
+    @invalidates_cache
     @kernel_function(
         name="change_state",
         description="Changes the state of the light",
@@ -55,8 +101,20 @@ class LightsPlugin:
         is_on: Annotated[bool, "Whether to turn the light on or off"],
     ) -> str:
         """Changes the state of the light."""
-        for light in self.lights:
-            if light["id"] == id:
-                light["is_on"] = is_on
-                return light
+        changed = self.store.set_states({id: is_on})
+        if changed:
+            return changed[0]
         return "Light state changed successfully"
+
+    @invalidates_cache
+    @kernel_function(
+        name="change_states",
+        description="Turns several lights on or off at once",
+    )
+    def change_states(
+        self,
+        ids: Annotated[list[int], "The IDs of the lights to change"],
+        is_on: Annotated[bool, "Whether to turn the lights on or off"],
+    ) -> Annotated[list[dict], "The changed lights"]:
+        """Changes the state of several lights in one call."""
+        return self.store.set_states({id: is_on for id in ids})
@@ -1,8 +1,14 @@
-import importlib
-from typing import List, Dict, Any
+import functools
+import json
+from typing import List, Dict, Any, Optional, Tuple
 import logging
 
 from semantic_kernel import Kernel
+from semantic_kernel.functions.kernel_plugin import KernelPlugin
+
+from promptflow_tool_semantic_kernel.tools.function_offloader import FunctionOffloader
+from promptflow_tool_semantic_kernel.tools.plugin_registry import PluginRegistry
+from promptflow_tool_semantic_kernel.tools.service_pool import ServicePool
 
 
 class PluginManager:
@@ -10,11 +16,57 @@ class PluginManager:
     Manages the registration of plugins to a semantic kernel.
     """
 
+    # Classes and shareable plugins are resolved once per process
+    registry: PluginRegistry = PluginRegistry()
+    # Synchronous plugin functions run in these pools
+    offloader: FunctionOffloader = FunctionOffloader()
+
     def __init__(self, kernel: Kernel, logger: logging.Logger):
         self.kernel: Kernel = kernel
         self.logger: logging.Logger = logger
 
-    def register_plugins(self, plugins: List[Dict[str, Any]]) -> None:
+    @staticmethod
+    def plugins_key(plugins: List[Dict[str, Any]],
+                    generation: Optional[int] = None) -> str:
+        """Fingerprint a list of plugin definitions
+
+        The fingerprint changes when a plugin module is reloaded, it is
+        taken for the registry ``generation`` the plugins were resolved in,
+        by default the current one.
+        """
+        if generation is None:
+            generation = PluginManager.registry.generation
+        return ServicePool.fingerprint(
+            json.dumps([plugins, generation], sort_keys=True, default=repr))
+
+    @staticmethod
+    def similarity_vocabulary(
+        plugins: List[Dict[str, Any]]
+    ) -> Tuple[Dict[str, str], List[Tuple[str, str]]]:
+        """Collect the words plugin classes teach the similarity cache
+
+        Plugin classes can map words onto a synonym in ``similar_words``
+        and list pairs of words with opposite meaning in
+        ``opposite_words``. Words are lowercase and singular. Plugins that
+        cannot be resolved are skipped, ``register_plugins`` reports them.
+        """
+        synonyms: Dict[str, str] = {}
+        opposites: List[Tuple[str, str]] = []
+        for plugin in plugins or []:
+            if not isinstance(plugin, dict):
+                continue
+            try:
+                plugin_class = PluginManager.registry.resolve_class(
+                    plugin.get("module"), plugin.get("class"))
+            except Exception:
+                continue
+            synonyms.update(getattr(plugin_class, "similar_words", {}))
+            opposites.extend(
+                tuple(pair)
+                for pair in getattr(plugin_class, "opposite_words", ()))
+        return synonyms, opposites
+
+    def register_plugins(self, plugins: List[Dict[str, Any]]) -> str:
         """Register multiple plugins with the semantic kernel.
 
         Parameters
@@ -24,6 +76,23 @@ class PluginManager:
             - "name": The name of the plugin
             - "class": The class name of the plugin
             - "module": The full module path where the plugin class is defined
+            - "parameters": Optional keyword arguments of the plugin constructor
+            - "lazy": Optional, construct the plugin only when the model calls
+              one of its functions
+            - "offload": Optional, set to false to run synchronous functions
+              on the event loop instead of the thread pool
+            - "cpu_bound_functions": Optional names of functions to run in
+              the process pool
+
+        Plugin classes that set ``shareable = True`` are built once per
+        parameters and reused by later requests.
+
+        Returns
+        -------
+        str
+            The ``plugins_key`` of the registered plugins. It is taken
+            before they are resolved, so a module reloaded meanwhile cannot
+            give plugins of the new version the key of the old one.
 
         Example
         -------
@@ -43,6 +112,7 @@ class PluginManager:
         plugin_manager.register_plugins(plugins)
         ```
         """
+        plugins_key = PluginManager.plugins_key(plugins)
         for plugin in plugins:
             if not plugin or not isinstance(plugin, dict):
                 self.logger.error(f"Invalid plugin definition: {plugin}")
@@ -57,16 +127,32 @@ class PluginManager:
                 self.logger.error(f"Invalid plugin definition: {plugin}")
                 continue
 
-            try:
-                # Import the plugin module
-                module = importlib.import_module(plugin_module)
-                plugin_class_obj = getattr(module, plugin_class)
+            offload = plugin.get("offload", True) is not False
+            cpu_bound = tuple(sorted(plugin.get("cpu_bound_functions") or []))
+            prepare = (functools.partial(
+                PluginManager.offloader.offload_plugin, cpu_bound=cpu_bound)
+                       if offload else None)
 
-                # Create an instance of the plugin
-                instance = plugin_class_obj(**plugin_parameters)
+            try:
+                # KernelPlugins of the registry come back offloaded, shared
+                # ones are cached per offload settings
+                plugin_obj = PluginManager.registry.get_kernel_plugin(
+                    plugin_name,
+                    plugin_module,
+                    plugin_class,
+                    plugin_parameters,
+                    lazy=plugin.get("lazy", False) is True,
+                    options=(offload, cpu_bound),
+                    prepare=prepare)
 
                 # Register the plugin with the kernel
-                self.kernel.add_plugin(instance, plugin_name=plugin_name)
+                kernel_plugin = self.kernel.add_plugin(plugin_obj,
+                                                       plugin_name=plugin_name)
+                if (prepare is not None
+                        and not isinstance(plugin_obj, KernelPlugin)
+                        and isinstance(kernel_plugin, KernelPlugin)):
+                    # Built by the kernel for this request only
+                    prepare(kernel_plugin)
                 self.logger.info(f"Registered plugin '{plugin_name}'")
             except ImportError as e:
                 self.logger.error(
@@ -74,3 +160,4 @@ class PluginManager:
             except Exception as e:
                 self.logger.error(
                     f"Failed to register plugin '{plugin_name}': {str(e)}")
+        return plugins_key
@@ -0,0 +1,184 @@
+import importlib
+import inspect
+import json
+import threading
+from collections import OrderedDict
+from typing import Any, Callable, Dict, List, Optional
+
+from semantic_kernel.functions.kernel_plugin import KernelPlugin
+
+from promptflow_tool_semantic_kernel.tools.lazy_plugin import LazyInstance, LazyPlugin
+from promptflow_tool_semantic_kernel.tools.service_pool import ServicePool
+
+
+class PluginRegistry:
+    """
+    Process-wide cache of plugin classes, instances and KernelPlugins.
+
+    Plugin classes are resolved once per (module, class). Instances are only
+    reused for plugins that declare ``shareable = True``, i.e. plugins that
+    keep no per-request state, keyed by (module, class, parameters hash).
+    The KernelPlugin built from a shared instance is cached as well, so
+    registering it again skips the ``@kernel_function`` introspection.
+    Lazy plugins are advertised from their class and built on first call.
+    Instances and KernelPlugins are evicted least recently used first.
+    ``replace_module`` swaps in a reloaded module, ``generation`` counts
+    the swaps.
+    """
+
+    def __init__(self, max_size: int = 128):
+        self.max_size: int = max_size
+        self.hits: int = 0
+        self.misses: int = 0
+        self.generation: int = 0
+        self._classes: Dict[tuple, Any] = {}
+        self._instances: "OrderedDict[tuple, Any]" = OrderedDict()
+        self._kernel_plugins: "OrderedDict[tuple, KernelPlugin]" = OrderedDict(
+        )
+        self._lock = threading.RLock()
+
+    @staticmethod
+    def is_shareable(plugin_class: Any) -> bool:
+        """Whether instances of the class may be shared between requests"""
+        return inspect.getattr_static(plugin_class, "shareable", False) is True
+
+    @staticmethod
+    def parameters_hash(parameters: Optional[Dict[str, Any]]) -> str:
+        return ServicePool.fingerprint(
+            json.dumps(parameters or {}, sort_keys=True, default=repr))
+
+    def resolve_class(self, module_name: str, class_name: str) -> Any:
+        """Import the module and return the plugin class, once per class"""
+        key = (module_name, class_name)
+        with self._lock:
+            plugin_class = self._classes.get(key)
+        if plugin_class is None:
+            module = importlib.import_module(module_name)
+            plugin_class = getattr(module, class_name)
+            with self._lock:
+                self._classes[key] = plugin_class
+        return plugin_class
+
+    def get_kernel_plugin(
+            self,
+            plugin_name: str,
+            module_name: str,
+            class_name: str,
+            parameters: Optional[Dict[str, Any]],
+            lazy: bool = False,
+            options: tuple = (),
+            prepare: Optional[Callable[[KernelPlugin], None]] = None) -> Any:
+        """Return what to pass to ``kernel.add_plugin`` for a definition
+
+        That is a cached KernelPlugin for shareable plugins and a new
+        instance for every other plugin. With ``lazy`` the plugin is only
+        constructed when one of its functions is invoked.
+
+        KernelPlugins built here are passed to ``prepare`` before they are
+        returned or cached, cached ones are kept per ``options``, which
+        describe what ``prepare`` does to them.
+        """
+        plugin_class = self.resolve_class(module_name, class_name)
+        if not self.is_shareable(plugin_class):
+            if lazy:
+                kernel_plugin = LazyPlugin.from_class(
+                    plugin_name, plugin_class,
+                    LazyInstance(lambda: plugin_class(**(parameters or {}))))
+                if prepare is not None:
+                    prepare(kernel_plugin)
+                return kernel_plugin
+            return plugin_class(**(parameters or {}))
+
+        instance_key = (module_name, class_name,
+                        self.parameters_hash(parameters))
+        plugin_key = (plugin_name, lazy) + instance_key + (options, )
+        with self._lock:
+            kernel_plugin = self._kernel_plugins.get(plugin_key)
+            if kernel_plugin is not None:
+                self._kernel_plugins.move_to_end(plugin_key)
+                self.hits += 1
+                return kernel_plugin
+            self.misses += 1
+
+        if lazy:
+            kernel_plugin = LazyPlugin.from_class(
+                plugin_name, plugin_class,
+                LazyInstance(lambda: self._get_instance(
+                    instance_key, plugin_class, parameters)))
+        else:
+            kernel_plugin = KernelPlugin.from_object(
+                plugin_name,
+                self._get_instance(instance_key, plugin_class, parameters))
+        # Prepared before other requests can see it
+        if prepare is not None:
+            prepare(kernel_plugin)
+
+        with self._lock:
+            kernel_plugin = self._kernel_plugins.setdefault(
+                plugin_key, kernel_plugin)
+            self._kernel_plugins.move_to_end(plugin_key)
+            self._trim(self._kernel_plugins)
+        return kernel_plugin
+
+    def _get_instance(self, instance_key: tuple, plugin_class: Any,
+                      parameters: Optional[Dict[str, Any]]) -> Any:
+        with self._lock:
+            instance = self._instances.get(instance_key)
+        if instance is None:
+            instance = plugin_class(**(parameters or {}))
+        with self._lock:
+            instance = self._instances.setdefault(instance_key, instance)
+            self._instances.move_to_end(instance_key)
+            self._trim(self._instances)
+        return instance
+
+    def module_names(self) -> List[str]:
+        with self._lock:
+            return sorted({module_name for module_name, _ in self._classes})
+
+    def replace_module(self, module_name: str, module: Any) -> None:
+        """Resolve the classes of a module from its new version
+
+        Instances and KernelPlugins of the old version are dropped. Requests
+        that already registered them keep using them.
+        """
+        with self._lock:
+            for key in [key for key in self._classes if key[0] == module_name]:
+                plugin_class = getattr(module, key[1], None)
+                if plugin_class is None:
+                    del self._classes[key]
+                else:
+                    self._classes[key] = plugin_class
+            for key in [
+                    key for key in self._instances if key[0] == module_name
+            ]:
+                del self._instances[key]
+            for key in [
+                    key for key in self._kernel_plugins
+                    if key[2] == module_name
+            ]:
+                del self._kernel_plugins[key]
+            self.generation += 1
+
+    def stats(self) -> Dict[str, int]:
+        with self._lock:
+            return {
+                "classes": len(self._classes),
+                "instances": len(self._instances),
+                "kernel_plugins": len(self._kernel_plugins),
+                "hits": self.hits,
+                "misses": self.misses,
+                "generation": self.generation,
+            }
+
+    def clear(self) -> None:
+        with self._lock:
+            self._classes.clear()
+            self._instances.clear()
+            self._kernel_plugins.clear()
+            self.hits = 0
+            self.misses = 0
+
+    def _trim(self, entries: OrderedDict) -> None:
+        while len(entries) > self.max_size:
+            entries.popitem(last=False)
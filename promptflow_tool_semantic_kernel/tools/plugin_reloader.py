@@ -0,0 +1,141 @@
+import importlib.util
+import os
+import sys
+import threading
+from typing import Dict, List, Optional, Tuple
+
+from promptflow_tool_semantic_kernel.tools.function_result_cache import FunctionResultCache
+from promptflow_tool_semantic_kernel.tools.logger_factory import LoggerFactory
+from promptflow_tool_semantic_kernel.tools.plugin_registry import PluginRegistry
+
+
+class PluginReloader:
+    """
+    Reloads plugin modules when their source file changes.
+
+    A daemon thread polls the files of the modules the registry resolved
+    plugin classes from. A changed module is executed into a new module
+    object and only swapped into ``sys.modules`` and the registry when that
+    succeeds, so a broken edit keeps the old version running. Requests that
+    already registered a plugin keep the old version until they finish.
+
+    Enabled with the ``PLUGIN_HOT_RELOAD`` environment variable, polling
+    every ``PLUGIN_HOT_RELOAD_INTERVAL`` seconds.
+    """
+
+    DEFAULT_INTERVAL = 2.0
+
+    _running: Optional["PluginReloader"] = None
+    _running_lock = threading.Lock()
+
+    def __init__(self,
+                 registry: PluginRegistry,
+                 interval: float = DEFAULT_INTERVAL):
+        self.registry: PluginRegistry = registry
+        self.interval: float = interval
+        self.reloads: int = 0
+        self.failures: int = 0
+        self._versions: Dict[str, Tuple[int, int]] = {}
+        self._stop = threading.Event()
+        self._thread: Optional[threading.Thread] = None
+
+    @staticmethod
+    def enabled() -> bool:
+        return os.environ.get("PLUGIN_HOT_RELOAD",
+                              "").lower() in ("1", "true", "yes")
+
+    @classmethod
+    def ensure_started(cls, registry: PluginRegistry) -> "PluginReloader":
+        """Start the process-wide reloader of the registry, once"""
+        with cls._running_lock:
+            if cls._running is None:
+                cls._running = PluginReloader(
+                    registry,
+                    float(
+                        os.environ.get("PLUGIN_HOT_RELOAD_INTERVAL",
+                                       cls.DEFAULT_INTERVAL)))
+                cls._running.start()
+            return cls._running
+
+    @classmethod
+    def stop_running(cls) -> None:
+        with cls._running_lock:
+            running, cls._running = cls._running, None
+        if running is not None:
+            running.stop()
+
+    def start(self) -> None:
+        self._thread = threading.Thread(target=self._run,
+                                        name="plugin-reloader",
+                                        daemon=True)
+        self._thread.start()
+
+    def stop(self) -> None:
+        self._stop.set()
+        if self._thread is not None:
+            self._thread.join()
+
+    def _run(self) -> None:
+        while not self._stop.wait(self.interval):
+            try:
+                self.check()
+            except Exception as e:
+                LoggerFactory.create_logger("plugin-reloader").error(
+                    f"Checking plugin modules failed: {str(e)}")
+
+    @staticmethod
+    def _version(module_name: str) -> Optional[Tuple[int, int]]:
+        path = getattr(sys.modules.get(module_name), "__file__", None)
+        if not path:
+            return None
+        try:
+            stat = os.stat(path)
+        except OSError:
+            return None
+        return (stat.st_mtime_ns, stat.st_size)
+
+    def check(self) -> List[str]:
+        """Reload the modules changed since the last check"""
+        reloaded = []
+        for module_name in self.registry.module_names():
+            version = self._version(module_name)
+            if version is None:
+                continue
+            known = self._versions.setdefault(module_name, version)
+            if known == version:
+                continue
+            # Not retried until the file changes again
+            self._versions[module_name] = version
+            if self.reload(module_name):
+                reloaded.append(module_name)
+        return reloaded
+
+    def reload(self, module_name: str) -> bool:
+        logger = LoggerFactory.create_logger("plugin-reloader")
+        old = sys.modules[module_name]
+        try:
+            spec = importlib.util.spec_from_file_location(
+                module_name,
+                old.__spec__.origin,
+                submodule_search_locations=old.__spec__.
+                submodule_search_locations)
+            module = importlib.util.module_from_spec(spec)
+            # Compiled from source, a cached .pyc written within the same
+            # second as the edit could be stale
+            with open(old.__spec__.origin, "rb") as source:
+                code = compile(source.read(), old.__spec__.origin, "exec")
+            exec(code, module.__dict__)
+        except Exception as e:
+            self.failures += 1
+            logger.error(
+                f"Reloading plugin module {module_name} failed, keeping "
+                f"the running version: {str(e)}")
+            return False
+
+        sys.modules[module_name] = module
+        self.registry.replace_module(module_name, module)
+        # Results of the old code may differ from the new one
+        FunctionResultCache.clear_registry()
+        self.reloads += 1
+        logger.info(f"Reloaded plugin module {module_name}")
+        return True
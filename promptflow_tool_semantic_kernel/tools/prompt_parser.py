@@ -0,0 +1,38 @@
+import functools
+import re
+from typing import List, Tuple
+
+from semantic_kernel.contents.utils.author_role import AuthorRole
+
+# Promptflow role markers, e.g. "# system:" on a line of its own, which may
+# end in "\r\n"
+_ROLE_MARKER = re.compile(
+    r"^[ \t]*#[ \t]*(system|user|assistant)[ \t]*:[ \t]*\r?$",
+    re.IGNORECASE | re.MULTILINE)
+
+
+class PromptParser:
+    """Splits a rendered prompt into role-tagged messages."""
+
+    @staticmethod
+    @functools.lru_cache(maxsize=256)
+    def parse(prompt: str) -> Tuple[Tuple[AuthorRole, str], ...]:
+        """Return the (role, content) sections of a rendered prompt
+
+        A prompt without markers is one user message, as is. Otherwise text
+        before the first marker is a user message, sections are stripped and
+        empty sections are dropped.
+        """
+        markers = list(_ROLE_MARKER.finditer(prompt))
+        if not markers:
+            return ((AuthorRole.USER, prompt), )
+        sections: List[Tuple[AuthorRole, str]] = [
+            (AuthorRole.USER, prompt[:markers[0].start()])
+        ]
+        for index, marker in enumerate(markers):
+            end = (markers[index + 1].start()
+                   if index + 1 < len(markers) else len(prompt))
+            sections.append((AuthorRole(marker.group(1).lower()),
+                             prompt[marker.end():end]))
+        return tuple((role, content.strip()) for role, content in sections
+                     if content.strip())
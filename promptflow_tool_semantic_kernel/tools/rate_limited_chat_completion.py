@@ -0,0 +1,98 @@
+from collections.abc import AsyncGenerator
+from typing import Any, ClassVar, List, Optional
+
+from semantic_kernel.connectors.ai.prompt_execution_settings import PromptExecutionSettings
+from semantic_kernel.contents.chat_history import ChatHistory
+
+from promptflow_tool_semantic_kernel.tools.delegating_chat_completion import DelegatingChatCompletion
+from promptflow_tool_semantic_kernel.tools.error_classifier import ErrorClassifier
+from promptflow_tool_semantic_kernel.tools.rate_limiter import RateLimiter, last_rate_limit_headers
+
+
+class RateLimitedChatCompletion(DelegatingChatCompletion):
+    """
+    Chat completion service that queues requests within a RateLimiter budget.
+
+    Every request reserves one request and its estimated tokens before it is
+    sent. The estimate is corrected with the reported usage afterwards, and
+    the budget follows the provider's ``x-ratelimit-*`` headers and
+    ``Retry-After`` delays.
+    """
+
+    # Completion tokens assumed when the settings do not cap them
+    DEFAULT_COMPLETION_TOKENS: ClassVar[int] = 256
+
+    rate_limiter: Any
+
+    def __init__(self, inner: Any, rate_limiter: RateLimiter, **kwargs: Any):
+        super().__init__(inner, rate_limiter=rate_limiter, **kwargs)
+
+    @staticmethod
+    def estimate_tokens(chat_history: ChatHistory,
+                        settings: PromptExecutionSettings) -> int:
+        """Roughly estimate the tokens a request counts against the TPM"""
+        characters = sum(
+            len(str(message.content or "")) for message in chat_history.messages)
+        prompt_tokens = characters // 4 + 4 * len(chat_history.messages)
+        completion_tokens = (getattr(settings, "max_tokens", None)
+                             or getattr(settings, "max_completion_tokens", None)
+                             or RateLimitedChatCompletion.DEFAULT_COMPLETION_TOKENS)
+        return prompt_tokens + completion_tokens
+
+    @staticmethod
+    def _get_usage_tokens(messages: List[Any]) -> Optional[int]:
+        for message in messages or []:
+            metadata = getattr(message, "metadata", None) or {}
+            usage = metadata.get("usage") if isinstance(metadata, dict) else None
+            if usage is not None:
+                return ((getattr(usage, "prompt_tokens", None) or 0) +
+                        (getattr(usage, "completion_tokens", None) or 0))
+        return None
+
+    def _after_response(self, estimated: int, messages: List[Any]) -> None:
+        actual = self._get_usage_tokens(messages)
+        if actual:
+            self.rate_limiter.record_usage(estimated, actual)
+        # The provider's view of the budget wins over the local estimate
+        self.rate_limiter.update_from_headers(last_rate_limit_headers.get())
+
+    def _after_error(self, error: Exception) -> None:
+        self.rate_limiter.update_from_headers(last_rate_limit_headers.get())
+        if ErrorClassifier.get_status_code(error) == 429:
+            retry_after = ErrorClassifier.get_retry_after(error)
+            if retry_after:
+                self.rate_limiter.block_for(retry_after)
+
+    async def _inner_get_chat_message_contents(self, chat_history: ChatHistory,
+                                               settings: PromptExecutionSettings):
+        estimated = self.estimate_tokens(chat_history, settings)
+        await self.rate_limiter.acquire(estimated)
+        last_rate_limit_headers.set(None)
+        try:
+            result = await self.inner._inner_get_chat_message_contents(
+                chat_history, settings)
+        except Exception as e:
+            self._after_error(e)
+            raise
+        self._after_response(estimated, result)
+        return result
+
+    async def _inner_get_streaming_chat_message_contents(
+            self,
+            chat_history: ChatHistory,
+            settings: PromptExecutionSettings,
+            function_invoke_attempt: int = 0) -> AsyncGenerator[list, Any]:
+        estimated = self.estimate_tokens(chat_history, settings)
+        await self.rate_limiter.acquire(estimated)
+        last_rate_limit_headers.set(None)
+        usage_messages = []
+        try:
+            async for messages in self.inner._inner_get_streaming_chat_message_contents(
+                    chat_history, settings, function_invoke_attempt):
+                if self._get_usage_tokens(messages):
+                    usage_messages = messages
+                yield messages
+        except Exception as e:
+            self._after_error(e)
+            raise
+        self._after_response(estimated, usage_messages)
@@ -0,0 +1,248 @@
+import asyncio
+import threading
+import time
+from collections import deque
+from contextvars import ContextVar
+from typing import Any, Dict, Optional
+
+import httpx
+
+# Rate limit headers of the last response received in the current context.
+# Set by the response hook of the shared HTTP clients and read by the
+# RateLimitedChatCompletion that issued the request.
+last_rate_limit_headers: ContextVar[Optional[Dict[str, str]]] = ContextVar(
+    "last_rate_limit_headers", default=None)
+
+
+async def capture_rate_limit_headers(response: httpx.Response) -> None:
+    """httpx response hook storing the provider's rate limit headers"""
+    headers = {
+        name.lower(): value
+        for name, value in response.headers.items()
+        if name.lower().startswith("x-ratelimit-")
+    }
+    if headers:
+        last_rate_limit_headers.set(headers)
+
+
+class _Waiter:
+    """Queued caller of ``acquire`` and the event loop it waits on."""
+
+    def __init__(self):
+        self.loop = asyncio.get_running_loop()
+        self.event = asyncio.Event()
+
+    def wake(self) -> None:
+        """Wake the caller, from any thread"""
+        try:
+            self.loop.call_soon_threadsafe(self.event.set)
+        except RuntimeError:
+            # Its loop is closed, the caller is gone
+            pass
+
+
+class RateLimiter:
+    """
+    Requests-per-minute and tokens-per-minute budget of one deployment.
+
+    Both budgets are token buckets refilled continuously at ``limit / 60``
+    per second. Callers wait in FIFO order, so a large request at the head
+    of the queue is not starved by smaller ones behind it. The state is
+    guarded by a thread lock so one limiter can be shared by the services
+    of several event loops.
+    """
+
+    _registry: Dict[Any, "RateLimiter"] = {}
+    _registry_lock = threading.Lock()
+
+    def __init__(self,
+                 requests_per_minute: Optional[float] = None,
+                 tokens_per_minute: Optional[float] = None):
+        self.requests_per_minute: Optional[float] = requests_per_minute
+        self.tokens_per_minute: Optional[float] = tokens_per_minute
+        self._requests: float = requests_per_minute or 0.0
+        self._tokens: float = tokens_per_minute or 0.0
+        self._updated: float = time.monotonic()
+        self._blocked_until: float = 0.0
+        self._queue: deque = deque()
+        self._lock = threading.Lock()
+
+    @classmethod
+    def for_deployment(cls,
+                       key: Any,
+                       requests_per_minute: Optional[float] = None,
+                       tokens_per_minute: Optional[float] = None
+                       ) -> "RateLimiter":
+        """Return the process-wide limiter of a deployment
+
+        An existing limiter adopts changed limits.
+        """
+        with cls._registry_lock:
+            limiter = cls._registry.get(key)
+            if limiter is None:
+                limiter = cls(requests_per_minute, tokens_per_minute)
+                cls._registry[key] = limiter
+            else:
+                limiter.configure(requests_per_minute, tokens_per_minute)
+            return limiter
+
+    @classmethod
+    def clear_registry(cls) -> None:
+        with cls._registry_lock:
+            cls._registry.clear()
+
+    def configure(self, requests_per_minute: Optional[float],
+                  tokens_per_minute: Optional[float]) -> None:
+        """Change the limits, keeping the budget used so far"""
+        with self._lock:
+            if (requests_per_minute == self.requests_per_minute
+                    and tokens_per_minute == self.tokens_per_minute):
+                return
+            self._refill(time.monotonic())
+            self._requests = self._adjust(self._requests,
+                                          self.requests_per_minute,
+                                          requests_per_minute)
+            self._tokens = self._adjust(self._tokens, self.tokens_per_minute,
+                                        tokens_per_minute)
+            self.requests_per_minute = requests_per_minute
+            self.tokens_per_minute = tokens_per_minute
+            self._wake_head()
+
+    @staticmethod
+    def _adjust(budget: float, old_limit: Optional[float],
+                new_limit: Optional[float]) -> float:
+        if not new_limit:
+            return 0.0
+        if not old_limit:
+            return new_limit
+        # Keep what was used of the old limit
+        return max(0.0, min(new_limit, budget + new_limit - old_limit))
+
+    @property
+    def queue_depth(self) -> int:
+        with self._lock:
+            return len(self._queue)
+
+    def available(self) -> Dict[str, float]:
+        """Return the current request and token budgets"""
+        with self._lock:
+            self._refill(time.monotonic())
+            return {"requests": self._requests, "tokens": self._tokens}
+
+    async def acquire(self, tokens: int = 0) -> None:
+        """Wait until one request of ``tokens`` tokens fits the budget"""
+        waiter = _Waiter()
+        with self._lock:
+            self._queue.append(waiter)
+        try:
+            while True:
+                with self._lock:
+                    waiter.event.clear()
+                    delay = None
+                    if self._queue[0] is waiter:
+                        delay = self._reserve(tokens)
+                        if delay <= 0:
+                            self._queue.popleft()
+                            self._wake_head()
+                            return
+                try:
+                    await asyncio.wait_for(waiter.event.wait(), delay)
+                except asyncio.TimeoutError:
+                    pass
+        except BaseException:
+            with self._lock:
+                if waiter in self._queue:
+                    head = self._queue[0] is waiter
+                    self._queue.remove(waiter)
+                    if head:
+                        self._wake_head()
+            raise
+
+    def record_usage(self, estimated_tokens: int, actual_tokens: int) -> None:
+        """Correct the token budget once the real usage is known"""
+        if not self.tokens_per_minute:
+            return
+        with self._lock:
+            self._tokens = min(self.tokens_per_minute,
+                               self._tokens + estimated_tokens - actual_tokens)
+            if actual_tokens < estimated_tokens:
+                self._wake_head()
+
+    def update_from_headers(self, headers: Optional[Dict[str, str]]) -> None:
+        """Adopt the budget reported in ``x-ratelimit-*`` response headers"""
+        if not headers:
+            return
+        with self._lock:
+            self._refill(time.monotonic())
+            limit = self._parse(headers.get("x-ratelimit-limit-requests"))
+            if limit is not None and not self.requests_per_minute:
+                self.requests_per_minute = limit
+            limit = self._parse(headers.get("x-ratelimit-limit-tokens"))
+            if limit is not None and not self.tokens_per_minute:
+                self.tokens_per_minute = limit
+
+            remaining = self._parse(
+                headers.get("x-ratelimit-remaining-requests"))
+            if remaining is not None and self.requests_per_minute:
+                self._requests = min(self.requests_per_minute, remaining)
+            remaining = self._parse(headers.get("x-ratelimit-remaining-tokens"))
+            if remaining is not None and self.tokens_per_minute:
+                self._tokens = min(self.tokens_per_minute, remaining)
+            self._wake_head()
+
+    def block_for(self, seconds: float) -> None:
+        """Hold back all callers, e.g. after a 429 with Retry-After"""
+        with self._lock:
+            self._blocked_until = max(self._blocked_until,
+                                      time.monotonic() + seconds)
+
+    def _wake_head(self) -> None:
+        """Let the caller at the head check the budget again"""
+        if self._queue:
+            self._queue[0].wake()
+
+    def _refill(self, now: float) -> None:
+        elapsed = max(0.0, now - self._updated)
+        self._updated = now
+        if self.requests_per_minute:
+            self._requests = min(
+                self.requests_per_minute,
+                self._requests + elapsed * self.requests_per_minute / 60.0)
+        if self.tokens_per_minute:
+            self._tokens = min(
+                self.tokens_per_minute,
+                self._tokens + elapsed * self.tokens_per_minute / 60.0)
+
+    def _reserve(self, tokens: int) -> float:
+        """Take the budget and return 0, or return how long to wait"""
+        now = time.monotonic()
+        if now < self._blocked_until:
+            return self._blocked_until - now
+        self._refill(now)
+
+        waits = [0.0]
+        if self.requests_per_minute and self._requests < 1:
+            waits.append((1 - self._requests) * 60.0 /
+                         self.requests_per_minute)
+        if self.tokens_per_minute:
+            # A request larger than the whole budget waits for a full bucket
+            tokens = min(tokens, self.tokens_per_minute)
+            if self._tokens < tokens:
+                waits.append((tokens - self._tokens) * 60.0 /
+                             self.tokens_per_minute)
+        delay = max(waits)
+        if delay > 0:
+            return delay
+
+        if self.requests_per_minute:
+            self._requests -= 1
+        if self.tokens_per_minute:
+            self._tokens -= tokens
+        return 0.0
+
+    @staticmethod
+    def _parse(value: Optional[str]) -> Optional[float]:
+        try:
+            return float(value) if value is not None else None
+        except ValueError:
+            return None
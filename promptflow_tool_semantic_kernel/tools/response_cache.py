@@ -0,0 +1,350 @@
+import abc
+import asyncio
+import json
+import os
+import sqlite3
+import threading
+import time
+from collections import OrderedDict
+from collections.abc import AsyncGenerator
+from typing import Any, Awaitable, Callable, Dict, List, Optional
+
+from semantic_kernel.contents.chat_history import ChatHistory
+from semantic_kernel.contents.function_call_content import FunctionCallContent
+
+from promptflow_tool_semantic_kernel.tools.logger_factory import LoggerFactory
+from promptflow_tool_semantic_kernel.tools.response_strategy import ResponseStrategy
+from promptflow_tool_semantic_kernel.tools.service_pool import ServicePool
+
+
+class CachedResponse:
+    """Response chunks of a request and the messages it added to the history."""
+
+    def __init__(self, chunks: List[Optional[str]], messages: str,
+                 created: float):
+        self.chunks: List[Optional[str]] = chunks
+        # Serialized ChatHistory of the tool calls and results of the turn,
+        # empty if the turn invoked no tools
+        self.messages: str = messages
+        self.created: float = created
+
+    @property
+    def content(self) -> str:
+        return "".join(chunk or "" for chunk in self.chunks)
+
+    @property
+    def invoked_tools(self) -> bool:
+        return bool(self.messages)
+
+
+class ReplayingCache(abc.ABC):
+    """
+    Base class of the response caches.
+
+    Subclasses look responses up with ``get`` and store them with ``put``.
+    ``stream`` and ``complete`` wrap a response of ResponseStrategy, replay
+    a cached response instead of sending the request, and store a new
+    response once it is complete. Turns that invoked tools are neither
+    stored nor replayed unless tool calls are allowed, since the tools
+    would not run again.
+
+    ``stream`` and ``complete`` go through ``get_async`` and ``put_async``,
+    which subclasses override to keep blocking work off the event loop.
+    """
+
+    def __init__(self, clock: Callable[[], float] = time.time):
+        self.hits: int = 0
+        self.misses: int = 0
+        self.bypassed: int = 0
+        self._clock = clock
+        self._lock = threading.Lock()
+
+    @abc.abstractmethod
+    def get(self, key: Any) -> Optional[CachedResponse]:
+        """Return the cached response of a request, if any"""
+
+    @abc.abstractmethod
+    def put(self, key: Any, response: CachedResponse) -> None:
+        """Store the response of a request"""
+
+    async def get_async(self, key: Any) -> Optional[CachedResponse]:
+        return self.get(key)
+
+    async def put_async(self, key: Any, response: CachedResponse) -> None:
+        self.put(key, response)
+
+    def record(self, outcome: str) -> None:
+        with self._lock:
+            setattr(self, outcome, getattr(self, outcome) + 1)
+
+    async def _lookup(self, key: Any, allow_tool_calls: bool,
+                      history: ChatHistory) -> Optional[CachedResponse]:
+        response = await self.get_async(key)
+        if response is None or (response.invoked_tools
+                                and not allow_tool_calls):
+            self.record("misses")
+            return None
+        self.record("hits")
+        if response.invoked_tools:
+            # Shown as tool messages like on the original turn
+            history.messages.extend(
+                ChatHistory.restore_chat_history(response.messages).messages)
+        LoggerFactory.create_logger("response-cache").debug(
+            f"Replaying cached response {str(key)[:12]}")
+        return response
+
+    async def _store(self, key: Any, chunks: List[Optional[str]],
+                     history: ChatHistory, start: int,
+                     allow_tool_calls: bool) -> None:
+        if any(
+                isinstance(chunk, str)
+                and chunk.startswith(ResponseStrategy.ERROR_PREFIX)
+                for chunk in chunks):
+            return
+        messages = history.messages[start:]
+        invoked_tools = any(
+            isinstance(item, FunctionCallContent) for message in messages
+            for item in message.items)
+        if invoked_tools and not allow_tool_calls:
+            self.record("bypassed")
+            return
+        await self.put_async(
+            key,
+            CachedResponse(
+                chunks,
+                ChatHistory(messages=messages).serialize()
+                if invoked_tools else "", self._clock()))
+
+    async def stream(self,
+                     key: Any,
+                     chunks: AsyncGenerator[Optional[str], None],
+                     history: ChatHistory,
+                     allow_tool_calls: bool = False
+                     ) -> AsyncGenerator[Optional[str], None]:
+        """Replay a cached response or stream and store the response"""
+        response = await self._lookup(key, allow_tool_calls, history)
+        if response is not None:
+            await chunks.aclose()
+            for chunk in response.chunks:
+                yield chunk
+            return
+
+        start = len(history.messages)
+        received = []
+        async for chunk in chunks:
+            received.append(chunk)
+            yield chunk
+        await self._store(key, received, history, start, allow_tool_calls)
+
+    async def complete(self,
+                       key: Any,
+                       content: Awaitable[str],
+                       history: ChatHistory,
+                       allow_tool_calls: bool = False) -> str:
+        """Return a cached response or wait for and store the response"""
+        response = await self._lookup(key, allow_tool_calls, history)
+        if response is not None:
+            # The request is not sent
+            getattr(content, "close", lambda: None)()
+            return response.content
+
+        start = len(history.messages)
+        result = await content
+        await self._store(key, [result], history, start, allow_tool_calls)
+        return result
+
+
+class ResponseCache(ReplayingCache):
+    """
+    Exact-match cache of chat responses.
+
+    Requests are keyed by a hash of the deployment, the messages, the
+    execution settings, the function choice behavior and the plugins. Up to
+    ``max_entries`` responses are kept in memory, least recently used first
+    evicted. With a ``path`` they are also stored in a SQLite database that
+    is shared by the processes using it. Reads and writes of the database
+    run in a worker thread. Expired entries are removed, and the database
+    is trimmed to ``max_disk_entries`` responses, at most once every
+    ``prune_interval`` seconds. Entries expire ``ttl`` seconds after they
+    were stored.
+
+    A streamed response is replayed chunk by chunk, and either mode can
+    replay a response stored by the other.
+    """
+
+    _shared: Optional["ResponseCache"] = None
+    _shared_lock = threading.Lock()
+
+    def __init__(self,
+                 max_entries: int = 1024,
+                 ttl: float = 86400.0,
+                 path: Optional[str] = None,
+                 max_disk_entries: int = 100_000,
+                 timeout: float = 5.0,
+                 prune_interval: float = 60.0,
+                 clock: Callable[[], float] = time.time):
+        self.max_entries: int = max_entries
+        self.ttl: float = ttl
+        self.path: Optional[str] = path
+        self.max_disk_entries: int = max_disk_entries
+        self.timeout: float = timeout
+        self.prune_interval: float = prune_interval
+        super().__init__(clock)
+        self._entries: "OrderedDict[str, CachedResponse]" = OrderedDict()
+        self._pruned_at: float = self._clock()
+        self._local = threading.local()
+        if path:
+            connection = self._connection()
+            with connection:
+                connection.execute(
+                    "CREATE TABLE IF NOT EXISTS responses ("
+                    "key TEXT PRIMARY KEY, chunks TEXT NOT NULL, "
+                    "messages TEXT NOT NULL, created REAL NOT NULL)")
+                connection.execute("CREATE INDEX IF NOT EXISTS "
+                                   "responses_created ON responses (created)")
+
+    @classmethod
+    def shared(cls) -> "ResponseCache":
+        """Return the process-wide cache
+
+        Configured with the ``RESPONSE_CACHE_PATH``, ``RESPONSE_CACHE_TTL``,
+        ``RESPONSE_CACHE_SIZE`` and ``RESPONSE_CACHE_DISK_SIZE`` environment
+        variables. Without a path responses are only kept in memory.
+        """
+        with cls._shared_lock:
+            if cls._shared is None:
+                cls._shared = ResponseCache(
+                    max_entries=int(
+                        os.environ.get("RESPONSE_CACHE_SIZE", 1024)),
+                    ttl=float(os.environ.get("RESPONSE_CACHE_TTL", 86400)),
+                    path=os.environ.get("RESPONSE_CACHE_PATH") or None,
+                    max_disk_entries=int(
+                        os.environ.get("RESPONSE_CACHE_DISK_SIZE", 100_000)))
+            return cls._shared
+
+    @classmethod
+    def clear_shared(cls) -> None:
+        with cls._shared_lock:
+            cls._shared = None
+
+    @staticmethod
+    def request_key(model: str, history: ChatHistory, settings: Any,
+                    plugins_key: str = "") -> str:
+        """Hash everything that determines the response of a request"""
+        behavior = getattr(settings, "function_choice_behavior", None)
+        return ServicePool.fingerprint(
+            model,
+            json.dumps([message.to_dict() for message in history.messages],
+                       sort_keys=True,
+                       default=str),
+            json.dumps(settings.prepare_settings_dict(),
+                       sort_keys=True,
+                       default=str),
+            json.dumps(behavior.model_dump(exclude_none=True)
+                       if behavior is not None else None,
+                       sort_keys=True,
+                       default=str), plugins_key)
+
+    def _connection(self) -> sqlite3.Connection:
+        connection = getattr(self._local, "connection", None)
+        if connection is None:
+            connection = sqlite3.connect(self.path, timeout=self.timeout)
+            connection.execute("PRAGMA journal_mode=WAL")
+            connection.execute("PRAGMA synchronous=NORMAL")
+            self._local.connection = connection
+        return connection
+
+    def _recall(self, key: str) -> Optional[CachedResponse]:
+        """Return a response of the memory tier"""
+        with self._lock:
+            response = self._entries.get(key)
+            if response is not None:
+                if self._clock() - response.created < self.ttl:
+                    self._entries.move_to_end(key)
+                    return response
+                del self._entries[key]
+        return None
+
+    def get(self, key: str) -> Optional[CachedResponse]:
+        response = self._recall(key)
+        if response is not None or not self.path:
+            return response
+
+        row = self._connection().execute(
+            "SELECT chunks, messages, created FROM responses "
+            "WHERE key = ? AND created > ?",
+            (key, self._clock() - self.ttl)).fetchone()
+        if row is None:
+            return None
+        response = CachedResponse(json.loads(row[0]), row[1], row[2])
+        self._remember(key, response)
+        return response
+
+    async def get_async(self, key: str) -> Optional[CachedResponse]:
+        response = self._recall(key)
+        if response is not None or not self.path:
+            return response
+        # The query may wait for the database lock of another process
+        return await asyncio.to_thread(self.get, key)
+
+    def _remember(self, key: str, response: CachedResponse) -> None:
+        with self._lock:
+            self._entries[key] = response
+            self._entries.move_to_end(key)
+            while len(self._entries) > self.max_entries:
+                self._entries.popitem(last=False)
+
+    def put(self, key: str, response: CachedResponse) -> None:
+        self._remember(key, response)
+        if self.path:
+            self._write(key, response)
+
+    async def put_async(self, key: str, response: CachedResponse) -> None:
+        self._remember(key, response)
+        if self.path:
+            await asyncio.to_thread(self._write, key, response)
+
+    def _write(self, key: str, response: CachedResponse) -> None:
+        now = self._clock()
+        with self._lock:
+            prune = now - self._pruned_at >= self.prune_interval
+            if prune:
+                self._pruned_at = now
+        connection = self._connection()
+        with connection:
+            connection.execute(
+                "INSERT OR REPLACE INTO responses "
+                "(key, chunks, messages, created) VALUES (?, ?, ?, ?)",
+                (key, json.dumps(response.chunks), response.messages,
+                 response.created))
+            if prune:
+                self._prune(connection, now)
+
+    def _prune(self, connection: sqlite3.Connection, now: float) -> None:
+        connection.execute("DELETE FROM responses WHERE created <= ?",
+                           (now - self.ttl, ))
+        # The oldest responses go first
+        connection.execute(
+            "DELETE FROM responses WHERE key IN (SELECT key FROM "
+            "responses ORDER BY created DESC LIMIT -1 OFFSET ?)",
+            (self.max_disk_entries, ))
+
+    def stats(self) -> Dict[str, int]:
+        with self._lock:
+            return {
+                "entries": len(self._entries),
+                "hits": self.hits,
+                "misses": self.misses,
+                "bypassed": self.bypassed,
+            }
+
+    def clear(self) -> None:
+        with self._lock:
+            self._entries.clear()
+            self.hits = 0
+            self.misses = 0
+            self.bypassed = 0
+        if self.path:
+            connection = self._connection()
+            with connection:
+                connection.execute("DELETE FROM responses")
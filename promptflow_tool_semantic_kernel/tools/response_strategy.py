@@ -1,29 +1,46 @@
 from collections.abc import AsyncGenerator
+from typing import Any, Optional
 
 from promptflow._utils.logger_utils import LoggerFactory
 
 from semantic_kernel import Kernel
-from semantic_kernel.connectors.ai.open_ai import AzureChatCompletion
+from semantic_kernel.connectors.ai.chat_completion_client_base import ChatCompletionClientBase
+from semantic_kernel.connectors.ai.prompt_execution_settings import PromptExecutionSettings
 from semantic_kernel.contents.chat_history import ChatHistory
 
-from semantic_kernel.connectors.ai.open_ai.prompt_execution_settings.azure_chat_prompt_execution_settings import (
-    AzureChatPromptExecutionSettings, )
-
 from promptflow_tool_semantic_kernel.tools.logger_factory import LoggerFactory
+from promptflow_tool_semantic_kernel.tools.retry_policy import RetryPolicy
+from promptflow_tool_semantic_kernel.tools.retrying_chat_completion import RetryingChatCompletion
 import traceback
 
 
 class ResponseStrategy:
 
+    # Starts the text returned in place of a failed response
+    ERROR_PREFIX = "Error retrieving response: "
+
+    @staticmethod
+    def _apply_retry_policy(chat_completion: Any,
+                            retry_policy: Optional[RetryPolicy]) -> Any:
+        """Wrap the service so every request follows the retry policy"""
+        if retry_policy is None:
+            return chat_completion
+        return RetryingChatCompletion(chat_completion, retry_policy)
+
     @staticmethod
     async def get_streaming_response(
-            chat_completion: AzureChatCompletion, history: ChatHistory,
-            settings: AzureChatPromptExecutionSettings,
-            kernel: Kernel) -> AsyncGenerator[str, None]:
+            chat_completion: ChatCompletionClientBase,
+            history: ChatHistory,
+            settings: PromptExecutionSettings,
+            kernel: Kernel,
+            retry_policy: Optional[RetryPolicy] = None
+    ) -> AsyncGenerator[str, None]:
         """Handle streaming response strategy"""
         logger = LoggerFactory.create_logger("response-strategy")
 
         try:
+            chat_completion = ResponseStrategy._apply_retry_policy(
+                chat_completion, retry_policy)
             streaming_response = chat_completion.get_streaming_chat_message_content(
                 chat_history=history,
                 settings=settings,
@@ -35,17 +52,21 @@ class ResponseStrategy:
             logger.error(
                 f"Error in streaming response: {str(e)}\nTraceback: {traceback.format_exc()}"
             )
-            yield f"Error retrieving response: {str(e)}"
+            yield f"{ResponseStrategy.ERROR_PREFIX}{str(e)}"
 
     @staticmethod
-    async def get_complete_response(chat_completion: AzureChatCompletion,
-                                    history: ChatHistory,
-                                    settings: AzureChatPromptExecutionSettings,
-                                    kernel: Kernel) -> str:
+    async def get_complete_response(
+            chat_completion: ChatCompletionClientBase,
+            history: ChatHistory,
+            settings: PromptExecutionSettings,
+            kernel: Kernel,
+            retry_policy: Optional[RetryPolicy] = None) -> str:
         """Handle complete (non-streaming) response strategy"""
         logger = LoggerFactory.create_logger("response-strategy")
 
         try:
+            chat_completion = ResponseStrategy._apply_retry_policy(
+                chat_completion, retry_policy)
             response = await chat_completion.get_chat_message_content(
                 chat_history=history,
                 settings=settings,
@@ -55,4 +76,4 @@ class ResponseStrategy:
             return response.content
         except Exception as e:
             logger.error(f"Error in complete response: {str(e)}")
-            return f"Error retrieving response: {str(e)}"
+            return f"{ResponseStrategy.ERROR_PREFIX}{str(e)}"
@@ -0,0 +1,114 @@
+import random
+import threading
+from collections import deque
+from typing import Any, Dict, Optional
+
+
+class LatencyTracker:
+    """Keeps recent request latencies of one service to derive percentiles."""
+
+    # Percentiles are not trusted before this many samples were recorded
+    MIN_SAMPLES = 20
+
+    _registry: Dict[Any, "LatencyTracker"] = {}
+    _registry_lock = threading.Lock()
+
+    def __init__(self, max_samples: int = 200):
+        self._samples: deque = deque(maxlen=max_samples)
+        self._lock = threading.Lock()
+
+    @classmethod
+    def for_service(cls, key: Any) -> "LatencyTracker":
+        """Return the process-wide tracker of a service"""
+        with cls._registry_lock:
+            tracker = cls._registry.get(key)
+            if tracker is None:
+                tracker = cls()
+                cls._registry[key] = tracker
+            return tracker
+
+    @classmethod
+    def clear_registry(cls) -> None:
+        with cls._registry_lock:
+            cls._registry.clear()
+
+    def record(self, seconds: float) -> None:
+        with self._lock:
+            self._samples.append(seconds)
+
+    def percentile(self, fraction: float) -> Optional[float]:
+        """Return the latency below which ``fraction`` of the samples fall"""
+        with self._lock:
+            if len(self._samples) < self.MIN_SAMPLES:
+                return None
+            ordered = sorted(self._samples)
+        index = min(len(ordered) - 1, int(fraction * len(ordered)))
+        return ordered[index]
+
+
+class RetryPolicy:
+    """
+    How ResponseStrategy retries and hedges requests to the model.
+
+    Retriable errors (429, 5xx, timeouts) are retried up to
+    ``max_attempts`` times with full-jitter exponential backoff, waiting at
+    least as long as the ``Retry-After`` header asks. No retry is started
+    that cannot finish before ``deadline`` seconds after the response was
+    requested. With ``hedge`` enabled a second request is sent when the first
+    one takes longer than the ``hedge_percentile`` latency of the service, and
+    whichever answers first wins.
+    """
+
+    def __init__(self,
+                 max_attempts: int = 3,
+                 base_delay: float = 0.5,
+                 max_delay: float = 8.0,
+                 deadline: Optional[float] = None,
+                 hedge: bool = False,
+                 hedge_percentile: float = 0.95):
+        self.max_attempts: int = max(1, max_attempts)
+        self.base_delay: float = base_delay
+        self.max_delay: float = max_delay
+        self.deadline: Optional[float] = deadline
+        self.hedge: bool = hedge
+        self.hedge_percentile: float = hedge_percentile
+
+    # Connection configs keys of the policy
+    CONFIG_KEYS = ("retry_max_attempts", "retry_base_delay", "retry_max_delay",
+                   "request_deadline", "hedge_requests")
+
+    @staticmethod
+    def configured(configs: Optional[Dict[str, Any]]) -> bool:
+        """Whether connection configs opt in to the policy"""
+        return isinstance(configs, dict) and any(
+            key in configs for key in RetryPolicy.CONFIG_KEYS)
+
+    @staticmethod
+    def from_configs(
+            configs: Optional[Dict[str, Any]]) -> Optional["RetryPolicy"]:
+        """Build a policy from connection configs
+
+        Keys are ``retry_max_attempts``, ``retry_base_delay``,
+        ``retry_max_delay``, ``request_deadline`` and ``hedge_requests``.
+        Without any of them there is no policy, and requests are sent once
+        with the retries of the provider SDK, as before.
+        """
+        if not RetryPolicy.configured(configs):
+            return None
+        deadline = configs.get("request_deadline")
+        return RetryPolicy(
+            max_attempts=int(configs.get("retry_max_attempts", 3)),
+            base_delay=float(configs.get("retry_base_delay", 0.5)),
+            max_delay=float(configs.get("retry_max_delay", 8.0)),
+            deadline=float(deadline) if deadline else None,
+            hedge=str(configs.get("hedge_requests", "false")).strip().lower()
+            in ("1", "true", "yes"),
+        )
+
+    def backoff(self, attempt: int, retry_after: Optional[float] = None) -> float:
+        """Return the delay before retry number ``attempt`` (starting at 0)"""
+        ceiling = min(self.max_delay, self.base_delay * (2**attempt))
+        delay = random.uniform(0, ceiling)
+        if retry_after is not None:
+            delay = max(delay, retry_after)
+        return delay
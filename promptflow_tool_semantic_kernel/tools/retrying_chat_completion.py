@@ -0,0 +1,239 @@
+import asyncio
+import copy
+import time
+from collections.abc import AsyncGenerator
+from typing import Any, Optional
+
+from semantic_kernel.connectors.ai.prompt_execution_settings import PromptExecutionSettings
+from semantic_kernel.contents.chat_history import ChatHistory
+
+from promptflow_tool_semantic_kernel.tools.circuit_breaker import CircuitOpenError
+from promptflow_tool_semantic_kernel.tools.delegating_chat_completion import DelegatingChatCompletion
+from promptflow_tool_semantic_kernel.tools.error_classifier import ErrorClassifier
+from promptflow_tool_semantic_kernel.tools.logger_factory import LoggerFactory
+from promptflow_tool_semantic_kernel.tools.rate_limiter import last_rate_limit_headers
+from promptflow_tool_semantic_kernel.tools.retry_policy import LatencyTracker, RetryPolicy
+
+
+class DeadlineExceededError(TimeoutError):
+    """Raised when a response could not be produced within the deadline."""
+
+
+class RetryingChatCompletion(DelegatingChatCompletion):
+    """
+    Applies a RetryPolicy to every request of one response.
+
+    ResponseStrategy creates one instance per response, so the deadline
+    covers all requests of the function calling loop. Retries and hedges
+    happen per request to the model and never repeat plugin invocations.
+    Streaming requests are only retried or hedged until the first chunk,
+    the deadline also bounds the wait for every later chunk.
+
+    Hedged requests run in tasks of their own, the rate limit headers of the
+    winning request are copied back into the caller's context.
+    """
+
+    retry_policy: Any
+    latency_tracker: Any
+    deadline_at: Optional[float] = None
+
+    def __init__(self, inner: Any, retry_policy: RetryPolicy, **kwargs: Any):
+        deadline_at = None
+        if retry_policy.deadline:
+            deadline_at = time.monotonic() + retry_policy.deadline
+        super().__init__(inner,
+                         retry_policy=retry_policy,
+                         latency_tracker=LatencyTracker.for_service(
+                             (inner.service_url(), inner.ai_model_id)),
+                         deadline_at=deadline_at,
+                         **kwargs)
+
+    def _remaining(self) -> Optional[float]:
+        if self.deadline_at is None:
+            return None
+        return self.deadline_at - time.monotonic()
+
+    def _hedge_delay(self) -> Optional[float]:
+        if not self.retry_policy.hedge:
+            return None
+        return self.latency_tracker.percentile(
+            self.retry_policy.hedge_percentile)
+
+    async def _within_deadline(self, awaitable):
+        remaining = self._remaining()
+        if remaining is None:
+            return await awaitable
+        if remaining <= 0:
+            if asyncio.iscoroutine(awaitable):
+                awaitable.close()
+            raise DeadlineExceededError("Request deadline exceeded")
+        try:
+            return await asyncio.wait_for(awaitable, remaining)
+        except asyncio.TimeoutError as e:
+            raise DeadlineExceededError("Request deadline exceeded") from e
+
+    async def _wait_before_retry(self, attempt: int, error: Exception) -> None:
+        """Sleep before the next attempt or re-raise if it is not worth it"""
+        # An open circuit is meant to fail fast, not to be waited for
+        if isinstance(error, (DeadlineExceededError, CircuitOpenError)):
+            raise error
+        if (not ErrorClassifier.is_retriable(error)
+                or attempt >= self.retry_policy.max_attempts):
+            raise error
+        delay = self.retry_policy.backoff(
+            attempt - 1, ErrorClassifier.get_retry_after(error))
+        remaining = self._remaining()
+        if remaining is not None and delay >= remaining:
+            raise error
+
+        logger = LoggerFactory.create_logger("response-strategy")
+        logger.warning(f"Request failed (attempt {attempt}), retrying in "
+                       f"{delay:.2f}s: {str(error)}")
+        await asyncio.sleep(delay)
+
+    async def _timed_request(self, chat_history: ChatHistory,
+                             settings: PromptExecutionSettings):
+        start = time.monotonic()
+        # The connectors write the request messages into the settings
+        result = await self.inner._inner_get_chat_message_contents(
+            chat_history, copy.deepcopy(settings))
+        self.latency_tracker.record(time.monotonic() - start)
+        return result
+
+    @staticmethod
+    async def _with_headers(awaitable):
+        """Return the result and the rate limit headers of a hedged task"""
+        result = await awaitable
+        return result, last_rate_limit_headers.get()
+
+    async def _hedged_request(self, chat_history: ChatHistory,
+                              settings: PromptExecutionSettings):
+        hedge_delay = self._hedge_delay()
+        if hedge_delay is None:
+            return await self._timed_request(chat_history, settings)
+
+        primary = asyncio.ensure_future(
+            self._with_headers(self._timed_request(chat_history, settings)))
+        pending = {primary}
+        try:
+            done, _ = await asyncio.wait(pending, timeout=hedge_delay)
+            if not done:
+                pending.add(
+                    asyncio.ensure_future(
+                        self._with_headers(
+                            self._timed_request(chat_history, settings))))
+            error = None
+            while pending:
+                done, pending = await asyncio.wait(
+                    pending, return_when=asyncio.FIRST_COMPLETED)
+                for task in done:
+                    if task.exception() is None:
+                        result, headers = task.result()
+                        last_rate_limit_headers.set(headers)
+                        return result
+                    error = task.exception()
+            raise error
+        finally:
+            for task in pending:
+                task.cancel()
+
+    async def _inner_get_chat_message_contents(self, chat_history: ChatHistory,
+                                               settings: PromptExecutionSettings):
+        attempt = 0
+        while True:
+            attempt += 1
+            try:
+                return await self._within_deadline(
+                    self._hedged_request(chat_history, settings))
+            except Exception as e:
+                await self._wait_before_retry(attempt, e)
+
+    async def _open_stream(self, chat_history: ChatHistory,
+                           settings: PromptExecutionSettings,
+                           function_invoke_attempt: int):
+        """Start a streaming request and wait for its first chunk"""
+        start = time.monotonic()
+        stream = self.inner._inner_get_streaming_chat_message_contents(
+            chat_history, copy.deepcopy(settings), function_invoke_attempt)
+        try:
+            first = await stream.__anext__()
+        except StopAsyncIteration:
+            first = None
+        except BaseException:
+            await stream.aclose()
+            raise
+        self.latency_tracker.record(time.monotonic() - start)
+        return stream, first
+
+    async def _hedged_stream(self, chat_history: ChatHistory,
+                             settings: PromptExecutionSettings,
+                             function_invoke_attempt: int):
+        hedge_delay = self._hedge_delay()
+        if hedge_delay is None:
+            return await self._open_stream(chat_history, settings,
+                                           function_invoke_attempt)
+
+        pending = {
+            asyncio.ensure_future(
+                self._with_headers(
+                    self._open_stream(chat_history, settings,
+                                      function_invoke_attempt)))
+        }
+        winner = None
+        try:
+            done, _ = await asyncio.wait(pending, timeout=hedge_delay)
+            if not done:
+                pending.add(
+                    asyncio.ensure_future(
+                        self._with_headers(
+                            self._open_stream(chat_history, settings,
+                                              function_invoke_attempt))))
+            error = None
+            while pending and winner is None:
+                done, pending = await asyncio.wait(
+                    pending, return_when=asyncio.FIRST_COMPLETED)
+                for task in done:
+                    if task.exception() is not None:
+                        error = task.exception()
+                    elif winner is None:
+                        winner, headers = task.result()
+                        # The rest of the stream runs in this context
+                        last_rate_limit_headers.set(headers)
+                    else:
+                        await task.result()[0][0].aclose()
+            if winner is None:
+                raise error
+            return winner
+        finally:
+            for task in pending:
+                task.cancel()
+
+    async def _inner_get_streaming_chat_message_contents(
+            self,
+            chat_history: ChatHistory,
+            settings: PromptExecutionSettings,
+            function_invoke_attempt: int = 0) -> AsyncGenerator[list, Any]:
+        attempt = 0
+        while True:
+            attempt += 1
+            try:
+                stream, first = await self._within_deadline(
+                    self._hedged_stream(chat_history, settings,
+                                        function_invoke_attempt))
+                break
+            except Exception as e:
+                await self._wait_before_retry(attempt, e)
+
+        try:
+            if first is None:
+                return
+            yield first
+            while True:
+                try:
+                    # A stream stalling after its first chunk is bounded too
+                    messages = await self._within_deadline(stream.__anext__())
+                except StopAsyncIteration:
+                    return
+                yield messages
+        finally:
+            await stream.aclose()
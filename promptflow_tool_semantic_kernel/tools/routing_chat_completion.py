@@ -0,0 +1,182 @@
+import copy
+import random
+import time
+from collections.abc import AsyncGenerator
+from typing import Any, ClassVar, List, Optional
+
+from semantic_kernel.connectors.ai.prompt_execution_settings import PromptExecutionSettings
+from semantic_kernel.contents.chat_history import ChatHistory
+
+from promptflow_tool_semantic_kernel.tools.delegating_chat_completion import DelegatingChatCompletion
+from promptflow_tool_semantic_kernel.tools.error_classifier import ErrorClassifier
+from promptflow_tool_semantic_kernel.tools.logger_factory import LoggerFactory
+
+
+class Backend:
+    """Routing state of one deployment behind a RoutingChatCompletion."""
+
+    # Smoothing factor of the latency moving average
+    LATENCY_ALPHA = 0.3
+
+    def __init__(self,
+                 service: Any,
+                 weight: float = 1.0,
+                 name: Optional[str] = None,
+                 failure_cooldown: float = 5.0):
+        self.service = service
+        self.weight: float = max(float(weight), 0.01)
+        self.name: str = name or str(service.ai_model_id)
+        self.failure_cooldown: float = failure_cooldown
+        self.in_flight: int = 0
+        self.latency: Optional[float] = None
+        self.health: float = 1.0
+        self.cooldown_until: float = 0.0
+        self.successes: int = 0
+        self.failures: int = 0
+
+    def is_available(self, now: float) -> bool:
+        return now >= self.cooldown_until
+
+    def record_success(self, elapsed: float) -> None:
+        self.successes += 1
+        self.health = min(1.0, self.health * 0.8 + 0.2)
+        if self.latency is None:
+            self.latency = elapsed
+        else:
+            self.latency += self.LATENCY_ALPHA * (elapsed - self.latency)
+
+    def record_failure(self, retry_after: Optional[float] = None) -> None:
+        self.failures += 1
+        self.health = max(0.01, self.health * 0.5)
+        cooldown = retry_after if retry_after is not None else self.failure_cooldown
+        self.cooldown_until = time.monotonic() + cooldown
+
+    def stats(self) -> dict:
+        return {
+            "name": self.name,
+            "weight": self.weight,
+            "in_flight": self.in_flight,
+            "latency": self.latency,
+            "health": self.health,
+            "successes": self.successes,
+            "failures": self.failures,
+        }
+
+
+class RoutingChatCompletion(DelegatingChatCompletion):
+    """
+    Chat completion service that balances requests over several backends.
+
+    Backends are ranked by ``strategy`` (``least_loaded`` or
+    ``lowest_latency``), scaled by their weight and health score. Requests
+    that fail with a retriable error (429, 5xx, timeouts) fail over to the
+    next backend, and the failing backend is put on cooldown for its
+    ``Retry-After`` delay. A streaming response only fails over until its
+    first chunk has been yielded.
+    """
+
+    LEAST_LOADED: ClassVar[str] = "least_loaded"
+    LOWEST_LATENCY: ClassVar[str] = "lowest_latency"
+
+    backends: List[Any]
+    strategy: str = LEAST_LOADED
+
+    def __init__(self,
+                 backends: List[Backend],
+                 strategy: str = LEAST_LOADED,
+                 **kwargs: Any):
+        if not backends:
+            raise ValueError("At least one backend is required")
+        if strategy not in (self.LEAST_LOADED, self.LOWEST_LATENCY):
+            raise ValueError(f"Unknown routing strategy '{strategy}'")
+        super().__init__(inner=backends[0].service,
+                         backends=backends,
+                         strategy=strategy,
+                         **kwargs)
+
+    def wrapped_services(self) -> list:
+        return [backend.service for backend in self.backends]
+
+    def backend_stats(self) -> List[dict]:
+        """Return the health and load of every backend"""
+        return [backend.stats() for backend in self.backends]
+
+    def _cost(self, backend: Backend) -> float:
+        load = backend.in_flight + 1
+        if self.strategy == self.LOWEST_LATENCY:
+            # Unmeasured backends are probed first
+            load = (backend.latency or 0.0) * load
+        return load / (backend.weight * backend.health)
+
+    def _ranked_backends(self) -> List[Backend]:
+        """Order backends by cost, cooling down backends go last"""
+        now = time.monotonic()
+        available = [b for b in self.backends if b.is_available(now)]
+        cooling = [b for b in self.backends if not b.is_available(now)]
+        available.sort(key=lambda b: (self._cost(b), random.random()))
+        cooling.sort(key=lambda b: b.cooldown_until)
+        return available + cooling
+
+    def _handle_failure(self, backend: Backend, error: Exception) -> None:
+        """Record a failure, raising the error if failing over cannot help"""
+        if not ErrorClassifier.is_retriable(error):
+            raise error
+        backend.record_failure(ErrorClassifier.get_retry_after(error))
+        logger = LoggerFactory.create_logger("routing-chat-completion")
+        logger.warning(
+            f"Backend '{backend.name}' failed, trying next backend: {str(error)}"
+        )
+
+    async def _inner_get_chat_message_contents(self, chat_history: ChatHistory,
+                                               settings: PromptExecutionSettings):
+        last_error = None
+        for backend in self._ranked_backends():
+            backend.in_flight += 1
+            start = time.monotonic()
+            try:
+                result = await backend.service._inner_get_chat_message_contents(
+                    chat_history, copy.deepcopy(settings))
+            except Exception as e:
+                self._handle_failure(backend, e)
+                last_error = e
+                continue
+            finally:
+                backend.in_flight -= 1
+            backend.record_success(time.monotonic() - start)
+            return result
+        raise last_error
+
+    async def _inner_get_streaming_chat_message_contents(
+            self,
+            chat_history: ChatHistory,
+            settings: PromptExecutionSettings,
+            function_invoke_attempt: int = 0) -> AsyncGenerator[list, Any]:
+        last_error = None
+        for backend in self._ranked_backends():
+            backend.in_flight += 1
+            start = time.monotonic()
+            started = False
+            try:
+                async for messages in backend.service._inner_get_streaming_chat_message_contents(
+                        chat_history, copy.deepcopy(settings),
+                        function_invoke_attempt):
+                    if not started:
+                        # Time to first chunk is the latency that matters
+                        backend.record_success(time.monotonic() - start)
+                        started = True
+                    yield messages
+            except Exception as e:
+                if started:
+                    # Chunks were already sent, failing over would repeat them
+                    if ErrorClassifier.is_retriable(e):
+                        backend.record_failure()
+                    raise
+                self._handle_failure(backend, e)
+                last_error = e
+                continue
+            finally:
+                backend.in_flight -= 1
+            if not started:
+                backend.record_success(time.monotonic() - start)
+            return
+        raise last_error
@@ -2,23 +2,36 @@ from collections.abc import AsyncGenerator
 import json
 import logging
 from typing import Dict, List, Any, Union
-from jinja2 import Template
 
 from promptflow.core import tool
 from promptflow.connections import CustomConnection, AzureOpenAIConnection, OpenAIConnection
 from promptflow.contracts.types import PromptTemplate
 from promptflow._utils.logger_utils import LoggerFactory
 
-from semantic_kernel.connectors.ai.function_choice_behavior import FunctionChoiceBehavior
 from semantic_kernel.contents.chat_history import ChatHistory
 
 from promptflow_tool_semantic_kernel.tools.logger_factory import LoggerFactory
 from promptflow_tool_semantic_kernel.tools.kernel_factory import KernelFactory
+from promptflow_tool_semantic_kernel.tools.calibrating_chat_completion import CalibratingChatCompletion
 from promptflow_tool_semantic_kernel.tools.chat_history_processor import ChatHistoryProcessor
+from promptflow_tool_semantic_kernel.tools.history_compactor import HistoryCompactor
+from promptflow_tool_semantic_kernel.tools.history_window import HistoryWindow
+from promptflow_tool_semantic_kernel.tools.response_cache import ResponseCache
 from promptflow_tool_semantic_kernel.tools.response_strategy import ResponseStrategy
+from promptflow_tool_semantic_kernel.tools.retry_policy import RetryPolicy
+from promptflow_tool_semantic_kernel.tools.similarity_cache import SimilarityCache
+from promptflow_tool_semantic_kernel.tools.single_flight import SingleFlight
 from promptflow_tool_semantic_kernel.tools.tracing_disabler import TracingDisabler
 from promptflow_tool_semantic_kernel.tools.plugin_manager import PluginManager
+from promptflow_tool_semantic_kernel.tools.plugin_reloader import PluginReloader
+from promptflow_tool_semantic_kernel.tools.function_choice_cache import CachedFunctionChoiceBehavior
+from promptflow_tool_semantic_kernel.tools.function_result_cache import FunctionResultCache
+from promptflow_tool_semantic_kernel.tools.function_selector import FunctionSelector
+from promptflow_tool_semantic_kernel.tools.tool_call_executor import ToolCallExecutor
 from promptflow_tool_semantic_kernel.tools.response_processor import HistoryObserver, ResponseProcessor
+from promptflow_tool_semantic_kernel.tools.template_cache import TemplateCache
+from promptflow_tool_semantic_kernel.tools.token_estimator import TokenEstimator
+from promptflow_tool_semantic_kernel.tools.usage_tracking_chat_completion import UsageTrackingChatCompletion
 
 import logging
 
@@ -32,6 +45,18 @@ async def semantic_kernel_chat(
         prompt: PromptTemplate,
         plugins: List[Dict[str, Any]],
         streaming: bool = True,
+        parallel_tool_calls: bool = True,
+        max_parallel_tool_calls: int = ToolCallExecutor.DEFAULT_MAX_CONCURRENCY,
+        tool_call_timeout: float = 0.0,
+        max_functions: int = 0,
+        session_id: str = "",
+        max_history_tokens: int = 0,
+        summarize_after_messages: int = 0,
+        summary_deployment_name: str = "",
+        cache_responses: bool = False,
+        cache_tool_calls: bool = False,
+        similarity_threshold: float = 0.0,
+        coalesce_requests: bool = False,
         **kwargs) -> Union[str, AsyncGenerator[str, None]]:
     """
     Process chat interactions using Semantic Kernel.
@@ -44,35 +69,115 @@ async def semantic_kernel_chat(
     plugins: List of plugins to register with the kernel. Each plugin should be a dict with 
         'instance' (the plugin instance) and 'name' (optional plugin name)
     streaming: Whether to stream the response
+    parallel_tool_calls: Whether the model may request several tool calls at once
+    max_parallel_tool_calls: How many tool calls of the request run at the same time
+    tool_call_timeout: Seconds a tool call may take, 0 for no limit. Plugin
+        definitions can override it with 'timeout' and 'function_timeouts'
+    max_functions: How many of the best matching functions to send to the
+        model, 0 to send all of them
+    session_id: Identifies the conversation, so the messages of earlier
+        turns are reused instead of rebuilt from chat_history
+    max_history_tokens: Token budget of the messages sent to the model, the
+        oldest turns are dropped to fit. 0 for no limit
+    summarize_after_messages: With a session_id, fold the older half of the
+        history into a summary once it is longer. 0 to never summarize
+    summary_deployment_name: Deployment writing the summaries, defaults to
+        deployment_name
+    cache_responses: Answer repeated identical requests from the response
+        cache instead of the model
+    cache_tool_calls: Also cache turns that invoked tools, the tools do not
+        run again when they are replayed
+    similarity_threshold: Answer questions with the response to an earlier
+        question of at least this similarity, 0 to only reuse responses of
+        identical requests
+    coalesce_requests: Send concurrent identical requests to the model once
+        and share the response
     **kwargs: Additional parameters for prompt rendering
     """
     logger = LoggerFactory.create_logger("semantic-kernel-tool", logging.INFO)
 
+    pooled_service = None
     try:
-        # Render the prompt with provided parameters
-        rendered_prompt = Template(str(prompt),
-                                   trim_blocks=True,
-                                   keep_trailing_newline=True).render(**kwargs)
+        # Render the prompt with provided parameters, compiled once
+        rendered_prompt = TemplateCache.render(str(prompt), **kwargs)
 
         logger.info(f"Processing prompt: {rendered_prompt[:50]}...")
 
         # Create and configure the kernel
         kernel, chat_completion = KernelFactory.create_kernel(
             connection, deployment_name)
+        pooled_service = chat_completion
+        # Reports the prompt tokens served from the provider's cache
+        chat_completion = UsageTrackingChatCompletion(
+            chat_completion,
+            deployment_name,
+            ai_model_id=deployment_name,
+            service_id=deployment_name)
+
+        if PluginReloader.enabled():
+            PluginReloader.ensure_started(PluginManager.registry)
 
         # Register plugins using the plugin manager
         plugin_manager = PluginManager(kernel, logger)
-        plugin_manager.register_plugins(plugins)
+        # Tool definitions are built once per plugin list
+        plugins_key = plugin_manager.register_plugins(plugins)
+        ToolCallExecutor(
+            max_concurrency=max_parallel_tool_calls,
+            default_timeout=tool_call_timeout or None,
+            timeouts=ToolCallExecutor.timeouts_from_plugins(plugins)).install(
+                kernel)
+        FunctionResultCache.from_plugins(plugins).install(kernel)
 
         # Process chat history
         history: ChatHistory = ChatHistoryProcessor.build_history(
-            chat_history, rendered_prompt)
+            chat_history, rendered_prompt, session_id=session_id or None)
+        # Few-shot examples of the prompt are kept with its question
+        prompt_messages = ChatHistoryProcessor.prompt_messages(rendered_prompt)
+        if session_id and summarize_after_messages > 0:
+            history = ChatHistoryProcessor.compactor.compact(
+                history, session_id, summarize_after_messages,
+                HistoryCompactor.summarizer(
+                    connection, summary_deployment_name or deployment_name),
+                prompt_messages)
+        if max_history_tokens > 0:
+            # Estimates are calibrated with the usage the model reports
+            estimator = TokenEstimator.for_model(deployment_name)
+            history = HistoryWindow.fit(history, max_history_tokens,
+                                        estimator, prompt_messages)
+            chat_completion = CalibratingChatCompletion(
+                chat_completion, estimator)
 
         # Configure execution settings
         # Get execution settings from the kernel factory
         execution_settings = KernelFactory.get_execution_settings(connection)
-        execution_settings.function_choice_behavior = FunctionChoiceBehavior.Auto(
-        )
+        included_functions = None
+        if max_functions > 0:
+            # The history ends with the rendered prompt
+            included_functions = FunctionSelector.for_kernel(
+                kernel, plugins_key).select(
+                    FunctionSelector.history_text(history), max_functions)
+        execution_settings.function_choice_behavior = CachedFunctionChoiceBehavior.Auto(
+            cache_key=plugins_key,
+            filters={"included_functions": included_functions}
+            if included_functions else None)
+        if hasattr(execution_settings, "parallel_tool_calls"):
+            execution_settings.parallel_tool_calls = parallel_tool_calls
+        retry_policy = RetryPolicy.from_configs(
+            getattr(connection, "configs", {}))
+        response_cache = None
+        if cache_responses or coalesce_requests:
+            cache_key = ResponseCache.request_key(deployment_name, history,
+                                                  execution_settings,
+                                                  plugins_key)
+        if cache_responses:
+            response_cache = ResponseCache.shared()
+        similarity_cache = None
+        if similarity_threshold > 0:
+            similarity_cache = SimilarityCache.shared()
+            synonyms, opposites = PluginManager.similarity_vocabulary(plugins)
+            similarity_key = SimilarityCache.request_key(
+                deployment_name, history, execution_settings, plugins_key,
+                similarity_threshold, synonyms, opposites)
 
         # Get response using appropriate strategy
         # Create the history observer and response processor
@@ -84,7 +189,19 @@ async def semantic_kernel_chat(
             with TracingDisabler():
                 logger.debug("Using streaming response strategy")
                 content_generator = ResponseStrategy.get_streaming_response(
-                    chat_completion, history, execution_settings, kernel)
+                    chat_completion, history, execution_settings, kernel,
+                    retry_policy)
+                if coalesce_requests:
+                    content_generator = SingleFlight.stream(
+                        cache_key, content_generator, history)
+                if similarity_cache is not None:
+                    content_generator = similarity_cache.stream(
+                        similarity_key, content_generator, history,
+                        cache_tool_calls)
+                if response_cache is not None:
+                    content_generator = response_cache.stream(
+                        cache_key, content_generator, history,
+                        cache_tool_calls)
                 async for output in processor.process(content_generator,
                                                       is_streaming=True):
                     yield output
@@ -92,7 +209,18 @@ async def semantic_kernel_chat(
         else:
             logger.debug("Using complete response strategy")
             content_generator = ResponseStrategy.get_complete_response(
-                chat_completion, history, execution_settings, kernel)
+                chat_completion, history, execution_settings, kernel,
+                retry_policy)
+            if coalesce_requests:
+                content_generator = SingleFlight.complete(
+                    cache_key, content_generator, history)
+            if similarity_cache is not None:
+                content_generator = similarity_cache.complete(
+                    similarity_key, content_generator, history,
+                    cache_tool_calls)
+            if response_cache is not None:
+                content_generator = response_cache.complete(
+                    cache_key, content_generator, history, cache_tool_calls)
             async for output in processor.process(content_generator,
                                                   is_streaming=False):
                 yield output
@@ -101,3 +229,6 @@ async def semantic_kernel_chat(
         logger.error(f"Semantic kernel processing failed: {str(e)}",
                      exc_info=True)
         yield f"An error occurred: {str(e)}"
+    finally:
+        if pooled_service is not None:
+            KernelFactory.release(pooled_service)
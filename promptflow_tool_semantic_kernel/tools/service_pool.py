@@ -0,0 +1,228 @@
+import asyncio
+import hashlib
+import inspect
+import threading
+import time
+import weakref
+from collections import OrderedDict
+from typing import Any, Callable, Dict, Optional
+
+from promptflow_tool_semantic_kernel.tools.logger_factory import LoggerFactory
+
+
+class _Entry:
+    """Pooled service, the event loop it is bound to and its users."""
+
+    def __init__(self, service: Any, loop: Optional[Any]):
+        self.service: Any = service
+        self.last_used: float = time.monotonic()
+        # Held weakly, a loop of a finished asyncio.run must not be kept
+        self.loop_ref: Optional[weakref.ref] = (weakref.ref(loop)
+                                                if loop is not None else None)
+        self.users: int = 0
+
+    def loop_alive(self, loop: Optional[Any] = None) -> bool:
+        """Whether the entry's loop is open and, if given, is ``loop``"""
+        if self.loop_ref is None:
+            return loop is None
+        bound = self.loop_ref()
+        return (bound is not None and not bound.is_closed()
+                and (loop is None or bound is loop))
+
+
+class ServicePool:
+    """
+    Process-wide pool of chat completion services.
+
+    Entries are keyed by a fingerprint of the connection and deployment and
+    by the running event loop, since async HTTP clients are bound to the
+    loop that opened their connections. Services are therefore only reused
+    by requests on the same loop, as in an async server. When promptflow
+    runs each line in its own ``asyncio.run``, every line builds its own
+    service. They are evicted when the pool
+    exceeds ``max_size`` (least recently used first), when they have not
+    been used for ``idle_ttl`` seconds, or when their loop was closed, e.g.
+    at the end of ``asyncio.run``. Evicted services are handed to
+    ``close_callback`` so their HTTP clients get released, services still
+    in use only once the last user called ``release``.
+
+    All operations are synchronous and never await while holding the lock,
+    which makes the pool safe to use from threads and from coroutines.
+    Services are closed outside the lock.
+    """
+
+    def __init__(self,
+                 max_size: int = 32,
+                 idle_ttl: float = 600.0,
+                 close_callback: Optional[Callable[[Any], None]] = None):
+        self.max_size: int = max_size
+        self.idle_ttl: float = idle_ttl
+        self.close_callback: Callable[[Any], None] = (
+            close_callback or ServicePool.close_service)
+        self.hits: int = 0
+        self.misses: int = 0
+        self.evictions: int = 0
+        self._entries: "OrderedDict[tuple, _Entry]" = OrderedDict()
+        # Evicted entries waiting for their users to release them
+        self._retired: Dict[int, _Entry] = {}
+        self._lock = threading.RLock()
+
+    @staticmethod
+    def fingerprint(*parts: Any) -> str:
+        """Hash the given parts into a key that does not expose secrets"""
+        digest = hashlib.sha256()
+        for part in parts:
+            digest.update(str(part).encode("utf-8"))
+            digest.update(b"\x1f")
+        return digest.hexdigest()
+
+    @staticmethod
+    def _running_loop() -> Optional[Any]:
+        try:
+            return asyncio.get_running_loop()
+        except RuntimeError:
+            return None
+
+    def get_or_create(self, key: str, factory: Callable[[], Any]) -> Any:
+        """Return the pooled service for ``key`` or create it with ``factory``
+
+        The caller uses the service until it calls ``release``.
+        """
+        loop = self._running_loop()
+        # The id of a dead loop can be reused, entries check the loop itself
+        pool_key = (key, id(loop) if loop is not None else None)
+        to_close = []
+        try:
+            with self._lock:
+                self._evict_expired(to_close)
+                entry = self._entries.get(pool_key)
+                if entry is not None and not entry.loop_alive(loop):
+                    self._evict(pool_key, to_close)
+                    entry = None
+                if entry is not None:
+                    entry.last_used = time.monotonic()
+                    entry.users += 1
+                    self._entries.move_to_end(pool_key)
+                    self.hits += 1
+                    return entry.service
+                self.misses += 1
+        finally:
+            self._close_all(to_close)
+
+        # Build outside the lock so a slow constructor does not block hits
+        service = factory()
+
+        duplicate = None
+        try:
+            with self._lock:
+                entry = self._entries.get(pool_key)
+                if entry is not None and entry.loop_alive(loop):
+                    # Another caller won the race, keep its service
+                    entry.last_used = time.monotonic()
+                    self._entries.move_to_end(pool_key)
+                    duplicate, service = service, entry.service
+                else:
+                    if entry is not None:
+                        self._evict(pool_key, to_close)
+                    entry = self._entries[pool_key] = _Entry(service, loop)
+                    while len(self._entries) > self.max_size:
+                        self._evict(next(iter(self._entries)), to_close)
+                entry.users += 1
+        finally:
+            self._close_all(to_close)
+
+        if duplicate is not None:
+            self._close(duplicate, count=False)
+        return service
+
+    def release(self, service: Any) -> None:
+        """Return a service obtained from ``get_or_create``
+
+        An evicted service is closed when its last user releases it.
+        """
+        to_close = []
+        with self._lock:
+            retired = self._retired.get(id(service))
+            entries = [retired] if retired is not None else [
+                entry for entry in self._entries.values()
+                if entry.service is service
+            ]
+            for entry in entries:
+                entry.users = max(0, entry.users - 1)
+                if entry is retired and entry.users == 0:
+                    del self._retired[id(service)]
+                    to_close.append(entry)
+        self._close_all(to_close)
+
+    def stats(self) -> Dict[str, int]:
+        """Return hit/miss/eviction counters and the current size"""
+        with self._lock:
+            return {
+                "hits": self.hits,
+                "misses": self.misses,
+                "evictions": self.evictions,
+                "size": len(self._entries),
+            }
+
+    def clear(self) -> None:
+        """Close and drop every pooled service"""
+        with self._lock:
+            entries = list(self._entries.values()) + list(
+                self._retired.values())
+            self._entries.clear()
+            self._retired.clear()
+        for entry in entries:
+            self._close(entry.service)
+
+    def _evict(self, pool_key: tuple, to_close: list) -> None:
+        """Drop an entry, it is closed by the caller outside the lock"""
+        entry = self._entries.pop(pool_key)
+        self.evictions += 1
+        if entry.loop_ref is not None and not entry.loop_alive():
+            # Closing would need the loop, the sockets of the dead loop are
+            # closed by the garbage collector
+            return
+        if entry.users > 0:
+            self._retired[id(entry.service)] = entry
+        else:
+            to_close.append(entry)
+
+    def _evict_expired(self, to_close: list) -> None:
+        deadline = (time.monotonic() - self.idle_ttl
+                    if self.idle_ttl is not None else None)
+        expired = [
+            pool_key for pool_key, entry in self._entries.items()
+            if (deadline is not None and entry.last_used < deadline
+                and entry.users == 0) or (entry.loop_ref is not None
+                                          and not entry.loop_alive())
+        ]
+        for pool_key in expired:
+            self._evict(pool_key, to_close)
+
+    def _close_all(self, entries: list) -> None:
+        while entries:
+            self._close(entries.pop().service, count=False)
+
+    def _close(self, service: Any, count: bool = True) -> None:
+        if count:
+            self.evictions += 1
+        try:
+            self.close_callback(service)
+        except Exception as e:
+            logger = LoggerFactory.create_logger("service-pool")
+            logger.warning(f"Failed to close pooled service: {str(e)}")
+
+    @staticmethod
+    def close_service(service: Any) -> None:
+        """Close the HTTP client of a chat completion service, if it has one"""
+        client = getattr(service, "client", None)
+        close = getattr(client, "close", None)
+        if not callable(close):
+            return
+        result = close()
+        if not inspect.isawaitable(result):
+            return
+        try:
+            asyncio.get_running_loop().create_task(result)
+        except RuntimeError:
+            asyncio.run(result)
@@ -0,0 +1,334 @@
+import json
+import math
+import os
+import random
+import threading
+import time
+from collections import Counter, OrderedDict
+from typing import Any, Callable, Dict, Iterable, List, Optional, Tuple
+
+from semantic_kernel.contents.chat_history import ChatHistory
+from semantic_kernel.contents.utils.author_role import AuthorRole
+
+from promptflow_tool_semantic_kernel.tools.function_selector import FunctionSelector
+from promptflow_tool_semantic_kernel.tools.logger_factory import LoggerFactory
+from promptflow_tool_semantic_kernel.tools.response_cache import CachedResponse, ReplayingCache
+from promptflow_tool_semantic_kernel.tools.response_strategy import ResponseStrategy
+from promptflow_tool_semantic_kernel.tools.service_pool import ServicePool
+
+
+class SimilarityKey:
+    """Current question of a request and the scope it may be answered in."""
+
+    def __init__(self,
+                 scope: str,
+                 question: str,
+                 threshold: float,
+                 synonyms: Optional[Dict[str, str]] = None,
+                 opposites: Iterable[Tuple[str, str]] = ()):
+        self.scope: str = scope
+        self.question: str = question
+        self.threshold: float = threshold
+        # Words counted as another word, and pairs of words that never match
+        self.synonyms: Dict[str, str] = dict(synonyms or {})
+        self.opposites: Dict[str, str] = {}
+        for first, second in opposites:
+            self.opposites[first] = second
+            self.opposites[second] = first
+        # Matching response sent to the model anyway, to check the answer
+        self.candidate: Optional[CachedResponse] = None
+
+    def __str__(self) -> str:
+        return self.scope
+
+
+class _Entry:
+    """Question with its sparse term vector and the response to it."""
+
+    def __init__(self, question: str, response: CachedResponse,
+                 vector: Dict[str, float]):
+        self.question: str = question
+        self.response: CachedResponse = response
+        self.vector: Dict[str, float] = vector
+        self.norm: float = SimilarityCache.norm(vector)
+
+
+class _Scope:
+    """Questions answered in one scope, oldest first."""
+
+    def __init__(self):
+        self.entries: "OrderedDict[int, _Entry]" = OrderedDict()
+        # Weights of each term in the questions that contain it
+        self.postings: Dict[str, Dict[int, float]] = {}
+        self.next_id: int = 0
+
+    def add(self, entry: _Entry) -> None:
+        self.entries[self.next_id] = entry
+        for term, weight in entry.vector.items():
+            self.postings.setdefault(term, {})[self.next_id] = weight
+        self.next_id += 1
+
+    def pop_oldest(self) -> None:
+        entry_id, entry = self.entries.popitem(last=False)
+        for term in entry.vector:
+            posting = self.postings[term]
+            del posting[entry_id]
+            if not posting:
+                del self.postings[term]
+
+
+class SimilarityCache(ReplayingCache):
+    """
+    Answers questions with the response to an earlier, similar question.
+
+    Questions are compared locally, without an embedding service, as sparse
+    vectors of their words. Case, punctuation, word order, plurals and stop
+    words do not matter. The key of a request can map synonyms onto one
+    word and name pairs of opposite words, such as "on" and "off", that
+    never match. Both come from the plugins of the request. Otherwise a
+    question matches when the cosine similarity reaches the threshold of
+    the request. An inverted index of the terms only scores questions
+    sharing a term with the query.
+
+    Questions are only compared within a scope: the deployment, the
+    plugins, the system messages, the execution settings and the previous
+    message of the conversation. Each scope keeps its ``max_entries``
+    newest questions for ``ttl`` seconds, and the ``max_scopes`` least
+    recently used scopes are kept.
+
+    A ``verify_rate`` share of the hits is still sent to the model. When
+    its answer and the cached one have a similarity below
+    ``answer_threshold``, the hit is counted as a false positive.
+    """
+
+    STOP_WORDS = frozenset([
+        "a", "an", "and", "are", "at", "be", "by", "can", "could", "do",
+        "for", "i", "in", "is", "it", "me", "my", "of", "please", "s", "that",
+        "the", "this", "to", "what", "with", "would", "you"
+    ])
+    _shared: Optional["SimilarityCache"] = None
+    _shared_lock = threading.Lock()
+
+    def __init__(self,
+                 max_entries: int = 1000,
+                 max_scopes: int = 64,
+                 ttl: float = 86400.0,
+                 verify_rate: float = 0.05,
+                 answer_threshold: float = 0.5,
+                 clock: Callable[[], float] = time.time,
+                 sample: Callable[[], float] = random.random):
+        self.max_entries: int = max_entries
+        self.max_scopes: int = max_scopes
+        self.ttl: float = ttl
+        self.verify_rate: float = verify_rate
+        self.answer_threshold: float = answer_threshold
+        self.verified: int = 0
+        self.false_positives: int = 0
+        super().__init__(clock)
+        self._sample = sample
+        self._scopes: "OrderedDict[str, _Scope]" = OrderedDict()
+
+    @classmethod
+    def shared(cls) -> "SimilarityCache":
+        """Return the process-wide cache
+
+        Configured with the ``SIMILARITY_CACHE_SIZE``,
+        ``SIMILARITY_CACHE_TTL`` and ``SIMILARITY_CACHE_VERIFY_RATE``
+        environment variables.
+        """
+        with cls._shared_lock:
+            if cls._shared is None:
+                cls._shared = SimilarityCache(
+                    max_entries=int(
+                        os.environ.get("SIMILARITY_CACHE_SIZE", 1000)),
+                    ttl=float(os.environ.get("SIMILARITY_CACHE_TTL", 86400)),
+                    verify_rate=float(
+                        os.environ.get("SIMILARITY_CACHE_VERIFY_RATE", 0.05)))
+            return cls._shared
+
+    @classmethod
+    def clear_shared(cls) -> None:
+        with cls._shared_lock:
+            cls._shared = None
+
+    @classmethod
+    def terms(cls,
+              text: str,
+              synonyms: Optional[Dict[str, str]] = None) -> List[str]:
+        synonyms = synonyms or {}
+        return [
+            synonyms.get(word, word)
+            for word in FunctionSelector.tokenize(text)
+            if word not in cls.STOP_WORDS
+        ]
+
+    @classmethod
+    def vector(cls,
+               text: str,
+               synonyms: Optional[Dict[str, str]] = None) -> Dict[str, float]:
+        """Term frequencies of a text, dampened"""
+        return {
+            term: math.log1p(count)
+            for term, count in Counter(cls.terms(text, synonyms)).items()
+        }
+
+    @staticmethod
+    def norm(vector: Dict[str, float]) -> float:
+        return math.sqrt(sum(weight * weight for weight in vector.values()))
+
+    @classmethod
+    def similarity(cls, first: Dict[str, float],
+                   second: Dict[str, float]) -> float:
+        norm = cls.norm(first) * cls.norm(second)
+        dot = sum(weight * second.get(term, 0.0)
+                  for term, weight in first.items())
+        return dot / norm if norm else 0.0
+
+    @staticmethod
+    def contradicts(first: Dict[str, float], second: Dict[str, float],
+                    opposites: Dict[str, str]) -> bool:
+        """Whether one text has a word and the other only its opposite"""
+        for term in first:
+            opposite = opposites.get(term)
+            if (opposite in second and opposite not in first
+                    and term not in second):
+                return True
+        return False
+
+    @staticmethod
+    def request_key(model: str,
+                    history: ChatHistory,
+                    settings: Any,
+                    plugins_key: str,
+                    threshold: float,
+                    synonyms: Optional[Dict[str, str]] = None,
+                    opposites: Iterable[Tuple[str, str]] = ()
+                    ) -> SimilarityKey:
+        """Key of the current question, the last message of the history"""
+        messages = history.messages
+        system = [
+            message.content for message in messages[:-1]
+            if message.role == AuthorRole.SYSTEM
+        ]
+        previous = [
+            message.to_dict() for message in messages[:-1]
+            if message.role != AuthorRole.SYSTEM
+        ][-1:]
+        scope = ServicePool.fingerprint(
+            model, plugins_key, json.dumps(system),
+            json.dumps(previous, sort_keys=True, default=str),
+            json.dumps(settings.prepare_settings_dict(),
+                       sort_keys=True,
+                       default=str))
+        return SimilarityKey(scope, messages[-1].content or "", threshold,
+                             synonyms, opposites)
+
+    def get(self, key: SimilarityKey) -> Optional[CachedResponse]:
+        vector = self.vector(key.question, key.synonyms)
+        if not vector:
+            return None
+        match = self._search(key, vector)
+        if match is None:
+            return None
+        question, response, score = match
+
+        logger = LoggerFactory.create_logger("similarity-cache")
+        if self.verify_rate and self._sample() < self.verify_rate:
+            key.candidate = response
+            self.record("verified")
+            logger.debug(f"Verifying the answer of {question!r} "
+                         f"(similarity {score:.2f})")
+            return None
+        logger.info(f"Answering {key.question[:50]!r} like {question[:50]!r} "
+                    f"(similarity {score:.2f})")
+        return response
+
+    def _search(
+        self, key: SimilarityKey, vector: Dict[str, float]
+    ) -> Optional[Tuple[str, CachedResponse, float]]:
+        with self._lock:
+            scope = self._scopes.get(key.scope)
+            if scope is None:
+                return None
+            self._scopes.move_to_end(key.scope)
+            self._expire(scope)
+            # Only questions sharing a term with this one can score above 0
+            dots: Dict[int, float] = {}
+            for term, weight in vector.items():
+                for entry_id, other in scope.postings.get(term, {}).items():
+                    dots[entry_id] = dots.get(entry_id, 0.0) + weight * other
+            norm = self.norm(vector)
+            scores = sorted(
+                ((dot / (norm * scope.entries[entry_id].norm), entry_id)
+                 for entry_id, dot in dots.items()),
+                reverse=True)
+            for score, entry_id in scores:
+                if score < key.threshold:
+                    return None
+                entry = scope.entries[entry_id]
+                if not self.contradicts(vector, entry.vector, key.opposites):
+                    return entry.question, entry.response, score
+        return None
+
+    def _expire(self, scope: _Scope) -> None:
+        # Questions are stored in order, the oldest come first
+        now = self._clock()
+        while scope.entries and now - next(iter(
+                scope.entries.values())).response.created >= self.ttl:
+            scope.pop_oldest()
+
+    def put(self, key: SimilarityKey, response: CachedResponse) -> None:
+        vector = self.vector(key.question, key.synonyms)
+        if not vector:
+            return
+        entry = _Entry(key.question, response, vector)
+        with self._lock:
+            scope = self._scopes.get(key.scope)
+            if scope is None:
+                scope = self._scopes[key.scope] = _Scope()
+            self._scopes.move_to_end(key.scope)
+            self._expire(scope)
+            scope.add(entry)
+            while len(scope.entries) > self.max_entries:
+                scope.pop_oldest()
+            while len(self._scopes) > self.max_scopes:
+                self._scopes.popitem(last=False)
+
+    async def _store(self, key: SimilarityKey, chunks: List[Optional[str]],
+                     history: ChatHistory, start: int,
+                     allow_tool_calls: bool) -> None:
+        answer = "".join(chunk or "" for chunk in chunks)
+        if key.candidate is not None and not answer.startswith(
+                ResponseStrategy.ERROR_PREFIX):
+            similarity = self.similarity(
+                self.vector(answer, key.synonyms),
+                self.vector(key.candidate.content, key.synonyms))
+            if similarity < self.answer_threshold:
+                self.record("false_positives")
+                LoggerFactory.create_logger("similarity-cache").warning(
+                    f"Cached answer for {key.question[:50]!r} differs from "
+                    f"the model's (similarity {similarity:.2f})")
+        await super()._store(key, chunks, history, start,
+                             allow_tool_calls)
+
+    def stats(self) -> Dict[str, int]:
+        with self._lock:
+            return {
+                "scopes": len(self._scopes),
+                "entries": sum(
+                    len(scope.entries) for scope in self._scopes.values()),
+                "hits": self.hits,
+                "misses": self.misses,
+                "bypassed": self.bypassed,
+                "verified": self.verified,
+                "false_positives": self.false_positives,
+            }
+
+    def clear(self) -> None:
+        with self._lock:
+            self._scopes.clear()
+            self.hits = 0
+            self.misses = 0
+            self.bypassed = 0
+            self.verified = 0
+            self.false_positives = 0
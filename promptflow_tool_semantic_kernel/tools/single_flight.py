@@ -0,0 +1,267 @@
+import asyncio
+import copy
+import threading
+from collections.abc import AsyncGenerator
+from typing import Any, Awaitable, Callable, Dict, List, Optional, Tuple
+
+from semantic_kernel.contents.chat_history import ChatHistory
+
+from promptflow_tool_semantic_kernel.tools.logger_factory import LoggerFactory
+
+
+class _Waiter:
+    """Subscriber waiting for news of a flight and the loop it waits on."""
+
+    def __init__(self):
+        self.loop = asyncio.get_running_loop()
+        self.event = asyncio.Event()
+
+    def wake(self) -> None:
+        """Wake the subscriber, from any thread"""
+        try:
+            self.loop.call_soon_threadsafe(self.event.set)
+        except RuntimeError:
+            # Its loop is closed, the subscriber is gone
+            pass
+
+
+class _Flight:
+    """Upstream call shared by the subscribers of identical requests."""
+
+    def __init__(self):
+        self.chunks: List[Optional[str]] = []
+        # Messages the call added to the leader's history so far
+        self.messages: List[Any] = []
+        # Number of those messages added before each chunk
+        self.marks: List[int] = []
+        self.done: bool = False
+        self.error: Optional[BaseException] = None
+        self.subscribers: int = 0
+        self.task: Optional[asyncio.Task] = None
+        self.loop: Optional[asyncio.AbstractEventLoop] = None
+        self._waiters: List[_Waiter] = []
+        self._lock = threading.Lock()
+
+    def add(self, chunk: Optional[str], messages: List[Any]) -> None:
+        """Publish a chunk and the messages added before it"""
+
+        def change():
+            self.messages = messages
+            self.marks.append(len(messages))
+            self.chunks.append(chunk)
+
+        self._update(change)
+
+    def finish(self, error: Optional[BaseException],
+               messages: List[Any]) -> None:
+
+        def change():
+            self.messages = messages
+            self.error = error
+            self.done = True
+
+        self._update(change)
+
+    def _update(self, change: Callable[[], None]) -> None:
+        """Apply a change and wake the subscribers of every loop"""
+        with self._lock:
+            change()
+            waiters, self._waiters = self._waiters, []
+        for waiter in waiters:
+            waiter.wake()
+
+    async def wait(self, ready: Callable[[], bool]) -> None:
+        """Wait for an update unless ``ready`` is true already"""
+        waiter = _Waiter()
+        with self._lock:
+            if ready():
+                return
+            self._waiters.append(waiter)
+        try:
+            await waiter.event.wait()
+        finally:
+            with self._lock:
+                if waiter in self._waiters:
+                    self._waiters.remove(waiter)
+
+    def cancel(self) -> None:
+        """Cancel the call, from any thread"""
+        try:
+            self.loop.call_soon_threadsafe(self.task.cancel)
+        except RuntimeError:
+            # Its loop is closed, which cancelled the call already
+            pass
+
+
+class SingleFlight:
+    """
+    Coalesces concurrent identical requests into one upstream call.
+
+    The first request of a key starts the call in a task of its own, later
+    requests with the same key subscribe to it until it is finished. Every
+    subscriber of a stream receives all chunks, a late joiner first the
+    ones already received. A subscriber that disconnects only unsubscribes,
+    the call is cancelled once it has no subscribers left. Subscribers
+    other than the first get the tool messages of the call added to their
+    history, when streaming before the chunk that followed them on the
+    first one, otherwise when the call is finished.
+
+    Calls are shared by the requests of every event loop and thread of the
+    process, as when promptflow runs each line in its own ``asyncio.run``.
+    The call runs on the loop of the first request, since its services are
+    bound to that loop. If that loop is shut down before the call is
+    finished, the other subscribers get an error.
+    """
+
+    _flights: Dict[Tuple[bool, str], _Flight] = {}
+    _lock = threading.Lock()
+    started: int = 0
+    coalesced: int = 0
+
+    @classmethod
+    def _join(cls, flight_key: tuple) -> Tuple[_Flight, bool]:
+        """Return the flight of a key and whether it is new"""
+        with cls._lock:
+            flight = cls._flights.get(flight_key)
+            created = flight is None
+            if created:
+                flight = cls._flights[flight_key] = _Flight()
+                cls.started += 1
+            else:
+                cls.coalesced += 1
+            flight.subscribers += 1
+        if not created:
+            LoggerFactory.create_logger("single-flight").debug(
+                f"Joined request {flight_key[1][:12]} with "
+                f"{flight.subscribers - 1} others")
+        return flight, created
+
+    @classmethod
+    def _remove(cls, flight_key: tuple, flight: _Flight) -> None:
+        with cls._lock:
+            if cls._flights.get(flight_key) is flight:
+                del cls._flights[flight_key]
+
+    @classmethod
+    def _leave(cls, flight_key: tuple, flight: _Flight) -> None:
+        with cls._lock:
+            flight.subscribers -= 1
+            abandoned = flight.subscribers == 0 and not flight.done
+        if abandoned:
+            cls._remove(flight_key, flight)
+            flight.cancel()
+
+    @classmethod
+    async def _produce(cls, flight_key: tuple, flight: _Flight, chunks: Any,
+                       history: ChatHistory, streaming: bool) -> None:
+        start = len(history.messages)
+        error = None
+        try:
+            if streaming:
+                async for chunk in chunks:
+                    flight.add(chunk, history.messages[start:])
+            else:
+                result = await chunks
+                flight.add(result, history.messages[start:])
+        except asyncio.CancelledError:
+            # Only seen by subscribers if the loop of the call shut down
+            error = RuntimeError("The shared request was cancelled")
+            raise
+        except Exception as e:
+            # Raised to every subscriber
+            error = e
+        finally:
+            cls._remove(flight_key, flight)
+            flight.finish(error, history.messages[start:])
+
+    @classmethod
+    def _subscribe(cls, key: str, chunks: Any, history: ChatHistory,
+                   streaming: bool) -> Tuple[tuple, _Flight, bool]:
+        # Streamed and complete responses are separate calls
+        flight_key = (streaming, key)
+        flight, leader = cls._join(flight_key)
+        if leader:
+            flight.loop = asyncio.get_running_loop()
+            flight.task = asyncio.ensure_future(
+                cls._produce(flight_key, flight, chunks, history, streaming))
+        return flight_key, flight, leader
+
+    @staticmethod
+    def _finish(flight: _Flight, history: ChatHistory, leader: bool,
+                added: int) -> None:
+        error = flight.error
+        if error is not None:
+            # A copy per subscriber, so their tracebacks do not pile up on
+            # one exception shared across requests
+            try:
+                fresh = copy.copy(error)
+            except Exception:
+                fresh = RuntimeError(str(error))
+            raise fresh from error
+        if not leader:
+            history.messages.extend(flight.messages[added:])
+
+    @classmethod
+    async def stream(cls, key: str, chunks: AsyncGenerator[Optional[str],
+                                                           None],
+                     history: ChatHistory
+                     ) -> AsyncGenerator[Optional[str], None]:
+        """Stream the chunks of the shared call of a request"""
+        flight_key, flight, leader = cls._subscribe(key, chunks, history,
+                                                    True)
+        try:
+            if not leader:
+                # The request is not sent
+                await chunks.aclose()
+            received = 0
+            added = 0
+            while True:
+                if received < len(flight.chunks):
+                    if not leader and added < flight.marks[received]:
+                        # Before the chunk, like on the leader's history,
+                        # so the tool messages are sent to the client
+                        history.messages.extend(
+                            flight.messages[added:flight.marks[received]])
+                        added = flight.marks[received]
+                    received += 1
+                    yield flight.chunks[received - 1]
+                elif flight.done:
+                    break
+                else:
+                    await flight.wait(lambda: received < len(flight.chunks)
+                                      or flight.done)
+            cls._finish(flight, history, leader, added)
+        finally:
+            cls._leave(flight_key, flight)
+
+    @classmethod
+    async def complete(cls, key: str, content: Awaitable[str],
+                       history: ChatHistory) -> str:
+        """Return the response of the shared call of a request"""
+        flight_key, flight, leader = cls._subscribe(key, content, history,
+                                                    False)
+        if not leader:
+            getattr(content, "close", lambda: None)()
+        try:
+            while not flight.done:
+                await flight.wait(lambda: flight.done)
+            cls._finish(flight, history, leader, 0)
+            return flight.chunks[0]
+        finally:
+            cls._leave(flight_key, flight)
+
+    @classmethod
+    def stats(cls) -> Dict[str, int]:
+        with cls._lock:
+            return {
+                "in_flight": len(cls._flights),
+                "started": cls.started,
+                "coalesced": cls.coalesced,
+            }
+
+    @classmethod
+    def clear(cls) -> None:
+        with cls._lock:
+            cls._flights.clear()
+            cls.started = 0
+            cls.coalesced = 0
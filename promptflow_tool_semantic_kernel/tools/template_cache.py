@@ -0,0 +1,73 @@
+import hashlib
+import threading
+from collections import OrderedDict
+from typing import Any, Dict
+
+from jinja2 import Template
+from jinja2.sandbox import SandboxedEnvironment
+
+
+class TemplateCache:
+    """
+    Process-wide cache of compiled prompt templates.
+
+    Templates are compiled once by a shared sandboxed environment and kept
+    by the hash of their source, least recently used first evicted once
+    there are more than ``MAX_SIZE``. The sandbox rejects access to unsafe
+    attributes such as ``__class__`` from the template.
+    """
+
+    MAX_SIZE = 256
+
+    environment = SandboxedEnvironment(trim_blocks=True,
+                                       keep_trailing_newline=True)
+
+    _templates: "OrderedDict[str, Template]" = OrderedDict()
+    _lock = threading.Lock()
+    hits: int = 0
+    misses: int = 0
+
+    @staticmethod
+    def key(source: str) -> str:
+        return hashlib.sha256(source.encode("utf-8")).hexdigest()
+
+    @classmethod
+    def get(cls, source: str) -> Template:
+        """Return the compiled template of a source"""
+        key = cls.key(source)
+        with cls._lock:
+            template = cls._templates.get(key)
+            if template is not None:
+                cls._templates.move_to_end(key)
+                cls.hits += 1
+                return template
+            cls.misses += 1
+
+        # Compiled outside the lock, a concurrent miss compiles it twice
+        template = cls.environment.from_string(source)
+        with cls._lock:
+            cls._templates[key] = template
+            cls._templates.move_to_end(key)
+            while len(cls._templates) > cls.MAX_SIZE:
+                cls._templates.popitem(last=False)
+        return template
+
+    @classmethod
+    def render(cls, source: str, **kwargs: Any) -> str:
+        return cls.get(source).render(**kwargs)
+
+    @classmethod
+    def stats(cls) -> Dict[str, int]:
+        with cls._lock:
+            return {
+                "templates": len(cls._templates),
+                "hits": cls.hits,
+                "misses": cls.misses,
+            }
+
+    @classmethod
+    def clear(cls) -> None:
+        with cls._lock:
+            cls._templates.clear()
+            cls.hits = 0
+            cls.misses = 0
@@ -0,0 +1,95 @@
+import json
+import math
+import threading
+from typing import Any, Dict, Iterable, Optional
+
+from semantic_kernel.contents.function_call_content import FunctionCallContent
+from semantic_kernel.contents.function_result_content import FunctionResultContent
+
+
+class TokenEstimator:
+    """
+    Estimates prompt tokens locally from the length of the text.
+
+    No tokenizer is downloaded. The estimate starts at ``chars_per_token``
+    characters per token and is calibrated per model: ``observe`` compares
+    an estimate with the prompt tokens the service reported and moves
+    ``factor`` towards their ratio.
+    """
+
+    DEFAULT_CHARS_PER_TOKEN = 4.0
+    # Role and separators of the chat format
+    TOKENS_PER_MESSAGE = 4
+    # Weight of a new observation in the calibration factor
+    SMOOTHING = 0.2
+    MIN_FACTOR = 0.25
+    MAX_FACTOR = 4.0
+
+    _models: Dict[str, "TokenEstimator"] = {}
+    _models_lock = threading.Lock()
+
+    def __init__(self,
+                 model: str = "",
+                 chars_per_token: float = DEFAULT_CHARS_PER_TOKEN):
+        self.model: str = model
+        self.chars_per_token: float = chars_per_token
+        self.factor: float = 1.0
+        self.observations: int = 0
+        self._lock = threading.Lock()
+
+    @classmethod
+    def for_model(cls, model: str) -> "TokenEstimator":
+        """Return the process-wide estimator of a model"""
+        with cls._models_lock:
+            estimator = cls._models.get(model)
+            if estimator is None:
+                estimator = cls._models[model] = TokenEstimator(model)
+            return estimator
+
+    @classmethod
+    def clear_registry(cls) -> None:
+        with cls._models_lock:
+            cls._models.clear()
+
+    def _raw_text(self, text: Optional[str]) -> float:
+        return len(text or "") / self.chars_per_token
+
+    def estimate_text(self, text: Optional[str]) -> int:
+        return math.ceil(self._raw_text(text) * self.factor)
+
+    def _raw_message(self, message: Any) -> float:
+        tokens = self._raw_text(message.content)
+        for item in message.items:
+            if isinstance(item, FunctionCallContent):
+                tokens += self._raw_text(
+                    f"{item.name} {item.arguments or ''}")
+            elif isinstance(item, FunctionResultContent):
+                tokens += self._raw_text(str(item.result))
+        return tokens
+
+    def estimate_message(self, message: Any) -> int:
+        return self.TOKENS_PER_MESSAGE + math.ceil(
+            self._raw_message(message) * self.factor)
+
+    def estimate(self, messages: Iterable[Any]) -> int:
+        return sum(self.estimate_message(message) for message in messages)
+
+    def estimate_request(self, messages: Iterable[Any],
+                         settings: Any = None) -> int:
+        """Estimate the prompt of a request, including tool definitions"""
+        tokens = self.estimate(messages)
+        tools = getattr(settings, "tools", None)
+        if tools:
+            tokens += self.estimate_text(json.dumps(tools))
+        return tokens
+
+    def observe(self, estimated: int, actual: int) -> None:
+        """Calibrate with the prompt tokens the service reported"""
+        if estimated <= 0 or actual <= 0:
+            return
+        with self._lock:
+            target = self.factor * actual / estimated
+            self.factor += self.SMOOTHING * (target - self.factor)
+            self.factor = min(self.MAX_FACTOR,
+                              max(self.MIN_FACTOR, self.factor))
+            self.observations += 1
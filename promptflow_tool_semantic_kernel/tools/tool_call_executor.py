@@ -0,0 +1,179 @@
+import asyncio
+import os
+import threading
+import weakref
+from contextvars import ContextVar
+from typing import Any, Callable, Dict, List, Optional
+
+from semantic_kernel.functions.function_result import FunctionResult
+
+from promptflow_tool_semantic_kernel.tools.logger_factory import LoggerFactory
+
+# Model turn of the tool call running in the current task
+_current_turn: ContextVar[Optional["_Turn"]] = ContextVar("_current_turn",
+                                                          default=None)
+
+
+class FatalToolCallError(Exception):
+    """Raised by a plugin function to cancel the other tool calls of its turn."""
+
+
+class _Turn:
+    """Tool calls the model requested in one response."""
+
+    def __init__(self, function_count: int):
+        self.function_count: int = function_count
+        self.finished: int = 0
+        self.tasks: set = set()
+        self.failed_function: Optional[str] = None
+
+
+class ToolCallExecutor:
+    """
+    Limits and supervises the tool calls of a kernel.
+
+    Semantic Kernel starts all tool calls of a model turn at once. Installed
+    as kernel filters, the executor caps how many of them run at the same
+    time (``max_concurrency`` per request, and the
+    ``TOOL_CALL_MAX_CONCURRENCY`` environment variable for all requests of
+    an event loop), applies a timeout per function and cancels the
+    remaining calls of a turn when one of them raises FatalToolCallError.
+    Timed out and cancelled calls report an error to the model instead of
+    a result.
+
+    Timeouts are looked up by fully qualified function name
+    (``plugin-function``), then by plugin name, then ``default_timeout``.
+    """
+
+    DEFAULT_MAX_CONCURRENCY = 8
+    DEFAULT_SHARED_MAX_CONCURRENCY = 32
+
+    _semaphores: "weakref.WeakKeyDictionary" = weakref.WeakKeyDictionary()
+    _semaphores_lock = threading.Lock()
+
+    def __init__(self,
+                 max_concurrency: int = DEFAULT_MAX_CONCURRENCY,
+                 default_timeout: Optional[float] = None,
+                 timeouts: Optional[Dict[str, float]] = None):
+        self.max_concurrency: int = max(1, max_concurrency)
+        self.default_timeout: Optional[float] = default_timeout
+        self.timeouts: Dict[str, float] = timeouts or {}
+        self._turns: Dict[int, _Turn] = {}
+        self._limit: Optional[asyncio.Semaphore] = None
+
+    @staticmethod
+    def timeouts_from_plugins(
+            plugins: List[Dict[str, Any]]) -> Dict[str, float]:
+        """Read ``timeout`` and ``function_timeouts`` of plugin definitions"""
+        timeouts = {}
+        for plugin in plugins or []:
+            if not isinstance(plugin, dict) or not plugin.get("name"):
+                continue
+            name = plugin["name"]
+            if plugin.get("timeout"):
+                timeouts[name] = float(plugin["timeout"])
+            for function_name, timeout in (plugin.get("function_timeouts")
+                                           or {}).items():
+                timeouts[f"{name}-{function_name}"] = float(timeout)
+        return timeouts
+
+    def install(self, kernel: Any) -> None:
+        kernel.add_filter("auto_function_invocation",
+                          self._auto_function_invocation_filter)
+        kernel.add_filter("function_invocation",
+                          self._function_invocation_filter)
+
+    def timeout_for(self, function: Any) -> Optional[float]:
+        if function.fully_qualified_name in self.timeouts:
+            return self.timeouts[function.fully_qualified_name]
+        return self.timeouts.get(function.plugin_name, self.default_timeout)
+
+    def _request_semaphore(self) -> asyncio.Semaphore:
+        """Return the semaphore of this executor's request"""
+        if self._limit is None:
+            self._limit = asyncio.Semaphore(self.max_concurrency)
+        return self._limit
+
+    @classmethod
+    def _shared_semaphore(cls) -> asyncio.Semaphore:
+        """Return the semaphore shared by all requests of the running loop"""
+        loop = asyncio.get_running_loop()
+        with cls._semaphores_lock:
+            semaphore = cls._semaphores.get(loop)
+            if semaphore is None:
+                semaphore = asyncio.Semaphore(
+                    max(
+                        1,
+                        int(
+                            os.environ.get(
+                                "TOOL_CALL_MAX_CONCURRENCY",
+                                cls.DEFAULT_SHARED_MAX_CONCURRENCY))))
+                cls._semaphores[loop] = semaphore
+            return semaphore
+
+    @staticmethod
+    def _set_error(context: Any, message: str) -> None:
+        context.function_result = FunctionResult(
+            function=context.function.metadata, value=message)
+
+    async def _auto_function_invocation_filter(self, context: Any,
+                                               next: Callable) -> None:
+        index = context.request_sequence_index
+        turn = self._turns.get(index)
+        if turn is None:
+            turn = self._turns[index] = _Turn(context.function_count)
+        try:
+            # The request's own slot first, so waiting on it does not hold
+            # one of the shared slots
+            async with self._request_semaphore(), self._shared_semaphore():
+                if turn.failed_function is not None:
+                    self._set_error(
+                        context, f"Cancelled because {turn.failed_function} "
+                        "failed")
+                    return
+                await self._run(context, next, turn)
+        finally:
+            turn.finished += 1
+            if turn.finished >= turn.function_count:
+                self._turns.pop(index, None)
+
+    async def _run(self, context: Any, next: Callable, turn: _Turn) -> None:
+        name = context.function.fully_qualified_name
+        timeout = self.timeout_for(context.function)
+        token = _current_turn.set(turn)
+        try:
+            task = asyncio.ensure_future(next(context))
+        finally:
+            _current_turn.reset(token)
+        turn.tasks.add(task)
+        try:
+            done, _ = await asyncio.wait({task}, timeout=timeout)
+        finally:
+            turn.tasks.discard(task)
+            if not task.done():
+                # Timed out, or the whole response was cancelled
+                task.cancel()
+
+        if not done:
+            LoggerFactory.create_logger("tool-call-executor").warning(
+                f"Tool call {name} timed out after {timeout}s")
+            self._set_error(context, f"{name} timed out after {timeout}s")
+        elif task.cancelled():
+            self._set_error(
+                context, f"Cancelled because {turn.failed_function} failed")
+        else:
+            task.result()
+
+    async def _function_invocation_filter(self, context: Any,
+                                          next: Callable) -> None:
+        try:
+            await next(context)
+        except FatalToolCallError:
+            turn = _current_turn.get()
+            if turn is not None and turn.failed_function is None:
+                turn.failed_function = context.function.fully_qualified_name
+                current = asyncio.current_task()
+                for task in turn.tasks:
+                    if task is not current:
+                        task.cancel()
+            raise
@@ -0,0 +1,66 @@
+import threading
+from typing import Any, Dict, Optional, Tuple
+
+
+class UsageTracker:
+    """
+    Process-wide token usage per model.
+
+    Counts the prompt tokens the service reported and how many of them were
+    served from the provider's prompt cache, so the effect of a stable
+    prompt prefix can be checked with ``stats``.
+    """
+
+    _models: Dict[str, Dict[str, int]] = {}
+    _lock = threading.Lock()
+
+    @staticmethod
+    def usage_of(message: Any) -> Optional[Tuple[int, int, int]]:
+        """Return the prompt, cached and completion tokens of a response
+
+        The cached tokens are only reported in the raw OpenAI response, the
+        usage in the metadata is the fallback without them.
+        """
+        usage = getattr(getattr(message, "inner_content", None), "usage",
+                        None)
+        if usage is None:
+            usage = getattr(message, "metadata", {}).get("usage")
+        if usage is None or not getattr(usage, "prompt_tokens", None):
+            return None
+        details = getattr(usage, "prompt_tokens_details", None)
+        cached_tokens = getattr(details, "cached_tokens", None) or 0
+        return (usage.prompt_tokens, cached_tokens,
+                getattr(usage, "completion_tokens", None) or 0)
+
+    @classmethod
+    def record(cls, model: str, prompt_tokens: int, cached_tokens: int,
+               completion_tokens: int) -> None:
+        with cls._lock:
+            counters = cls._models.setdefault(
+                model, {
+                    "requests": 0,
+                    "prompt_tokens": 0,
+                    "cached_tokens": 0,
+                    "completion_tokens": 0
+                })
+            counters["requests"] += 1
+            counters["prompt_tokens"] += prompt_tokens
+            counters["cached_tokens"] += cached_tokens
+            counters["completion_tokens"] += completion_tokens
+
+    @classmethod
+    def stats(cls) -> Dict[str, Dict[str, Any]]:
+        """Return the counters and the cache hit rate of every model"""
+        with cls._lock:
+            return {
+                model: {
+                    **counters, "cache_hit_rate":
+                    (counters["cached_tokens"] / counters["prompt_tokens"]
+                     if counters["prompt_tokens"] else 0.0)
+                } for model, counters in cls._models.items()
+            }
+
+    @classmethod
+    def clear(cls) -> None:
+        with cls._lock:
+            cls._models.clear()
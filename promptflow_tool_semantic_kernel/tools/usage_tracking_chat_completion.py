@@ -0,0 +1,55 @@
+from collections.abc import AsyncGenerator
+from typing import Any
+
+from semantic_kernel.connectors.ai.prompt_execution_settings import PromptExecutionSettings
+from semantic_kernel.contents.chat_history import ChatHistory
+
+from promptflow_tool_semantic_kernel.tools.delegating_chat_completion import DelegatingChatCompletion
+from promptflow_tool_semantic_kernel.tools.logger_factory import LoggerFactory
+from promptflow_tool_semantic_kernel.tools.usage_tracker import UsageTracker
+
+
+class UsageTrackingChatCompletion(DelegatingChatCompletion):
+    """
+    Chat completion service that records the token usage of every request.
+
+    The usage, including the prompt tokens served from the provider's
+    prompt cache, is added to the UsageTracker counters of ``model``.
+    """
+
+    model: str
+
+    def __init__(self, inner: Any, model: str, **kwargs: Any):
+        super().__init__(inner, model=model, **kwargs)
+
+    def _record(self, messages: list) -> bool:
+        for message in messages:
+            usage = UsageTracker.usage_of(message)
+            if usage is not None:
+                UsageTracker.record(self.model, *usage)
+                prompt_tokens, cached_tokens, _ = usage
+                LoggerFactory.create_logger("usage").debug(
+                    f"{self.model}: {cached_tokens} of {prompt_tokens} "
+                    f"prompt tokens cached")
+                return True
+        return False
+
+    async def _inner_get_chat_message_contents(self, chat_history: ChatHistory,
+                                               settings: PromptExecutionSettings):
+        result = await self.inner._inner_get_chat_message_contents(
+            chat_history, settings)
+        self._record(result)
+        return result
+
+    async def _inner_get_streaming_chat_message_contents(
+            self,
+            chat_history: ChatHistory,
+            settings: PromptExecutionSettings,
+            function_invoke_attempt: int = 0) -> AsyncGenerator[list, Any]:
+        recorded = False
+        async for messages in self.inner._inner_get_streaming_chat_message_contents(
+                chat_history, settings, function_invoke_attempt):
+            # The usage comes with the last chunk, once per choice
+            if not recorded:
+                recorded = self._record(messages)
+            yield messages
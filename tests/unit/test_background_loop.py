@@ -0,0 +1,53 @@
+import asyncio
+import threading
+
+import pytest
+
+from promptflow_tool_semantic_kernel.tools.background_loop import BackgroundLoop
+
+
+@pytest.fixture
+def background():
+    background = BackgroundLoop(name="test-loop")
+    yield background
+    background.stop()
+
+
+class TestBackgroundLoop:
+
+    def test_runs_coroutines_in_its_thread(self, background):
+
+        async def thread_name():
+            await asyncio.sleep(0)
+            return threading.current_thread().name
+
+        assert background.submit(thread_name()).result(5) == "test-loop"
+
+    def test_outlives_the_submitting_loop(self, background):
+        release = threading.Event()
+
+        async def slow():
+            await asyncio.to_thread(release.wait)
+            return "done"
+
+        async def request():
+            return background.submit(slow())
+
+        future = asyncio.run(request())
+        release.set()
+
+        assert future.result(5) == "done"
+
+    def test_restarts_after_stop(self, background):
+
+        async def loop():
+            return asyncio.get_running_loop()
+
+        first = background.submit(loop()).result(5)
+        background.stop()
+
+        assert first.is_closed()
+        assert background.submit(loop()).result(5) is not first
+
+    def test_shared(self):
+        assert BackgroundLoop.shared() is BackgroundLoop.shared()
@@ -0,0 +1,90 @@
+import pytest
+from unittest.mock import AsyncMock, MagicMock
+
+from openai.types import CompletionUsage
+from semantic_kernel.connectors.ai.open_ai.prompt_execution_settings.open_ai_prompt_execution_settings import (
+    OpenAIChatPromptExecutionSettings, )
+from semantic_kernel.contents.chat_history import ChatHistory
+from semantic_kernel.contents.chat_message_content import ChatMessageContent
+from semantic_kernel.contents.utils.author_role import AuthorRole
+
+from promptflow_tool_semantic_kernel.tools.calibrating_chat_completion import CalibratingChatCompletion
+from promptflow_tool_semantic_kernel.tools.token_estimator import TokenEstimator
+
+
+def make_service():
+    service = MagicMock()
+    service.ai_model_id = "gpt-4o"
+    service.service_id = "gpt-4o"
+    return service
+
+
+def make_response(prompt_tokens=None):
+    metadata = {}
+    if prompt_tokens is not None:
+        metadata["usage"] = CompletionUsage(prompt_tokens=prompt_tokens,
+                                            completion_tokens=1,
+                                            total_tokens=prompt_tokens + 1)
+    return ChatMessageContent(role=AuthorRole.ASSISTANT,
+                              content="ok",
+                              metadata=metadata)
+
+
+@pytest.fixture
+def history():
+    history = ChatHistory()
+    history.add_user_message("a" * 400)
+    return history
+
+
+class TestCalibratingChatCompletion:
+
+    @pytest.mark.asyncio
+    async def test_observes_usage(self, history):
+        inner = make_service()
+        inner._inner_get_chat_message_contents = AsyncMock(
+            return_value=[make_response(208)])
+        estimator = TokenEstimator()
+        service = CalibratingChatCompletion(inner, estimator)
+
+        result = await service._inner_get_chat_message_contents(
+            history, OpenAIChatPromptExecutionSettings())
+
+        assert result[0].content == "ok"
+        assert estimator.observations == 1
+        assert estimator.factor > 1.0
+
+    @pytest.mark.asyncio
+    async def test_observes_usage_of_last_chunk(self, history):
+        inner = make_service()
+
+        async def stream(chat_history, settings, function_invoke_attempt):
+            yield [make_response()]
+            yield [make_response(52)]
+
+        inner._inner_get_streaming_chat_message_contents = stream
+        estimator = TokenEstimator()
+        service = CalibratingChatCompletion(inner, estimator)
+
+        chunks = [
+            chunk async for chunk in
+            service._inner_get_streaming_chat_message_contents(
+                history, OpenAIChatPromptExecutionSettings())
+        ]
+
+        assert len(chunks) == 2
+        assert estimator.observations == 1
+        assert estimator.factor < 1.0
+
+    @pytest.mark.asyncio
+    async def test_without_usage(self, history):
+        inner = make_service()
+        inner._inner_get_chat_message_contents = AsyncMock(
+            return_value=[make_response()])
+        estimator = TokenEstimator()
+
+        await CalibratingChatCompletion(
+            inner, estimator)._inner_get_chat_message_contents(
+                history, OpenAIChatPromptExecutionSettings())
+
+        assert estimator.observations == 0
@@ -213,3 +213,114 @@ def test_build_history_with_null_answer():
     assert result.messages[0].role == "user"
     assert result.messages[0].content == "What is Python?"
     assert result.messages[1].content == "Tell me more"
+
+
+def make_turn(index):
+    return {
+        "inputs": {
+            "question": f"Question {index}"
+        },
+        "outputs": {
+            "answer": f"Answer {index}"
+        }
+    }
+
+
+@pytest.fixture
+def clear_cache():
+    ChatHistoryProcessor.cache.clear()
+    yield
+    ChatHistoryProcessor.cache.clear()
+
+
+def contents(history):
+    return [(message.role, message.content) for message in history.messages]
+
+
+def test_session_reuses_previous_turns(clear_cache):
+    turns = [make_turn(i) for i in range(3)]
+    first = ChatHistoryProcessor.build_history(turns[:2], "Question 2",
+                                               session_id="s")
+
+    second = ChatHistoryProcessor.build_history(turns, "Question 3",
+                                                session_id="s")
+
+    assert contents(second) == contents(
+        ChatHistoryProcessor.build_history(turns, "Question 3"))
+    assert second.messages[0] is first.messages[0]
+    assert len(first.messages) == 5
+    assert ChatHistoryProcessor.cache.stats()["hits"] == 1
+
+
+def test_session_rebuilds_when_history_changed(clear_cache):
+    turns = [make_turn(i) for i in range(3)]
+    ChatHistoryProcessor.build_history(turns, "Question 3", session_id="s")
+
+    edited = [make_turn(i) for i in range(4)]
+    edited[1]["outputs"]["answer"] = "Edited"
+    result = ChatHistoryProcessor.build_history(edited, "Question 4",
+                                                session_id="s")
+
+    assert result.messages[3].content == "Edited"
+    assert contents(result) == contents(
+        ChatHistoryProcessor.build_history(edited, "Question 4"))
+    assert ChatHistoryProcessor.cache.stats()["misses"] == 2
+
+
+def test_session_rebuilds_when_history_is_shorter(clear_cache):
+    turns = [make_turn(i) for i in range(3)]
+    ChatHistoryProcessor.build_history(turns, "Question 3", session_id="s")
+
+    result = ChatHistoryProcessor.build_history(turns[:1], "Again",
+                                                session_id="s")
+
+    assert contents(result)[-1] == ("user", "Again")
+    assert len(result.messages) == 3
+
+
+def test_sessions_are_separate(clear_cache):
+    ChatHistoryProcessor.build_history([make_turn(0)], "Hi", session_id="a")
+
+    result = ChatHistoryProcessor.build_history([make_turn(1)], "Hi",
+                                                session_id="b")
+
+    assert result.messages[0].content == "Question 1"
+
+
+PROMPT = """# system:
+You are a helpful assistant.
+
+# user:
+{question}
+"""
+
+
+def test_prompt_sections_become_role_messages():
+    result = ChatHistoryProcessor.build_history(
+        [make_turn(0)], PROMPT.format(question="Question 1"))
+
+    assert contents(result) == [("system", "You are a helpful assistant."),
+                                ("user", "Question 0"),
+                                ("assistant", "Answer 0"),
+                                ("user", "Question 1")]
+
+
+def test_system_prefix_is_identical_across_turns(clear_cache):
+    turns = [make_turn(i) for i in range(3)]
+    first = ChatHistoryProcessor.build_history(
+        turns[:2], PROMPT.format(question="Question 2"), session_id="s")
+
+    second = ChatHistoryProcessor.build_history(
+        turns, PROMPT.format(question="Question 3"), session_id="s")
+
+    assert contents(second)[:5] == contents(first)[:5]
+    assert [role for role, _ in contents(second)].count("system") == 1
+    assert ChatHistoryProcessor.cache.stats()["hits"] == 1
+
+
+def test_prompt_messages_counts_the_messages_after_the_history():
+    prompt = ("# system:\nBe brief.\n# user:\nExample\n# assistant:\n"
+              "Example answer\n# user:\nQuestion")
+
+    assert ChatHistoryProcessor.prompt_messages(prompt) == 3
+    assert ChatHistoryProcessor.prompt_messages("Question") == 1
@@ -0,0 +1,195 @@
+import pytest
+from unittest.mock import MagicMock, patch
+
+from promptflow_tool_semantic_kernel.tools.circuit_breaker import CircuitBreaker, CircuitOpenError
+
+
+class FakeClock:
+
+    def __init__(self):
+        self.now = 1000.0
+
+    def __call__(self):
+        return self.now
+
+
+@pytest.fixture
+def clock():
+    fake_clock = FakeClock()
+    with patch(
+            'promptflow_tool_semantic_kernel.tools.circuit_breaker.time.monotonic',
+            fake_clock):
+        yield fake_clock
+
+
+class TestCircuitBreaker:
+
+    @pytest.fixture(autouse=True)
+    def clear_registry(self):
+        yield
+        CircuitBreaker.clear_registry()
+
+    def test_opens_after_consecutive_failures(self, clock):
+        breaker = CircuitBreaker("east", failure_threshold=3)
+
+        for _ in range(2):
+            breaker.before_call()
+            breaker.record_failure()
+        assert breaker.state == CircuitBreaker.CLOSED
+
+        breaker.before_call()
+        breaker.record_failure()
+        assert breaker.state == CircuitBreaker.OPEN
+
+    def test_success_resets_consecutive_failures(self, clock):
+        breaker = CircuitBreaker("east", failure_threshold=2)
+
+        breaker.record_failure()
+        breaker.record_success()
+        breaker.record_failure()
+
+        assert breaker.state == CircuitBreaker.CLOSED
+
+    def test_opens_on_error_rate(self, clock):
+        breaker = CircuitBreaker("east",
+                                 failure_threshold=100,
+                                 error_rate_threshold=0.5,
+                                 min_calls=4)
+
+        breaker.record_failure()
+        breaker.record_success()
+        breaker.record_failure()
+        assert breaker.state == CircuitBreaker.CLOSED
+
+        breaker.record_success()
+        breaker.record_failure()
+        assert breaker.error_rate() == 0.6
+        assert breaker.state == CircuitBreaker.OPEN
+
+    def test_open_circuit_fails_fast(self, clock):
+        breaker = CircuitBreaker("east", failure_threshold=1, reset_timeout=10)
+        breaker.record_failure()
+        clock.now += 4
+
+        with pytest.raises(CircuitOpenError) as error:
+            breaker.before_call()
+
+        assert error.value.retry_after == pytest.approx(6.0)
+        assert breaker.stats()["rejected_calls"] == 1
+
+    def test_half_open_probe_closes_circuit(self, clock):
+        breaker = CircuitBreaker("east", failure_threshold=1, reset_timeout=10)
+        breaker.record_failure()
+        clock.now += 10
+
+        breaker.before_call()
+        assert breaker.state == CircuitBreaker.HALF_OPEN
+        # Only one probe at a time
+        with pytest.raises(CircuitOpenError):
+            breaker.before_call()
+
+        breaker.record_success()
+        assert breaker.state == CircuitBreaker.CLOSED
+        breaker.before_call()
+
+    def test_failed_probe_reopens_circuit(self, clock):
+        breaker = CircuitBreaker("east", failure_threshold=1, reset_timeout=10)
+        breaker.record_failure()
+        clock.now += 10
+
+        breaker.before_call()
+        breaker.record_failure()
+
+        assert breaker.state == CircuitBreaker.OPEN
+        with pytest.raises(CircuitOpenError):
+            breaker.before_call()
+
+    def test_released_probe_can_be_retried(self, clock):
+        breaker = CircuitBreaker("east", failure_threshold=1, reset_timeout=10)
+        breaker.record_failure()
+        clock.now += 10
+
+        breaker.before_call()
+        breaker.release()
+
+        breaker.before_call()
+        assert breaker.state == CircuitBreaker.HALF_OPEN
+
+    def test_listeners_receive_transitions(self, clock):
+        listener = MagicMock()
+        CircuitBreaker.add_listener(listener)
+        try:
+            breaker = CircuitBreaker("east",
+                                     failure_threshold=1,
+                                     reset_timeout=10)
+            breaker.record_failure()
+            clock.now += 10
+            breaker.before_call()
+            breaker.record_success()
+        finally:
+            CircuitBreaker.remove_listener(listener)
+
+        assert [c.args for c in listener.call_args_list] == [
+            ("east", "closed", "open"),
+            ("east", "open", "half_open"),
+            ("east", "half_open", "closed"),
+        ]
+
+    def test_for_endpoint_returns_shared_breaker(self):
+        breaker = CircuitBreaker.for_endpoint("https://east",
+                                              failure_threshold=2)
+
+        assert CircuitBreaker.for_endpoint("https://east") is breaker
+        assert CircuitBreaker.for_endpoint("https://west") is not breaker
+        assert breaker.failure_threshold == 2
+
+    def test_for_endpoint_applies_changed_options(self, clock):
+        breaker = CircuitBreaker.for_endpoint("https://east",
+                                              failure_threshold=2,
+                                              error_rate_threshold=0.5)
+        breaker.record_failure()
+
+        assert CircuitBreaker.for_endpoint("https://east",
+                                           failure_threshold=3,
+                                           window_size=5) is breaker
+        assert breaker.failure_threshold == 3
+        assert breaker.error_rate_threshold == 0.5
+        assert breaker.consecutive_failures == 1
+        assert breaker.error_rate() == 1.0
+
+    def test_for_endpoint_keeps_options_not_given(self):
+        breaker = CircuitBreaker.for_endpoint("https://east",
+                                              failure_threshold=2,
+                                              reset_timeout=5.0,
+                                              min_calls=3)
+
+        CircuitBreaker.for_endpoint("https://east", error_rate_threshold=0.5)
+
+        assert breaker.failure_threshold == 2
+        assert breaker.reset_timeout == 5.0
+        assert breaker.min_calls == 3
+        assert breaker.error_rate_threshold == 0.5
+        assert breaker._outcomes.maxlen == 20
+
+    def test_configure_rejects_unknown_options(self):
+        with pytest.raises(TypeError):
+            CircuitBreaker("east").configure(threshold=2)
+
+    def test_failing_listener_is_logged(self, clock):
+        failing = MagicMock(side_effect=RuntimeError("metrics down"))
+        listener = MagicMock()
+        CircuitBreaker.add_listener(failing)
+        CircuitBreaker.add_listener(listener)
+        try:
+            breaker = CircuitBreaker("east", failure_threshold=1)
+            with patch(
+                    'promptflow_tool_semantic_kernel.tools.logger_factory.LoggerFactory.create_logger'
+            ) as mock_logger_factory:
+                breaker.record_failure()
+        finally:
+            CircuitBreaker.remove_listener(failing)
+            CircuitBreaker.remove_listener(listener)
+
+        assert breaker.state == CircuitBreaker.OPEN
+        listener.assert_called_once_with("east", "closed", "open")
+        mock_logger_factory.return_value.error.assert_called_once()
@@ -0,0 +1,133 @@
+import httpx
+import openai
+import pytest
+from unittest.mock import AsyncMock, MagicMock
+
+from semantic_kernel.connectors.ai.open_ai.prompt_execution_settings.open_ai_prompt_execution_settings import (
+    OpenAIChatPromptExecutionSettings, )
+from semantic_kernel.contents.chat_history import ChatHistory
+
+from promptflow_tool_semantic_kernel.tools.circuit_breaker import CircuitBreaker, CircuitOpenError
+from promptflow_tool_semantic_kernel.tools.circuit_breaking_chat_completion import CircuitBreakingChatCompletion
+from promptflow_tool_semantic_kernel.tools.error_classifier import ErrorClassifier
+from promptflow_tool_semantic_kernel.tools.routing_chat_completion import Backend, RoutingChatCompletion
+
+
+def make_service(name):
+    service = MagicMock()
+    service.ai_model_id = name
+    service.service_id = name
+    return service
+
+
+def make_status_error(status_code):
+    request = httpx.Request("POST", "https://test.openai.azure.com")
+    response = httpx.Response(status_code, request=request)
+    return openai.APIStatusError("error", response=response, body=None)
+
+
+class TestCircuitBreakingChatCompletion:
+
+    @pytest.fixture
+    def settings(self):
+        return OpenAIChatPromptExecutionSettings()
+
+    @pytest.mark.asyncio
+    async def test_server_errors_open_circuit(self, settings):
+        inner = make_service("east")
+        inner._inner_get_chat_message_contents = AsyncMock(
+            side_effect=make_status_error(503))
+        service = CircuitBreakingChatCompletion(
+            inner, CircuitBreaker("east", failure_threshold=2))
+
+        for _ in range(2):
+            with pytest.raises(openai.APIStatusError):
+                await service._inner_get_chat_message_contents(
+                    ChatHistory(), settings)
+
+        with pytest.raises(CircuitOpenError):
+            await service._inner_get_chat_message_contents(
+                ChatHistory(), settings)
+        assert inner._inner_get_chat_message_contents.await_count == 2
+
+    @pytest.mark.asyncio
+    @pytest.mark.parametrize("status_code", [400, 429])
+    async def test_client_errors_do_not_count(self, settings, status_code):
+        inner = make_service("east")
+        inner._inner_get_chat_message_contents = AsyncMock(
+            side_effect=make_status_error(status_code))
+        breaker = CircuitBreaker("east", failure_threshold=1)
+        service = CircuitBreakingChatCompletion(inner, breaker)
+
+        with pytest.raises(openai.APIStatusError):
+            await service._inner_get_chat_message_contents(
+                ChatHistory(), settings)
+
+        assert breaker.state == CircuitBreaker.CLOSED
+
+    @pytest.mark.asyncio
+    async def test_streaming_success_recorded_on_first_chunk(self, settings):
+
+        async def stream(chat_history, settings, function_invoke_attempt):
+            yield ["a"]
+            yield ["b"]
+
+        inner = make_service("east")
+        inner._inner_get_streaming_chat_message_contents = stream
+        breaker = CircuitBreaker("east", failure_threshold=1)
+        breaker.record_success = MagicMock()
+        service = CircuitBreakingChatCompletion(inner, breaker)
+
+        chunks = [
+            chunk async for chunk in
+            service._inner_get_streaming_chat_message_contents(
+                ChatHistory(), settings)
+        ]
+
+        assert chunks == [["a"], ["b"]]
+        breaker.record_success.assert_called_once()
+
+    @pytest.mark.asyncio
+    async def test_streaming_failure_before_first_chunk(self, settings):
+
+        async def stream(chat_history, settings, function_invoke_attempt):
+            raise make_status_error(500)
+            yield
+
+        inner = make_service("east")
+        inner._inner_get_streaming_chat_message_contents = stream
+        breaker = CircuitBreaker("east", failure_threshold=1)
+        service = CircuitBreakingChatCompletion(inner, breaker)
+
+        with pytest.raises(openai.APIStatusError):
+            async for _ in service._inner_get_streaming_chat_message_contents(
+                    ChatHistory(), settings):
+                pass
+
+        assert breaker.state == CircuitBreaker.OPEN
+
+    def test_open_circuit_error_is_retriable(self):
+        error = CircuitOpenError("east", 12.0)
+
+        assert ErrorClassifier.is_retriable(error)
+        assert ErrorClassifier.get_retry_after(error) == 12.0
+
+    @pytest.mark.asyncio
+    async def test_router_fails_over_from_open_circuit(self, settings):
+        east = make_service("east")
+        east._inner_get_chat_message_contents = AsyncMock()
+        breaker = CircuitBreaker("east", failure_threshold=1)
+        breaker.record_failure()
+        west = make_service("west")
+        west._inner_get_chat_message_contents = AsyncMock(
+            return_value=["west"])
+        router = RoutingChatCompletion([
+            Backend(CircuitBreakingChatCompletion(east, breaker), weight=10),
+            Backend(west)
+        ])
+
+        result = await router._inner_get_chat_message_contents(
+            ChatHistory(), settings)
+
+        assert result == ["west"]
+        east._inner_get_chat_message_contents.assert_not_awaited()
@@ -0,0 +1,67 @@
+import pytest
+from unittest.mock import AsyncMock, MagicMock
+
+from semantic_kernel.connectors.ai.open_ai.prompt_execution_settings.open_ai_prompt_execution_settings import (
+    OpenAIChatPromptExecutionSettings, )
+from semantic_kernel.contents.chat_history import ChatHistory
+
+from promptflow_tool_semantic_kernel.tools.delegating_chat_completion import DelegatingChatCompletion
+
+
+def make_inner():
+    inner = MagicMock()
+    inner.ai_model_id = "gpt-4"
+    inner.service_id = "gpt-4"
+    inner.get_prompt_execution_settings_class.return_value = OpenAIChatPromptExecutionSettings
+    return inner
+
+
+class TestDelegatingChatCompletion:
+
+    def test_identity_is_copied_from_inner(self):
+        inner = make_inner()
+
+        service = DelegatingChatCompletion(inner)
+
+        assert service.ai_model_id == "gpt-4"
+        assert service.service_id == "gpt-4"
+        assert service.wrapped_services() == [inner]
+        assert service.get_prompt_execution_settings_class(
+        ) is OpenAIChatPromptExecutionSettings
+
+    @pytest.mark.asyncio
+    async def test_complete_request_is_delegated(self):
+        inner = make_inner()
+        response = MagicMock()
+        response.items = []
+        inner._inner_get_chat_message_contents = AsyncMock(
+            return_value=[response])
+        service = DelegatingChatCompletion(inner)
+
+        result = await service.get_chat_message_content(
+            ChatHistory(), OpenAIChatPromptExecutionSettings())
+
+        assert result is response
+        inner._inner_get_chat_message_contents.assert_awaited_once()
+
+    @pytest.mark.asyncio
+    async def test_streaming_request_is_delegated(self):
+        inner = make_inner()
+
+        async def streaming(chat_history, settings, function_invoke_attempt):
+            for content in ["Hello", " world"]:
+                chunk = MagicMock()
+                chunk.content = content
+                chunk.items = []
+                yield [chunk]
+
+        inner._inner_get_streaming_chat_message_contents = streaming
+        service = DelegatingChatCompletion(inner)
+
+        result = [
+            chunk.content
+            async for chunk in service.get_streaming_chat_message_content(
+                ChatHistory(), OpenAIChatPromptExecutionSettings())
+        ]
+
+        assert result == ["Hello", " world"]
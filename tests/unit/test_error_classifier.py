@@ -0,0 +1,87 @@
+import asyncio
+from unittest.mock import MagicMock
+
+import httpx
+import openai
+import pytest
+from semantic_kernel.exceptions import ServiceResponseException
+
+from promptflow_tool_semantic_kernel.tools.error_classifier import ErrorClassifier
+
+
+def make_status_error(status_code, headers=None):
+    request = httpx.Request("POST", "https://test.openai.azure.com")
+    response = httpx.Response(status_code,
+                              headers=headers or {},
+                              request=request)
+    return openai.APIStatusError("error", response=response, body=None)
+
+
+def wrap(error):
+    # Semantic Kernel wraps provider errors like this
+    try:
+        try:
+            raise error
+        except Exception as ex:
+            raise ServiceResponseException("service failed", ex) from ex
+    except ServiceResponseException as wrapped:
+        return wrapped
+
+
+class TestErrorClassifier:
+
+    @pytest.mark.parametrize("status_code,expected", [(429, True),
+                                                      (500, True),
+                                                      (503, True),
+                                                      (400, False),
+                                                      (401, False),
+                                                      (404, False)])
+    def test_is_retriable_by_status_code(self, status_code, expected):
+        error = wrap(make_status_error(status_code))
+
+        assert ErrorClassifier.get_status_code(error) == status_code
+        assert ErrorClassifier.is_retriable(error) == expected
+
+    def test_timeouts_are_retriable(self):
+        request = httpx.Request("POST", "https://test.openai.azure.com")
+
+        assert ErrorClassifier.is_retriable(wrap(asyncio.TimeoutError()))
+        assert ErrorClassifier.is_retriable(
+            wrap(openai.APITimeoutError(request=request)))
+        assert ErrorClassifier.is_retriable(
+            httpx.ConnectError("refused", request=request))
+
+    def test_generic_errors_are_not_retriable(self):
+        assert not ErrorClassifier.is_retriable(ValueError("bad input"))
+        assert ErrorClassifier.get_status_code(ValueError("x")) is None
+
+    def test_get_retry_after_seconds(self):
+        error = wrap(make_status_error(429, {"retry-after": "7"}))
+
+        assert ErrorClassifier.get_retry_after(error) == 7.0
+
+    def test_get_retry_after_milliseconds_preferred(self):
+        error = make_status_error(429, {
+            "retry-after": "7",
+            "retry-after-ms": "1500"
+        })
+
+        assert ErrorClassifier.get_retry_after(error) == 1.5
+
+    def test_get_retry_after_http_date_in_past(self):
+        error = make_status_error(
+            429, {"retry-after": "Wed, 21 Oct 2015 07:28:00 GMT"})
+
+        assert ErrorClassifier.get_retry_after(error) == 0.0
+
+    def test_get_retry_after_missing(self):
+        assert ErrorClassifier.get_retry_after(make_status_error(500)) is None
+        assert ErrorClassifier.get_retry_after(ValueError("x")) is None
+
+    def test_iter_chain_handles_cycles(self):
+        error = ValueError("a")
+        other = ValueError("b")
+        error.__cause__ = other
+        other.__cause__ = error
+
+        assert list(ErrorClassifier.iter_chain(error)) == [error, other]
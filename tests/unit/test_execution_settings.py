@@ -0,0 +1,31 @@
+import pytest
+
+from promptflow_tool_semantic_kernel.tools.execution_settings import AzureChatExecutionSettings, OpenAIChatExecutionSettings
+
+TOOLS = [{
+    "type": "function",
+    "function": {
+        "name": "lights-get_lights",
+        "parameters": {}
+    }
+}]
+
+
+@pytest.mark.parametrize(
+    "settings_class", [AzureChatExecutionSettings, OpenAIChatExecutionSettings])
+class TestExecutionSettings:
+
+    def test_sends_parallel_tool_calls_with_tools(self, settings_class):
+        settings = settings_class(parallel_tool_calls=False, tools=TOOLS)
+
+        assert settings.prepare_settings_dict()["parallel_tool_calls"] is False
+
+    def test_drops_parallel_tool_calls_without_tools(self, settings_class):
+        settings = settings_class(parallel_tool_calls=False)
+
+        assert "parallel_tool_calls" not in settings.prepare_settings_dict()
+
+    def test_unset_by_default(self, settings_class):
+        settings = settings_class(tools=TOOLS)
+
+        assert "parallel_tool_calls" not in settings.prepare_settings_dict()
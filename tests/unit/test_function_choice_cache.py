@@ -0,0 +1,112 @@
+import logging
+import time
+from typing import Annotated
+
+import pytest
+from semantic_kernel import Kernel
+from semantic_kernel.connectors.ai.function_calling_utils import update_settings_from_function_call_configuration
+from semantic_kernel.connectors.ai.function_choice_behavior import FunctionChoiceBehavior
+from semantic_kernel.connectors.ai.open_ai.prompt_execution_settings.open_ai_prompt_execution_settings import (
+    OpenAIChatPromptExecutionSettings, )
+from semantic_kernel.functions import kernel_function
+from semantic_kernel.functions.kernel_plugin import KernelPlugin
+
+from promptflow_tool_semantic_kernel.tools.function_choice_cache import CachedFunctionChoiceBehavior
+
+
+def make_function(index):
+
+    @kernel_function(name=f"function_{index}",
+                     description=f"Function number {index}")
+    def function(
+        id: Annotated[int, "The ID of the item"],
+        name: Annotated[str, "The name of the item"],
+        tags: Annotated[list[str], "Tags of the item"] = None,
+    ) -> str:
+        return name
+
+    return function
+
+
+def make_kernel(function_count):
+    kernel = Kernel()
+    kernel.add_plugin(
+        KernelPlugin(name="items",
+                     functions=[make_function(i)
+                                for i in range(function_count)]))
+    return kernel
+
+
+def configure(behavior, kernel):
+    settings = OpenAIChatPromptExecutionSettings(
+        function_choice_behavior=behavior)
+    behavior.configure(kernel, update_settings_from_function_call_configuration,
+                       settings)
+    return settings
+
+
+class TestCachedFunctionChoiceBehavior:
+
+    @pytest.fixture(autouse=True)
+    def clear_cache(self):
+        CachedFunctionChoiceBehavior.clear_cache()
+        yield
+        CachedFunctionChoiceBehavior.clear_cache()
+
+    def test_cached_settings_match_semantic_kernel(self):
+        kernel = make_kernel(3)
+
+        expected = configure(FunctionChoiceBehavior.Auto(), kernel)
+        configure(CachedFunctionChoiceBehavior.Auto(cache_key="plugins"),
+                  kernel)
+        cached = configure(
+            CachedFunctionChoiceBehavior.Auto(cache_key="plugins"), kernel)
+
+        assert CachedFunctionChoiceBehavior.cache_stats()["hits"] == 1
+        assert cached.tools == expected.tools
+        assert cached.tool_choice == expected.tool_choice
+        assert cached.prepare_settings_dict() == expected.prepare_settings_dict(
+        )
+
+    def test_key_changes_with_plugins_and_filters(self):
+        configure(CachedFunctionChoiceBehavior.Auto(cache_key="a"),
+                  make_kernel(2))
+        other_key = configure(CachedFunctionChoiceBehavior.Auto(cache_key="b"),
+                              make_kernel(3))
+        filtered = configure(
+            CachedFunctionChoiceBehavior.Auto(
+                cache_key="a",
+                filters={"included_functions": ["items-function_0"]}),
+            make_kernel(2))
+
+        assert len(other_key.tools) == 3
+        assert len(filtered.tools) == 1
+        assert CachedFunctionChoiceBehavior.cache_stats()["hits"] == 0
+
+    def test_without_cache_key_behaves_like_semantic_kernel(self):
+        kernel = make_kernel(2)
+
+        configure(CachedFunctionChoiceBehavior.Auto(), kernel)
+        settings = configure(CachedFunctionChoiceBehavior.Auto(), kernel)
+
+        assert len(settings.tools) == 2
+        assert CachedFunctionChoiceBehavior.cache_stats()["entries"] == 0
+
+    def test_benchmark_with_many_functions(self):
+        kernel = make_kernel(60)
+        rounds = 50
+
+        def measure(make_behavior):
+            start = time.perf_counter()
+            for _ in range(rounds):
+                configure(make_behavior(), kernel)
+            return (time.perf_counter() - start) / rounds
+
+        uncached = measure(FunctionChoiceBehavior.Auto)
+        cached = measure(
+            lambda: CachedFunctionChoiceBehavior.Auto(cache_key="plugins"))
+
+        logging.getLogger(__name__).info(
+            f"60 functions: {uncached * 1e3:.3f}ms uncached, "
+            f"{cached * 1e3:.3f}ms cached per request")
+        assert cached < uncached
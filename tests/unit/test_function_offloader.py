@@ -0,0 +1,163 @@
+import asyncio
+import os
+import threading
+
+import pytest
+
+from semantic_kernel import Kernel
+from semantic_kernel.functions import kernel_function
+from semantic_kernel.functions.kernel_arguments import KernelArguments
+from semantic_kernel.functions.kernel_plugin import KernelPlugin
+
+from promptflow_tool_semantic_kernel.tools.function_offloader import FunctionOffloader
+from promptflow_tool_semantic_kernel.tools.lights_plugin import LightsPlugin
+
+
+class WorkerPlugin:
+
+    def __init__(self):
+        self.release = threading.Event()
+
+    @kernel_function(name="thread_name", description="Current thread")
+    def thread_name(self) -> str:
+        return threading.current_thread().name
+
+    @kernel_function(name="wait", description="Blocks until released")
+    def wait(self) -> str:
+        self.release.wait(5)
+        return "released"
+
+    @kernel_function(name="pid", description="Current process id")
+    def pid(self, offset: int = 0) -> int:
+        return os.getpid() + offset
+
+    @kernel_function(name="echo_async", description="Echoes the text")
+    async def echo_async(self, text: str) -> str:
+        return text
+
+    def __getstate__(self):
+        return {}
+
+    def __setstate__(self, state):
+        self.release = threading.Event()
+
+
+@pytest.fixture
+def offloader():
+    offloader = FunctionOffloader(thread_workers=2, process_workers=1)
+    yield offloader
+    offloader.shutdown()
+
+
+def make_kernel(offloader, plugin, cpu_bound=()):
+    kernel = Kernel()
+    kernel_plugin = kernel.add_plugin(plugin, plugin_name="worker")
+    offloader.offload_plugin(kernel_plugin, cpu_bound)
+    return kernel
+
+
+async def invoke(kernel, function_name, **arguments):
+    result = await kernel.invoke(plugin_name="worker",
+                                 function_name=function_name,
+                                 arguments=KernelArguments(**arguments))
+    return result.value
+
+
+class TestFunctionOffloader:
+
+    def test_defaults_from_environment(self, monkeypatch):
+        monkeypatch.setenv("PLUGIN_THREAD_POOL_SIZE", "3")
+        monkeypatch.setenv("PLUGIN_PROCESS_POOL_SIZE", "2")
+
+        offloader = FunctionOffloader()
+
+        assert offloader.thread_workers == 3
+        assert offloader.process_workers == 2
+        assert offloader.stats()["thread"]["max_workers"] == 3
+
+    def test_wraps_only_synchronous_functions(self, offloader):
+        plugin = KernelPlugin.from_object("worker", WorkerPlugin())
+        echo_async = plugin["echo_async"]
+
+        offloader.offload_plugin(plugin)
+
+        assert plugin["echo_async"] is echo_async
+        assert plugin["thread_name"].metadata.is_asynchronous
+        assert [p.name for p in plugin["pid"].parameters] == ["offset"]
+        assert plugin["pid"].description == "Current process id"
+
+    def test_wraps_once(self, offloader):
+        plugin = KernelPlugin.from_object("worker", WorkerPlugin())
+        offloader.offload_plugin(plugin)
+        wrapped = plugin["thread_name"]
+
+        offloader.offload_plugin(plugin)
+
+        assert plugin["thread_name"] is wrapped
+
+    @pytest.mark.asyncio
+    async def test_runs_in_thread_pool(self, offloader):
+        kernel = make_kernel(offloader, WorkerPlugin())
+
+        name = await invoke(kernel, "thread_name")
+
+        assert name.startswith("plugin-function")
+        assert offloader.stats()["thread"]["completed"] == 1
+
+    @pytest.mark.asyncio
+    async def test_does_not_block_event_loop(self, offloader):
+        plugin = WorkerPlugin()
+        kernel = make_kernel(offloader, plugin)
+
+        waiting = asyncio.ensure_future(invoke(kernel, "wait"))
+        await asyncio.sleep(0.05)
+        assert offloader.stats()["thread"]["running"] == 1
+
+        plugin.release.set()
+        assert await waiting == "released"
+        assert offloader.stats()["thread"]["running"] == 0
+
+    @pytest.mark.asyncio
+    async def test_reports_queue_depth(self, offloader):
+        plugin = WorkerPlugin()
+        kernel = make_kernel(offloader, plugin)
+
+        calls = [
+            asyncio.ensure_future(invoke(kernel, "wait")) for _ in range(3)
+        ]
+        await asyncio.sleep(0.05)
+        stats = offloader.stats()["thread"]
+        assert stats["running"] == 2
+        assert stats["queued"] == 1
+
+        plugin.release.set()
+        assert await asyncio.gather(*calls) == ["released"] * 3
+        stats = offloader.stats()["thread"]
+        assert (stats["queued"], stats["running"], stats["completed"]) == (0,
+                                                                           0,
+                                                                           3)
+
+    @pytest.mark.asyncio
+    async def test_runs_cpu_bound_functions_in_process_pool(self, offloader):
+        kernel = make_kernel(offloader, WorkerPlugin(), cpu_bound=["pid"])
+
+        pid = await invoke(kernel, "pid", offset=1)
+
+        assert pid != os.getpid() + 1
+        assert offloader.stats()["process"] == {
+            "max_workers": 1,
+            "queued": 0,
+            "completed": 1
+        }
+
+    @pytest.mark.asyncio
+    async def test_unpicklable_plugin_runs_in_thread_pool(self, offloader):
+        # The default store holds a lock, which cannot be pickled
+        kernel = make_kernel(offloader, LightsPlugin(),
+                             cpu_bound=["get_lights"])
+
+        lights = await invoke(kernel, "get_lights", id=0, all=True)
+
+        assert len(lights) == 3
+        assert offloader.stats()["process"]["completed"] == 0
+        assert offloader.stats()["thread"]["completed"] == 1
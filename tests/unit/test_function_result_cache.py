@@ -0,0 +1,210 @@
+import asyncio
+
+import pytest
+
+from semantic_kernel import Kernel
+from semantic_kernel.functions import kernel_function
+from semantic_kernel.functions.kernel_arguments import KernelArguments
+
+from promptflow_tool_semantic_kernel.tools.function_result_cache import FunctionResultCache, ResultCache, cached_result, invalidates_cache, _MISSING
+
+
+class InventoryPlugin:
+
+    def __init__(self):
+        self.items = {"apple": 1}
+        self.reads = 0
+
+    @kernel_function(name="count", description="Counts an item")
+    def count(self, item: str, unit: str = "pieces") -> int:
+        self.reads += 1
+        return self.items.get(item, 0)
+
+    @kernel_function(name="add", description="Adds an item")
+    def add(self, item: str) -> None:
+        self.items[item] = self.items.get(item, 0) + 1
+
+
+class DecoratedPlugin(InventoryPlugin):
+
+    @cached_result(ttl=60, max_size=2)
+    @kernel_function(name="count", description="Counts an item")
+    def count(self, item: str, unit: str = "pieces") -> int:
+        return super().count(item, unit)
+
+    @invalidates_cache
+    @kernel_function(name="add", description="Adds an item")
+    def add(self, item: str) -> None:
+        super().add(item)
+
+
+@pytest.fixture(autouse=True)
+def clear_registry():
+    FunctionResultCache.clear_registry()
+    yield
+    FunctionResultCache.clear_registry()
+
+
+DEFINITION = {
+    "name": "inventory",
+    "class": "InventoryPlugin",
+    "module": "tests.unit.test_function_result_cache",
+    "cache": {
+        "count": 60
+    },
+    "invalidates_cache": ["add"]
+}
+
+
+def make_kernel(plugin, definitions=None):
+    kernel = Kernel()
+    kernel.add_plugin(plugin, plugin_name="inventory")
+    FunctionResultCache.from_plugins(definitions or []).install(kernel)
+    return kernel
+
+
+async def invoke(kernel, function_name, **arguments):
+    result = await kernel.invoke(plugin_name="inventory",
+                                 function_name=function_name,
+                                 arguments=KernelArguments(**arguments))
+    return result.value
+
+
+class TestResultCache:
+
+    def test_expires_entries(self):
+        now = [0.0]
+        cache = ResultCache(ttl=10, max_size=4, clock=lambda: now[0])
+        cache.put("a", 1, cache.generation)
+
+        assert cache.get("a") == 1
+        now[0] = 10.0
+        assert cache.get("a") is _MISSING
+        assert cache.stats()["entries"] == 0
+
+    def test_evicts_least_recently_used(self):
+        cache = ResultCache(ttl=10, max_size=2)
+        cache.put("a", 1, cache.generation)
+        cache.put("b", 2, cache.generation)
+        cache.get("a")
+        cache.put("c", 3, cache.generation)
+
+        assert cache.get("b") is _MISSING
+        assert cache.get("a") == 1
+        assert cache.stats()["evictions"] == 1
+
+    def test_skips_results_of_older_generation(self):
+        cache = ResultCache(ttl=10, max_size=2)
+        generation = cache.generation
+        cache.invalidate()
+
+        assert not cache.put("a", 1, generation)
+        assert cache.get("a") is _MISSING
+
+
+class TestFunctionResultCache:
+
+    def test_reads_plugin_definitions(self):
+        cache = FunctionResultCache.from_plugins([
+            dict(DEFINITION, cache={"count": {
+                "ttl": 5,
+                "max_size": 10
+            }}), None
+        ])
+
+        assert cache.policies == {
+            "inventory-count": {
+                "ttl": 5.0,
+                "max_size": 10
+            }
+        }
+        assert cache.invalidating == {"inventory-add"}
+        assert cache.scope_for("inventory").startswith(
+            "inventory:tests.unit.test_function_result_cache.InventoryPlugin:")
+
+    @pytest.mark.asyncio
+    async def test_caches_on_normalized_arguments(self):
+        plugin = InventoryPlugin()
+        kernel = make_kernel(plugin, [DEFINITION])
+
+        assert await invoke(kernel, "count", item="apple") == 1
+        assert await invoke(kernel, "count", item="apple",
+                            unit="pieces") == 1
+        assert await invoke(kernel, "count", item="apple",
+                            unrelated="x") == 1
+        assert await invoke(kernel, "count", item="pear") == 0
+
+        assert plugin.reads == 2
+        stats = FunctionResultCache.stats()
+        [(name, counters)] = stats.items()
+        assert name.endswith("/inventory-count")
+        assert (counters["hits"], counters["misses"]) == (2, 2)
+        assert counters["hit_rate"] == 0.5
+
+    @pytest.mark.asyncio
+    async def test_shared_between_kernels(self):
+        first = InventoryPlugin()
+        second = InventoryPlugin()
+
+        await invoke(make_kernel(first, [DEFINITION]), "count", item="apple")
+        await invoke(make_kernel(second, [DEFINITION]), "count", item="apple")
+
+        assert (first.reads, second.reads) == (1, 0)
+
+    @pytest.mark.asyncio
+    async def test_mutating_function_invalidates(self):
+        plugin = InventoryPlugin()
+        kernel = make_kernel(plugin, [DEFINITION])
+
+        assert await invoke(kernel, "count", item="apple") == 1
+        await invoke(kernel, "add", item="apple")
+
+        assert await invoke(kernel, "count", item="apple") == 2
+        assert plugin.reads == 2
+
+    @pytest.mark.asyncio
+    async def test_decorators(self):
+        plugin = DecoratedPlugin()
+        kernel = make_kernel(plugin)
+
+        await invoke(kernel, "count", item="apple")
+        await invoke(kernel, "count", item="apple")
+        assert plugin.reads == 1
+
+        await invoke(kernel, "add", item="apple")
+        assert await invoke(kernel, "count", item="apple") == 2
+        assert plugin.reads == 2
+
+    @pytest.mark.asyncio
+    async def test_uncached_functions_run_every_time(self):
+        plugin = InventoryPlugin()
+        kernel = make_kernel(plugin)
+
+        await invoke(kernel, "count", item="apple")
+        await invoke(kernel, "count", item="apple")
+
+        assert plugin.reads == 2
+        assert FunctionResultCache.stats() == {}
+
+    @pytest.mark.asyncio
+    async def test_result_of_concurrent_change_is_not_stored(self):
+        plugin = InventoryPlugin()
+        kernel = make_kernel(plugin, [DEFINITION])
+        started = asyncio.Event()
+        release = asyncio.Event()
+
+        async def slow_count(context, next):
+            if context.function.name == "count":
+                started.set()
+                await release.wait()
+            await next(context)
+
+        kernel.add_filter("function_invocation", slow_count)
+        reading = asyncio.ensure_future(invoke(kernel, "count", item="apple"))
+        await started.wait()
+        await invoke(kernel, "add", item="apple")
+        release.set()
+        await reading
+
+        assert await invoke(kernel, "count", item="apple") == 2
+        assert plugin.reads == 2
@@ -0,0 +1,126 @@
+import time
+
+import pytest
+
+from semantic_kernel import Kernel
+from semantic_kernel.contents.chat_history import ChatHistory
+from semantic_kernel.contents.chat_message_content import ChatMessageContent
+from semantic_kernel.contents.function_call_content import FunctionCallContent
+from semantic_kernel.contents.utils.author_role import AuthorRole
+from semantic_kernel.functions import kernel_function
+from semantic_kernel.functions.kernel_function_from_method import KernelFunctionFromMethod
+from semantic_kernel.functions.kernel_plugin import KernelPlugin
+
+from promptflow_tool_semantic_kernel.tools.function_selector import FunctionSelector
+from promptflow_tool_semantic_kernel.tools.lights_plugin import LightsPlugin
+
+
+class WeatherPlugin:
+
+    @kernel_function(name="get_forecast",
+                     description="Gets the weather forecast for a city")
+    def get_forecast(self, city: str) -> str:
+        return "sunny"
+
+
+class CalendarPlugin:
+
+    @kernel_function(name="listEvents",
+                     description="Lists the meetings in the calendar")
+    def list_events(self, day: str) -> str:
+        return ""
+
+
+@pytest.fixture(autouse=True)
+def clear_cache():
+    FunctionSelector.clear_cache()
+    yield
+    FunctionSelector.clear_cache()
+
+
+@pytest.fixture
+def kernel():
+    kernel = Kernel()
+    kernel.add_plugin(LightsPlugin(), plugin_name="lights")
+    kernel.add_plugin(WeatherPlugin(), plugin_name="weather")
+    kernel.add_plugin(CalendarPlugin(), plugin_name="calendar")
+    return kernel
+
+
+def make_function(index):
+
+    @kernel_function(name=f"function_{index}",
+                     description=f"Handles topic{index} requests")
+    def function() -> str:
+        return ""
+
+    return KernelFunctionFromMethod(method=function, plugin_name="many")
+
+
+class TestFunctionSelector:
+
+    def test_tokenize(self):
+        assert FunctionSelector.tokenize("listEvents get_lights HTTPError"
+                                         " class") == [
+                                             "list", "event", "get", "light",
+                                             "http", "error", "class"
+                                         ]
+
+    def test_selects_best_matches(self, kernel):
+        selector = FunctionSelector.from_kernel(kernel)
+
+        assert selector.select("Will it rain in Paris? Check the weather",
+                               1) == ["weather-get_forecast"]
+        assert sorted(selector.select("Turn on the porch light", 3)) == [
+            "lights-change_state", "lights-change_states", "lights-get_lights"
+        ]
+        assert selector.select("Which meetings do I have?",
+                               1) == ["calendar-listEvents"]
+
+    def test_all_functions_when_nothing_matches(self, kernel):
+        selector = FunctionSelector.from_kernel(kernel)
+
+        assert selector.select("hello there", 2) is None
+        assert selector.select("weather", 0) is None
+        assert selector.select("weather", 5) is None
+
+    def test_uses_recent_history(self, kernel):
+        history = ChatHistory()
+        history.add_user_message("What is the forecast for Oslo?")
+        history.add_message(
+            ChatMessageContent(role=AuthorRole.ASSISTANT,
+                               items=[
+                                   FunctionCallContent(
+                                       id="1",
+                                       name="weather-get_forecast",
+                                       arguments="{}")
+                               ]))
+        history.add_user_message("And tomorrow?")
+
+        text = FunctionSelector.history_text(history)
+
+        assert "weather-get_forecast" in text
+        assert FunctionSelector.from_kernel(kernel).select(
+            text, 1) == ["weather-get_forecast"]
+
+    def test_index_is_cached_per_key(self, kernel):
+        first = FunctionSelector.for_kernel(kernel, "key")
+
+        assert FunctionSelector.for_kernel(kernel, "key") is first
+        assert FunctionSelector.for_kernel(kernel, "other") is not first
+
+    def test_selection_is_fast(self):
+        kernel = Kernel()
+        kernel.add_plugin(
+            KernelPlugin(name="many",
+                         functions=[make_function(i) for i in range(200)]))
+        selector = FunctionSelector.for_kernel(kernel, "many")
+
+        start = time.perf_counter()
+        for _ in range(20):
+            selected = selector.select("please handle topic42 and topic7",
+                                       5)
+        elapsed = (time.perf_counter() - start) / 20
+
+        assert sorted(selected[:2]) == ["many-function_42", "many-function_7"]
+        assert elapsed < 0.01
@@ -0,0 +1,51 @@
+from promptflow_tool_semantic_kernel.tools.history_cache import CachedHistory, HistoryCache
+
+
+def make_history(count=1):
+    return CachedHistory(["message"] * count, count, 42)
+
+
+class TestHistoryCache:
+
+    def test_get_and_put(self):
+        cache = HistoryCache()
+        history = make_history()
+
+        assert cache.get("session") is None
+        cache.put("session", history)
+
+        assert cache.get("session") is history
+
+    def test_evicts_least_recently_used(self):
+        cache = HistoryCache(max_sessions=2)
+        cache.put("a", make_history())
+        cache.put("b", make_history())
+        cache.get("a")
+        cache.put("c", make_history())
+
+        assert cache.get("b") is None
+        assert cache.get("a") is not None
+        assert cache.stats()["sessions"] == 2
+
+    def test_expires_idle_sessions(self):
+        now = [0.0]
+        cache = HistoryCache(idle_ttl=10, clock=lambda: now[0])
+        cache.put("idle", make_history())
+        cache.put("active", make_history())
+
+        now[0] = 8.0
+        assert cache.get("active") is not None
+        now[0] = 12.0
+
+        assert cache.get("idle") is None
+        assert cache.get("active") is not None
+
+    def test_stats(self):
+        cache = HistoryCache()
+        cache.record(True)
+        cache.record(False)
+        cache.put("session", make_history())
+
+        assert cache.stats() == {"sessions": 1, "hits": 1, "misses": 1}
+        cache.clear()
+        assert cache.stats() == {"sessions": 0, "hits": 0, "misses": 0}
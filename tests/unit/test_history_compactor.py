@@ -0,0 +1,246 @@
+import asyncio
+import threading
+
+import pytest
+from unittest.mock import AsyncMock, MagicMock, patch
+
+from semantic_kernel.contents.chat_history import ChatHistory
+from semantic_kernel.contents.chat_message_content import ChatMessageContent
+from semantic_kernel.contents.function_call_content import FunctionCallContent
+from semantic_kernel.contents.function_result_content import FunctionResultContent
+from semantic_kernel.contents.utils.author_role import AuthorRole
+
+from promptflow_tool_semantic_kernel.tools.history_compactor import SUMMARY_PREFIX, HistoryCompactor
+
+
+def make_history(turns, current="current"):
+    history = ChatHistory()
+    history.add_system_message("system")
+    for index in range(turns):
+        history.add_user_message(f"question {index}")
+        history.add_assistant_message(f"answer {index}")
+    history.add_user_message(current)
+    return history
+
+
+def contents(history):
+    return [message.content for message in history.messages]
+
+
+class RecordingSummarizer:
+
+    def __init__(self):
+        self.texts = []
+
+    async def __call__(self, text):
+        self.texts.append(text)
+        return f"summary {len(self.texts)}"
+
+
+class TestHistoryCompactor:
+
+    @pytest.mark.asyncio
+    async def test_short_history_is_unchanged(self):
+        compactor = HistoryCompactor()
+        history = make_history(2)
+        summarize = RecordingSummarizer()
+
+        assert compactor.compact(history, "s", 4, summarize) is history
+        await compactor.wait("s")
+        assert summarize.texts == []
+
+    @pytest.mark.asyncio
+    async def test_summary_is_computed_off_the_critical_path(self):
+        compactor = HistoryCompactor()
+        summarize = RecordingSummarizer()
+        history = make_history(4)
+
+        # No summary yet, the request gets the full history
+        assert compactor.compact(history, "s", 4, summarize) is history
+        await compactor.wait("s")
+
+        assert "user: question 0" in summarize.texts[0]
+        assert "question 2" in summarize.texts[0]
+        assert "question 3" not in summarize.texts[0]
+
+        compacted = compactor.compact(make_history(4, "next"), "s", 4,
+                                      summarize)
+        assert contents(compacted) == [
+            "system", SUMMARY_PREFIX + "summary 1", "question 3", "answer 3",
+            "next"
+        ]
+        # Not refreshed before the uncovered turns grow past the limit
+        await compactor.wait("s")
+        assert len(summarize.texts) == 1
+
+    @pytest.mark.asyncio
+    async def test_summary_is_refreshed_incrementally(self):
+        compactor = HistoryCompactor()
+        summarize = RecordingSummarizer()
+        compactor.compact(make_history(4), "s", 4, summarize)
+        await compactor.wait("s")
+
+        compacted = compactor.compact(make_history(6), "s", 4, summarize)
+        # The current request still uses the last completed summary
+        assert compacted.messages[1].content == SUMMARY_PREFIX + "summary 1"
+        await compactor.wait("s")
+
+        assert summarize.texts[1].startswith("Previous summary:\nsummary 1")
+        assert "question 2" not in summarize.texts[1]
+        assert "question 3" in summarize.texts[1]
+        assert compactor.get("s").covered == 10
+
+    @pytest.mark.asyncio
+    async def test_one_summary_at_a_time(self):
+        compactor = HistoryCompactor()
+        release = threading.Event()
+        calls = []
+
+        async def summarize(text):
+            calls.append(text)
+            await asyncio.to_thread(release.wait)
+            return "summary"
+
+        compactor.compact(make_history(4), "s", 4, summarize)
+        compactor.compact(make_history(4), "s", 4, summarize)
+        release.set()
+        await compactor.wait("s")
+
+        assert len(calls) == 1
+
+    def test_summary_outlives_the_request_loop(self):
+        compactor = HistoryCompactor()
+        release = threading.Event()
+
+        async def summarize(text):
+            await asyncio.to_thread(release.wait)
+            return "summary"
+
+        async def request():
+            compactor.compact(make_history(4), "s", 4, summarize)
+
+        # Like promptflow, every request runs in its own asyncio.run
+        asyncio.run(request())
+        release.set()
+        asyncio.run(compactor.wait("s"))
+
+        assert compactor.get("s").text == "summary"
+        assert "s" not in compactor._pending
+
+    @pytest.mark.asyncio
+    async def test_cancelled_summary_is_not_pending(self):
+        compactor = HistoryCompactor()
+        release = threading.Event()
+
+        async def summarize(text):
+            await asyncio.to_thread(release.wait)
+            return "summary"
+
+        compactor.compact(make_history(4), "s", 4, summarize)
+        compactor._pending["s"].cancel()
+        release.set()
+
+        assert "s" not in compactor._pending
+        assert compactor.get("s") is None
+
+    @pytest.mark.asyncio
+    async def test_edited_history_discards_summary(self):
+        compactor = HistoryCompactor()
+        summarize = RecordingSummarizer()
+        compactor.compact(make_history(4), "s", 4, summarize)
+        await compactor.wait("s")
+
+        edited = make_history(4)
+        edited.messages[1].content = "edited"
+
+        assert compactor.compact(edited, "s", 4, summarize) is edited
+        await compactor.wait("s")
+        assert "edited" in summarize.texts[1]
+
+    @pytest.mark.asyncio
+    async def test_failed_summary_keeps_full_history(self):
+        compactor = HistoryCompactor()
+        history = make_history(4)
+
+        compactor.compact(history, "s", 4,
+                          AsyncMock(side_effect=RuntimeError("down")))
+        await compactor.wait("s")
+
+        assert compactor.get("s") is None
+        assert compactor.compact(history, "s", 4,
+                                 RecordingSummarizer()) is history
+
+    @pytest.mark.asyncio
+    async def test_never_summarizes_the_prompt(self):
+        compactor = HistoryCompactor()
+        summarize = RecordingSummarizer()
+
+        def with_example():
+            history = make_history(4)
+            current = history.messages.pop()
+            # Few-shot example of the prompt before its question
+            history.add_user_message("example")
+            history.add_assistant_message("example answer")
+            history.add_message(current)
+            return history
+
+        compactor.compact(with_example(), "s", 4, summarize, 3)
+        await compactor.wait("s")
+
+        assert "example" not in summarize.texts[0]
+        assert contents(compactor.compact(with_example(), "s", 4, summarize,
+                                          3)) == [
+                                              "system",
+                                              SUMMARY_PREFIX + "summary 1",
+                                              "question 3", "answer 3",
+                                              "example", "example answer",
+                                              "current"
+                                          ]
+
+    @pytest.mark.asyncio
+    async def test_does_not_split_tool_calls(self):
+        compactor = HistoryCompactor()
+        summarize = RecordingSummarizer()
+        history = ChatHistory()
+        history.add_user_message("question")
+        history.add_message(
+            ChatMessageContent(role=AuthorRole.ASSISTANT,
+                               items=[
+                                   FunctionCallContent(id="1",
+                                                       name="lights-get",
+                                                       arguments="{}")
+                               ]))
+        history.add_message(
+            ChatMessageContent(role=AuthorRole.TOOL,
+                               items=[
+                                   FunctionResultContent(id="1",
+                                                         name="lights-get",
+                                                         result="on")
+                               ]))
+        history.add_assistant_message("answer")
+        history.add_user_message("current")
+
+        compactor.compact(history, "s", 2, summarize)
+        await compactor.wait("s")
+
+        assert "[lights-get returned on]" in summarize.texts[0]
+        assert compactor.get("s").covered == 3
+
+    @pytest.mark.asyncio
+    async def test_summarizer_uses_kernel_factory(self):
+        service = MagicMock()
+        service.get_chat_message_content = AsyncMock(return_value="short")
+        with patch(
+                "promptflow_tool_semantic_kernel.tools.kernel_factory.KernelFactory.create_kernel",
+                return_value=(MagicMock(), service)) as create_kernel, patch(
+                    "promptflow_tool_semantic_kernel.tools.kernel_factory.KernelFactory.get_execution_settings"
+                ):
+            summarize = HistoryCompactor.summarizer("connection", "mini")
+            create_kernel.assert_not_called()
+
+            assert await summarize("long text") == "short"
+
+        create_kernel.assert_called_once_with("connection", "mini")
+        history = service.get_chat_message_content.call_args.kwargs[
+            "chat_history"]
+        assert history.messages[-1].content == "long text"
@@ -0,0 +1,104 @@
+from semantic_kernel.contents.chat_history import ChatHistory
+from semantic_kernel.contents.chat_message_content import ChatMessageContent
+from semantic_kernel.contents.function_call_content import FunctionCallContent
+from semantic_kernel.contents.function_result_content import FunctionResultContent
+from semantic_kernel.contents.utils.author_role import AuthorRole
+
+from promptflow_tool_semantic_kernel.tools.history_window import HistoryWindow
+from promptflow_tool_semantic_kernel.tools.token_estimator import TokenEstimator
+
+# 40 characters, 14 tokens per message with the default estimator
+TEXT = "a" * 40
+
+
+def make_history(turns):
+    history = ChatHistory()
+    history.add_system_message("system")
+    for index in range(turns):
+        history.add_user_message(f"{index}{TEXT}"[:40])
+        history.add_assistant_message(TEXT)
+    history.add_user_message("current")
+    return history
+
+
+def add_tool_call(history):
+    history.add_message(
+        ChatMessageContent(role=AuthorRole.ASSISTANT,
+                           items=[
+                               FunctionCallContent(id="1",
+                                                   name="lights-get_lights",
+                                                   arguments="{}")
+                           ]))
+    history.add_message(
+        ChatMessageContent(role=AuthorRole.TOOL,
+                           items=[
+                               FunctionResultContent(id="1",
+                                                     name="lights-get_lights",
+                                                     result=TEXT)
+                           ]))
+
+
+class TestHistoryWindow:
+
+    def test_keeps_history_within_budget(self):
+        history = make_history(2)
+
+        assert HistoryWindow.fit(history, 1000, TokenEstimator()) is history
+
+    def test_drops_oldest_turns(self):
+        history = make_history(10)
+        estimator = TokenEstimator()
+
+        windowed = HistoryWindow.fit(history, 80, estimator)
+
+        assert windowed.messages[0].role == AuthorRole.SYSTEM
+        assert windowed.messages[-1].content == "current"
+        # system 6 + current 6 leaves room for 4 messages of 14 tokens
+        assert [message.content for message in windowed.messages[1:-1]
+                ] == [message.content for message in history.messages[-5:-1]]
+        assert estimator.estimate(windowed.messages) <= 80
+
+    def test_always_keeps_system_and_current_prompt(self):
+        windowed = HistoryWindow.fit(make_history(3), 1, TokenEstimator())
+
+        assert [message.content for message in windowed.messages
+                ] == ["system", "current"]
+
+    def test_keeps_every_message_of_the_prompt(self):
+        history = make_history(3)
+        current = history.messages.pop()
+        # Few-shot example of the prompt before its question
+        history.add_user_message("example")
+        history.add_assistant_message("example answer")
+        history.add_message(current)
+
+        windowed = HistoryWindow.fit(history, 1, TokenEstimator(), 3)
+
+        assert [message.content for message in windowed.messages
+                ] == ["system", "example", "example answer", "current"]
+
+    def test_never_splits_tool_calls(self):
+        history = make_history(0)
+        current = history.messages.pop()
+        history.add_user_message(TEXT)
+        add_tool_call(history)
+        history.add_message(current)
+        estimator = TokenEstimator()
+        call_tokens = estimator.estimate(history.messages[2:4])
+
+        windowed = HistoryWindow.fit(history, 12 + call_tokens - 1,
+                                     estimator)
+
+        assert [message.content for message in windowed.messages
+                ] == ["system", "current"]
+
+        windowed = HistoryWindow.fit(history, 12 + call_tokens, estimator)
+        assert len(windowed.messages) == 4
+        assert windowed.messages[2].role == AuthorRole.TOOL
+
+    def test_units(self):
+        history = make_history(1)
+        add_tool_call(history)
+
+        assert [len(unit) for unit in HistoryWindow.units(history.messages)
+                ] == [1, 1, 1, 1, 2]
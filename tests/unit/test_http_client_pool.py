@@ -0,0 +1,172 @@
+import asyncio
+import threading
+
+import httpx
+import pytest
+from unittest.mock import MagicMock, patch
+
+from promptflow_tool_semantic_kernel.tools.http_client_pool import HttpClientPool, HTTP_CLIENT_DEFAULTS
+
+
+class TestHttpClientPool:
+
+    @pytest.fixture
+    def pool(self):
+        pool = HttpClientPool()
+        yield pool
+        pool.clear()
+
+    def test_options_from_configs_defaults(self):
+        options = dict(HttpClientPool.options_from_configs({}))
+
+        assert options == HTTP_CLIENT_DEFAULTS
+
+    def test_options_from_configs_converts_strings(self):
+        options = dict(
+            HttpClientPool.options_from_configs({
+                "http_max_connections": "7",
+                "http_keepalive_expiry": "1.5",
+                "http2": "true",
+                "http_read_timeout": "30",
+                "api_type": "azure",
+            }))
+
+        assert options["http_max_connections"] == 7
+        assert options["http_keepalive_expiry"] == 1.5
+        assert options["http2"] is True
+        assert options["http_read_timeout"] == 30.0
+
+    def test_options_from_non_dict_configs(self):
+        options = dict(HttpClientPool.options_from_configs(MagicMock()))
+
+        assert options == HTTP_CLIENT_DEFAULTS
+
+    def test_get_client_shares_client_per_endpoint(self, pool):
+        options = HttpClientPool.options_from_configs({})
+
+        first = pool.get_client("https://a.example.com", options)
+        second = pool.get_client("https://a.example.com", options)
+        other = pool.get_client("https://b.example.com", options)
+
+        assert first is second
+        assert first is not other
+        assert pool.owns(first)
+        assert not pool.owns(httpx.AsyncClient())
+
+    def test_get_client_applies_options(self, pool):
+        options = HttpClientPool.options_from_configs({
+            "http_connect_timeout": "2",
+            "http_read_timeout": "20"
+        })
+
+        client = pool.get_client("https://a.example.com", options)
+
+        assert client.timeout == httpx.Timeout(20.0, connect=2.0)
+
+    def test_http2_without_h2_falls_back(self, pool):
+        options = HttpClientPool.options_from_configs({"http2": "true"})
+
+        with patch(
+                'promptflow_tool_semantic_kernel.tools.http_client_pool.importlib.util.find_spec',
+                return_value=None), \
+                patch('promptflow_tool_semantic_kernel.tools.http_client_pool.httpx.AsyncClient') as mock_client, \
+                patch('promptflow_tool_semantic_kernel.tools.logger_factory.LoggerFactory.create_logger') as mock_logger_factory:
+            mock_client.return_value.is_closed = False
+            pool.get_client("https://a.example.com", options)
+            pool._clients.clear()
+
+        assert mock_client.call_args.kwargs["http2"] is False
+        mock_logger_factory.return_value.warning.assert_called_once()
+
+    def test_closed_client_is_replaced(self, pool):
+        options = HttpClientPool.options_from_configs({})
+        client = pool.get_client("https://a.example.com", options)
+        pool.clear()
+
+        assert client.is_closed
+        assert pool.get_client("https://a.example.com", options) is not client
+
+    def test_clients_of_closed_loops_are_dropped(self, pool):
+        options = HttpClientPool.options_from_configs({})
+
+        async def get():
+            return pool.get_client("https://a.example.com", options)
+
+        clients = [asyncio.run(get()) for _ in range(20)]
+
+        assert len({id(client) for client in clients}) == 20
+        assert len(pool) == 1
+        assert pool.get_client("https://a.example.com", options) not in clients
+        assert len(pool) == 1
+
+    @pytest.mark.asyncio
+    async def test_shared_within_a_loop(self, pool):
+        options = HttpClientPool.options_from_configs({})
+
+        first = pool.get_client("https://a.example.com", options)
+
+        assert pool.get_client("https://a.example.com", options) is first
+        assert len(pool) == 1
+
+    def test_evicts_least_recently_used(self):
+        pool = HttpClientPool(max_size=2)
+        options = HttpClientPool.options_from_configs({})
+        first = pool.get_client("https://a.example.com", options)
+        evicted = pool.get_client("https://b.example.com", options)
+        pool.get_client("https://a.example.com", options)
+
+        pool.get_client("https://c.example.com", options)
+
+        assert len(pool) == 2
+        assert pool.get_client("https://a.example.com", options) is first
+        assert pool.get_client("https://b.example.com",
+                               options) is not evicted
+        # Services still using it must not close it
+        assert pool.owns(evicted) and not evicted.is_closed
+        # The first b and c
+        assert pool.stats() == {"size": 2, "retired": 2, "closed": 0}
+
+        pool.release(evicted)
+
+        assert evicted.is_closed
+        assert not pool.owns(evicted)
+        assert pool.stats() == {"size": 2, "retired": 1, "closed": 1}
+        pool.clear()
+
+    def test_closes_unused_evicted_clients(self):
+        pool = HttpClientPool(max_size=1)
+        options = HttpClientPool.options_from_configs({})
+        evicted = pool.get_client("https://a.example.com", options)
+        pool.release(evicted)
+
+        pool.get_client("https://b.example.com", options)
+
+        assert evicted.is_closed
+        assert pool.stats()["closed"] == 1
+        pool.clear()
+
+    def test_closes_evicted_clients_on_their_loop(self):
+        pool = HttpClientPool(max_size=1)
+        options = HttpClientPool.options_from_configs({})
+        loop = asyncio.new_event_loop()
+        thread = threading.Thread(target=loop.run_forever)
+        thread.start()
+        try:
+
+            async def get():
+                return pool.get_client("https://a.example.com", options)
+
+            evicted = asyncio.run_coroutine_threadsafe(get(), loop).result(5)
+            pool.release(evicted)
+
+            pool.get_client("https://b.example.com", options)
+            asyncio.run_coroutine_threadsafe(asyncio.sleep(0.01),
+                                             loop).result(5)
+
+            assert evicted.is_closed
+            assert pool.stats()["closed"] == 1
+        finally:
+            loop.call_soon_threadsafe(loop.stop)
+            thread.join()
+            loop.close()
+            pool.clear()
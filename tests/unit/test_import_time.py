@@ -0,0 +1,53 @@
+import json
+import subprocess
+import sys
+
+TOOL_MODULE = "promptflow_tool_semantic_kernel.tools.semantic_kernel_tool"
+
+# Connectors that must only be imported once a matching connection is used
+PROVIDER_MODULES = (
+    "semantic_kernel.connectors.ai.open_ai",
+    "semantic_kernel.connectors.ai.google.google_ai",
+    "google.generativeai",
+)
+
+
+def run_import(statement):
+    """Run ``statement`` in a fresh interpreter with ``-X importtime``
+
+    Returns the provider modules that ended up loaded and the cumulative
+    import times in microseconds reported for each module.
+    """
+    script = (f"{statement}\n"
+              "import json, sys\n"
+              f"print(json.dumps([m for m in {PROVIDER_MODULES!r} "
+              "if m in sys.modules]))")
+    result = subprocess.run([sys.executable, "-X", "importtime", "-c", script],
+                            capture_output=True,
+                            text=True,
+                            check=True)
+    times = {}
+    for line in result.stderr.splitlines():
+        if not line.startswith("import time:") or line.count("|") != 2:
+            continue
+        _, cumulative, module = line.split("|")
+        if cumulative.strip().isdigit():
+            times[module.strip()] = int(cumulative)
+    return json.loads(result.stdout.splitlines()[-1]), times
+
+
+class TestImportTime:
+
+    def test_tool_import_does_not_load_provider_connectors(self):
+        loaded, times = run_import(f"import {TOOL_MODULE}")
+
+        assert loaded == [], (f"{TOOL_MODULE} imported in "
+                              f"{times.get(TOOL_MODULE, 0) / 1e6:.2f}s")
+        assert TOOL_MODULE in times
+
+    def test_provider_connector_loaded_on_first_use(self):
+        loaded, _ = run_import(
+            "from promptflow_tool_semantic_kernel.tools import kernel_factory\n"
+            "kernel_factory.AzureChatCompletion")
+
+        assert loaded == ["semantic_kernel.connectors.ai.open_ai"]
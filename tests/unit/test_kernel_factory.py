@@ -1,8 +1,15 @@
+import json
 import pytest
 from unittest.mock import MagicMock, patch
 from semantic_kernel import Kernel
 from semantic_kernel.connectors.ai.open_ai import AzureChatCompletion, OpenAIChatCompletion
 from promptflow_tool_semantic_kernel.tools.kernel_factory import KernelFactory
+from promptflow_tool_semantic_kernel.tools.service_pool import ServicePool
+from promptflow_tool_semantic_kernel.tools.http_client_pool import HttpClientPool
+from promptflow_tool_semantic_kernel.tools.routing_chat_completion import RoutingChatCompletion
+from promptflow_tool_semantic_kernel.tools.rate_limited_chat_completion import RateLimitedChatCompletion
+from promptflow_tool_semantic_kernel.tools.circuit_breaker import CircuitBreaker
+from promptflow_tool_semantic_kernel.tools.circuit_breaking_chat_completion import CircuitBreakingChatCompletion
 
 from semantic_kernel.connectors.ai.open_ai.prompt_execution_settings.azure_chat_prompt_execution_settings import (
     AzureChatPromptExecutionSettings, )
@@ -13,6 +20,14 @@ from semantic_kernel.connectors.ai.google.google_ai.google_ai_prompt_execution_s
 
 class TestKernelFactory:
 
+    @pytest.fixture(autouse=True)
+    def clear_service_pool(self):
+        KernelFactory.service_pool.clear()
+        yield
+        KernelFactory.service_pool.clear()
+        KernelFactory.http_client_pool.clear()
+        CircuitBreaker.clear_registry()
+
     def test_create_kernel_with_azure_connection(self):
         # Mock AzureOpenAIConnection
         mock_connection = MagicMock()
@@ -278,6 +293,26 @@ class TestKernelFactory:
             mock_google_chat.assert_called_once_with(
                 gemini_model_id="gemini-2.0", api_key="google-key")
 
+    def test_circuit_breaker_of_services_without_url(self):
+        connection = MagicMock()
+        connection.configs = {"circuit_breaker_failure_threshold": "3"}
+        services = []
+        for model in ("gemini-2.0", "gemini-2.0", "gemini-1.5"):
+            service = MagicMock()
+            service.service_url.return_value = None
+            service.ai_model_id = model
+            services.append(service)
+
+        with patch(
+                'promptflow_tool_semantic_kernel.tools.kernel_factory.CircuitBreakingChatCompletion'
+        ) as mock_wrapper:
+            for service in services:
+                KernelFactory._apply_circuit_breaker(service, connection)
+
+        breakers = [c.args[1] for c in mock_wrapper.call_args_list]
+        assert breakers[0] is breakers[1]
+        assert breakers[0] is not breakers[2]
+
     def test_get_execution_settings(self):
         # Test AzureOpenAIConnection
         azure_connection = MagicMock()
@@ -383,3 +418,183 @@ class TestKernelFactory:
             mock_google_chat.assert_called_once_with(
                 gemini_model_id="gemini-2.0-flash", api_key="google-key")
             mock_kernel.add_service.assert_called_once_with(mock_chat)
+
+    def test_create_kernel_reuses_pooled_chat_completion(self):
+        mock_connection = MagicMock()
+        mock_connection.__class__.__name__ = "OpenAIConnection"
+        mock_connection.secrets = {"api_key": "test-key"}
+        mock_connection.organization = "test-org"
+
+        with patch('promptflow_tool_semantic_kernel.tools.kernel_factory.Kernel') as mock_kernel_class, \
+                patch('promptflow_tool_semantic_kernel.tools.kernel_factory.OpenAIChatCompletion', autospec=True) as mock_openai_chat:
+            mock_kernel_class.side_effect = [MagicMock(), MagicMock()]
+            mock_chat = MagicMock()
+            mock_openai_chat.return_value = mock_chat
+
+            first_kernel, first_chat = KernelFactory.create_kernel(
+                mock_connection, "gpt-4")
+            second_kernel, second_chat = KernelFactory.create_kernel(
+                mock_connection, "gpt-4")
+
+            assert first_chat is second_chat
+            assert first_kernel is not second_kernel
+            mock_openai_chat.assert_called_once()
+            assert KernelFactory.service_pool.stats()["hits"] == 1
+
+    def test_service_key_differs_per_deployment_and_key(self):
+        mock_connection = MagicMock()
+        mock_connection.__class__.__name__ = "OpenAIConnection"
+        mock_connection.secrets = {"api_key": "test-key"}
+        mock_connection.organization = "test-org"
+
+        other_connection = MagicMock()
+        other_connection.__class__.__name__ = "OpenAIConnection"
+        other_connection.secrets = {"api_key": "other-key"}
+        other_connection.organization = "test-org"
+
+        key = KernelFactory._service_key(mock_connection, "gpt-4")
+        assert key == KernelFactory._service_key(mock_connection, "gpt-4")
+        assert key != KernelFactory._service_key(mock_connection, "gpt-4o")
+        assert key != KernelFactory._service_key(other_connection, "gpt-4")
+        assert "test-key" not in key
+
+    def test_create_kernel_uses_shared_http_client(self):
+        mock_connection = MagicMock()
+        mock_connection.__class__.__name__ = "CustomConnection"
+        mock_connection.configs = {
+            "api_type": "azure",
+            "base_url": "https://custom.azure.com/openai/",
+            "http_max_connections": "8",
+            "http_read_timeout": "30"
+        }
+        mock_connection.secrets = {"api_key": "custom-key"}
+
+        first_kernel, first_chat = KernelFactory.create_kernel(
+            mock_connection, "first-deployment")
+        second_kernel, second_chat = KernelFactory.create_kernel(
+            mock_connection, "second-deployment")
+
+        assert first_chat is not second_chat
+        assert first_chat.client._client is second_chat.client._client
+        assert KernelFactory.http_client_pool.owns(first_chat.client._client)
+        assert first_chat.client.timeout.read == 30.0
+
+    def test_sdk_retries_are_kept_without_retry_policy(self):
+        mock_connection = MagicMock()
+        mock_connection.__class__.__name__ = "CustomConnection"
+        mock_connection.configs = {
+            "api_type": "azure",
+            "base_url": "https://custom.azure.com/openai/"
+        }
+        mock_connection.secrets = {"api_key": "custom-key"}
+
+        _, default_chat = KernelFactory.create_kernel(mock_connection,
+                                                      "deployment")
+        mock_connection.configs = dict(mock_connection.configs,
+                                       retry_max_attempts="3")
+        _, retrying_chat = KernelFactory.create_kernel(mock_connection,
+                                                       "deployment")
+
+        assert default_chat.client.max_retries > 0
+        assert retrying_chat.client.max_retries == 0
+
+    def test_evicted_service_keeps_shared_http_client_open(self):
+        chat_completion = MagicMock()
+        http_client = KernelFactory.http_client_pool.get_client(
+            "https://custom.azure.com", HttpClientPool.options_from_configs({}))
+        chat_completion.client._client = http_client
+
+        with patch.object(ServicePool, 'close_service') as mock_close:
+            KernelFactory._close_service(chat_completion)
+            mock_close.assert_not_called()
+            # Released, so the pool may close it once it is evicted
+            assert not http_client.is_closed
+            assert all(pooled.users == 0 for pooled in
+                       KernelFactory.http_client_pool._clients.values())
+
+            chat_completion.client._client = MagicMock()
+            KernelFactory._close_service(chat_completion)
+            mock_close.assert_called_once_with(chat_completion)
+
+    def test_create_kernel_with_backends_returns_router(self):
+        mock_connection = MagicMock()
+        mock_connection.__class__.__name__ = "CustomConnection"
+        mock_connection.configs = {
+            "api_type": "azure",
+            "routing_strategy": "lowest_latency",
+            "backends": json.dumps([{
+                "base_url": "https://east.openai.azure.com/openai/",
+                "weight": 2
+            }, {
+                "base_url": "https://west.openai.azure.com/openai/",
+                "deployment_name": "west-deployment",
+                "api_key_secret": "west_key",
+                "name": "west"
+            }])
+        }
+        mock_connection.secrets = {"api_key": "east-key", "west_key": "west-key"}
+
+        with patch('promptflow_tool_semantic_kernel.tools.kernel_factory.Kernel'), \
+                patch('promptflow_tool_semantic_kernel.tools.kernel_factory.AzureChatCompletion', autospec=True) as mock_azure_chat:
+            east, west = MagicMock(), MagicMock()
+            east.ai_model_id = east.service_id = "deployment-name"
+            west.ai_model_id = west.service_id = "west-deployment"
+            mock_azure_chat.side_effect = [east, west]
+
+            _, chat_completion = KernelFactory.create_kernel(
+                mock_connection, "deployment-name")
+
+        assert isinstance(chat_completion, RoutingChatCompletion)
+        assert chat_completion.strategy == "lowest_latency"
+        assert chat_completion.wrapped_services() == [east, west]
+        assert [b.weight for b in chat_completion.backends] == [2.0, 1.0]
+        assert chat_completion.backends[1].name == "west"
+        mock_azure_chat.assert_any_call(
+            api_key="east-key",
+            deployment_name="deployment-name",
+            base_url="https://east.openai.azure.com/openai/")
+        mock_azure_chat.assert_any_call(
+            api_key="west-key",
+            deployment_name="west-deployment",
+            base_url="https://west.openai.azure.com/openai/")
+
+    def test_create_kernel_with_rate_limit_wraps_service(self):
+        mock_connection = MagicMock()
+        mock_connection.__class__.__name__ = "CustomConnection"
+        mock_connection.configs = {
+            "api_type": "azure",
+            "base_url": "https://custom.azure.com/openai/",
+            "requests_per_minute": "60",
+            "tokens_per_minute": "1000"
+        }
+        mock_connection.secrets = {"api_key": "custom-key"}
+
+        _, chat_completion = KernelFactory.create_kernel(
+            mock_connection, "deployment-name")
+
+        assert isinstance(chat_completion, RateLimitedChatCompletion)
+        assert chat_completion.rate_limiter.requests_per_minute == 60.0
+        assert chat_completion.rate_limiter.tokens_per_minute == 1000.0
+        assert chat_completion.ai_model_id == "deployment-name"
+
+    def test_create_kernel_with_circuit_breaker_wraps_service(self):
+        mock_connection = MagicMock()
+        mock_connection.__class__.__name__ = "CustomConnection"
+        mock_connection.configs = {
+            "api_type": "azure",
+            "base_url": "https://custom.azure.com/openai/",
+            "requests_per_minute": "60",
+            "circuit_breaker_failure_threshold": "3",
+            "circuit_breaker_reset_timeout": "10"
+        }
+        mock_connection.secrets = {"api_key": "custom-key"}
+
+        _, chat_completion = KernelFactory.create_kernel(
+            mock_connection, "deployment-name")
+
+        assert isinstance(chat_completion, CircuitBreakingChatCompletion)
+        assert isinstance(chat_completion.inner, RateLimitedChatCompletion)
+        assert chat_completion.circuit_breaker.failure_threshold == 3
+        assert chat_completion.circuit_breaker.reset_timeout == 10.0
+        assert chat_completion.circuit_breaker is CircuitBreaker.for_endpoint(
+            chat_completion.service_url())
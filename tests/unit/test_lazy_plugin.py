@@ -0,0 +1,95 @@
+import pytest
+from unittest.mock import MagicMock
+
+from semantic_kernel import Kernel
+from semantic_kernel.functions import kernel_function
+from semantic_kernel.functions.kernel_arguments import KernelArguments
+
+from promptflow_tool_semantic_kernel.tools.lazy_plugin import LazyInstance, LazyPlugin
+
+
+class ExpensivePlugin:
+    created = 0
+
+    def __init__(self, prefix: str = ""):
+        ExpensivePlugin.created += 1
+        self.prefix = prefix
+
+    @kernel_function(name="echo", description="Echoes the text")
+    def echo(self, text: str) -> str:
+        return self.prefix + text
+
+    @kernel_function(name="echo_async", description="Echoes the text")
+    async def echo_async(self, text: str) -> str:
+        return self.prefix + text
+
+    def helper(self) -> str:
+        return "not a kernel function"
+
+    @staticmethod
+    @kernel_function(name="shout", description="Upper-cases the text")
+    def shout(text: str) -> str:
+        return text.upper()
+
+    @classmethod
+    @kernel_function(name="kind", description="Returns the class name")
+    def kind(cls) -> str:
+        return cls.__name__
+
+
+@pytest.fixture(autouse=True)
+def reset_counter():
+    ExpensivePlugin.created = 0
+
+
+class TestLazyInstance:
+
+    def test_builds_once_on_first_get(self):
+        factory = MagicMock(return_value="instance")
+        instance = LazyInstance(factory)
+
+        assert not instance.is_created
+        assert instance.get() == "instance"
+        assert instance.get() == "instance"
+        factory.assert_called_once_with()
+        assert instance.is_created
+
+
+class TestLazyPlugin:
+
+    def test_advertises_functions_without_constructing(self):
+        plugin = LazyPlugin.from_class(
+            "expensive", ExpensivePlugin,
+            LazyInstance(lambda: ExpensivePlugin(">")))
+
+        assert sorted(plugin.functions) == ["echo", "echo_async"]
+        assert [p.name for p in plugin["echo"].parameters] == ["text"]
+        assert plugin["echo_async"].metadata.is_asynchronous
+        assert ExpensivePlugin.created == 0
+
+    def test_skips_static_and_class_methods(self):
+        plugin = LazyPlugin.from_class("expensive", ExpensivePlugin,
+                                       LazyInstance(ExpensivePlugin))
+
+        assert "shout" not in plugin.functions
+        assert "kind" not in plugin.functions
+
+    @pytest.mark.asyncio
+    async def test_constructs_on_first_invocation(self):
+        kernel = Kernel()
+        kernel.add_plugin(
+            LazyPlugin.from_class("expensive", ExpensivePlugin,
+                                  LazyInstance(lambda: ExpensivePlugin(">"))))
+
+        assert ExpensivePlugin.created == 0
+
+        first = await kernel.invoke(plugin_name="expensive",
+                                    function_name="echo",
+                                    arguments=KernelArguments(text="a"))
+        second = await kernel.invoke(plugin_name="expensive",
+                                     function_name="echo_async",
+                                     arguments=KernelArguments(text="b"))
+
+        assert str(first) == ">a"
+        assert str(second) == ">b"
+        assert ExpensivePlugin.created == 1
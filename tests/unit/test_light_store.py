@@ -0,0 +1,268 @@
+import logging
+import multiprocessing
+import pickle
+import threading
+import time
+
+import pytest
+
+from promptflow_tool_semantic_kernel.tools.light_store import InMemoryLightStore, LightStore, SqliteLightStore
+from promptflow_tool_semantic_kernel.tools.lights_plugin import LightsPlugin
+
+
+def make_lights(count):
+    return [{
+        "id": id,
+        "name": f"Light {id}",
+        "is_on": False
+    } for id in range(1, count + 1)]
+
+
+def switch_on_in_process(path, ids):
+    SqliteLightStore(path).set_states({id: True for id in ids})
+
+
+@pytest.fixture(autouse=True)
+def clear_stores():
+    LightStore.clear_registry()
+    yield
+    LightStore.clear_registry()
+
+
+@pytest.fixture
+def store():
+    return InMemoryLightStore(make_lights(10_000))
+
+
+class TestLightStore:
+
+    def test_create_by_name(self):
+        assert isinstance(LightStore.create("memory"), InMemoryLightStore)
+        assert isinstance(LightStore.create(), InMemoryLightStore)
+
+    def test_create_keeps_instances(self, store):
+        assert LightStore.create(store) is store
+
+    def test_create_sqlite(self, tmp_path):
+        store = LightStore.create("sqlite", path=str(tmp_path / "lights.db"))
+
+        assert isinstance(store, SqliteLightStore)
+
+    def test_create_unknown_store(self):
+        with pytest.raises(ImportError):
+            LightStore.create("no_such_module.Store")
+
+    def test_shared_per_backend_and_options(self, store):
+        shared = LightStore.shared("memory", lights=make_lights(2))
+
+        assert LightStore.shared("memory", lights=make_lights(2)) is shared
+        assert LightStore.shared("memory", lights=make_lights(3)) is not shared
+        assert LightStore.shared(store) is store
+
+    def test_is_abstract(self):
+        with pytest.raises(TypeError):
+            LightStore()
+
+
+class TestLightStoreContract:
+    """Behavior every backend shares"""
+
+    @pytest.fixture(params=["memory", "sqlite"])
+    def backend(self, request, tmp_path):
+        lights = list(reversed(make_lights(5)))
+        if request.param == "sqlite":
+            return SqliteLightStore(str(tmp_path / "lights.db"), lights)
+        return InMemoryLightStore(lights)
+
+    def test_all_is_ordered_by_id(self, backend):
+        assert [light["id"] for light in backend.all()] == [1, 2, 3, 4, 5]
+
+    def test_get_keeps_order_and_skips_unknown(self, backend):
+        assert [light["id"] for light in backend.get([4, 0, 2])] == [4, 2]
+
+    def test_set_states_returns_changed_lights(self, backend):
+        changed = backend.set_states({3: True, 99: True})
+
+        assert changed == [{"id": 3, "name": "Light 3", "is_on": True}]
+        assert backend.get([3]) == changed
+
+    def test_returns_copies(self, backend):
+        backend.all()[0]["is_on"] = True
+        backend.get([2])[0]["is_on"] = True
+
+        assert not any(light["is_on"] for light in backend.all())
+
+
+class TestInMemoryLightStore:
+
+    def test_get_keeps_order_and_skips_unknown(self, store):
+        assert [light["id"]
+                for light in store.get([42, 0, 7])] == [42, 7]
+
+    def test_set_states(self, store):
+        changed = store.set_states({1: True, 20_000: True})
+
+        assert changed == [{"id": 1, "name": "Light 1", "is_on": True}]
+        assert store.get([1])[0]["is_on"] is True
+        assert len(store.all()) == 10_000
+
+    def test_concurrent_writes_and_reads(self, store):
+        errors = []
+
+        def toggle(offset):
+            try:
+                for round in range(20):
+                    store.set_states({
+                        id: round % 2 == 0
+                        for id in range(offset, 10_001, 4)
+                    })
+                    assert len(store.all()) == 10_000
+            except Exception as e:
+                errors.append(e)
+
+        threads = [
+            threading.Thread(target=toggle, args=(offset, ))
+            for offset in range(1, 5)
+        ]
+        for thread in threads:
+            thread.start()
+        for thread in threads:
+            thread.join()
+
+        assert errors == []
+        # The last round of every writer turned its lights off
+        assert not any(light["is_on"] for light in store.all())
+
+
+class TestSqliteLightStore:
+
+    @pytest.fixture
+    def path(self, tmp_path):
+        return str(tmp_path / "lights.db")
+
+    def test_default_path(self, tmp_path, monkeypatch):
+        monkeypatch.setenv("LIGHTS_DB_PATH", "data/lights.db")
+        monkeypatch.chdir(tmp_path)
+
+        store = SqliteLightStore()
+
+        assert store.path == str(tmp_path / "data" / "lights.db")
+        assert pickle.loads(pickle.dumps(store)).path == store.path
+
+    def test_uses_wal(self, path):
+        store = SqliteLightStore(path)
+
+        assert store._connection().execute(
+            "PRAGMA journal_mode").fetchone()[0] == "wal"
+
+    def test_get_and_set_states(self, path):
+        store = SqliteLightStore(path, make_lights(2_000))
+
+        changed = store.set_states({1_500: True, 3: True, 99_999: True})
+
+        assert changed == [{
+            "id": 1_500,
+            "name": "Light 1500",
+            "is_on": True
+        }, {
+            "id": 3,
+            "name": "Light 3",
+            "is_on": True
+        }]
+        assert [light["id"] for light in store.get(range(2_000, 0, -1))
+                if light["is_on"]] == [1_500, 3]
+        assert len(store.all()) == 2_000
+
+    def test_state_survives_restart(self, path):
+        SqliteLightStore(path, make_lights(3)).set_states({2: True})
+
+        # Seeding again keeps the stored state
+        reopened = SqliteLightStore(path, make_lights(3))
+
+        assert reopened.get([2])[0]["is_on"] is True
+
+    def test_shared_between_processes(self, path):
+        store = SqliteLightStore(path, make_lights(100))
+        process = multiprocessing.get_context("spawn").Process(
+            target=switch_on_in_process, args=(path, [10, 20]))
+        process.start()
+        process.join(30)
+
+        assert process.exitcode == 0
+        assert [light["id"] for light in store.all()
+                if light["is_on"]] == [10, 20]
+
+    def test_picklable(self, path):
+        store = SqliteLightStore(path, make_lights(3))
+
+        copy = pickle.loads(pickle.dumps(store))
+
+        assert copy.get([1]) == store.get([1])
+
+    def test_lights_plugin_backend(self, path):
+        plugin = LightsPlugin(store="sqlite", store_options={"path": path})
+
+        plugin.change_states(ids=[1, 2], is_on=True)
+
+        assert [light["is_on"] for light in LightsPlugin(
+            store="sqlite", store_options={
+                "path": path
+            }).get_state(id=None, all=True)] == [True, True, True]
+
+    def test_lights_plugin_sees_changes_of_other_processes(self, path):
+        plugin = LightsPlugin(store="sqlite", store_options={"path": path})
+        assert plugin.get_state(id=1, all=False)[0]["is_on"] is False
+
+        process = multiprocessing.get_context("spawn").Process(
+            target=switch_on_in_process, args=(path, [1]))
+        process.start()
+        process.join(30)
+
+        assert plugin.get_state(id=1, all=False)[0]["is_on"] is True
+        assert not hasattr(LightsPlugin.get_state, "__result_cache__")
+
+
+class TestLightStoreBenchmark:
+
+    def test_100k_devices(self, tmp_path):
+        count = 100_000
+        lights = make_lights(count)
+        stores = {
+            "memory": InMemoryLightStore(lights),
+            "sqlite": SqliteLightStore(str(tmp_path / "lights.db"), lights),
+        }
+        ids = list(range(1, count + 1, count // 1_000))
+
+        def linear_get(id):
+            for light in lights:
+                if light["id"] == id:
+                    return [light]
+
+        def measure(function, rounds=200):
+            start = time.perf_counter()
+            for round in range(rounds):
+                function(round)
+            return (time.perf_counter() - start) / rounds * 1e6
+
+        results = {
+            "list": {
+                "get":
+                measure(lambda round: linear_get(ids[round * 50 % 1_000]),
+                        rounds=20)
+            }
+        }
+        for name, store in stores.items():
+            results[name] = {
+                "get":
+                measure(lambda round: store.get([ids[round % 1_000]])),
+                "batch of 1000":
+                measure(lambda round: store.set_states(
+                    {id: round % 2 == 0
+                     for id in ids}),
+                        rounds=10),
+            }
+
+        logging.getLogger(__name__).info(
+            f"{count} devices, microseconds per call: {results}")
+        assert results["memory"]["get"] < results["list"]["get"]
+        assert results["sqlite"]["get"] < results["list"]["get"]
@@ -1,7 +1,15 @@
 import pytest
+from promptflow_tool_semantic_kernel.tools.light_store import LightStore
 from promptflow_tool_semantic_kernel.tools.lights_plugin import LightsPlugin
 
 
+@pytest.fixture(autouse=True)
+def clear_stores():
+    LightStore.clear_registry()
+    yield
+    LightStore.clear_registry()
+
+
 @pytest.fixture
 def lights_plugin():
     return LightsPlugin()
@@ -62,3 +70,64 @@ def test_change_state_invalid_id(lights_plugin):
 
 def test_get_state_no_id_no_all(lights_plugin):
     assert lights_plugin.get_state(id=None, all=False) == []
+
+
+def test_get_state_by_ids(lights_plugin):
+    assert [light["id"] for light in lights_plugin.get_state(
+        id=None, all=False, ids=[3, 99, 1])] == [3, 1]
+
+
+def test_change_states(lights_plugin):
+    changed = lights_plugin.change_states(ids=[1, 2, 99], is_on=True)
+
+    assert [light["id"] for light in changed] == [1, 2]
+    assert all(light["is_on"] for light in lights_plugin.get_state(
+        id=None, all=True))
+
+
+def test_rebuilt_instance_keeps_state():
+    first = LightsPlugin()
+    first.change_state(1, True)
+
+    assert LightsPlugin().get_state(id=1, all=False)[0]["is_on"] is True
+
+
+def test_instances_with_other_parameters_do_not_share_state():
+    LightsPlugin().change_state(1, True)
+
+    other = LightsPlugin(lights=[{"id": 1, "name": "Desk", "is_on": False}])
+
+    assert other.get_state(id=1, all=False)[0]["is_on"] is False
+
+
+def test_returned_lights_are_copies(lights_plugin):
+    lights_plugin.get_state(id=1, all=False)[0]["is_on"] = True
+
+    assert lights_plugin.get_state(id=1, all=False)[0]["is_on"] is False
+
+
+def test_lights_parameter():
+    plugin = LightsPlugin(lights=[{"id": 7, "name": "Desk", "is_on": True}])
+
+    assert plugin.get_state(id=None, all=True) == [{
+        "id": 7,
+        "name": "Desk",
+        "is_on": True
+    }]
+
+
+def test_store_parameter():
+    plugin = LightsPlugin(
+        store="promptflow_tool_semantic_kernel.tools.light_store."
+        "InMemoryLightStore",
+        store_options={"lights": [{
+            "id": 5,
+            "name": "Garage",
+            "is_on": False
+        }]})
+
+    assert plugin.change_state(5, True) == {
+        "id": 5,
+        "name": "Garage",
+        "is_on": True
+    }
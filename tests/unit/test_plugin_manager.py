@@ -7,6 +7,12 @@ from promptflow_tool_semantic_kernel.tools.plugin_manager import PluginManager
 
 class TestPluginManager:
 
+    @pytest.fixture(autouse=True)
+    def clear_registry(self):
+        PluginManager.registry.clear()
+        yield
+        PluginManager.registry.clear()
+
     @pytest.fixture
     def mock_kernel(self):
         return MagicMock(spec=Kernel)
@@ -169,3 +175,107 @@ class TestPluginManager:
 
             # Assert
             mock_logger.error.assert_called_once()
+
+    def test_shareable_plugin_is_built_once(self, mock_logger):
+        definition = {
+            "name": "lights",
+            "class": "LightsPlugin",
+            "module": "promptflow_tool_semantic_kernel.tools.lights_plugin"
+        }
+        first_kernel = Kernel()
+        second_kernel = Kernel()
+
+        PluginManager(first_kernel, mock_logger).register_plugins([definition])
+        PluginManager(second_kernel,
+                      mock_logger).register_plugins([definition])
+
+        assert first_kernel.get_plugin("lights") is second_kernel.get_plugin(
+            "lights")
+        assert "get_lights" in second_kernel.get_plugin("lights").functions
+        assert PluginManager.registry.stats()["hits"] == 1
+        mock_logger.error.assert_not_called()
+
+    def test_synchronous_functions_are_offloaded(self, mock_logger):
+        definition = {
+            "name": "lights",
+            "class": "LightsPlugin",
+            "module": "promptflow_tool_semantic_kernel.tools.lights_plugin"
+        }
+        kernel = Kernel()
+
+        PluginManager(kernel, mock_logger).register_plugins(
+            [dict(definition, name="offloaded"),
+             dict(definition, offload=False)])
+
+        assert kernel.get_function("offloaded",
+                                   "get_lights").metadata.is_asynchronous
+        assert not kernel.get_function("lights",
+                                       "get_lights").metadata.is_asynchronous
+        mock_logger.error.assert_not_called()
+
+    def test_shared_plugin_is_cached_per_offload_settings(self, mock_logger):
+        definition = {
+            "name": "lights",
+            "class": "LightsPlugin",
+            "module": "promptflow_tool_semantic_kernel.tools.lights_plugin",
+            "offload": False
+        }
+        first_kernel = Kernel()
+        second_kernel = Kernel()
+        third_kernel = Kernel()
+
+        PluginManager(first_kernel, mock_logger).register_plugins([definition])
+        PluginManager(second_kernel,
+                      mock_logger).register_plugins([dict(definition,
+                                                          offload=True)])
+        PluginManager(third_kernel, mock_logger).register_plugins([definition])
+
+        assert not first_kernel.get_function(
+            "lights", "get_lights").metadata.is_asynchronous
+        assert second_kernel.get_function(
+            "lights", "get_lights").metadata.is_asynchronous
+        assert third_kernel.get_plugin("lights") is first_kernel.get_plugin(
+            "lights")
+        mock_logger.error.assert_not_called()
+
+    def test_returns_key_of_generation_before_registering(self, mock_kernel,
+                                                          mock_logger):
+        definition = {
+            "name": "lights",
+            "class": "LightsPlugin",
+            "module": "promptflow_tool_semantic_kernel.tools.lights_plugin"
+        }
+        key = PluginManager.plugins_key([definition])
+
+        def reload_meanwhile(*args, **kwargs):
+            PluginManager.registry.generation += 1
+            return MagicMock()
+
+        with patch.object(PluginManager.registry,
+                          "get_kernel_plugin",
+                          side_effect=reload_meanwhile):
+            registered = PluginManager(mock_kernel,
+                                       mock_logger).register_plugins(
+                                           [definition])
+
+        assert registered == key
+        assert PluginManager.plugins_key([definition]) != key
+
+
+    def test_similarity_vocabulary_comes_from_plugin_classes(self):
+        synonyms, opposites = PluginManager.similarity_vocabulary([
+            {
+                "name": "lights",
+                "class": "LightsPlugin",
+                "module": "promptflow_tool_semantic_kernel.tools.lights_plugin"
+            },
+            {
+                "name": "missing",
+                "class": "Missing",
+                "module": "not_a_module"
+            },
+            None,
+        ])
+
+        assert synonyms["lamp"] == "light"
+        assert ("on", "off") in opposites
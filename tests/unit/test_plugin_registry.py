@@ -0,0 +1,124 @@
+import pytest
+from unittest.mock import MagicMock, patch
+
+from semantic_kernel.functions import kernel_function
+from semantic_kernel.functions.kernel_plugin import KernelPlugin
+
+from promptflow_tool_semantic_kernel.tools.plugin_registry import PluginRegistry
+
+
+class SharedPlugin:
+    shareable = True
+
+    def __init__(self, prefix: str = ""):
+        self.prefix = prefix
+
+    @kernel_function(name="echo", description="Echoes the text")
+    def echo(self, text: str) -> str:
+        return self.prefix + text
+
+
+class StatefulPlugin:
+
+    @kernel_function(name="echo", description="Echoes the text")
+    def echo(self, text: str) -> str:
+        return text
+
+
+@pytest.fixture
+def registry():
+    return PluginRegistry(max_size=2)
+
+
+@pytest.fixture
+def module():
+    fake_module = MagicMock()
+    fake_module.SharedPlugin = SharedPlugin
+    fake_module.StatefulPlugin = StatefulPlugin
+    with patch(
+            'promptflow_tool_semantic_kernel.tools.plugin_registry.importlib.import_module',
+            return_value=fake_module) as import_module:
+        yield import_module
+
+
+class TestPluginRegistry:
+
+    def test_resolve_class_imports_once(self, registry, module):
+        assert registry.resolve_class("plugins", "SharedPlugin") is SharedPlugin
+        assert registry.resolve_class("plugins", "SharedPlugin") is SharedPlugin
+
+        module.assert_called_once_with("plugins")
+
+    def test_is_shareable(self):
+        assert PluginRegistry.is_shareable(SharedPlugin)
+        assert not PluginRegistry.is_shareable(StatefulPlugin)
+        assert not PluginRegistry.is_shareable(MagicMock())
+
+    def test_shareable_plugin_is_cached(self, registry, module):
+        first = registry.get_kernel_plugin("shared", "plugins", "SharedPlugin",
+                                           {"prefix": ">"})
+        second = registry.get_kernel_plugin("shared", "plugins",
+                                            "SharedPlugin", {"prefix": ">"})
+
+        assert isinstance(first, KernelPlugin)
+        assert first is second
+        assert registry.stats()["hits"] == 1
+
+    def test_parameters_and_name_are_part_of_the_key(self, registry, module):
+        plugin = registry.get_kernel_plugin("shared", "plugins",
+                                            "SharedPlugin", {"prefix": ">"})
+        other_parameters = registry.get_kernel_plugin("shared", "plugins",
+                                                      "SharedPlugin",
+                                                      {"prefix": "<"})
+        other_name = registry.get_kernel_plugin("other", "plugins",
+                                                "SharedPlugin", {"prefix": ">"})
+
+        assert other_parameters is not plugin
+        assert other_name is not plugin
+        assert other_name.name == "other"
+        # Both names share the instance built for the same parameters
+        assert registry.stats()["instances"] == 2
+
+    def test_stateful_plugin_is_built_per_call(self, registry, module):
+        first = registry.get_kernel_plugin("stateful", "plugins",
+                                           "StatefulPlugin", None)
+        second = registry.get_kernel_plugin("stateful", "plugins",
+                                            "StatefulPlugin", None)
+
+        assert isinstance(first, StatefulPlugin)
+        assert first is not second
+        assert registry.stats()["kernel_plugins"] == 0
+
+    def test_evicts_least_recently_used(self, registry, module):
+        for prefix in ("a", "b", "c"):
+            registry.get_kernel_plugin("shared", "plugins", "SharedPlugin",
+                                       {"prefix": prefix})
+
+        assert registry.stats()["kernel_plugins"] == 2
+        assert registry.stats()["instances"] == 2
+
+    def test_lazy_plugin_is_not_constructed(self, registry, module):
+        with patch.object(StatefulPlugin, "__init__",
+                          return_value=None) as constructor:
+            plugin = registry.get_kernel_plugin("stateful",
+                                                "plugins",
+                                                "StatefulPlugin",
+                                                None,
+                                                lazy=True)
+
+        assert isinstance(plugin, KernelPlugin)
+        assert "echo" in plugin.functions
+        constructor.assert_not_called()
+
+    def test_lazy_shareable_plugin_is_cached(self, registry, module):
+        first = registry.get_kernel_plugin("shared",
+                                           "plugins",
+                                           "SharedPlugin", {"prefix": ">"},
+                                           lazy=True)
+        second = registry.get_kernel_plugin("shared",
+                                            "plugins",
+                                            "SharedPlugin", {"prefix": ">"},
+                                            lazy=True)
+
+        assert first is second
+        assert registry.stats()["instances"] == 0
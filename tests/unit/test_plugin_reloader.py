@@ -0,0 +1,114 @@
+import os
+import sys
+import time
+
+import pytest
+
+from semantic_kernel.functions.kernel_plugin import KernelPlugin
+
+from promptflow_tool_semantic_kernel.tools.plugin_registry import PluginRegistry
+from promptflow_tool_semantic_kernel.tools.plugin_reloader import PluginReloader
+
+SOURCE = '''
+from semantic_kernel.functions import kernel_function
+
+
+class GreeterPlugin:
+    shareable = True
+
+    @kernel_function(name="greet", description="Greets")
+    def greet(self) -> str:
+        return "{greeting}"
+'''
+
+
+@pytest.fixture
+def plugin_module(tmp_path, monkeypatch):
+    path = tmp_path / "reloadable_greeter.py"
+    path.write_text(SOURCE.format(greeting="hello"))
+    monkeypatch.syspath_prepend(str(tmp_path))
+    yield path
+    sys.modules.pop("reloadable_greeter", None)
+
+
+def edit(path, source):
+    path.write_text(source)
+    # Make sure the modification time differs on coarse file systems
+    stat = path.stat()
+    os.utime(path, ns=(stat.st_atime_ns, stat.st_mtime_ns + 1_000_000_000))
+
+
+def greet(kernel_plugin):
+    return kernel_plugin["greet"].method()
+
+
+class TestPluginReloader:
+
+    def test_swaps_changed_module(self, plugin_module):
+        registry = PluginRegistry()
+        reloader = PluginReloader(registry)
+        old = registry.get_kernel_plugin("greeter", "reloadable_greeter",
+                                         "GreeterPlugin", None)
+        assert reloader.check() == []
+
+        edit(plugin_module, SOURCE.format(greeting="hi there"))
+
+        assert reloader.check() == ["reloadable_greeter"]
+        new = registry.get_kernel_plugin("greeter", "reloadable_greeter",
+                                         "GreeterPlugin", None)
+        assert isinstance(new, KernelPlugin)
+        assert greet(new) == "hi there"
+        # Requests holding the old version keep it
+        assert greet(old) == "hello"
+        assert registry.stats()["generation"] == 1
+        assert reloader.reloads == 1
+        assert reloader.check() == []
+
+    def test_keeps_running_version_on_error(self, plugin_module):
+        registry = PluginRegistry()
+        reloader = PluginReloader(registry)
+        registry.resolve_class("reloadable_greeter", "GreeterPlugin")
+        reloader.check()
+        module = sys.modules["reloadable_greeter"]
+
+        edit(plugin_module, "def broken(:\n")
+
+        assert reloader.check() == []
+        assert reloader.failures == 1
+        assert sys.modules["reloadable_greeter"] is module
+        assert registry.resolve_class("reloadable_greeter",
+                                      "GreeterPlugin") is module.GreeterPlugin
+        assert registry.stats()["generation"] == 0
+
+    def test_polls_in_background(self, plugin_module):
+        registry = PluginRegistry()
+        registry.resolve_class("reloadable_greeter", "GreeterPlugin")
+        reloader = PluginReloader(registry, interval=0.01)
+        reloader.start()
+        try:
+            time.sleep(0.05)
+            edit(plugin_module, SOURCE.format(greeting="polled"))
+            deadline = time.monotonic() + 5
+            while reloader.reloads == 0 and time.monotonic() < deadline:
+                time.sleep(0.01)
+        finally:
+            reloader.stop()
+
+        plugin_class = registry.resolve_class("reloadable_greeter",
+                                              "GreeterPlugin")
+        assert plugin_class().greet() == "polled"
+
+    def test_started_once_when_enabled(self, monkeypatch):
+        monkeypatch.setenv("PLUGIN_HOT_RELOAD", "true")
+        monkeypatch.setenv("PLUGIN_HOT_RELOAD_INTERVAL", "60")
+        registry = PluginRegistry()
+        try:
+            assert PluginReloader.enabled()
+            first = PluginReloader.ensure_started(registry)
+            assert PluginReloader.ensure_started(registry) is first
+            assert first.interval == 60.0
+        finally:
+            PluginReloader.stop_running()
+
+        monkeypatch.delenv("PLUGIN_HOT_RELOAD")
+        assert not PluginReloader.enabled()
@@ -0,0 +1,45 @@
+from semantic_kernel.contents.utils.author_role import AuthorRole
+
+from promptflow_tool_semantic_kernel.tools.prompt_parser import PromptParser
+
+
+class TestPromptParser:
+
+    def test_prompt_without_markers(self):
+        assert PromptParser.parse("  Hello\n") == ((AuthorRole.USER,
+                                                   "  Hello\n"), )
+
+    def test_splits_sections(self):
+        prompt = ("# system:\nBe brief.\n\n# user:\nHi\n"
+                  "# Assistant :\nHello\n#user:\nBye\n")
+
+        assert PromptParser.parse(prompt) == (
+            (AuthorRole.SYSTEM, "Be brief."),
+            (AuthorRole.USER, "Hi"),
+            (AuthorRole.ASSISTANT, "Hello"),
+            (AuthorRole.USER, "Bye"),
+        )
+
+    def test_text_before_first_marker_is_user_message(self):
+        assert PromptParser.parse("Context\n# system:\nBe brief.") == (
+            (AuthorRole.USER, "Context"),
+            (AuthorRole.SYSTEM, "Be brief."),
+        )
+
+    def test_drops_empty_sections(self):
+        assert PromptParser.parse("# system:\n\n# user:\nHi") == (
+            (AuthorRole.USER, "Hi"), )
+
+    def test_markdown_headings_are_content(self):
+        prompt = "# system:\n# Rules\nBe brief."
+
+        assert PromptParser.parse(prompt) == ((AuthorRole.SYSTEM,
+                                               "# Rules\nBe brief."), )
+
+    def test_windows_line_endings(self):
+        prompt = "# system:\r\nBe brief.\r\n# user:\r\nHi\r\n"
+
+        assert PromptParser.parse(prompt) == (
+            (AuthorRole.SYSTEM, "Be brief."),
+            (AuthorRole.USER, "Hi"),
+        )
@@ -0,0 +1,123 @@
+import httpx
+import openai
+import pytest
+from unittest.mock import AsyncMock, MagicMock
+
+from semantic_kernel.connectors.ai.completion_usage import CompletionUsage
+from semantic_kernel.connectors.ai.open_ai.prompt_execution_settings.open_ai_prompt_execution_settings import (
+    OpenAIChatPromptExecutionSettings, )
+from semantic_kernel.contents.chat_history import ChatHistory
+from semantic_kernel.contents.chat_message_content import ChatMessageContent
+
+from promptflow_tool_semantic_kernel.tools.rate_limited_chat_completion import RateLimitedChatCompletion
+from promptflow_tool_semantic_kernel.tools.rate_limiter import last_rate_limit_headers
+
+
+@pytest.fixture
+def inner():
+    service = MagicMock()
+    service.ai_model_id = "gpt-4"
+    service.service_id = "gpt-4"
+    return service
+
+
+@pytest.fixture
+def rate_limiter():
+    limiter = MagicMock()
+    limiter.acquire = AsyncMock()
+    return limiter
+
+
+@pytest.fixture
+def chat_history():
+    history = ChatHistory()
+    history.add_user_message("x" * 400)
+    return history
+
+
+def make_response(prompt_tokens, completion_tokens):
+    return ChatMessageContent(role="assistant",
+                              content="Hi",
+                              metadata={
+                                  "usage":
+                                  CompletionUsage(
+                                      prompt_tokens=prompt_tokens,
+                                      completion_tokens=completion_tokens)
+                              })
+
+
+class TestRateLimitedChatCompletion:
+
+    def test_estimate_tokens(self, chat_history):
+        settings = OpenAIChatPromptExecutionSettings(max_tokens=50)
+
+        assert RateLimitedChatCompletion.estimate_tokens(
+            chat_history, settings) == 100 + 4 + 50
+
+    def test_estimate_tokens_default_completion(self, chat_history):
+        settings = OpenAIChatPromptExecutionSettings()
+
+        assert RateLimitedChatCompletion.estimate_tokens(
+            chat_history, settings) == 104 + 256
+
+    @pytest.mark.asyncio
+    async def test_complete_request_reserves_and_reconciles(
+            self, inner, rate_limiter, chat_history):
+        settings = OpenAIChatPromptExecutionSettings(max_tokens=50)
+
+        async def send(chat_history, settings):
+            last_rate_limit_headers.set(
+                {"x-ratelimit-remaining-requests": "5"})
+            return [make_response(100, 20)]
+
+        inner._inner_get_chat_message_contents = send
+        service = RateLimitedChatCompletion(inner, rate_limiter)
+
+        await service._inner_get_chat_message_contents(chat_history, settings)
+
+        rate_limiter.acquire.assert_awaited_once_with(154)
+        rate_limiter.update_from_headers.assert_called_once_with(
+            {"x-ratelimit-remaining-requests": "5"})
+        rate_limiter.record_usage.assert_called_once_with(154, 120)
+
+    @pytest.mark.asyncio
+    async def test_429_blocks_limiter_for_retry_after(self, inner,
+                                                      rate_limiter,
+                                                      chat_history):
+        request = httpx.Request("POST", "https://test.openai.azure.com")
+        response = httpx.Response(429,
+                                  headers={"retry-after": "12"},
+                                  request=request)
+        inner._inner_get_chat_message_contents = AsyncMock(
+            side_effect=openai.RateLimitError(
+                "limited", response=response, body=None))
+        service = RateLimitedChatCompletion(inner, rate_limiter)
+
+        with pytest.raises(openai.RateLimitError):
+            await service._inner_get_chat_message_contents(
+                chat_history, OpenAIChatPromptExecutionSettings())
+
+        rate_limiter.block_for.assert_called_once_with(12.0)
+
+    @pytest.mark.asyncio
+    async def test_streaming_request_reconciles_usage(self, inner,
+                                                      rate_limiter,
+                                                      chat_history):
+        settings = OpenAIChatPromptExecutionSettings(max_tokens=50)
+
+        async def streaming(chat_history, settings, function_invoke_attempt):
+            yield [ChatMessageContent(role="assistant", content="Hi")]
+            yield [make_response(100, 10)]
+
+        inner._inner_get_streaming_chat_message_contents = streaming
+        service = RateLimitedChatCompletion(inner, rate_limiter)
+
+        chunks = [
+            messages async for messages in
+            service._inner_get_streaming_chat_message_contents(
+                chat_history, settings)
+        ]
+
+        assert len(chunks) == 2
+        rate_limiter.acquire.assert_awaited_once_with(154)
+        rate_limiter.record_usage.assert_called_once_with(154, 110)
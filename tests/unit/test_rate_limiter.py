@@ -0,0 +1,188 @@
+import asyncio
+import threading
+import httpx
+import pytest
+from unittest.mock import patch
+
+from promptflow_tool_semantic_kernel.tools.rate_limiter import RateLimiter, capture_rate_limit_headers, last_rate_limit_headers
+
+
+class FakeClock:
+
+    def __init__(self):
+        self.now = 1000.0
+
+    def __call__(self):
+        return self.now
+
+
+@pytest.fixture
+def clock():
+    fake_clock = FakeClock()
+    with patch(
+            'promptflow_tool_semantic_kernel.tools.rate_limiter.time.monotonic',
+            fake_clock):
+        yield fake_clock
+
+
+class TestRateLimiter:
+
+    def test_reserve_takes_request_and_tokens(self, clock):
+        limiter = RateLimiter(requests_per_minute=60, tokens_per_minute=600)
+
+        assert limiter._reserve(100) == 0.0
+        assert limiter.available() == {"requests": 59, "tokens": 500}
+
+    def test_reserve_returns_wait_when_requests_exhausted(self, clock):
+        limiter = RateLimiter(requests_per_minute=2)
+
+        assert limiter._reserve(0) == 0.0
+        assert limiter._reserve(0) == 0.0
+        # One request refills every 30 seconds
+        assert limiter._reserve(0) == pytest.approx(30.0)
+
+        clock.now += 30.0
+        assert limiter._reserve(0) == 0.0
+
+    def test_reserve_returns_wait_when_tokens_exhausted(self, clock):
+        limiter = RateLimiter(tokens_per_minute=600)
+
+        assert limiter._reserve(500) == 0.0
+        assert limiter._reserve(200) == pytest.approx(10.0)
+
+    def test_oversized_request_waits_for_full_bucket(self, clock):
+        limiter = RateLimiter(tokens_per_minute=600)
+        limiter._reserve(600)
+
+        assert limiter._reserve(10000) == pytest.approx(60.0)
+        clock.now += 60.0
+        assert limiter._reserve(10000) == 0.0
+
+    def test_update_from_headers(self, clock):
+        limiter = RateLimiter(requests_per_minute=60)
+
+        limiter.update_from_headers({
+            "x-ratelimit-remaining-requests": "3",
+            "x-ratelimit-limit-tokens": "1000",
+            "x-ratelimit-remaining-tokens": "250",
+        })
+
+        assert limiter.tokens_per_minute == 1000
+        assert limiter.available() == {"requests": 3, "tokens": 250}
+
+    def test_update_from_headers_ignores_invalid_values(self, clock):
+        limiter = RateLimiter(requests_per_minute=60)
+
+        limiter.update_from_headers({"x-ratelimit-remaining-requests": "n/a"})
+        limiter.update_from_headers(None)
+
+        assert limiter.available()["requests"] == 60
+
+    def test_record_usage_refunds_overestimate(self, clock):
+        limiter = RateLimiter(tokens_per_minute=1000)
+        limiter._reserve(500)
+
+        limiter.record_usage(estimated_tokens=500, actual_tokens=100)
+
+        assert limiter.available()["tokens"] == 900
+
+    def test_block_for(self, clock):
+        limiter = RateLimiter(requests_per_minute=60)
+
+        limiter.block_for(5.0)
+
+        assert limiter._reserve(0) == pytest.approx(5.0)
+
+    @pytest.mark.asyncio
+    async def test_acquire_serves_callers_in_order(self):
+        limiter = RateLimiter(requests_per_minute=6000)
+        limiter._requests = 0
+        order = []
+
+        async def caller(name):
+            await limiter.acquire()
+            order.append(name)
+
+        await asyncio.gather(*(caller(i) for i in range(5)))
+
+        assert order == [0, 1, 2, 3, 4]
+        assert limiter.queue_depth == 0
+
+    @pytest.mark.asyncio
+    async def test_cancelled_caller_leaves_queue(self):
+        limiter = RateLimiter(requests_per_minute=1)
+        await limiter.acquire()
+
+        waiter = asyncio.create_task(limiter.acquire())
+        await asyncio.sleep(0.05)
+        assert limiter.queue_depth == 1
+
+        waiter.cancel()
+        with pytest.raises(asyncio.CancelledError):
+            await waiter
+        assert limiter.queue_depth == 0
+
+    def test_for_deployment_shares_limiter(self):
+        RateLimiter.clear_registry()
+
+        first = RateLimiter.for_deployment(("https://a", "gpt"), 60)
+        second = RateLimiter.for_deployment(("https://a", "gpt"), 60)
+        other = RateLimiter.for_deployment(("https://b", "gpt"), 60)
+
+        assert first is second
+        assert first is not other
+        RateLimiter.clear_registry()
+
+    def test_for_deployment_adopts_changed_limits(self, clock):
+        RateLimiter.clear_registry()
+        first = RateLimiter.for_deployment("gpt", 60, 1000)
+        first._reserve(400)
+
+        second = RateLimiter.for_deployment("gpt", 120, 2000)
+
+        assert second is first
+        assert first.requests_per_minute == 120
+        assert first.available() == {"requests": 119, "tokens": 1600}
+        RateLimiter.clear_registry()
+
+    @pytest.mark.asyncio
+    async def test_refund_wakes_waiting_caller(self):
+        limiter = RateLimiter(tokens_per_minute=60)
+        await limiter.acquire(60)
+
+        waiter = asyncio.create_task(limiter.acquire(30))
+        await asyncio.sleep(0.01)
+        limiter.record_usage(estimated_tokens=60, actual_tokens=20)
+
+        await asyncio.wait_for(waiter, 1)
+        assert limiter.queue_depth == 0
+
+    def test_wakes_callers_of_other_loops(self):
+        limiter = RateLimiter(requests_per_minute=6000)
+        limiter._requests = 0
+        threads = [
+            threading.Thread(target=asyncio.run, args=(limiter.acquire(), ))
+            for _ in range(3)
+        ]
+
+        for thread in threads:
+            thread.start()
+        for thread in threads:
+            thread.join(1)
+
+        assert not any(thread.is_alive() for thread in threads)
+        assert limiter.queue_depth == 0
+
+    @pytest.mark.asyncio
+    async def test_capture_rate_limit_headers(self):
+        response = httpx.Response(200,
+                                  headers={
+                                      "X-RateLimit-Remaining-Requests": "9",
+                                      "Content-Type": "application/json"
+                                  })
+
+        await capture_rate_limit_headers(response)
+
+        assert last_rate_limit_headers.get() == {
+            "x-ratelimit-remaining-requests": "9"
+        }
@@ -0,0 +1,315 @@
+import threading
+
+import pytest
+
+from semantic_kernel.connectors.ai.function_choice_behavior import FunctionChoiceBehavior
+from semantic_kernel.connectors.ai.open_ai.prompt_execution_settings.open_ai_prompt_execution_settings import (
+    OpenAIChatPromptExecutionSettings, )
+from semantic_kernel.contents.chat_history import ChatHistory
+from semantic_kernel.contents.chat_message_content import ChatMessageContent
+from semantic_kernel.contents.function_call_content import FunctionCallContent
+from semantic_kernel.contents.function_result_content import FunctionResultContent
+from semantic_kernel.contents.utils.author_role import AuthorRole
+
+from promptflow_tool_semantic_kernel.tools.response_cache import CachedResponse, ReplayingCache, ResponseCache
+
+
+class Clock:
+
+    def __init__(self):
+        self.now = 1000.0
+
+    def __call__(self):
+        return self.now
+
+
+def make_history(prompt="Hello"):
+    history = ChatHistory()
+    history.add_system_message("Be brief.")
+    history.add_user_message(prompt)
+    return history
+
+
+def add_tool_turn(history):
+    history.add_message(
+        ChatMessageContent(role=AuthorRole.ASSISTANT,
+                           items=[
+                               FunctionCallContent(id="1",
+                                                   name="lights-get_lights",
+                                                   arguments="{}")
+                           ]))
+    history.add_message(
+        ChatMessageContent(role=AuthorRole.TOOL,
+                           items=[
+                               FunctionResultContent(id="1",
+                                                     name="lights-get_lights",
+                                                     result="[]")
+                           ]))
+
+
+class Model:
+    """Counts requests and streams a fixed answer"""
+
+    def __init__(self, chunks=("Hi", " there"), tools=False):
+        self.chunks = chunks
+        self.tools = tools
+        self.requests = 0
+
+    async def stream(self, history):
+        self.requests += 1
+        if self.tools:
+            add_tool_turn(history)
+        for chunk in self.chunks:
+            yield chunk
+
+    async def complete(self, history):
+        self.requests += 1
+        if self.tools:
+            add_tool_turn(history)
+        return "".join(self.chunks)
+
+
+async def collect(generator):
+    return [chunk async for chunk in generator]
+
+
+class TestRequestKey:
+
+    def test_same_request_same_key(self):
+        settings = OpenAIChatPromptExecutionSettings(temperature=0)
+
+        assert ResponseCache.request_key(
+            "gpt-4o", make_history(), settings,
+            "plugins") == ResponseCache.request_key(
+                "gpt-4o", make_history(),
+                OpenAIChatPromptExecutionSettings(temperature=0), "plugins")
+
+    def test_key_depends_on_request(self):
+        settings = OpenAIChatPromptExecutionSettings(temperature=0)
+        key = ResponseCache.request_key("gpt-4o", make_history(), settings,
+                                        "plugins")
+        with_functions = OpenAIChatPromptExecutionSettings(temperature=0)
+        with_functions.function_choice_behavior = FunctionChoiceBehavior.Auto(
+            filters={"included_functions": ["lights-get_lights"]})
+
+        assert key != ResponseCache.request_key("gpt-4o-mini", make_history(),
+                                                settings, "plugins")
+        assert key != ResponseCache.request_key("gpt-4o", make_history("Hi"),
+                                                settings, "plugins")
+        assert key != ResponseCache.request_key(
+            "gpt-4o", make_history(),
+            OpenAIChatPromptExecutionSettings(temperature=1), "plugins")
+        assert key != ResponseCache.request_key("gpt-4o", make_history(),
+                                                with_functions, "plugins")
+        assert key != ResponseCache.request_key("gpt-4o", make_history(),
+                                                settings, "other")
+
+
+class TestResponseCache:
+
+    @pytest.mark.asyncio
+    async def test_replays_stream(self):
+        cache = ResponseCache()
+        model = Model()
+
+        first = await collect(
+            cache.stream("key", model.stream(make_history()), make_history()))
+        second = await collect(
+            cache.stream("key", model.stream(make_history()), make_history()))
+
+        assert first == second == ["Hi", " there"]
+        assert model.requests == 1
+        assert cache.stats() == {
+            "entries": 1,
+            "hits": 1,
+            "misses": 1,
+            "bypassed": 0
+        }
+
+    @pytest.mark.asyncio
+    async def test_modes_share_responses(self):
+        cache = ResponseCache()
+        model = Model()
+
+        await collect(
+            cache.stream("key", model.stream(make_history()), make_history()))
+        content = model.complete(make_history())
+        result = await cache.complete("key", content, make_history())
+
+        assert result == "Hi there"
+        assert model.requests == 1
+
+    @pytest.mark.asyncio
+    async def test_does_not_store_errors(self):
+        cache = ResponseCache()
+        model = Model(chunks=("Error retrieving response: timeout", ))
+
+        await cache.complete("key", model.complete(make_history()),
+                             make_history())
+
+        assert cache.get("key") is None
+
+    @pytest.mark.asyncio
+    async def test_bypasses_tool_turns(self):
+        cache = ResponseCache()
+        model = Model(tools=True)
+
+        history = make_history()
+        await cache.complete("key", model.complete(history), history)
+        history = make_history()
+        await cache.complete("key", model.complete(history), history)
+
+        assert model.requests == 2
+        assert cache.stats()["bypassed"] == 2
+
+    @pytest.mark.asyncio
+    async def test_replays_allowed_tool_turns(self):
+        cache = ResponseCache()
+        model = Model(tools=True)
+        history = make_history()
+        await collect(
+            cache.stream("key", model.stream(history), history, True))
+
+        replayed = make_history()
+        chunks = await collect(
+            cache.stream("key", model.stream(replayed), replayed, True))
+        skipped = make_history()
+        await collect(cache.stream("key", model.stream(skipped), skipped))
+
+        assert chunks == ["Hi", " there"]
+        assert replayed.messages[2].items[0].name == "lights-get_lights"
+        assert replayed.messages[3].items[0].result == "[]"
+        assert model.requests == 2
+
+    @pytest.mark.asyncio
+    async def test_stopped_stream_is_not_stored(self):
+        cache = ResponseCache()
+        stream = cache.stream("key", Model().stream(make_history()),
+                              make_history())
+
+        await stream.__anext__()
+        await stream.aclose()
+
+        assert cache.get("key") is None
+
+    def test_expires(self):
+        clock = Clock()
+        cache = ResponseCache(ttl=60, clock=clock)
+        cache.put("key", CachedResponse(["Hi"], "", clock()))
+
+        clock.now += 61
+
+        assert cache.get("key") is None
+
+    def test_evicts_least_recently_used(self):
+        cache = ResponseCache(max_entries=2)
+        for key in ("a", "b"):
+            cache.put(key, CachedResponse([key], "", cache._clock()))
+        cache.get("a")
+
+        cache.put("c", CachedResponse(["c"], "", cache._clock()))
+
+        assert cache.get("b") is None
+        assert cache.get("a").content == "a"
+
+
+class TestDiskTier:
+
+    @pytest.fixture
+    def path(self, tmp_path):
+        return str(tmp_path / "responses.db")
+
+    def test_shared_between_caches(self, path):
+        ResponseCache(path=path).put("key",
+                                     CachedResponse(["Hi", None], "", 1e12))
+
+        response = ResponseCache(path=path).get("key")
+
+        assert response.chunks == ["Hi", None]
+        assert response.content == "Hi"
+
+    def test_expires(self, path):
+        clock = Clock()
+        ResponseCache(path=path, ttl=60,
+                      clock=clock).put("key", CachedResponse(["Hi"], "",
+                                                             clock()))
+
+        clock.now += 61
+
+        assert ResponseCache(path=path, ttl=60, clock=clock).get("key") is None
+
+    def test_limits_size(self, path):
+        clock = Clock()
+        cache = ResponseCache(path=path,
+                              max_disk_entries=2,
+                              prune_interval=0,
+                              clock=clock)
+        for key in ("a", "b", "c"):
+            clock.now += 1
+            cache.put(key, CachedResponse([key], "", clock()))
+
+        reopened = ResponseCache(path=path, clock=clock)
+
+        assert reopened.get("a") is None
+        assert reopened.get("c").content == "c"
+
+    def test_prunes_periodically(self, path):
+        clock = Clock()
+        cache = ResponseCache(path=path,
+                              max_disk_entries=1,
+                              prune_interval=60,
+                              clock=clock)
+        for key in ("a", "b"):
+            clock.now += 1
+            cache.put(key, CachedResponse([key], "", clock()))
+
+        assert ResponseCache(path=path, clock=clock).get("a") is not None
+
+        clock.now += 60
+        cache.put("c", CachedResponse(["c"], "", clock()))
+
+        reopened = ResponseCache(path=path, clock=clock)
+        assert reopened.get("b") is None
+        assert reopened.get("c").content == "c"
+
+    @pytest.mark.asyncio
+    async def test_disk_access_runs_off_the_loop(self, path, monkeypatch):
+        cache = ResponseCache(path=path)
+        threads = []
+        connection = cache._connection
+
+        def record_thread():
+            threads.append(threading.current_thread())
+            return connection()
+
+        monkeypatch.setattr(cache, "_connection", record_thread)
+        model = Model()
+
+        await cache.complete("key", model.complete(make_history()),
+                             make_history())
+        cache._entries.clear()
+        result = await cache.complete("key", model.complete(make_history()),
+                                      make_history())
+
+        assert result == "Hi there"
+        assert model.requests == 1
+        # The first lookup, the write and the second lookup
+        assert len(threads) == 3
+        assert threading.current_thread() not in threads
+
+    def test_is_abstract(self):
+        with pytest.raises(TypeError):
+            ReplayingCache()
+
+    def test_shared_instance_from_environment(self, path, monkeypatch):
+        monkeypatch.setenv("RESPONSE_CACHE_PATH", path)
+        monkeypatch.setenv("RESPONSE_CACHE_TTL", "60")
+        ResponseCache.clear_shared()
+        try:
+            cache = ResponseCache.shared()
+
+            assert cache is ResponseCache.shared()
+            assert cache.path == path
+            assert cache.ttl == 60
+        finally:
+            ResponseCache.clear_shared()
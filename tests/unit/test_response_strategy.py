@@ -7,6 +7,8 @@ from semantic_kernel.connectors.ai.open_ai import AzureChatCompletion
 from semantic_kernel.contents.chat_history import ChatHistory
 from semantic_kernel.connectors.ai.open_ai.prompt_execution_settings.azure_chat_prompt_execution_settings import AzureChatPromptExecutionSettings
 from promptflow_tool_semantic_kernel.tools.response_strategy import ResponseStrategy
+from promptflow_tool_semantic_kernel.tools.retry_policy import RetryPolicy
+from promptflow_tool_semantic_kernel.tools.retrying_chat_completion import RetryingChatCompletion
 
 
 class TestResponseStrategy:
@@ -101,3 +103,35 @@ class TestResponseStrategy:
 
         # Verify error message is returned
         assert "Error retrieving response: Test error" in result
+
+    @pytest.mark.asyncio
+    async def test_get_complete_response_with_retry_policy(
+            self, kernel, chat_history, settings):
+        chat_completion = MagicMock()
+        chat_completion.ai_model_id = "gpt-4"
+        chat_completion.service_id = "gpt-4"
+        response = MagicMock()
+        response.content = "Complete response content"
+
+        with patch(
+                'promptflow_tool_semantic_kernel.tools.retrying_chat_completion.RetryingChatCompletion.get_chat_message_content',
+                new=AsyncMock(return_value=response)) as mock_get:
+            result = await ResponseStrategy.get_complete_response(
+                chat_completion, chat_history, settings, kernel,
+                RetryPolicy(max_attempts=2))
+
+        assert result == "Complete response content"
+        mock_get.assert_awaited_once_with(chat_history=chat_history,
+                                          settings=settings,
+                                          kernel=kernel)
+
+    def test_apply_retry_policy(self, chat_completion):
+        chat_completion.ai_model_id = "gpt-4"
+        chat_completion.service_id = "gpt-4"
+
+        assert ResponseStrategy._apply_retry_policy(chat_completion,
+                                                    None) is chat_completion
+        wrapped = ResponseStrategy._apply_retry_policy(chat_completion,
+                                                       RetryPolicy())
+        assert isinstance(wrapped, RetryingChatCompletion)
+        assert wrapped.inner is chat_completion
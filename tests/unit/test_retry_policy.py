@@ -0,0 +1,87 @@
+import pytest
+from unittest.mock import patch
+
+from promptflow_tool_semantic_kernel.tools.retry_policy import LatencyTracker, RetryPolicy
+
+
+class TestRetryPolicy:
+
+    def test_from_configs_is_opt_in(self):
+        assert RetryPolicy.from_configs({}) is None
+        assert RetryPolicy.from_configs({"api_type": "azure"}) is None
+
+    def test_from_configs_defaults(self):
+        policy = RetryPolicy.from_configs({"request_deadline": ""})
+
+        assert policy.max_attempts == 3
+        assert policy.deadline is None
+        assert policy.hedge is False
+
+    def test_from_configs_converts_strings(self):
+        policy = RetryPolicy.from_configs({
+            "retry_max_attempts": "5",
+            "retry_base_delay": "0.1",
+            "retry_max_delay": "2",
+            "request_deadline": "30",
+            "hedge_requests": "true",
+        })
+
+        assert policy.max_attempts == 5
+        assert policy.base_delay == 0.1
+        assert policy.max_delay == 2.0
+        assert policy.deadline == 30.0
+        assert policy.hedge is True
+
+    def test_from_non_dict_configs(self):
+        assert RetryPolicy.from_configs(None) is None
+
+    def test_backoff_uses_full_jitter_up_to_max_delay(self):
+        policy = RetryPolicy(base_delay=1.0, max_delay=4.0)
+
+        with patch(
+                'promptflow_tool_semantic_kernel.tools.retry_policy.random.uniform',
+                side_effect=lambda low, high: high) as mock_uniform:
+            assert policy.backoff(0) == 1.0
+            assert policy.backoff(1) == 2.0
+            assert policy.backoff(5) == 4.0
+            mock_uniform.assert_called_with(0, 4.0)
+
+    def test_backoff_honors_retry_after(self):
+        policy = RetryPolicy(base_delay=1.0, max_delay=4.0)
+
+        assert policy.backoff(0, retry_after=10.0) == 10.0
+
+
+class TestLatencyTracker:
+
+    def test_percentile_requires_samples(self):
+        tracker = LatencyTracker()
+        tracker.record(1.0)
+
+        assert tracker.percentile(0.95) is None
+
+    def test_percentile(self):
+        tracker = LatencyTracker()
+        for value in range(1, 101):
+            tracker.record(value / 100)
+
+        assert tracker.percentile(0.95) == 0.96
+        assert tracker.percentile(0.5) == 0.51
+
+    def test_keeps_only_recent_samples(self):
+        tracker = LatencyTracker(max_samples=20)
+        for _ in range(20):
+            tracker.record(10.0)
+        for _ in range(20):
+            tracker.record(1.0)
+
+        assert tracker.percentile(0.95) == 1.0
+
+    def test_for_service_shares_tracker(self):
+        LatencyTracker.clear_registry()
+
+        assert LatencyTracker.for_service("a") is LatencyTracker.for_service(
+            "a")
+        assert LatencyTracker.for_service("a") is not LatencyTracker.for_service(
+            "b")
+        LatencyTracker.clear_registry()
@@ -0,0 +1,322 @@
+import asyncio
+import httpx
+import openai
+import pytest
+from unittest.mock import AsyncMock, MagicMock, patch
+
+from semantic_kernel.connectors.ai.open_ai.prompt_execution_settings.open_ai_prompt_execution_settings import (
+    OpenAIChatPromptExecutionSettings, )
+from semantic_kernel.contents.chat_history import ChatHistory
+
+from promptflow_tool_semantic_kernel.tools.rate_limiter import last_rate_limit_headers
+from promptflow_tool_semantic_kernel.tools.retry_policy import LatencyTracker, RetryPolicy
+from promptflow_tool_semantic_kernel.tools.retrying_chat_completion import DeadlineExceededError, RetryingChatCompletion
+
+
+def make_status_error(status_code, headers=None):
+    request = httpx.Request("POST", "https://test.openai.azure.com")
+    response = httpx.Response(status_code,
+                              headers=headers or {},
+                              request=request)
+    return openai.APIStatusError("error", response=response, body=None)
+
+
+@pytest.fixture(autouse=True)
+def clear_latency_trackers():
+    LatencyTracker.clear_registry()
+    yield
+    LatencyTracker.clear_registry()
+
+
+@pytest.fixture
+def inner():
+    service = MagicMock()
+    service.ai_model_id = "gpt-4"
+    service.service_id = "gpt-4"
+    service.service_url.return_value = "https://test.openai.azure.com"
+    return service
+
+
+@pytest.fixture
+def settings():
+    return OpenAIChatPromptExecutionSettings()
+
+
+@pytest.fixture
+def no_sleep():
+    with patch(
+            'promptflow_tool_semantic_kernel.tools.retrying_chat_completion.asyncio.sleep',
+            new=AsyncMock()) as mock_sleep:
+        yield mock_sleep
+
+
+def fill_latencies(service, seconds):
+    for _ in range(LatencyTracker.MIN_SAMPLES):
+        service.latency_tracker.record(seconds)
+
+
+class TestRetryingChatCompletion:
+
+    @pytest.mark.asyncio
+    async def test_retries_retriable_errors(self, inner, settings, no_sleep):
+        response = MagicMock()
+        inner._inner_get_chat_message_contents = AsyncMock(side_effect=[
+            make_status_error(429, {"retry-after": "2"}),
+            make_status_error(503), [response]
+        ])
+        service = RetryingChatCompletion(inner, RetryPolicy(max_attempts=3))
+
+        result = await service._inner_get_chat_message_contents(
+            ChatHistory(), settings)
+
+        assert result == [response]
+        assert inner._inner_get_chat_message_contents.await_count == 3
+        assert no_sleep.await_count == 2
+        # The first wait honors Retry-After
+        assert no_sleep.await_args_list[0].args[0] >= 2.0
+
+    @pytest.mark.asyncio
+    async def test_does_not_retry_client_errors(self, inner, settings,
+                                                no_sleep):
+        inner._inner_get_chat_message_contents = AsyncMock(
+            side_effect=make_status_error(400))
+        service = RetryingChatCompletion(inner, RetryPolicy(max_attempts=3))
+
+        with pytest.raises(openai.APIStatusError):
+            await service._inner_get_chat_message_contents(
+                ChatHistory(), settings)
+
+        assert inner._inner_get_chat_message_contents.await_count == 1
+
+    @pytest.mark.asyncio
+    async def test_gives_up_after_max_attempts(self, inner, settings,
+                                               no_sleep):
+        inner._inner_get_chat_message_contents = AsyncMock(
+            side_effect=make_status_error(500))
+        service = RetryingChatCompletion(inner, RetryPolicy(max_attempts=2))
+
+        with pytest.raises(openai.APIStatusError):
+            await service._inner_get_chat_message_contents(
+                ChatHistory(), settings)
+
+        assert inner._inner_get_chat_message_contents.await_count == 2
+
+    @pytest.mark.asyncio
+    async def test_does_not_retry_past_deadline(self, inner, settings,
+                                                no_sleep):
+        inner._inner_get_chat_message_contents = AsyncMock(
+            side_effect=make_status_error(429, {"retry-after": "60"}))
+        service = RetryingChatCompletion(
+            inner, RetryPolicy(max_attempts=5, deadline=10))
+
+        with pytest.raises(openai.APIStatusError):
+            await service._inner_get_chat_message_contents(
+                ChatHistory(), settings)
+
+        assert inner._inner_get_chat_message_contents.await_count == 1
+        no_sleep.assert_not_awaited()
+
+    @pytest.mark.asyncio
+    async def test_deadline_cancels_slow_request(self, inner, settings):
+
+        async def slow(chat_history, settings):
+            await asyncio.sleep(10)
+
+        inner._inner_get_chat_message_contents = slow
+        service = RetryingChatCompletion(inner, RetryPolicy(deadline=0.05))
+
+        with pytest.raises(DeadlineExceededError):
+            await service._inner_get_chat_message_contents(
+                ChatHistory(), settings)
+
+    @pytest.mark.asyncio
+    async def test_hedged_request_takes_faster_answer(self, inner, settings):
+        calls = []
+
+        async def request(chat_history, settings):
+            calls.append(settings)
+            if len(calls) == 1:
+                await asyncio.sleep(10)
+                return ["slow"]
+            return ["fast"]
+
+        inner._inner_get_chat_message_contents = request
+        service = RetryingChatCompletion(inner, RetryPolicy(hedge=True))
+        fill_latencies(service, 0.01)
+
+        result = await service._inner_get_chat_message_contents(
+            ChatHistory(), settings)
+
+        assert result == ["fast"]
+        assert len(calls) == 2
+        # Each request gets its own copy of the settings
+        assert calls[0] is not calls[1]
+
+    @pytest.mark.asyncio
+    async def test_no_hedge_without_latency_history(self, inner, settings):
+        inner._inner_get_chat_message_contents = AsyncMock(
+            return_value=["answer"])
+        service = RetryingChatCompletion(inner, RetryPolicy(hedge=True))
+
+        result = await service._inner_get_chat_message_contents(
+            ChatHistory(), settings)
+
+        assert result == ["answer"]
+        assert inner._inner_get_chat_message_contents.await_count == 1
+        assert service.latency_tracker._samples
+
+    @pytest.mark.asyncio
+    async def test_streaming_retries_before_first_chunk(
+            self, inner, settings, no_sleep):
+        attempts = []
+
+        async def streaming(chat_history, settings, function_invoke_attempt):
+            attempts.append(1)
+            if len(attempts) == 1:
+                raise make_status_error(502)
+            yield ["Hello"]
+            yield [" world"]
+
+        inner._inner_get_streaming_chat_message_contents = streaming
+        service = RetryingChatCompletion(inner, RetryPolicy())
+
+        result = [
+            messages async for messages in
+            service._inner_get_streaming_chat_message_contents(
+                ChatHistory(), settings)
+        ]
+
+        assert result == [["Hello"], [" world"]]
+        assert len(attempts) == 2
+
+    @pytest.mark.asyncio
+    async def test_streaming_does_not_retry_after_first_chunk(
+            self, inner, settings, no_sleep):
+        attempts = []
+
+        async def streaming(chat_history, settings, function_invoke_attempt):
+            attempts.append(1)
+            yield ["Hello"]
+            raise make_status_error(502)
+
+        inner._inner_get_streaming_chat_message_contents = streaming
+        service = RetryingChatCompletion(inner, RetryPolicy())
+
+        result = []
+        with pytest.raises(openai.APIStatusError):
+            async for messages in service._inner_get_streaming_chat_message_contents(
+                    ChatHistory(), settings):
+                result.append(messages)
+
+        assert result == [["Hello"]]
+        assert len(attempts) == 1
+
+    @pytest.mark.asyncio
+    async def test_hedged_stream_takes_first_chunk_and_closes_loser(
+            self, inner, settings):
+        closed = []
+
+        async def streaming(chat_history, settings, function_invoke_attempt):
+            index = len(closed)
+            closed.append(False)
+            try:
+                if index == 0:
+                    await asyncio.sleep(10)
+                yield [f"stream-{index}"]
+            finally:
+                closed[index] = True
+
+        inner._inner_get_streaming_chat_message_contents = streaming
+        service = RetryingChatCompletion(inner, RetryPolicy(hedge=True))
+        fill_latencies(service, 0.01)
+
+        result = [
+            messages async for messages in
+            service._inner_get_streaming_chat_message_contents(
+                ChatHistory(), settings)
+        ]
+        await asyncio.sleep(0)
+
+        assert result == [["stream-1"]]
+        assert closed == [True, True]
+
+    @pytest.mark.asyncio
+    async def test_deadline_bounds_stream_after_first_chunk(
+            self, inner, settings):
+        closed = []
+
+        async def streaming(chat_history, settings, function_invoke_attempt):
+            try:
+                yield ["Hello"]
+                await asyncio.sleep(10)
+                yield [" world"]
+            finally:
+                closed.append(True)
+
+        inner._inner_get_streaming_chat_message_contents = streaming
+        service = RetryingChatCompletion(inner, RetryPolicy(deadline=0.05))
+
+        result = []
+        with pytest.raises(DeadlineExceededError):
+            async for messages in service._inner_get_streaming_chat_message_contents(
+                    ChatHistory(), settings):
+                result.append(messages)
+
+        assert result == [["Hello"]]
+        assert closed == [True]
+
+    @pytest.mark.asyncio
+    async def test_hedged_stream_hands_back_rate_limit_headers(
+            self, inner, settings):
+        seen = []
+
+        async def streaming(chat_history, settings, function_invoke_attempt):
+            index = len(seen)
+            seen.append(None)
+            last_rate_limit_headers.set(None)
+            if index == 0:
+                await asyncio.sleep(10)
+            # Set by the response hook of the winning request
+            last_rate_limit_headers.set({"x-ratelimit-remaining-tokens": "7"})
+            yield ["Hello"]
+            yield [" world"]
+            # Read like RateLimitedChatCompletion does after the stream
+            seen[index] = last_rate_limit_headers.get()
+
+        inner._inner_get_streaming_chat_message_contents = streaming
+        service = RetryingChatCompletion(inner, RetryPolicy(hedge=True))
+        fill_latencies(service, 0.01)
+
+        result = [
+            messages async for messages in
+            service._inner_get_streaming_chat_message_contents(
+                ChatHistory(), settings)
+        ]
+
+        assert result == [["Hello"], [" world"]]
+        assert seen[1] == {"x-ratelimit-remaining-tokens": "7"}
+        assert last_rate_limit_headers.get() == {
+            "x-ratelimit-remaining-tokens": "7"
+        }
+
+    @pytest.mark.asyncio
+    async def test_hedged_request_hands_back_rate_limit_headers(
+            self, inner, settings):
+        calls = []
+
+        async def request(chat_history, settings):
+            calls.append(1)
+            if len(calls) == 1:
+                await asyncio.sleep(10)
+            last_rate_limit_headers.set({"x-ratelimit-remaining-requests": "3"})
+            return ["fast"]
+
+        inner._inner_get_chat_message_contents = request
+        service = RetryingChatCompletion(inner, RetryPolicy(hedge=True))
+        fill_latencies(service, 0.01)
+
+        await service._inner_get_chat_message_contents(ChatHistory(), settings)
+
+        assert last_rate_limit_headers.get() == {
+            "x-ratelimit-remaining-requests": "3"
+        }
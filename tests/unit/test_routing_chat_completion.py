@@ -0,0 +1,183 @@
+import httpx
+import openai
+import pytest
+from unittest.mock import AsyncMock, MagicMock, patch
+
+from semantic_kernel.connectors.ai.open_ai.prompt_execution_settings.open_ai_prompt_execution_settings import (
+    OpenAIChatPromptExecutionSettings, )
+from semantic_kernel.contents.chat_history import ChatHistory
+
+from promptflow_tool_semantic_kernel.tools.routing_chat_completion import Backend, RoutingChatCompletion
+
+
+def make_service(name):
+    service = MagicMock()
+    service.ai_model_id = name
+    service.service_id = name
+    service.get_prompt_execution_settings_class.return_value = OpenAIChatPromptExecutionSettings
+    return service
+
+
+def make_status_error(status_code, headers=None):
+    request = httpx.Request("POST", "https://test.openai.azure.com")
+    response = httpx.Response(status_code,
+                              headers=headers or {},
+                              request=request)
+    return openai.APIStatusError("error", response=response, body=None)
+
+
+class TestRoutingChatCompletion:
+
+    @pytest.fixture
+    def settings(self):
+        return OpenAIChatPromptExecutionSettings()
+
+    def test_requires_backends(self):
+        with pytest.raises(ValueError):
+            RoutingChatCompletion([])
+
+    def test_rejects_unknown_strategy(self):
+        with pytest.raises(ValueError):
+            RoutingChatCompletion([Backend(make_service("a"))],
+                                  strategy="random")
+
+    def test_least_loaded_prefers_idle_and_heavier_backends(self):
+        busy = Backend(make_service("busy"))
+        idle = Backend(make_service("idle"))
+        heavy = Backend(make_service("heavy"), weight=3)
+        busy.in_flight = 2
+        idle.in_flight = 1
+        heavy.in_flight = 1
+        router = RoutingChatCompletion([busy, idle, heavy])
+
+        assert [b.name for b in router._ranked_backends()
+               ] == ["heavy", "idle", "busy"]
+
+    def test_lowest_latency_strategy(self):
+        slow = Backend(make_service("slow"))
+        fast = Backend(make_service("fast"))
+        slow.record_success(2.0)
+        fast.record_success(0.5)
+        router = RoutingChatCompletion([slow, fast],
+                                       strategy="lowest_latency")
+
+        assert router._ranked_backends()[0].name == "fast"
+
+    def test_cooling_down_backends_go_last(self):
+        first = Backend(make_service("first"), weight=10)
+        second = Backend(make_service("second"))
+        first.record_failure(retry_after=60)
+        router = RoutingChatCompletion([first, second])
+
+        assert [b.name for b in router._ranked_backends()
+               ] == ["second", "first"]
+
+    @pytest.mark.asyncio
+    async def test_fails_over_on_429(self, settings):
+        first = make_service("first")
+        second = make_service("second")
+        response = MagicMock()
+        first._inner_get_chat_message_contents = AsyncMock(
+            side_effect=make_status_error(429, {"retry-after": "30"}))
+        second._inner_get_chat_message_contents = AsyncMock(
+            return_value=[response])
+        router = RoutingChatCompletion(
+            [Backend(first, weight=2), Backend(second)])
+
+        result = await router._inner_get_chat_message_contents(
+            ChatHistory(), settings)
+
+        assert result == [response]
+        stats = {s["name"]: s for s in router.backend_stats()}
+        assert stats["first"]["failures"] == 1
+        assert stats["first"]["health"] < 1.0
+        assert stats["second"]["successes"] == 1
+        assert router.backends[0].cooldown_until > 0
+        assert all(s["in_flight"] == 0 for s in stats.values())
+
+    @pytest.mark.asyncio
+    async def test_non_retriable_error_is_raised(self, settings):
+        first = make_service("first")
+        second = make_service("second")
+        first._inner_get_chat_message_contents = AsyncMock(
+            side_effect=make_status_error(400))
+        second._inner_get_chat_message_contents = AsyncMock()
+        router = RoutingChatCompletion(
+            [Backend(first, weight=2), Backend(second)])
+
+        with pytest.raises(openai.APIStatusError):
+            await router._inner_get_chat_message_contents(
+                ChatHistory(), settings)
+
+        second._inner_get_chat_message_contents.assert_not_called()
+        assert router.backends[0].failures == 0
+
+    @pytest.mark.asyncio
+    async def test_all_backends_failing_raises_last_error(self, settings):
+        first = make_service("first")
+        second = make_service("second")
+        first._inner_get_chat_message_contents = AsyncMock(
+            side_effect=make_status_error(503))
+        second._inner_get_chat_message_contents = AsyncMock(
+            side_effect=make_status_error(500))
+        router = RoutingChatCompletion(
+            [Backend(first, weight=2), Backend(second)])
+
+        with pytest.raises(openai.APIStatusError) as error:
+            await router._inner_get_chat_message_contents(
+                ChatHistory(), settings)
+
+        assert error.value.status_code == 500
+
+    @pytest.mark.asyncio
+    async def test_streaming_fails_over_before_first_chunk(self, settings):
+        first = make_service("first")
+        second = make_service("second")
+
+        async def failing(chat_history, settings, function_invoke_attempt):
+            raise make_status_error(503)
+            yield
+
+        async def streaming(chat_history, settings, function_invoke_attempt):
+            for content in ["Hello", " world"]:
+                yield [content]
+
+        first._inner_get_streaming_chat_message_contents = failing
+        second._inner_get_streaming_chat_message_contents = streaming
+        router = RoutingChatCompletion(
+            [Backend(first, weight=2), Backend(second)])
+
+        result = [
+            messages async for messages in
+            router._inner_get_streaming_chat_message_contents(
+                ChatHistory(), settings)
+        ]
+
+        assert result == [["Hello"], [" world"]]
+        assert router.backends[0].failures == 1
+        assert router.backends[1].latency is not None
+
+    @pytest.mark.asyncio
+    async def test_streaming_does_not_fail_over_after_first_chunk(
+            self, settings):
+        first = make_service("first")
+        second = make_service("second")
+
+        async def broken(chat_history, settings, function_invoke_attempt):
+            yield ["Hello"]
+            raise make_status_error(503)
+
+        first._inner_get_streaming_chat_message_contents = broken
+        second._inner_get_streaming_chat_message_contents = MagicMock()
+        router = RoutingChatCompletion(
+            [Backend(first, weight=2), Backend(second)])
+
+        result = []
+        with pytest.raises(openai.APIStatusError):
+            async for messages in router._inner_get_streaming_chat_message_contents(
+                    ChatHistory(), settings):
+                result.append(messages)
+
+        assert result == [["Hello"]]
+        second._inner_get_streaming_chat_message_contents.assert_not_called()
+        assert router.backends[0].in_flight == 0
@@ -1,12 +1,14 @@
 import promptflow_tool_semantic_kernel.tools.semantic_kernel_tool as semantic_kernel_tool
 from promptflow.connections import CustomConnection
 from dotenv import load_dotenv
+import asyncio
 import os
 import pytest
 from unittest.mock import AsyncMock, MagicMock, patch
 import logging
 from unittest.mock import patch
 from promptflow.contracts.types import PromptTemplate
+from promptflow_tool_semantic_kernel.tools.response_cache import ResponseCache
 from semantic_kernel.connectors.ai.open_ai.services.azure_chat_completion import AzureChatCompletion
 from semantic_kernel.connectors.ai.open_ai.services.open_ai_chat_completion import OpenAIChatCompletion
 
@@ -179,3 +181,141 @@ async def test_chat_history_processing(mock_build_history, mock_create_kernel,
         # Assertions
         assert response[0] == "Streaming response"
         mock_build_history.assert_called_once()
+
+
+@pytest.mark.asyncio
+@patch(
+    "promptflow_tool_semantic_kernel.tools.kernel_factory.KernelFactory.create_kernel"
+)
+@patch(
+    "promptflow_tool_semantic_kernel.tools.response_strategy.ResponseStrategy.get_streaming_response"
+)
+async def test_cached_responses_are_replayed(mock_get_streaming,
+                                             mock_create_kernel,
+                                             mock_connection,
+                                             mock_chat_history, mock_prompt):
+    mock_create_kernel.return_value = (MagicMock(), MagicMock())
+
+    async def mock_streaming_gen():
+        yield "Streaming"
+        yield " response"
+
+    mock_get_streaming.side_effect = lambda *args: mock_streaming_gen()
+    ResponseCache.clear_shared()
+
+    try:
+        responses = []
+        for _ in range(2):
+            result = semantic_kernel_tool.semantic_kernel_chat(
+                connection=mock_connection,
+                deployment_name="test-deployment",
+                chat_history=mock_chat_history,
+                prompt=mock_prompt,
+                plugins=[],
+                streaming=True,
+                cache_responses=True,
+                topic="AI")
+            responses.append([r async for r in result])
+
+        assert responses[0] == responses[1] == ["Streaming", " response"]
+        assert ResponseCache.shared().stats()["hits"] == 1
+    finally:
+        ResponseCache.clear_shared()
+
+
+@pytest.mark.asyncio
+@patch(
+    "promptflow_tool_semantic_kernel.tools.kernel_factory.KernelFactory.create_kernel"
+)
+@patch(
+    "promptflow_tool_semantic_kernel.tools.response_strategy.ResponseStrategy.get_complete_response"
+)
+async def test_concurrent_requests_are_coalesced(mock_get_response,
+                                                 mock_create_kernel,
+                                                 mock_connection,
+                                                 mock_chat_history,
+                                                 mock_prompt):
+    mock_create_kernel.return_value = (MagicMock(), MagicMock())
+    calls = []
+
+    async def mock_response(*args):
+        calls.append(1)
+        await asyncio.sleep(0.01)
+        return "Test response"
+
+    mock_get_response.side_effect = mock_response
+
+    async def chat():
+        result = semantic_kernel_tool.semantic_kernel_chat(
+            connection=mock_connection,
+            deployment_name="test-deployment",
+            chat_history=mock_chat_history,
+            prompt=mock_prompt,
+            plugins=[],
+            streaming=False,
+            coalesce_requests=True,
+            topic="AI")
+        return [r async for r in result]
+
+    responses = await asyncio.gather(chat(), chat(), chat())
+
+    assert responses == [["Test response"]] * 3
+    assert len(calls) == 1
+
+
+@patch(
+    "promptflow_tool_semantic_kernel.tools.response_strategy.ResponseStrategy.get_complete_response"
+)
+def test_services_are_reused_within_a_loop_only(mock_get_response,
+                                                mock_chat_history,
+                                                mock_prompt):
+    from promptflow_tool_semantic_kernel.tools.kernel_factory import KernelFactory
+
+    connection = CustomConnection(secrets={"api_key": "test_api_key"},
+                                  configs={
+                                      "api_type": "azure",
+                                      "base_url":
+                                      "https://test.openai.azure.com/"
+                                  })
+    mock_get_response.return_value = "Test response"
+
+    async def chat():
+        result = semantic_kernel_tool.semantic_kernel_chat(
+            connection=connection,
+            deployment_name="test-deployment",
+            chat_history=mock_chat_history,
+            prompt=mock_prompt,
+            plugins=[],
+            streaming=False,
+            topic="AI")
+        return [r async for r in result]
+
+    async def two_chats():
+        return [await chat(), await chat()]
+
+    pool = KernelFactory.service_pool
+    pool.clear()
+    KernelFactory.http_client_pool.clear()
+
+    def counts(before):
+        stats = pool.stats()
+        return stats["hits"] - before["hits"], stats["misses"] - before[
+            "misses"]
+
+    try:
+        before = pool.stats()
+        # promptflow runs each line in its own asyncio.run, the service and
+        # HTTP client of the first line died with its loop
+        asyncio.run(chat())
+        asyncio.run(chat())
+
+        assert counts(before) == (0, 2)
+
+        # An async server runs every request on one loop
+        before = pool.stats()
+        asyncio.run(two_chats())
+
+        assert counts(before) == (1, 1)
+    finally:
+        pool.clear()
+        KernelFactory.http_client_pool.clear()
@@ -0,0 +1,177 @@
+import asyncio
+import threading
+from unittest.mock import AsyncMock, MagicMock, patch
+
+import pytest
+
+from promptflow_tool_semantic_kernel.tools.service_pool import ServicePool
+
+
+def use(pool, key, factory):
+    """Get a service for one request and release it again"""
+    service = pool.get_or_create(key, factory)
+    pool.release(service)
+    return service
+
+
+class TestServicePool:
+
+    @pytest.fixture
+    def close_callback(self):
+        return MagicMock()
+
+    @pytest.fixture
+    def pool(self, close_callback):
+        return ServicePool(max_size=2,
+                           idle_ttl=60.0,
+                           close_callback=close_callback)
+
+    def test_get_or_create_counts_hits_and_misses(self, pool):
+        factory = MagicMock(side_effect=lambda: object())
+
+        first = pool.get_or_create("a", factory)
+        second = pool.get_or_create("a", factory)
+
+        assert first is second
+        factory.assert_called_once()
+        assert pool.stats() == {
+            "hits": 1,
+            "misses": 1,
+            "evictions": 0,
+            "size": 1
+        }
+
+    def test_lru_eviction_closes_least_recently_used(self, pool,
+                                                     close_callback):
+        service_a = use(pool, "a", lambda: "service-a")
+        use(pool, "b", lambda: "service-b")
+        # Touch "a" so "b" becomes the least recently used entry
+        use(pool, "a", lambda: "unused")
+        use(pool, "c", lambda: "service-c")
+
+        close_callback.assert_called_once_with("service-b")
+        assert use(pool, "a", lambda: "unused") == service_a
+        assert pool.stats()["evictions"] == 1
+
+    def test_idle_ttl_eviction(self, pool, close_callback):
+        with patch(
+                'promptflow_tool_semantic_kernel.tools.service_pool.time.monotonic'
+        ) as mock_monotonic:
+            mock_monotonic.return_value = 100.0
+            use(pool, "a", lambda: "service-a")
+
+            mock_monotonic.return_value = 161.0
+            service = use(pool, "a", lambda: "fresh-a")
+
+        assert service == "fresh-a"
+        close_callback.assert_called_once_with("service-a")
+
+    def test_clear_closes_all_services(self, pool, close_callback):
+        pool.get_or_create("a", lambda: "service-a")
+        pool.get_or_create("b", lambda: "service-b")
+
+        pool.clear()
+
+        assert close_callback.call_count == 2
+        assert pool.stats()["size"] == 0
+
+    def test_failing_close_callback_is_logged(self, close_callback):
+        close_callback.side_effect = Exception("close failed")
+        pool = ServicePool(max_size=1, close_callback=close_callback)
+
+        with patch(
+                'promptflow_tool_semantic_kernel.tools.logger_factory.LoggerFactory.create_logger'
+        ) as mock_logger_factory:
+            mock_logger = MagicMock()
+            mock_logger_factory.return_value = mock_logger
+            use(pool, "a", lambda: "service-a")
+            use(pool, "b", lambda: "service-b")
+
+        mock_logger.warning.assert_called_once_with(
+            "Failed to close pooled service: close failed")
+
+    def test_concurrent_creation_keeps_single_service(self, close_callback):
+        pool = ServicePool(close_callback=close_callback)
+        barrier = threading.Barrier(4)
+        results = []
+
+        def factory():
+            return object()
+
+        def worker():
+            barrier.wait()
+            results.append(pool.get_or_create("a", factory))
+
+        threads = [threading.Thread(target=worker) for _ in range(4)]
+        for thread in threads:
+            thread.start()
+        for thread in threads:
+            thread.join()
+
+        assert all(result is results[0] for result in results)
+        assert pool.stats()["size"] == 1
+
+    def test_eviction_waits_for_release(self, pool, close_callback):
+        service_a = pool.get_or_create("a", lambda: "service-a")
+        use(pool, "b", lambda: "service-b")
+        use(pool, "c", lambda: "service-c")
+
+        close_callback.assert_not_called()
+
+        pool.release(service_a)
+
+        close_callback.assert_called_once_with("service-a")
+
+    def test_services_of_closed_loops_are_not_reused(self, close_callback):
+        pool = ServicePool(close_callback=close_callback)
+        created = []
+
+        def factory():
+            created.append(object())
+            return created[-1]
+
+        async def request():
+            return use(pool, "a", factory)
+
+        services = [asyncio.run(request()) for _ in range(20)]
+
+        assert len(set(map(id, services))) == len(created) == 20
+        assert pool.stats()["hits"] == 0
+        assert pool.stats()["size"] == 1
+        # Their clients cannot be closed without their loop
+        close_callback.assert_not_called()
+
+    @pytest.mark.asyncio
+    async def test_shared_within_a_loop(self, pool):
+        first = use(pool, "a", object)
+
+        assert use(pool, "a", object) is first
+
+    def test_fingerprint_hides_secrets(self):
+        key = ServicePool.fingerprint("OpenAIConnection", "secret-key", "gpt")
+
+        assert key == ServicePool.fingerprint("OpenAIConnection",
+                                              "secret-key", "gpt")
+        assert "secret-key" not in key
+
+    @pytest.mark.asyncio
+    async def test_close_service_schedules_async_close(self):
+        service = MagicMock()
+        service.client.close = AsyncMock()
+
+        ServicePool.close_service(service)
+        await asyncio.sleep(0)
+
+        service.client.close.assert_awaited_once()
+
+    def test_close_service_without_running_loop(self):
+        service = MagicMock()
+        service.client.close = AsyncMock()
+
+        ServicePool.close_service(service)
+
+        service.client.close.assert_awaited_once()
+
+    def test_close_service_without_client(self):
+        # Services without a client, e.g. Google AI, are simply skipped
+        ServicePool.close_service(object())
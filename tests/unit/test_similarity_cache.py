@@ -0,0 +1,193 @@
+import time
+
+import pytest
+
+from semantic_kernel.connectors.ai.open_ai.prompt_execution_settings.open_ai_prompt_execution_settings import (
+    OpenAIChatPromptExecutionSettings, )
+from semantic_kernel.contents.chat_history import ChatHistory
+
+from promptflow_tool_semantic_kernel.tools.lights_plugin import LightsPlugin
+from promptflow_tool_semantic_kernel.tools.response_cache import CachedResponse
+from promptflow_tool_semantic_kernel.tools.similarity_cache import SimilarityCache, SimilarityKey
+
+
+class Clock:
+
+    def __init__(self):
+        self.now = 1000.0
+
+    def __call__(self):
+        return self.now
+
+
+def make_history(question, system="You control the lights.", previous=None):
+    history = ChatHistory()
+    history.add_system_message(system)
+    if previous:
+        history.add_assistant_message(previous)
+    history.add_user_message(question)
+    return history
+
+
+def make_key(question, threshold=0.8, **kwargs):
+    return SimilarityCache.request_key("gpt-4o",
+                                       make_history(question, **kwargs),
+                                       OpenAIChatPromptExecutionSettings(),
+                                       "plugins", threshold)
+
+
+def make_lights_key(question, threshold=0.8):
+    return SimilarityCache.request_key("gpt-4o", make_history(question),
+                                       OpenAIChatPromptExecutionSettings(),
+                                       "plugins", threshold,
+                                       LightsPlugin.similar_words,
+                                       LightsPlugin.opposite_words)
+
+
+def make_response(answer, created=None):
+    return CachedResponse([answer], "", created or time.time())
+
+
+class TestSimilarityCache:
+
+    def test_matches_rephrased_question(self):
+        cache = SimilarityCache(verify_rate=0)
+        cache.put(make_key("turn on all lights"), make_response("Done"))
+        cache.put(make_key("what is the weather in Berlin"),
+                  make_response("Sunny"))
+
+        assert cache.get(make_key("Turn on all the lights!")).content == "Done"
+        assert cache.get(
+            make_key("What's the weather in Berlin?")).content == "Sunny"
+        assert cache.get(make_key("weather in Paris")) is None
+
+    def test_threshold(self):
+        cache = SimilarityCache(verify_rate=0)
+        cache.put(make_key("turn on all lights"), make_response("Done"))
+
+        assert cache.get(make_key("turn on kitchen lights")) is None
+        assert cache.get(make_key("turn on kitchen lights",
+                                  threshold=0.7)).content == "Done"
+
+    def test_synonyms_match_and_opposites_do_not(self):
+        cache = SimilarityCache(verify_rate=0)
+        cache.put(make_lights_key("turn on all lights"), make_response("On"))
+
+        assert cache.get(
+            make_lights_key("switch all the lights on")).content == "On"
+        assert cache.get(make_lights_key("turn off all lights",
+                                         threshold=0.1)) is None
+
+        cache.put(make_lights_key("turn off all lights"),
+                  make_response("Off"))
+
+        assert cache.get(
+            make_lights_key("switch all the lamps off",
+                            threshold=0.1)).content == "Off"
+
+    def test_knows_no_words_of_its_own(self):
+        cache = SimilarityCache(verify_rate=0)
+        cache.put(make_key("turn on all lights"), make_response("On"))
+
+        assert cache.get(make_key("switch all the lights on")) is None
+        assert cache.get(make_key("turn off all lights",
+                                  threshold=0.1)).content == "On"
+
+    def test_scopes(self):
+        cache = SimilarityCache()
+        cache.put(make_key("turn on all lights"), make_response("Done"))
+
+        assert cache.get(
+            make_key("turn on all lights", system="Be brief.")) is None
+        assert cache.get(
+            make_key("turn on all lights", previous="Which room?")) is None
+        assert cache.get(
+            SimilarityCache.request_key("gpt-4o-mini",
+                                        make_history("turn on all lights"),
+                                        OpenAIChatPromptExecutionSettings(),
+                                        "plugins", 0.8)) is None
+        assert cache.get(
+            SimilarityCache.request_key("gpt-4o",
+                                        make_history("turn on all lights"),
+                                        OpenAIChatPromptExecutionSettings(),
+                                        "other plugins", 0.8)) is None
+
+    def test_ignores_questions_without_terms(self):
+        cache = SimilarityCache()
+        cache.put(make_key("?"), make_response("What?"))
+
+        assert cache.get(make_key("?")) is None
+        assert cache.stats()["entries"] == 0
+
+    def test_expires_and_limits_entries(self):
+        clock = Clock()
+        cache = SimilarityCache(max_entries=2,
+                                ttl=60,
+                                verify_rate=0,
+                                clock=clock)
+        for question in ("red lights", "green lights", "blue lights"):
+            cache.put(make_key(question), make_response(question,
+                                                        clock.now))
+
+        assert cache.get(make_key("red lights")) is None
+        assert cache.get(make_key("blue lights")).content == "blue lights"
+
+        clock.now += 60
+
+        assert cache.get(make_key("blue lights")) is None
+        assert cache.stats()["entries"] == 0
+
+    @pytest.mark.asyncio
+    async def test_counts_false_positives(self):
+        cache = SimilarityCache(verify_rate=1.0)
+        cache.put(make_key("turn on all lights"), make_response("Done"))
+
+        async def answer(text):
+            return text
+
+        history = make_history("Turn on all the lights")
+        result = await cache.complete(make_key("Turn on all the lights"),
+                                      answer("All lights are on"), history)
+
+        assert result == "All lights are on"
+        stats = cache.stats()
+        assert stats["verified"] == 1
+        assert stats["false_positives"] == 1
+        assert stats["hits"] == 0
+
+    @pytest.mark.asyncio
+    async def test_replays_similar_answer(self):
+        cache = SimilarityCache(verify_rate=0)
+        requests = []
+
+        async def answer(text):
+            requests.append(text)
+            yield text
+
+        for question in ("turn on all lights", "Turn on all the lights!"):
+            history = make_history(question)
+            chunks = [
+                chunk async for chunk in cache.stream(make_key(question),
+                                                      answer("Done"),
+                                                      history)
+            ]
+            assert chunks == ["Done"]
+
+        assert len(requests) == 1
+        assert cache.stats()["hits"] == 1
+
+    def test_verifies_a_share_of_hits_by_default(self):
+        samples = iter([0.01, 0.5])
+        cache = SimilarityCache(sample=lambda: next(samples))
+        cache.put(make_key("turn on all lights"), make_response("Done"))
+
+        assert cache.get(make_key("turn on all lights")) is None
+        assert cache.get(make_key("turn on all lights")).content == "Done"
+        assert cache.stats()["verified"] == 1
+
+    def test_key_keeps_question(self):
+        key = make_key("turn on all lights")
+
+        assert isinstance(key, SimilarityKey)
+        assert key.question == "turn on all lights"
+        assert key.scope == make_key("turn off all lights").scope
@@ -0,0 +1,328 @@
+import asyncio
+import threading
+import time
+
+import pytest
+
+from semantic_kernel.contents.chat_history import ChatHistory
+from semantic_kernel.contents.chat_message_content import ChatMessageContent
+from semantic_kernel.contents.function_call_content import FunctionCallContent
+from semantic_kernel.contents.utils.author_role import AuthorRole
+
+from promptflow_tool_semantic_kernel.tools.response_processor import HistoryObserver, ResponseProcessor
+from promptflow_tool_semantic_kernel.tools.single_flight import SingleFlight
+
+
+@pytest.fixture(autouse=True)
+def clear_flights():
+    SingleFlight.clear()
+    yield
+    SingleFlight.clear()
+
+
+class Upstream:
+    """Streams chunks when released, counting the calls"""
+
+    def __init__(self, chunks=("a", "b", "c")):
+        self.chunks = chunks
+        self.calls = 0
+        self.cancelled = False
+        self.released = asyncio.Event()
+
+    async def stream(self, history=None):
+        self.calls += 1
+        try:
+            for index, chunk in enumerate(self.chunks):
+                if index == 1:
+                    await self.released.wait()
+                yield chunk
+        except asyncio.CancelledError:
+            self.cancelled = True
+            raise
+
+    async def complete(self, history=None):
+        self.calls += 1
+        await self.released.wait()
+        if history is not None:
+            history.add_message(
+                ChatMessageContent(role=AuthorRole.ASSISTANT,
+                                   items=[
+                                       FunctionCallContent(
+                                           id="1",
+                                           name="lights-get_lights",
+                                           arguments="{}")
+                                   ]))
+        return "".join(self.chunks)
+
+
+async def collect(generator):
+    return [chunk async for chunk in generator]
+
+
+class TestSingleFlight:
+
+    @pytest.mark.asyncio
+    async def test_shares_one_stream(self):
+        upstream = Upstream()
+        tasks = [
+            asyncio.ensure_future(
+                collect(
+                    SingleFlight.stream("key", upstream.stream(),
+                                        ChatHistory()))) for _ in range(5)
+        ]
+        await asyncio.sleep(0)
+        upstream.released.set()
+
+        results = await asyncio.gather(*tasks)
+
+        assert results == [["a", "b", "c"]] * 5
+        assert upstream.calls == 1
+        assert SingleFlight.stats() == {
+            "in_flight": 0,
+            "started": 1,
+            "coalesced": 4
+        }
+
+    @pytest.mark.asyncio
+    async def test_late_joiner_gets_buffered_prefix(self):
+        upstream = Upstream()
+        first = SingleFlight.stream("key", upstream.stream(), ChatHistory())
+        assert await first.__anext__() == "a"
+
+        late = asyncio.ensure_future(
+            collect(
+                SingleFlight.stream("key", upstream.stream(), ChatHistory())))
+        await asyncio.sleep(0)
+        upstream.released.set()
+
+        assert [chunk async for chunk in first] == ["b", "c"]
+        assert await late == ["a", "b", "c"]
+        assert upstream.calls == 1
+
+    @pytest.mark.asyncio
+    async def test_disconnect_keeps_others_subscribed(self):
+        upstream = Upstream()
+        first = SingleFlight.stream("key", upstream.stream(), ChatHistory())
+        assert await first.__anext__() == "a"
+        other = asyncio.ensure_future(
+            collect(
+                SingleFlight.stream("key", upstream.stream(), ChatHistory())))
+        await asyncio.sleep(0)
+
+        await first.aclose()
+        upstream.released.set()
+
+        assert await other == ["a", "b", "c"]
+        assert not upstream.cancelled
+
+    @pytest.mark.asyncio
+    async def test_cancels_call_without_subscribers(self):
+        upstream = Upstream()
+        subscriber = asyncio.ensure_future(
+            collect(
+                SingleFlight.stream("key", upstream.stream(), ChatHistory())))
+        await asyncio.sleep(0.01)
+
+        subscriber.cancel()
+        with pytest.raises(asyncio.CancelledError):
+            await subscriber
+        await asyncio.sleep(0)
+
+        assert upstream.cancelled
+        assert SingleFlight.stats()["in_flight"] == 0
+
+    @pytest.mark.asyncio
+    async def test_different_keys_are_separate_calls(self):
+        upstream = Upstream()
+        upstream.released.set()
+
+        await asyncio.gather(
+            collect(SingleFlight.stream("a", upstream.stream(),
+                                        ChatHistory())),
+            collect(SingleFlight.stream("b", upstream.stream(),
+                                        ChatHistory())))
+
+        assert upstream.calls == 2
+
+    @pytest.mark.asyncio
+    async def test_shares_complete_response_and_tool_messages(self):
+        upstream = Upstream()
+        histories = [ChatHistory() for _ in range(3)]
+        tasks = [
+            asyncio.ensure_future(
+                SingleFlight.complete("key", upstream.complete(history),
+                                      history)) for history in histories
+        ]
+        await asyncio.sleep(0)
+        upstream.released.set()
+
+        assert await asyncio.gather(*tasks) == ["abc"] * 3
+        assert upstream.calls == 1
+        assert [len(history.messages) for history in histories] == [1, 1, 1]
+
+    @pytest.mark.asyncio
+    async def test_streams_tool_messages_to_every_client(self):
+        released = asyncio.Event()
+
+        async def upstream(history):
+            history.add_message(
+                ChatMessageContent(role=AuthorRole.ASSISTANT,
+                                   items=[
+                                       FunctionCallContent(
+                                           id="1",
+                                           name="lights-get_lights",
+                                           arguments="{}")
+                                   ]))
+            yield "a"
+            await released.wait()
+            yield "b"
+
+        async def client():
+            history = ChatHistory()
+            processor = ResponseProcessor(HistoryObserver(history))
+            return [
+                output async for output in processor.process(
+                    SingleFlight.stream("key", upstream(history), history))
+            ], history
+
+        leader = asyncio.ensure_future(client())
+        await asyncio.sleep(0.01)
+        follower = asyncio.ensure_future(client())
+        await asyncio.sleep(0.01)
+        released.set()
+
+        for outputs, history in await asyncio.gather(leader, follower):
+            assert len(outputs) == 3
+            assert "lights-get_lights" in outputs[0]
+            assert outputs[1:] == ["a", "b"]
+            assert len(history.messages) == 1
+        assert SingleFlight.stats()["coalesced"] == 1
+
+    @pytest.mark.asyncio
+    async def test_errors_reach_every_subscriber(self):
+
+        async def failing():
+            await asyncio.sleep(0)
+            raise ValueError("upstream failed")
+
+        tasks = [
+            asyncio.ensure_future(
+                SingleFlight.complete("key", failing(), ChatHistory()))
+            for _ in range(2)
+        ]
+
+        results = await asyncio.gather(*tasks, return_exceptions=True)
+
+        assert [str(result) for result in results] == ["upstream failed"] * 2
+        assert all(isinstance(result, ValueError) for result in results)
+        assert results[0] is not results[1]
+        assert results[0].__cause__ is results[1].__cause__
+
+
+def wait_for_subscribers(count):
+    deadline = time.monotonic() + 5
+    while SingleFlight.stats()["coalesced"] < count:
+        assert time.monotonic() < deadline
+        time.sleep(0.01)
+
+
+class TestAcrossLoops:
+    """Each request in its own thread and asyncio.run, like promptflow"""
+
+    def test_shares_one_stream(self):
+        release = threading.Event()
+        calls = []
+
+        async def upstream():
+            calls.append(1)
+            yield "a"
+            await asyncio.to_thread(release.wait)
+            yield "b"
+
+        results = []
+
+        def request():
+            results.append(
+                asyncio.run(
+                    collect(
+                        SingleFlight.stream("key", upstream(),
+                                            ChatHistory()))))
+
+        threads = [threading.Thread(target=request) for _ in range(3)]
+        for thread in threads:
+            thread.start()
+        wait_for_subscribers(2)
+        release.set()
+        for thread in threads:
+            thread.join(5)
+
+        assert results == [["a", "b"]] * 3
+        assert len(calls) == 1
+        assert SingleFlight.stats()["in_flight"] == 0
+
+    def test_shares_complete_response(self):
+        release = threading.Event()
+        calls = []
+
+        async def upstream():
+            calls.append(1)
+            await asyncio.to_thread(release.wait)
+            return "abc"
+
+        results = []
+
+        def request():
+            results.append(
+                asyncio.run(
+                    SingleFlight.complete("key", upstream(), ChatHistory())))
+
+        threads = [threading.Thread(target=request) for _ in range(3)]
+        for thread in threads:
+            thread.start()
+        wait_for_subscribers(2)
+        release.set()
+        for thread in threads:
+            thread.join(5)
+
+        assert results == ["abc"] * 3
+        assert len(calls) == 1
+
+    def test_others_fail_when_the_first_loop_shuts_down(self):
+        received = threading.Event()
+        leave = threading.Event()
+
+        async def upstream():
+            yield "a"
+            await asyncio.sleep(10)
+            yield "b"
+
+        async def first():
+            stream = SingleFlight.stream("key", upstream(), ChatHistory())
+            await stream.__anext__()
+            received.set()
+            await asyncio.to_thread(leave.wait)
+            await stream.aclose()
+
+        leader = threading.Thread(target=lambda: asyncio.run(first()))
+        leader.start()
+        received.wait(5)
+        errors = []
+
+        def other():
+            try:
+                asyncio.run(
+                    collect(
+                        SingleFlight.stream("key", upstream(),
+                                            ChatHistory())))
+            except RuntimeError as e:
+                errors.append(e)
+
+        thread = threading.Thread(target=other)
+        thread.start()
+        wait_for_subscribers(1)
+        leave.set()
+        leader.join(5)
+        thread.join(5)
+
+        assert [str(error) for error in errors
+                ] == ["The shared request was cancelled"]
@@ -0,0 +1,86 @@
+import logging
+import time
+
+import pytest
+from jinja2 import Template
+from jinja2.exceptions import SecurityError
+
+from promptflow_tool_semantic_kernel.tools.template_cache import TemplateCache
+
+
+@pytest.fixture(autouse=True)
+def clear_cache():
+    TemplateCache.clear()
+    yield
+    TemplateCache.clear()
+
+
+class TestTemplateCache:
+
+    def test_renders_like_template(self):
+        source = "{% if name %}\nHello {{ name }}\n{% endif %}\n"
+
+        assert TemplateCache.render(source, name="Ada") == Template(
+            source, trim_blocks=True,
+            keep_trailing_newline=True).render(name="Ada")
+
+    def test_compiles_once(self):
+        first = TemplateCache.get("Hello {{ name }}")
+        second = TemplateCache.get("Hello {{ name }}")
+
+        assert first is second
+        assert TemplateCache.stats() == {
+            "templates": 1,
+            "hits": 1,
+            "misses": 1
+        }
+
+    def test_evicts_least_recently_used(self, monkeypatch):
+        monkeypatch.setattr(TemplateCache, "MAX_SIZE", 2)
+        TemplateCache.get("a")
+        TemplateCache.get("b")
+        TemplateCache.get("a")
+        TemplateCache.get("c")
+
+        TemplateCache.get("a")
+
+        assert TemplateCache.stats()["templates"] == 2
+        assert TemplateCache.stats()["hits"] == 2
+
+    def test_sandboxed(self):
+        with pytest.raises(SecurityError):
+            TemplateCache.render(
+                "{{ ''.__class__.__mro__[1].__subclasses__() }}")
+
+
+class TestTemplateCacheBenchmark:
+
+    def test_large_template(self):
+        source = "# system:\nYou are a helpful assistant.\n" + "".join(
+            f"{{% if items_{i} %}}\n{{% for item in items_{i} %}}\n"
+            f"- {{{{ item.name }}}}: {{{{ item.value | default('none') }}}}\n"
+            f"{{% endfor %}}\n{{% endif %}}\n" for i in range(200))
+        kwargs = {
+            f"items_{i}": [{
+                "name": "a",
+                "value": i
+            }]
+            for i in range(0, 200, 10)
+        }
+        rounds = 20
+
+        def measure(render):
+            start = time.perf_counter()
+            for _ in range(rounds):
+                render()
+            return (time.perf_counter() - start) / rounds
+
+        uncached = measure(lambda: Template(
+            source, trim_blocks=True, keep_trailing_newline=True).render(
+                **kwargs))
+        cached = measure(lambda: TemplateCache.render(source, **kwargs))
+
+        logging.getLogger(__name__).info(
+            f"{len(source)} characters: {uncached * 1e3:.3f}ms uncompiled, "
+            f"{cached * 1e3:.3f}ms cached per render")
+        assert cached < uncached
@@ -0,0 +1,69 @@
+from semantic_kernel.contents.chat_message_content import ChatMessageContent
+from semantic_kernel.contents.function_call_content import FunctionCallContent
+from semantic_kernel.contents.utils.author_role import AuthorRole
+
+from promptflow_tool_semantic_kernel.tools.token_estimator import TokenEstimator
+
+
+class TestTokenEstimator:
+
+    def test_estimates_from_length(self):
+        estimator = TokenEstimator()
+
+        assert estimator.estimate_text("a" * 40) == 10
+        assert estimator.estimate_text(None) == 0
+        assert estimator.estimate_message(
+            ChatMessageContent(role=AuthorRole.USER,
+                               content="a" * 40)) == 14
+
+    def test_counts_tool_calls(self):
+        estimator = TokenEstimator()
+        message = ChatMessageContent(
+            role=AuthorRole.ASSISTANT,
+            items=[
+                FunctionCallContent(id="1",
+                                    name="lights-get_lights",
+                                    arguments='{"all": true}')
+            ])
+
+        assert estimator.estimate_message(message) > 4
+
+    def test_counts_tool_definitions(self):
+        estimator = TokenEstimator()
+
+        class Settings:
+            tools = [{"type": "function", "function": {"name": "x" * 100}}]
+
+        assert estimator.estimate_request([], Settings()) > 25
+
+    def test_calibrates_towards_reported_usage(self):
+        estimator = TokenEstimator("gpt-4o")
+
+        for _ in range(30):
+            estimated = estimator.estimate_text("a" * 400)
+            estimator.observe(estimated, 150)
+
+        assert 145 <= estimator.estimate_text("a" * 400) <= 155
+        assert estimator.observations == 30
+
+    def test_ignores_empty_observations(self):
+        estimator = TokenEstimator()
+        estimator.observe(0, 100)
+        estimator.observe(100, 0)
+
+        assert estimator.factor == 1.0
+
+    def test_factor_is_bounded(self):
+        estimator = TokenEstimator()
+        for _ in range(100):
+            estimator.observe(1, 1000)
+
+        assert estimator.factor == TokenEstimator.MAX_FACTOR
+
+    def test_one_estimator_per_model(self):
+        TokenEstimator.clear_registry()
+
+        assert TokenEstimator.for_model("a") is TokenEstimator.for_model("a")
+        assert TokenEstimator.for_model("a") is not TokenEstimator.for_model(
+            "b")
+        TokenEstimator.clear_registry()
@@ -0,0 +1,155 @@
+import asyncio
+import time
+
+import pytest
+from semantic_kernel import Kernel
+from semantic_kernel.contents.chat_history import ChatHistory
+from semantic_kernel.contents.function_call_content import FunctionCallContent
+from semantic_kernel.contents.function_result_content import FunctionResultContent
+from semantic_kernel.functions import kernel_function
+
+from promptflow_tool_semantic_kernel.tools.tool_call_executor import FatalToolCallError, ToolCallExecutor
+
+
+class SlowPlugin:
+
+    def __init__(self):
+        self.running = 0
+        self.max_running = 0
+        self.cancelled = []
+
+    @kernel_function(name="wait", description="Waits")
+    async def wait(self, seconds: float) -> str:
+        self.running += 1
+        self.max_running = max(self.max_running, self.running)
+        try:
+            await asyncio.sleep(seconds)
+        except asyncio.CancelledError:
+            self.cancelled.append(seconds)
+            raise
+        finally:
+            self.running -= 1
+        return f"waited {seconds}"
+
+    @kernel_function(name="fail", description="Fails for good")
+    async def fail(self) -> str:
+        raise FatalToolCallError("device offline")
+
+
+async def run_turn(kernel, calls):
+    """Invoke the tool calls of one turn like Semantic Kernel does"""
+    history = ChatHistory()
+    await asyncio.gather(*[
+        kernel.invoke_function_call(function_call=FunctionCallContent(
+            id=str(index),
+            name=f"slow-{name}",
+            arguments=arguments),
+                                    chat_history=history,
+                                    function_call_count=len(calls),
+                                    request_index=0)
+        for index, (name, arguments) in enumerate(calls)
+    ])
+    results = {}
+    for message in history.messages:
+        for item in message.items:
+            if isinstance(item, FunctionResultContent):
+                results[item.id] = str(item.result)
+    return [results[str(index)] for index in range(len(calls))]
+
+
+@pytest.fixture
+def plugin():
+    return SlowPlugin()
+
+
+def make_kernel(plugin, executor):
+    kernel = Kernel()
+    kernel.add_plugin(plugin, plugin_name="slow")
+    executor.install(kernel)
+    return kernel
+
+
+class TestToolCallExecutor:
+
+    @pytest.mark.asyncio
+    async def test_runs_calls_concurrently(self, plugin):
+        kernel = make_kernel(plugin, ToolCallExecutor())
+
+        start = time.monotonic()
+        results = await run_turn(kernel, [("wait", '{"seconds": 0.1}')] * 5)
+
+        assert results == ["waited 0.1"] * 5
+        assert plugin.max_running == 5
+        assert time.monotonic() - start < 0.4
+
+    @pytest.mark.asyncio
+    async def test_caps_concurrency(self, plugin):
+        kernel = make_kernel(plugin, ToolCallExecutor(max_concurrency=2))
+
+        await run_turn(kernel, [("wait", '{"seconds": 0.02}')] * 5)
+
+        assert plugin.max_running == 2
+
+    @pytest.mark.asyncio
+    async def test_limits_requests_separately(self, plugin):
+        kernels = [
+            make_kernel(plugin, ToolCallExecutor(max_concurrency=2)),
+            make_kernel(plugin, ToolCallExecutor(max_concurrency=2))
+        ]
+
+        await asyncio.gather(*(run_turn(kernel,
+                                        [("wait", '{"seconds": 0.02}')] * 3)
+                               for kernel in kernels))
+
+        assert plugin.max_running == 4
+
+    @pytest.mark.asyncio
+    async def test_caps_concurrency_of_all_requests(self, plugin,
+                                                    monkeypatch):
+        monkeypatch.setenv("TOOL_CALL_MAX_CONCURRENCY", "3")
+        kernels = [
+            make_kernel(plugin, ToolCallExecutor(max_concurrency=2)),
+            make_kernel(plugin, ToolCallExecutor(max_concurrency=4))
+        ]
+
+        await asyncio.gather(*(run_turn(kernel,
+                                        [("wait", '{"seconds": 0.02}')] * 4)
+                               for kernel in kernels))
+
+        assert plugin.max_running == 3
+
+    @pytest.mark.asyncio
+    async def test_times_out_slow_calls(self, plugin):
+        kernel = make_kernel(
+            plugin, ToolCallExecutor(timeouts={"slow-wait": 0.05}))
+
+        results = await run_turn(kernel, [("wait", '{"seconds": 0.01}'),
+                                          ("wait", '{"seconds": 5}')])
+
+        assert results[0] == "waited 0.01"
+        assert "timed out after 0.05s" in results[1]
+        assert plugin.cancelled == [5]
+
+    @pytest.mark.asyncio
+    async def test_fatal_error_cancels_siblings(self, plugin):
+        kernel = make_kernel(plugin, ToolCallExecutor())
+
+        results = await run_turn(kernel, [("wait", '{"seconds": 5}'),
+                                          ("fail", "{}")])
+
+        assert results[0] == "Cancelled because slow-fail failed"
+        assert "device offline" in results[1]
+        assert plugin.cancelled == [5]
+
+    def test_timeouts_from_plugins(self):
+        timeouts = ToolCallExecutor.timeouts_from_plugins([{
+            "name": "lights",
+            "timeout": "10",
+            "function_timeouts": {
+                "change_state": 2
+            }
+        }, {
+            "name": "weather"
+        }, None])
+
+        assert timeouts == {"lights": 10.0, "lights-change_state": 2.0}
@@ -0,0 +1,57 @@
+import pytest
+from unittest.mock import MagicMock
+
+from openai.types import CompletionUsage
+from openai.types.completion_usage import PromptTokensDetails
+from semantic_kernel.contents.chat_message_content import ChatMessageContent
+from semantic_kernel.contents.utils.author_role import AuthorRole
+
+from promptflow_tool_semantic_kernel.tools.usage_tracker import UsageTracker
+
+
+@pytest.fixture(autouse=True)
+def clear_tracker():
+    UsageTracker.clear()
+    yield
+    UsageTracker.clear()
+
+
+class TestUsageTracker:
+
+    def test_reads_cached_tokens_of_raw_response(self):
+        message = ChatMessageContent(role=AuthorRole.ASSISTANT, content="ok")
+        message.inner_content = MagicMock(usage=CompletionUsage(
+            prompt_tokens=2000,
+            completion_tokens=10,
+            total_tokens=2010,
+            prompt_tokens_details=PromptTokensDetails(cached_tokens=1536)))
+
+        assert UsageTracker.usage_of(message) == (2000, 1536, 10)
+
+    def test_falls_back_to_metadata(self):
+        message = ChatMessageContent(
+            role=AuthorRole.ASSISTANT,
+            content="ok",
+            metadata={
+                "usage":
+                CompletionUsage(prompt_tokens=20,
+                                completion_tokens=5,
+                                total_tokens=25)
+            })
+
+        assert UsageTracker.usage_of(message) == (20, 0, 5)
+
+    def test_without_usage(self):
+        message = ChatMessageContent(role=AuthorRole.ASSISTANT, content="ok")
+
+        assert UsageTracker.usage_of(message) is None
+
+    def test_stats(self):
+        UsageTracker.record("gpt-4o", 2000, 1536, 10)
+        UsageTracker.record("gpt-4o", 2000, 0, 10)
+
+        stats = UsageTracker.stats()["gpt-4o"]
+        assert stats["requests"] == 2
+        assert stats["prompt_tokens"] == 4000
+        assert stats["cached_tokens"] == 1536
+        assert stats["cache_hit_rate"] == pytest.approx(0.384)
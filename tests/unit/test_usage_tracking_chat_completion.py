@@ -0,0 +1,76 @@
+import pytest
+from unittest.mock import AsyncMock, MagicMock
+
+from openai.types import CompletionUsage
+from openai.types.completion_usage import PromptTokensDetails
+from semantic_kernel.connectors.ai.open_ai.prompt_execution_settings.open_ai_prompt_execution_settings import (
+    OpenAIChatPromptExecutionSettings, )
+from semantic_kernel.contents.chat_history import ChatHistory
+from semantic_kernel.contents.chat_message_content import ChatMessageContent
+from semantic_kernel.contents.utils.author_role import AuthorRole
+
+from promptflow_tool_semantic_kernel.tools.usage_tracker import UsageTracker
+from promptflow_tool_semantic_kernel.tools.usage_tracking_chat_completion import UsageTrackingChatCompletion
+
+
+def make_response(cached_tokens=None):
+    message = ChatMessageContent(role=AuthorRole.ASSISTANT, content="ok")
+    if cached_tokens is not None:
+        message.inner_content = MagicMock(usage=CompletionUsage(
+            prompt_tokens=1200,
+            completion_tokens=3,
+            total_tokens=1203,
+            prompt_tokens_details=PromptTokensDetails(
+                cached_tokens=cached_tokens)))
+    return message
+
+
+@pytest.fixture(autouse=True)
+def clear_tracker():
+    UsageTracker.clear()
+    yield
+    UsageTracker.clear()
+
+
+class TestUsageTrackingChatCompletion:
+
+    @pytest.mark.asyncio
+    async def test_records_usage(self):
+        inner = MagicMock()
+        inner._inner_get_chat_message_contents = AsyncMock(
+            return_value=[make_response(1024)])
+        service = UsageTrackingChatCompletion(inner,
+                                              "gpt-4o",
+                                              ai_model_id="gpt-4o",
+                                              service_id="gpt-4o")
+
+        result = await service._inner_get_chat_message_contents(
+            ChatHistory(), OpenAIChatPromptExecutionSettings())
+
+        assert result[0].content == "ok"
+        assert UsageTracker.stats()["gpt-4o"]["cached_tokens"] == 1024
+
+    @pytest.mark.asyncio
+    async def test_records_usage_of_streams_once(self):
+        inner = MagicMock()
+
+        async def stream(chat_history, settings, function_invoke_attempt):
+            yield [make_response()]
+            yield [make_response(0), make_response(0)]
+
+        inner._inner_get_streaming_chat_message_contents = stream
+        service = UsageTrackingChatCompletion(inner,
+                                              "gpt-4o",
+                                              ai_model_id="gpt-4o",
+                                              service_id="gpt-4o")
+
+        chunks = [
+            chunk async for chunk in
+            service._inner_get_streaming_chat_message_contents(
+                ChatHistory(), OpenAIChatPromptExecutionSettings())
+        ]
+
+        assert len(chunks) == 2
+        stats = UsageTracker.stats()["gpt-4o"]
+        assert stats["requests"] == 1
+        assert stats["prompt_tokens"] == 1200